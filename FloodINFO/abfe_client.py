@@ -6,14 +6,23 @@ Client for querying ABFE data and generating map snapshots showing
 Advisory Base Flood Elevation information.
 """
 
-import requests
 import json
+import os
 import time
 import math
+import contextvars
+import concurrent.futures
 from typing import Dict, Any, Optional, Tuple, List
 from dataclasses import dataclass
 from datetime import datetime
 
+from upstream_http import UpstreamSession
+from print_cache import print_fingerprint, cached_output_url, remember_output_url, read_output
+from service_metadata import get_metadata_registry
+
+# Concurrent layer queries per ABFE point query
+ABFE_QUERY_WORKERS = int(os.getenv("ABFE_QUERY_WORKERS", "6"))
+
 
 @dataclass
 class ABFEData:
@@ -46,7 +55,7 @@ class FEMAABFEClient:
         self.abfe_service_url = "https://hazards.geoplatform.gov/server/rest/services/Region2/Advisory_Base_Flood_Elevation__ABFE__Data/MapServer"
         self.printing_service_url = "https://utility.arcgisonline.com/arcgis/rest/services/Utilities/PrintingTools/GPServer/Export%20Web%20Map%20Task/execute"
         
-        self.session = requests.Session()
+        self.session = UpstreamSession()
         self.session.headers.update({
             'User-Agent': 'ABFE-Client/1.0'
         })
@@ -55,14 +64,17 @@ class FEMAABFEClient:
         self._service_info = None
         self._layers_info = None
     
+    def _fetch_service_info(self) -> Dict[str, Any]:
+        response = self.session.get(f"{self.abfe_service_url}?f=json", timeout=30)
+        response.raise_for_status()
+        return response.json()
+
     def get_service_info(self) -> Dict[str, Any]:
-        """Get ABFE service information and layer details"""
+        """Get ABFE service information and layer details (cached across clients)"""
         
         if self._service_info is None:
             try:
-                response = self.session.get(f"{self.abfe_service_url}?f=json", timeout=30)
-                response.raise_for_status()
-                self._service_info = response.json()
+                self._service_info = get_metadata_registry().get(self.abfe_service_url, self._fetch_service_info)
                 
                 # Also get layers information
                 self._layers_info = self._service_info.get('layers', [])
@@ -112,20 +124,22 @@ class FEMAABFEClient:
             'summary': {
                 'total_layers_queried': 0,
                 'layers_with_data': 0,
+                'layers_failed': 0,
                 'abfe_values': []
             }
         }
         
         print(f"📊 Found {len(layers_info)} layers in ABFE service")
         
-        # Query each layer for data
-        for layer in layers_info:
+        # Query all layers concurrently (per-host limits apply through the shared session)
+        layer_results = self._query_layers_at_point(layers_info, longitude, latitude)
+        
+        for layer, layer_data in zip(layers_info, layer_results):
             layer_id = layer.get('id')
             layer_name = layer.get('name', f'Layer {layer_id}')
             
-            print(f"\n  🔍 Querying Layer {layer_id}: {layer_name}")
+            print(f"\n  🔍 Layer {layer_id}: {layer_name}")
             
-            layer_data = self._query_layer_at_point(layer_id, longitude, latitude)
             results['layers'][layer_id] = {
                 'layer_name': layer_name,
                 'layer_id': layer_id,
@@ -134,6 +148,8 @@ class FEMAABFEClient:
             }
             
             results['summary']['total_layers_queried'] += 1
+            if not layer_data.get('query_successful'):
+                results['summary']['layers_failed'] += 1
             
             if layer_data.get('has_data'):
                 results['summary']['layers_with_data'] += 1
@@ -160,11 +176,27 @@ class FEMAABFEClient:
                                 continue
                 
                 print(f"    ✅ {layer_data['feature_count']} feature(s) found")
+            elif not layer_data.get('query_successful'):
+                print(f"    ⚠️  Query failed: {layer_data.get('error')}")
             else:
                 print(f"    ❌ No data found")
         
         return results
     
+    def _query_layers_at_point(self, layers_info: List[Dict[str, Any]], longitude: float, latitude: float) -> List[Dict[str, Any]]:
+        """Query every layer at the point concurrently, returning results in layer order"""
+        
+        if len(layers_info) <= 1:
+            return [self._query_layer_at_point(layer.get('id'), longitude, latitude) for layer in layers_info]
+        
+        workers = min(len(layers_info), ABFE_QUERY_WORKERS)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._query_layer_at_point, layer.get('id'), longitude, latitude)
+                for layer in layers_info
+            ]
+            return [future.result() for future in futures]
+    
     def _query_layer_at_point(self, layer_id: int, longitude: float, latitude: float) -> Dict[str, Any]:
         """Query a specific ABFE layer at given coordinates"""
         
@@ -188,6 +220,9 @@ class FEMAABFEClient:
             response = self.session.get(f"{self.abfe_service_url}/{layer_id}/query", params=query_params, timeout=15)
             response.raise_for_status()
             data = response.json()
+            if 'error' in data:
+                # ArcGIS reports query errors with HTTP 200
+                raise RuntimeError(data['error'].get('message', 'query failed'))
             
             features = data.get('features', [])
             
@@ -423,6 +458,13 @@ class FEMAABFEClient:
             print(f"📐 Output format: {arcgis_format}")
             print(f"📏 Output size: {output_size[0]}x{output_size[1]} at {dpi} DPI")
             
+            # Reuse an identical earlier rendering from the print output cache
+            print_key = print_fingerprint(self.printing_service_url, web_map, layout_template, arcgis_format)
+            cached_url = cached_output_url(print_key)
+            if cached_url:
+                print(f"♻️  Reusing cached ABFE map rendering")
+                return True, cached_url, json.dumps({"cached": True})
+            
             print(f"📤 Submitting map export request...")
             
             # Submit the export request
@@ -438,6 +480,7 @@ class FEMAABFEClient:
                     if map_url:
                         print(f"✅ ABFE map generated successfully!")
                         print(f"📄 Map URL: {map_url}")
+                        remember_output_url(print_key, map_url)
                         return True, map_url, json.dumps(result)
             
             return False, f"Map generation failed: {result}", json.dumps(result)
@@ -463,11 +506,10 @@ class FEMAABFEClient:
             filename = f"abfe_map_{timestamp}.pdf"
         
         try:
-            response = self.session.get(download_url, timeout=60)
-            response.raise_for_status()
+            content = read_output(self.session, download_url, timeout=60)
             
             with open(filename, 'wb') as f:
-                f.write(response.content)
+                f.write(content)
             
             print(f"ABFE map downloaded successfully: {filename}")
             return True
@@ -535,16 +577,22 @@ class FEMAABFEClient:
         
         # Query ABFE data
         abfe_results = self.query_abfe_at_point(longitude, latitude)
+        counts = abfe_results['summary']
         
         summary = {
             'location': location_name or f"({longitude}, {latitude})",
             'coordinates': (longitude, latitude),
             'query_time': datetime.now().isoformat(),
             'abfe_data_available': abfe_results['abfe_data_found'],
+            # True only when every layer was queried successfully and none had data;
+            # a failed service or layer query leaves the question open
+            'abfe_data_absent': (counts['total_layers_queried'] > 0 and counts['layers_failed'] == 0
+                                 and not abfe_results['abfe_data_found']),
             'service_info': abfe_results['service_info'],
             'layers_summary': {
                 'total_layers': abfe_results['summary']['total_layers_queried'],
                 'layers_with_data': abfe_results['summary']['layers_with_data'],
+                'layers_failed': abfe_results['summary']['layers_failed'],
                 'abfe_values_found': len(abfe_results['summary']['abfe_values'])
             },
             'abfe_values': abfe_results['summary']['abfe_values'],
@@ -559,6 +607,12 @@ class FEMAABFEClient:
                 "Use ABFE data for planning and risk assessment purposes",
                 "Verify with local authorities for regulatory requirements"
             ])
+        elif not summary['abfe_data_absent']:
+            summary['recommendations'].extend([
+                "ABFE service could not be fully queried for this location",
+                "Review the ABFE map or retry the query before concluding no ABFE data applies",
+                "Check FEMA's current effective flood maps for regulatory BFE"
+            ])
         else:
             summary['recommendations'].extend([
                 "No ABFE data found for this specific location",
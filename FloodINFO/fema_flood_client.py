@@ -6,11 +6,12 @@ Client for accessing FEMA flood data services including NFHL, Preliminary FIRM,
 and MapSearch services.
 """
 
-import requests
 import json
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 
+from upstream_http import UpstreamSession
+
 
 @dataclass
 class FloodZone:
@@ -55,7 +56,7 @@ class FEMAFloodClient:
             'cslf_preliminary': f"{self.base_url}/CSLF/Prelim_CSLF/MapServer"
         }
         
-        self.session = requests.Session()
+        self.session = UpstreamSession()
         self.session.headers.update({
             'User-Agent': 'FEMA-Flood-Client/1.0'
         })
@@ -6,7 +6,6 @@ Client for generating FEMA FIRMette (Flood Insurance Rate Map) reports
 using FEMA's Map Service Center.
 """
 
-import requests
 import json
 import time
 import math
@@ -14,6 +13,10 @@ from typing import Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
+from upstream_http import UpstreamSession
+from print_cache import print_fingerprint, cached_output_url, remember_output_url, read_output
+from screening_tracing import span
+
 
 @dataclass
 class FIRMetteRequest:
@@ -45,7 +48,7 @@ class FEMAFIRMetteClient:
     def __init__(self):
         self.base_url = "https://msc.fema.gov/arcgis/rest/services"
         self.print_service_url = f"{self.base_url}/NFHL_Print/AGOLPrintB/GPServer/Print%20FIRM%20or%20FIRMette"
-        self.session = requests.Session()
+        self.session = UpstreamSession()
         self.session.headers.update({
             'User-Agent': 'FIRMette-Client/1.0',
             'Content-Type': 'application/x-www-form-urlencoded'
@@ -110,6 +113,14 @@ class FEMAFIRMetteClient:
                 'graphic': 'PDF'
             }
             
+            # Reuse an identical earlier FIRMette from the print output cache
+            print_key = print_fingerprint(submit_url, feature_class, params['Print_Type'], params['graphic'],
+                                          out_sr=params['env:outSR'])
+            cached_url = cached_output_url(print_key)
+            if cached_url:
+                print(f"♻️  Reusing cached FIRMette")
+                return True, cached_url, "cached"
+            
             print(f"📤 Submitting FIRMette job to: {submit_url}")
             
             # Submit the job
@@ -129,9 +140,11 @@ class FEMAFIRMetteClient:
                         print(f"✅ FIRMette job submitted successfully. Job ID: {job_id}")
                         
                         # Poll for completion
-                        pdf_url = self._poll_firmette_job(job_id)
+                        with span("print job FIRMette", kind="print_job", job_id=job_id):
+                            pdf_url = self._poll_firmette_job(job_id)
                         
                         if pdf_url:
+                            remember_output_url(print_key, pdf_url)
                             return True, pdf_url, job_id
                         else:
                             return False, "Job completed but no PDF URL found", job_id
@@ -145,6 +158,7 @@ class FEMAFIRMetteClient:
                         
                         if pdf_url:
                             print(f"📄 PDF URL extracted: {pdf_url}")
+                            remember_output_url(print_key, pdf_url)
                             return True, pdf_url, job_id
                         else:
                             return False, "Job succeeded but could not extract PDF URL", job_id
@@ -320,11 +334,10 @@ class FEMAFIRMetteClient:
             filename = f"firmette_{timestamp}.pdf"
         
         try:
-            response = self.session.get(download_url, timeout=60)
-            response.raise_for_status()
+            content = read_output(self.session, download_url, timeout=60)
             
             with open(filename, 'wb') as f:
-                f.write(response.content)
+                f.write(content)
             
             print(f"FIRMette downloaded successfully: {filename}")
             return True
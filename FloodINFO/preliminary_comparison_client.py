@@ -6,7 +6,6 @@ Client for generating FEMA Preliminary Comparison reports that compare
 current effective flood data with preliminary flood data.
 """
 
-import requests
 import json
 import time
 import math
@@ -14,6 +13,9 @@ from typing import Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
+from upstream_http import UpstreamSession
+from screening_tracing import span
+
 
 @dataclass
 class PreliminaryComparisonRequest:
@@ -43,7 +45,7 @@ class FEMAPreliminaryComparisonClient:
     def __init__(self):
         self.base_url = "https://msc.fema.gov/arcgis/rest/services"
         self.service_url = f"{self.base_url}/PreliminaryComparisonTool/PreliminaryComparisonToolB/GPServer/Preliminary%20Comparison%20Tool"
-        self.session = requests.Session()
+        self.session = UpstreamSession()
         self.session.headers.update({
             'User-Agent': 'PreliminaryComparison-Client/1.0',
             'Content-Type': 'application/x-www-form-urlencoded'
@@ -159,7 +161,8 @@ class FEMAPreliminaryComparisonClient:
                         print(f"✅ Job submitted successfully. Job ID: {job_id}")
                         
                         # Poll for completion
-                        pdf_url = self._poll_comparison_job(job_id)
+                        with span("print job Preliminary Comparison", kind="print_job", job_id=job_id):
+                            pdf_url = self._poll_comparison_job(job_id)
                         
                         if pdf_url:
                             return True, pdf_url, job_id
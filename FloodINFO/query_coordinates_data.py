@@ -14,11 +14,15 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from fema_flood_client import FEMAFloodClient
-import requests
+
 import json
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+from upstream_http import shared_session
+
+http = shared_session()
+
 def query_coordinate_data(longitude: float, latitude: float, location_name: str = None) -> Dict[str, Any]:
     """
     Query all available data for specific coordinates
@@ -207,9 +211,12 @@ def query_layer_at_coordinate(service_url: str, layer_id: int, longitude: float,
             'returnGeometry': 'true'
         }
         
-        response = requests.get(f"{service_url}/{layer_id}/query", params=query_params, timeout=15)
+        response = http.get(f"{service_url}/{layer_id}/query", params=query_params, timeout=15)
         response.raise_for_status()
         data = response.json()
+        if 'error' in data:
+            # ArcGIS reports query errors with HTTP 200
+            raise RuntimeError(data['error'].get('message', 'query failed'))
         
         features = data.get('features', [])
         
@@ -231,6 +238,24 @@ def query_layer_at_coordinate(service_url: str, layer_id: int, longitude: float,
             'error': str(e)
         }
 
+def preliminary_data_availability(results: Dict[str, Any]) -> Optional[bool]:
+    """
+    Whether preliminary FIRM data exists at the queried point
+    
+    Reads the 'Preliminary Data Availability' layer (layer 0 of the Preliminary
+    FIRM service) from query_coordinate_data() results.
+    
+    Returns:
+        True or False when the availability layer was queried successfully,
+        None when the answer is unknown (service not queried or query failed)
+    """
+    
+    service = results.get('services', {}).get('Preliminary FIRM', {})
+    availability = service.get('layers', {}).get(0)
+    if not availability or not availability.get('query_successful'):
+        return None
+    return bool(availability.get('has_data'))
+
 def generate_summary_report(results: Dict[str, Any]):
     """Generate a summary report of all findings"""
     
@@ -12,6 +12,7 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import requests
+
 import json
 import time
 from datetime import datetime
@@ -20,6 +21,9 @@ import logging
 import math
 from io import BytesIO
 
+from upstream_http import UpstreamSession
+from print_cache import print_fingerprint, cached_output_url, remember_output_url, read_output
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -67,7 +71,7 @@ class CriticalHabitatMapGenerator:
             }
         }
         
-        self.session = requests.Session()
+        self.session = UpstreamSession()
         self.session.headers.update({
             'User-Agent': 'CriticalHabitatMapGenerator/1.0',
             'Accept': 'application/json',
@@ -157,6 +161,13 @@ class CriticalHabitatMapGenerator:
             json.dump(web_map_json, f, indent=2)
         print(f"🔍 Debug: Web Map JSON saved to {debug_filename}")
         
+        # Reuse an identical earlier rendering from the print output cache
+        print_key = print_fingerprint(self.printing_service_url, web_map_json, layout_template, "PDF")
+        cached_url = cached_output_url(print_key)
+        if cached_url:
+            print("♻️  Reusing cached map rendering")
+            return self._download_pdf(cached_url, output_filename)
+        
         # Submit the export request
         print("\n📤 Submitting map export request...")
         
@@ -188,6 +199,7 @@ class CriticalHabitatMapGenerator:
                 return None
             
             print("✅ Map generated successfully!")
+            remember_output_url(print_key, result_url)
             print(f"📄 Map URL: {result_url}")
             
             # Download the PDF
@@ -442,8 +454,7 @@ class CriticalHabitatMapGenerator:
         """Download the PDF from the result URL"""
         
         try:
-            response = self.session.get(result_url, timeout=60)
-            response.raise_for_status()
+            content = read_output(self.session, result_url, timeout=60)
             
             # Generate filename if not provided
             if output_filename is None:
@@ -467,7 +478,7 @@ class CriticalHabitatMapGenerator:
             
             # Save the PDF
             with open(output_path, 'wb') as f:
-                f.write(response.content)
+                f.write(content)
             
             return output_path
             
@@ -7,7 +7,6 @@ It can determine if a location intersects with critical habitat areas and provid
 detailed information about threatened and endangered species habitats.
 """
 
-import requests
 import json
 import logging
 from typing import Dict, List, Any, Optional, Tuple
@@ -15,6 +14,8 @@ from dataclasses import dataclass
 from datetime import datetime
 import time
 
+from upstream_http import UpstreamSession
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -47,7 +48,7 @@ class CriticalHabitatClient:
     """Client for accessing USFWS Critical Habitat services"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = UpstreamSession()
         self.session.headers.update({
             'User-Agent': 'CriticalHabitatClient/1.0'
         })
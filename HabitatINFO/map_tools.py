@@ -11,7 +11,7 @@ import os
 from typing import Type, Dict, Any, Optional, List
 from pydantic import BaseModel, Field
 from langchain.tools import BaseTool, tool
-import requests
+
 import math
 from datetime import datetime
 
@@ -22,6 +22,7 @@ from .habitat_client import CriticalHabitatClient
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from output_directory_manager import get_output_manager
+from upstream_http import UpstreamSession
 
 logger = logging.getLogger(__name__)
 
@@ -128,7 +129,7 @@ def find_nearest_critical_habitat(longitude: float, latitude: float, search_radi
     """Find the nearest critical habitat area to a given location"""
     
     habitat_service_url = "https://services.arcgis.com/QVENGdaPbd4LUkLV/arcgis/rest/services/USFWS_Critical_Habitat/FeatureServer"
-    session = requests.Session()
+    session = UpstreamSession()
     session.headers.update({'User-Agent': 'CriticalHabitatFinder/1.0'})
     
     # Convert search radius to degrees (approximate)
@@ -727,7 +728,7 @@ def _get_detailed_habitat_info(nearest_habitat: Dict[str, Any]) -> Dict[str, Any
     
     try:
         habitat_service_url = "https://services.arcgis.com/QVENGdaPbd4LUkLV/arcgis/rest/services/USFWS_Critical_Habitat/FeatureServer"
-        session = requests.Session()
+        session = UpstreamSession()
         session.headers.update({'User-Agent': 'CriticalHabitatAnalyzer/1.0'})
         
         # Determine layer based on designation type
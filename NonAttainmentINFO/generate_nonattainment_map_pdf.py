@@ -12,6 +12,7 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import requests
+
 import json
 import time
 from datetime import datetime
@@ -20,6 +21,9 @@ import logging
 import math
 from io import BytesIO
 
+from upstream_http import UpstreamSession
+from print_cache import print_fingerprint, cached_output_url, remember_output_url, read_output
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -147,7 +151,7 @@ class NonAttainmentMapGenerator:
             }
         }
         
-        self.session = requests.Session()
+        self.session = UpstreamSession()
         self.session.headers.update({
             'User-Agent': 'NonAttainmentMapGenerator/1.0',
             'Accept': 'application/json',
@@ -241,11 +245,19 @@ class NonAttainmentMapGenerator:
             json.dump(web_map_json, f, indent=2)
         print(f"🔍 Debug: Web Map JSON saved to {debug_filename}")
         
+        # Reuse an identical earlier rendering from the print output cache (any of the
+        # fallback services may have produced it)
+        print_key = print_fingerprint(self.printing_service_urls[0], web_map_json, layout_template, "PDF")
+        cached_url = cached_output_url(print_key)
+        if cached_url:
+            print("♻️  Reusing cached map rendering")
+            return self._download_pdf(cached_url, output_filename)
+        
         # Submit the export request
         print("\n📤 Submitting map export request...")
         
         # Try multiple printing services
-        pdf_path = self._try_printing_services(export_params, output_filename)
+        pdf_path = self._try_printing_services(export_params, output_filename, print_key)
         
         if pdf_path:
             print(f"\n✅ Nonattainment map PDF saved to: {pdf_path}")
@@ -261,7 +273,8 @@ class NonAttainmentMapGenerator:
         
         return pdf_path
     
-    def _try_printing_services(self, export_params: Dict, output_filename: str = None) -> Optional[str]:
+    def _try_printing_services(self, export_params: Dict, output_filename: str = None,
+                               print_key: Optional[str] = None) -> Optional[str]:
         """Try multiple printing services with fallback"""
         
         for i, service_url in enumerate(self.printing_service_urls):
@@ -314,6 +327,7 @@ class NonAttainmentMapGenerator:
                 
                 print(f"✅ Map generated successfully using {service_name} service!")
                 print(f"📄 Map URL: {result_url}")
+                remember_output_url(print_key, result_url)
                 
                 # Download the PDF
                 print("\n📥 Downloading PDF...")
@@ -699,12 +713,11 @@ class NonAttainmentMapGenerator:
                 output_path = os.path.join('output', output_filename)
             
             # Download the PDF
-            response = self.session.get(result_url, timeout=60)
-            response.raise_for_status()
+            content = read_output(self.session, result_url, timeout=60)
             
             # Save to file
             with open(output_path, 'wb') as f:
-                f.write(response.content)
+                f.write(content)
             
             # Verify file was created and has content
             if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
@@ -717,6 +730,38 @@ class NonAttainmentMapGenerator:
             logger.error(f"Error downloading PDF: {e}")
             return None
     
+    def adaptive_map_settings(self, analysis_result = None) -> Dict[str, Any]:
+        """
+        Choose map settings from analysis results: a detailed view when areas were found,
+        a regional overview otherwise
+        
+        Args:
+            analysis_result: NonAttainmentAnalysisResult object
+            
+        Returns:
+            Dictionary with buffer_miles, base_map, transparency, pollutants and reasoning
+        """
+        
+        if analysis_result and analysis_result.has_nonattainment_areas:
+            # Areas found - use detailed view
+            return {
+                "buffer_miles": 15.0,
+                "base_map": "World_Topo_Map",
+                "transparency": 0.7,
+                # Extract pollutants from results
+                "pollutants": list(set(area.pollutant_name for area in analysis_result.nonattainment_areas)),
+                "reasoning": f"Found {analysis_result.area_count} nonattainment areas - using detailed 15-mile view"
+            }
+        
+        # No areas found - use regional view
+        return {
+            "buffer_miles": 50.0,
+            "base_map": "World_Street_Map",
+            "transparency": 0.8,
+            "pollutants": None,
+            "reasoning": "No nonattainment areas found - using 50-mile regional view"
+        }
+    
     def generate_adaptive_nonattainment_map(self, longitude: float, latitude: float,
                                           location_name: str = None,
                                           analysis_result = None) -> str:
@@ -737,33 +782,18 @@ class NonAttainmentMapGenerator:
             location_name = f"Air Quality Analysis at {latitude:.4f}, {longitude:.4f}"
         
         # Determine adaptive settings based on analysis
-        if analysis_result and analysis_result.has_nonattainment_areas:
-            # Areas found - use detailed view
-            buffer_miles = 15.0
-            base_map = "World_Topo_Map"
-            transparency = 0.7
-            reasoning = f"Found {analysis_result.area_count} nonattainment areas - using detailed 15-mile view"
-            
-            # Extract pollutants from results
-            pollutants = list(set(area.pollutant_name for area in analysis_result.nonattainment_areas))
-        else:
-            # No areas found - use regional view
-            buffer_miles = 50.0
-            base_map = "World_Street_Map"
-            transparency = 0.8
-            reasoning = "No nonattainment areas found - using 50-mile regional view"
-            pollutants = None
+        settings = self.adaptive_map_settings(analysis_result)
         
-        print(f"🎯 Adaptive map settings: {reasoning}")
+        print(f"🎯 Adaptive map settings: {settings['reasoning']}")
         
         return self.generate_nonattainment_map_pdf(
             longitude=longitude,
             latitude=latitude,
             location_name=f"{location_name} - Adaptive Analysis Map",
-            buffer_miles=buffer_miles,
-            base_map=base_map,
-            pollutants=pollutants,
-            nonattainment_transparency=transparency,
+            buffer_miles=settings["buffer_miles"],
+            base_map=settings["base_map"],
+            pollutants=settings["pollutants"],
+            nonattainment_transparency=settings["transparency"],
             include_legend=True
         )
     
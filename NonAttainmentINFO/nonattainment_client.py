@@ -7,7 +7,6 @@ It can determine if a location intersects with nonattainment areas and provide
 detailed information about air quality standards violations.
 """
 
-import requests
 import json
 import logging
 from typing import Dict, List, Any, Optional, Tuple
@@ -15,6 +14,8 @@ from dataclasses import dataclass
 from datetime import datetime
 import time
 
+from upstream_http import UpstreamSession
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -52,7 +53,7 @@ class NonAttainmentAreasClient:
     """Client for accessing EPA Nonattainment Areas services"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = UpstreamSession()
         self.session.headers.update({
             'User-Agent': 'NonAttainmentAreasClient/1.0'
         })
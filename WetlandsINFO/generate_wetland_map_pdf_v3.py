@@ -11,6 +11,7 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import requests
+
 import json
 import time
 from datetime import datetime
@@ -19,9 +20,19 @@ import logging
 import math
 from io import BytesIO
 
+from upstream_http import UpstreamSession
+from print_cache import print_fingerprint, cached_output_url, remember_output_url, read_output
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# "vector" stamps the radius circle onto the print PDF as vector paths; "raster"
+# rasterizes the page, draws the circle and re-encodes it as an image PDF
+CIRCLE_OVERLAY_MODE = os.getenv("CIRCLE_OVERLAY_MODE", "vector")
+
+# Orange, as RGB fractions for PyMuPDF
+CIRCLE_OVERLAY_COLOR = (1.0, 165 / 255, 0.0)
+
 
 class WetlandMapGeneratorV3:
     """Generate professional wetland map PDFs with proper configuration"""
@@ -38,7 +49,7 @@ class WetlandMapGeneratorV3:
             "World_Street_Map": "https://services.arcgisonline.com/ArcGIS/rest/services/World_Street_Map/MapServer"
         }
         
-        self.session = requests.Session()
+        self.session = UpstreamSession()
         self.session.headers.update({
             'User-Agent': 'WetlandMapGenerator/3.0',
             'Accept': 'application/json',
@@ -125,6 +136,13 @@ class WetlandMapGeneratorV3:
             json.dump(web_map_json, f, indent=2)
         print(f"🔍 Debug: Web Map JSON saved to {debug_filename}")
         
+        # Reuse an identical earlier rendering from the print output cache
+        print_key = print_fingerprint(self.printing_service_url, web_map_json, layout_template, "PDF")
+        cached_url = cached_output_url(print_key)
+        if cached_url:
+            print("♻️  Reusing cached map rendering")
+            return self._download_pdf(cached_url, output_filename)
+        
         # Submit the export request
         print("\n📤 Submitting map export request...")
         
@@ -156,6 +174,7 @@ class WetlandMapGeneratorV3:
                 return None
             
             print("✅ Map generated successfully!")
+            remember_output_url(print_key, result_url)
             print(f"📄 Map URL: {result_url}")
             
             # Download the PDF
@@ -970,8 +989,7 @@ class WetlandMapGeneratorV3:
         """Download the PDF from the result URL"""
         
         try:
-            response = self.session.get(result_url, timeout=60)
-            response.raise_for_status()
+            content = read_output(self.session, result_url, timeout=60)
             
             # Generate filename if not provided
             if output_filename is None:
@@ -984,7 +1002,7 @@ class WetlandMapGeneratorV3:
             
             # Save the PDF
             with open(output_path, 'wb') as f:
-                f.write(response.content)
+                f.write(content)
             
             return output_path
             
@@ -1121,38 +1139,47 @@ class WetlandMapGeneratorV3:
             json.dump(web_map_json, f, indent=2)
         print(f"🔍 Debug: Web Map JSON saved to {debug_filename}")
         
+        # Reuse an identical earlier base rendering from the print output cache
+        print_key = print_fingerprint(self.printing_service_url, web_map_json, layout_template, "PDF")
+        result_url = cached_output_url(print_key)
+        
         # Submit the export request
-        print("\n📤 Submitting map export request...")
+        if result_url:
+            print("\n♻️  Reusing cached base map rendering")
+        else:
+            print("\n📤 Submitting map export request...")
         
         try:
-            response = self.session.post(
-                self.printing_service_url, 
-                data=export_params, 
-                timeout=60
-            )
-            response.raise_for_status()
+            if result_url is None:
+                response = self.session.post(
+                    self.printing_service_url, 
+                    data=export_params, 
+                    timeout=60
+                )
+                response.raise_for_status()
             
-            result = response.json()
+                result = response.json()
             
-            # Check for errors
-            if 'error' in result:
-                logger.error(f"Service error: {result['error']}")
-                print(f"🔍 Full error response: {json.dumps(result, indent=2)}")
-                return None
+                # Check for errors
+                if 'error' in result:
+                    logger.error(f"Service error: {result['error']}")
+                    print(f"🔍 Full error response: {json.dumps(result, indent=2)}")
+                    return None
             
-            # Extract result URL
-            result_url = None
-            if 'results' in result and len(result['results']) > 0:
-                output_result = result['results'][0]
-                if 'value' in output_result:
-                    result_url = output_result['value'].get('url')
+                # Extract result URL
+                result_url = None
+                if 'results' in result and len(result['results']) > 0:
+                    output_result = result['results'][0]
+                    if 'value' in output_result:
+                        result_url = output_result['value'].get('url')
             
-            if not result_url:
-                logger.error("No output URL in result")
-                return None
+                if not result_url:
+                    logger.error("No output URL in result")
+                    return None
             
-            print("✅ Base map generated successfully!")
-            print(f"📄 Map URL: {result_url}")
+                print("✅ Base map generated successfully!")
+                print(f"📄 Map URL: {result_url}")
+                remember_output_url(print_key, result_url)
             
             # Download the base PDF
             print("\n📥 Downloading base PDF...")
@@ -1343,6 +1370,140 @@ class WetlandMapGeneratorV3:
                                   radius_miles: float, location_name: str, 
                                   map_buffer_miles: float, output_filename: str) -> Optional[str]:
         """
+        Add circle overlay to a PDF, stamped as vector paths unless CIRCLE_OVERLAY_MODE=raster
+        
+        Args:
+            pdf_path: Path to the base PDF file
+            longitude: Center longitude for circle
+            latitude: Center latitude for circle  
+            radius_miles: Radius of circle in miles
+            location_name: Location name for the map
+            map_buffer_miles: Map buffer used to calculate extent
+            output_filename: Desired output filename
+            
+        Returns:
+            Path to the final PDF with circle overlay, or None if failed
+        """
+        if CIRCLE_OVERLAY_MODE != "raster":
+            try:
+                return self._stamp_circle_overlay_vector(pdf_path, longitude, latitude, radius_miles,
+                                                         map_buffer_miles, output_filename)
+            except ImportError:
+                pass  # The raster path reports the missing PyMuPDF
+            except Exception as e:
+                print(f"⚠️  Vector circle overlay failed ({e}), rasterizing the page instead")
+        return self._add_circle_overlay_raster(pdf_path, longitude, latitude, radius_miles,
+                                               location_name, map_buffer_miles, output_filename)
+    
+    def _stamp_circle_overlay_vector(self, pdf_path: str, longitude: float, latitude: float,
+                                     radius_miles: float, map_buffer_miles: float,
+                                     output_filename: str) -> str:
+        """
+        Draw the radius circle and its legend as native PDF vector paths on the original page
+        
+        The print service's map content stays vector and the file keeps its size;
+        only a few path and text operators are appended to page 0.
+        """
+        import fitz  # PyMuPDF
+        
+        pdf_document = fitz.open(pdf_path)
+        try:
+            if len(pdf_document) == 0:
+                raise ValueError("PDF has no pages")
+            page = pdf_document[0]
+            
+            frame = self._find_map_frame(page)
+            to_page = self._map_to_page_transform(longitude, latitude, map_buffer_miles, frame)
+            
+            circle_points = self._generate_circle_points_precise(longitude, latitude, radius_miles, num_points=144)
+            outline = []
+            for lon, lat in circle_points:
+                x, y = to_page(lon, lat)
+                # Keep the outline inside the map frame, as the raster overlay does
+                outline.append(fitz.Point(min(max(x, frame.x0), frame.x1), min(max(y, frame.y0), frame.y1)))
+            line_width = max(2.0, frame.width * 0.004)
+            
+            shape = page.new_shape()
+            shape.draw_polyline(outline + outline[:1])
+            shape.finish(color=CIRCLE_OVERLAY_COLOR, width=line_width, closePath=True, lineJoin=1)
+            
+            # Legend: white box in the lower-left corner of the map frame
+            label = f"{radius_miles:g} mile radius"
+            font_size = max(8.0, frame.width * 0.012)
+            box = fitz.Rect(frame.x0 + 8, frame.y1 - font_size * 2.4 - 8,
+                            frame.x0 + 8 + font_size * 3.6 + fitz.get_text_length(label, fontsize=font_size),
+                            frame.y1 - 8)
+            shape.draw_rect(box)
+            shape.finish(color=(0, 0, 0), fill=(1, 1, 1), width=0.75, fill_opacity=0.85)
+            swatch_y = box.y0 + box.height / 2
+            shape.draw_line(fitz.Point(box.x0 + font_size * 0.6, swatch_y), fitz.Point(box.x0 + font_size * 2.6, swatch_y))
+            shape.finish(color=CIRCLE_OVERLAY_COLOR, width=line_width)
+            shape.insert_text(fitz.Point(box.x0 + font_size * 3.0, swatch_y + font_size * 0.35), label,
+                              fontsize=font_size, color=(0, 0, 0))
+            shape.commit()
+            
+            final_pdf_path = os.path.join('output', output_filename)
+            pdf_document.save(final_pdf_path, garbage=3, deflate=True)
+        finally:
+            pdf_document.close()
+        
+        print(f"⭕ {radius_miles} mile radius circle stamped as vector paths")
+        print(f"💾 Final PDF with circle saved: {final_pdf_path}")
+        return final_pdf_path
+    
+    @staticmethod
+    def _find_map_frame(page):
+        """
+        Page rectangle of the map frame: the largest image drawn on the page (the basemap
+        the print service rasterized), or the whole page for MAP_ONLY output
+        """
+        page_rect = page.rect
+        frames = [
+            page_rect & info["bbox"] for info in page.get_image_info()
+            if info.get("bbox") is not None
+        ]
+        frames = [frame for frame in frames if not frame.is_empty]
+        if frames:
+            largest = max(frames, key=lambda frame: frame.width * frame.height)
+            if largest.width * largest.height >= 0.25 * page_rect.width * page_rect.height:
+                return largest
+        return page_rect
+    
+    @staticmethod
+    def _map_to_page_transform(longitude: float, latitude: float, map_buffer_miles: float, frame):
+        """
+        Map (lon, lat) to page coordinates for the extent the print request asked for
+        
+        The print service keeps the extent center and grows the extent to the frame's
+        aspect ratio, so the Web Mercator extent is fitted to the frame the same way.
+        """
+        def lonlat_to_merc(lon_deg, lat_deg):
+            R_MAJOR = 6378137.0
+            x = math.radians(lon_deg) * R_MAJOR
+            lat_rad = math.radians(max(min(lat_deg, 89.9), -89.9))
+            y = R_MAJOR * math.log(math.tan(math.pi/4 + lat_rad/2))
+            return x, y
+        
+        buffer_degrees = map_buffer_miles / 69.0
+        minx, miny = lonlat_to_merc(longitude - buffer_degrees, latitude - buffer_degrees)
+        maxx, maxy = lonlat_to_merc(longitude + buffer_degrees, latitude + buffer_degrees)
+        center_x, center_y = (minx + maxx) / 2, (miny + maxy) / 2
+        
+        # Metres per page point, from whichever axis fills the frame
+        units_per_point = max((maxx - minx) / frame.width, (maxy - miny) / frame.height)
+        frame_center = (frame.x0 + frame.width / 2, frame.y0 + frame.height / 2)
+        
+        def to_page(lon_deg, lat_deg):
+            mx, my = lonlat_to_merc(lon_deg, lat_deg)
+            return (frame_center[0] + (mx - center_x) / units_per_point,
+                    frame_center[1] - (my - center_y) / units_per_point)
+        
+        return to_page
+    
+    def _add_circle_overlay_raster(self, pdf_path: str, longitude: float, latitude: float, 
+                                   radius_miles: float, location_name: str, 
+                                   map_buffer_miles: float, output_filename: str) -> Optional[str]:
+        """
         Add circle overlay to a PDF by converting to image, adding circle, and saving back as PDF
         
         Args:
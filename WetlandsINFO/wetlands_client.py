@@ -8,13 +8,14 @@ Provides functionality to query wetland data from multiple sources:
 - EPA Waters services for watershed boundaries
 """
 
-import requests
 import json
 import logging
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Any, Tuple
 from urllib.parse import urlencode
 
+from upstream_http import UpstreamSession
+
 logger = logging.getLogger(__name__)
 
 
@@ -81,7 +82,7 @@ class WetlandsClient:
     """
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = UpstreamSession()
         self.session.headers.update({
             'User-Agent': 'Wetlands-Client/1.0'
         })
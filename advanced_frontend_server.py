@@ -14,9 +14,9 @@ import uuid
 import time
 import logging
 
-from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request, Query
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
@@ -29,6 +29,16 @@ from environmental_screening_templates import (
     ResponseProcessingTemplates
 )
 from comprehensive_environmental_agent import create_comprehensive_environmental_agent
+from output_directory_manager import screening_workspace
+from screening_job_store import ScreeningJobStore, ScreeningWorkerPool
+from batch_scheduler import order_by_locality, batch_progress_metrics
+from screening_events import ScreeningProgressTracker, ScreeningProgressCallback, job_event_stream
+from output_file_index import get_file_index
+from project_catalogue import ProjectCatalogue
+from file_delivery import file_response, zip_response, JSONCompressionMiddleware
+from progressive_maps import MapManifest, get_map_pipeline
+from screening_metrics import screening_metrics, MetricsCallbackHandler, render_prometheus
+from screening_tracing import screening_trace, TracingCallbackHandler, ScreeningTrace
 
 app = FastAPI(
     title="Environmental Screening Platform",
@@ -45,14 +55,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON API responses; files are served with ETag/range support instead
+app.add_middleware(JSONCompressionMiddleware, minimum_size=1024)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Global state management
-active_screenings: Dict[str, Dict] = {}
-projects_db: List[Dict] = []
-reports_db: List[Dict] = []
-active_batches: Dict[str, Dict] = {}
+logger = logging.getLogger(__name__)
+
+# Global state management; screenings and batches live in the durable job store so
+# they survive restarts and are shared by every server worker process
+job_store = ScreeningJobStore()
+worker_pool: Optional[ScreeningWorkerPool] = None
+
+# Kind of the jobs this server creates and runs; app.py shares the job database with
+# its own kind and request payload
+JOB_KIND = "project_screening"
+file_index = get_file_index("output")
+
+# Projects on disk are read page by page from the file index when requested
+project_catalogue = ProjectCatalogue(file_index)
+
+# Job states shown as in-progress projects until the screening writes its project directory
+IN_PROGRESS_STATUSES = ("pending", "processing", "running")
+
+# Screenings of one batch running at once unless the request asks otherwise
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
 
 # Create a simple wrapper for the agent
 class EnvironmentalScreeningAgent:
@@ -166,24 +194,27 @@ async def serve_help():
 @app.get("/api/dashboard")
 async def get_dashboard_data():
     """Get dashboard statistics and recent activity"""
-    # Calculate stats from current data
-    total_projects = len(projects_db)
-    reports_generated = len(reports_db)
-    completed_projects = len([p for p in projects_db if p.get('status') == 'completed'])
-    risk_areas = len([p for p in projects_db if p.get('risk_level') == 'High'])
+    # Calculate stats from the catalogue and the screenings still running
+    in_progress = get_in_progress_projects()
+    total_projects = file_index.count_projects() + len(in_progress)
+    reports_generated = project_catalogue.count_reports()
+    completed_projects = project_catalogue.count_by_status('completed')
+    risk_areas = project_catalogue.count_by_risk_level('High')
     
     # Get recent activity
     recent_activity = []
     
     # Add recent projects
-    for project in sorted(projects_db, key=lambda x: x.get('created_date', ''), reverse=True)[:5]:
+    recent_projects, _ = project_catalogue.list_projects(limit=5)
+    for project in sorted(in_progress + recent_projects, key=lambda x: x.get('created_date') or '', reverse=True)[:5]:
         recent_activity.append({
-            'timestamp': project.get('created_date', datetime.now().isoformat()),
+            'timestamp': project.get('created_date') or datetime.now().isoformat(),
             'description': f"Started environmental screening for {project.get('name', 'Unknown Project')}"
         })
     
     # Add recent reports
-    for report in sorted(reports_db, key=lambda x: x.get('created_date', ''), reverse=True)[:3]:
+    recent_reports, _ = project_catalogue.list_reports(limit=3)
+    for report in recent_reports:
         recent_activity.append({
             'timestamp': report.get('created_date', datetime.now().isoformat()),
             'description': f"Generated report: {report.get('filename', 'Unknown Report')}"
@@ -201,28 +232,15 @@ async def get_dashboard_data():
     }
 
 @app.post("/api/environmental-screening")
-async def start_environmental_screening(request: ProjectRequest, background_tasks: BackgroundTasks):
+async def start_environmental_screening(request: ProjectRequest):
     """Start a new environmental screening"""
     try:
         # Generate unique screening ID
-        screening_id = f"screening_{int(time.time())}_{len(active_screenings)}"
-        
-        # Initialize screening status
-        screening_status = {
-            "id": screening_id,
-            "status": "running",
-            "progress": 0,
-            "message": "Initializing environmental screening...",
-            "start_time": datetime.now(),
-            "request": request.dict(),
-            "result": None,
-            "error": None
-        }
-        
-        active_screenings[screening_id] = screening_status
+        screening_id = f"screening_{int(time.time())}_{uuid.uuid4().hex[:8]}"
         
-        # Start background task
-        background_tasks.add_task(run_environmental_screening, screening_id, request)
+        # Enqueue the screening; a worker from the pool claims it
+        job_store.create_job(screening_id, request.dict(), kind=JOB_KIND,
+                             message="Initializing environmental screening...")
         
         return {"screening_id": screening_id, "status": "started"}
         
@@ -231,59 +249,29 @@ async def start_environmental_screening(request: ProjectRequest, background_task
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/batch-environmental-screening")
-async def start_batch_environmental_screening(batch_request: List[ProjectRequest], background_tasks: BackgroundTasks):
-    """Start multiple environmental screenings in batch"""
+async def start_batch_environmental_screening(
+    batch_request: List[ProjectRequest],
+    concurrency: int = Query(BATCH_CONCURRENCY, ge=1, le=32)
+):
+    """Start multiple environmental screenings in batch, running up to `concurrency` at once"""
     try:
         # Generate unique batch ID
-        batch_id = f"batch_{int(time.time())}_{len(active_batches)}"
-        
-        # Create individual screening IDs for each item
-        screening_ids = []
-        batch_items = []
-        
-        for i, request in enumerate(batch_request):
-            screening_id = f"{batch_id}_item_{i}"
-            screening_ids.append(screening_id)
-            
-            # Initialize individual screening status
-            screening_status = {
-                "id": screening_id,
-                "status": "pending",
-                "progress": 0,
-                "message": "Waiting to start...",
-                "start_time": None,
-                "request": request.dict(),
-                "result": None,
-                "error": None,
-                "batch_id": batch_id,
-                "batch_index": i
-            }
-            
-            active_screenings[screening_id] = screening_status
-            batch_items.append(screening_status)
+        batch_id = f"batch_{int(time.time())}_{uuid.uuid4().hex[:8]}"
         
-        # Initialize batch status
-        batch_status = {
-            "id": batch_id,
-            "status": "running",
-            "total_items": len(batch_request),
-            "completed_items": 0,
-            "failed_items": 0,
-            "start_time": datetime.now(),
-            "screening_ids": screening_ids,
-            "items": batch_items
-        }
-        
-        active_batches[batch_id] = batch_status
-        
-        # Start batch processing task
-        background_tasks.add_task(run_batch_screening, batch_id, batch_request)
+        # Enqueue one job per item, nearby locations next to each other so concurrent
+        # items share FIRM panels and map extents; batch_index keeps the submitted order
+        request_data = [request.dict() for request in batch_request]
+        screening_ids = job_store.create_batch(batch_id, request_data,
+                                               kind=JOB_KIND,
+                                               queue_order=order_by_locality(request_data),
+                                               concurrency_limit=concurrency)
         
         return {
             "batch_id": batch_id, 
             "status": "started",
             "screening_ids": screening_ids,
-            "total_items": len(batch_request)
+            "total_items": len(batch_request),
+            "concurrency": concurrency
         }
         
     except Exception as e:
@@ -293,43 +281,102 @@ async def start_batch_environmental_screening(batch_request: List[ProjectRequest
 @app.get("/api/environmental-screening/{screening_id}/status")
 async def get_screening_status(screening_id: str):
     """Get the status of a screening process"""
-    if screening_id not in active_screenings:
+    screening = job_store.get_job(screening_id)
+    if screening is None:
         raise HTTPException(status_code=404, detail="Screening not found")
     
-    return active_screenings[screening_id]
+    return screening
+
+@app.get("/api/environmental-screening/{screening_id}/events")
+async def stream_screening_events(screening_id: str, request: Request):
+    """Stream screening status and log events (Server-Sent Events) until the screening ends"""
+    if job_store.get_job(screening_id, include_logs=False) is None:
+        raise HTTPException(status_code=404, detail="Screening not found")
+    
+    # EventSource reconnects send the last log id they received
+    last_event_id = request.headers.get("last-event-id", "0")
+    last_log_id = int(last_event_id) if last_event_id.isdigit() else 0
+    
+    return StreamingResponse(
+        job_event_stream(job_store, screening_id, last_log_id=last_log_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/api/batch-environmental-screening/{batch_id}/status")
 async def get_batch_status(batch_id: str):
     """Get the status of a batch screening process"""
-    if batch_id not in active_batches:
+    item_statuses = job_store.list_jobs(batch_id=batch_id, kind=JOB_KIND)
+    if not item_statuses:
         raise HTTPException(status_code=404, detail="Batch not found")
     
-    batch = active_batches[batch_id]
-    
-    # Include individual item statuses
-    item_statuses = []
-    for screening_id in batch["screening_ids"]:
-        if screening_id in active_screenings:
-            item_statuses.append(active_screenings[screening_id])
+    # Batch state is derived from its items
+    counts = job_store.count_by_status(batch_id, kind=JOB_KIND)
+    total_items = len(item_statuses)
+    completed_items = counts.get("completed", 0)
+    failed_items = counts.get("failed", 0)
+    remaining_items = total_items - completed_items - failed_items
+    end_times = [item["end_time"] for item in item_statuses if item.get("end_time")]
+    concurrency = item_statuses[0].get("concurrency_limit")
     
     return {
-        **batch,
+        "id": batch_id,
+        "status": "completed" if remaining_items == 0 else "processing",
+        "total_items": total_items,
+        "completed_items": completed_items,
+        "failed_items": failed_items,
+        "start_time": min(item["created_at"] for item in item_statuses),
+        "end_time": max(end_times) if remaining_items == 0 and end_times else None,
+        "screening_ids": [item["id"] for item in item_statuses],
         "item_statuses": item_statuses,
-        "remaining_items": batch["total_items"] - batch["completed_items"] - batch["failed_items"]
+        "remaining_items": remaining_items,
+        "running_items": sum(counts.get(status, 0) for status in ("processing", "running")),
+        "metrics": batch_progress_metrics(item_statuses, concurrency)
     }
 
 @app.get("/api/projects")
-async def get_projects():
-    """Get all projects"""
-    return {'projects': projects_db}
+async def get_projects(offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    """Get one page of projects: screenings in progress first, then projects on disk (newest first)"""
+    in_progress = get_in_progress_projects()
+    
+    # The page may start among the in-progress screenings and continue into the catalogue
+    projects = in_progress[offset:offset + limit]
+    catalogue_offset = max(offset - len(in_progress), 0)
+    catalogue_limit = limit - len(projects)
+    if catalogue_limit > 0:
+        stored_projects, stored_total = project_catalogue.list_projects(catalogue_offset, catalogue_limit)
+        projects.extend(stored_projects)
+    else:
+        stored_total = file_index.count_projects()
+    
+    return {
+        'projects': projects,
+        'total': len(in_progress) + stored_total,
+        'offset': offset,
+        'limit': limit
+    }
+
+@app.get("/api/projects/{project_id}")
+async def get_project(project_id: str):
+    """Get a single project by its stable ID"""
+    project = project_catalogue.get_project(project_id)
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
 
 @app.get("/api/reports")
-async def get_reports():
-    """Get all reports with enhanced PDF information"""
+async def get_reports(
+    project_id: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Get one page of reports (newest first) with enhanced PDF information"""
+    reports, total = project_catalogue.list_reports(project_id, offset=offset, limit=limit)
+    
     # Enhance reports with download URLs and categorization
     enhanced_reports = []
     
-    for report in reports_db:
+    for report in reports:
         enhanced_report = report.copy()
         
         # Add download URLs
@@ -347,144 +394,83 @@ async def get_reports():
         
         enhanced_reports.append(enhanced_report)
     
-    # Sort by creation date (newest first)
-    enhanced_reports.sort(key=lambda x: x['created_date'], reverse=True)
-    
-    return {"reports": enhanced_reports}
+    return {"reports": enhanced_reports, "total": total, "offset": offset, "limit": limit}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Upstream, tool and LLM metrics in Prometheus text format"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
 
 @app.get("/files/{filename}")
-async def download_file(filename: str):
+async def download_file(filename: str, request: Request):
     """Download a generated file"""
-    # Look for file in output directories
-    output_dir = Path("output")
-    
-    # Search all project directories
-    for project_dir in output_dir.glob("*"):
-        if project_dir.is_dir():
-            # Check reports/pdfs folder first (for comprehensive PDFs)
-            pdf_dir = project_dir / "reports" / "pdfs"
-            if pdf_dir.exists():
-                file_path = pdf_dir / filename
-                if file_path.exists():
-                    return FileResponse(file_path, filename=filename)
-            
-            # Check reports folder
-            reports_dir = project_dir / "reports"
-            if reports_dir.exists():
-                file_path = reports_dir / filename
-                if file_path.exists():
-                    return FileResponse(file_path, filename=filename)
-            
-            # Check main project directory
-            file_path = project_dir / filename
-            if file_path.exists():
-                return FileResponse(file_path, filename=filename)
+    # Look in reports/pdfs first (comprehensive PDFs), then reports, then the project folder
+    file_path = file_index.resolve(filename, categories=("reports/pdfs", "reports", ""))
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="File not found")
     
-    raise HTTPException(status_code=404, detail="File not found")
+    return file_response(request, file_path, filename=filename)
 
 @app.get("/pdfs/{filename}")
-async def download_pdf(filename: str):
+async def download_pdf(filename: str, request: Request):
     """Download a PDF file specifically from the pdfs directory"""
-    output_dir = Path("output")
-    
-    # Search all project directories for PDFs
-    for project_dir in output_dir.glob("*"):
-        if project_dir.is_dir():
-            # Check reports/pdfs folder
-            pdf_dir = project_dir / "reports" / "pdfs"
-            if pdf_dir.exists():
-                file_path = pdf_dir / filename
-                if file_path.exists():
-                    return FileResponse(
-                        file_path, 
-                        filename=filename,
-                        media_type="application/pdf"
-                    )
-            
-            # Also check reports folder for other PDFs
-            reports_dir = project_dir / "reports"
-            if reports_dir.exists():
-                file_path = reports_dir / filename
-                if file_path.exists() and file_path.suffix.lower() == '.pdf':
-                    return FileResponse(
-                        file_path, 
-                        filename=filename,
-                        media_type="application/pdf"
-                    )
-    
-    raise HTTPException(status_code=404, detail="PDF file not found")
+    file_path = file_index.resolve(filename, categories=("reports/pdfs", "reports"), extensions=[".pdf"])
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="PDF file not found")
+    
+    return file_response(request, file_path, filename=filename, media_type="application/pdf")
 
 @app.get("/preview/{filename}")
-async def preview_file(filename: str):
+async def preview_file(filename: str, request: Request):
     """Preview a file (for PDFs, images, etc.)"""
     # Similar to download but with inline disposition
-    output_dir = Path("output")
-    
-    for project_dir in output_dir.glob("*"):
-        if project_dir.is_dir():
-            # Check reports/pdfs folder first
-            pdf_dir = project_dir / "reports" / "pdfs"
-            if pdf_dir.exists():
-                file_path = pdf_dir / filename
-                if file_path.exists():
-                    return FileResponse(
-                        file_path, 
-                        filename=filename,
-                        headers={"Content-Disposition": "inline"}
-                    )
-            
-            # Check reports folder
-            reports_dir = project_dir / "reports"
-            if reports_dir.exists():
-                file_path = reports_dir / filename
-                if file_path.exists():
-                    return FileResponse(
-                        file_path, 
-                        filename=filename,
-                        headers={"Content-Disposition": "inline"}
-                    )
-            
-            file_path = project_dir / filename
-            if file_path.exists():
-                return FileResponse(
-                    file_path, 
-                    filename=filename,
-                    headers={"Content-Disposition": "inline"}
-                )
-    
-    raise HTTPException(status_code=404, detail="File not found")
+    file_path = file_index.resolve(filename, categories=("reports/pdfs", "reports", ""))
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    return file_response(request, file_path, filename=filename, inline=True)
+
+def find_project_directory(project_id: str) -> Path:
+    """Project directory by stable project ID (or screening ID), or 404"""
+    project_dir = project_catalogue.get_project_directory(project_id)
+    if project_dir is None:
+        # Directory name match for links created before project IDs were stable
+        project_dirs = [d for d in Path("output").glob(f"*{project_id}*") if d.is_dir()]
+        if not project_dirs:
+            raise HTTPException(status_code=404, detail="Project not found")
+        project_dir = project_dirs[0]
+    return Path(project_dir)
+
+@app.get("/api/projects/{project_id}/maps")
+async def get_project_maps(project_id: str):
+    """Map manifest of a project: per domain map, its status and preview/final download URLs"""
+    project_dir = find_project_directory(project_id)
+    return MapManifest(str(project_dir)).with_urls(f"/api/projects/{project_id}/maps")
+
+@app.get("/api/projects/{project_id}/maps/{domain}")
+async def download_project_map(project_id: str, domain: str, request: Request, variant: Optional[str] = None):
+    """A domain map: the print-quality PDF once rendered, its preview PNG until then"""
+    if variant not in (None, "preview", "final"):
+        raise HTTPException(status_code=400, detail="variant must be 'preview' or 'final'")
+    
+    file_path = MapManifest(str(find_project_directory(project_id))).artifact(domain, variant)
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="Map not found")
+    
+    # The final map gets a new ETag, so a client revalidating the preview receives it
+    return file_response(request, file_path, filename=file_path.name, inline=True)
 
 @app.get("/api/projects/{project_id}/download")
 async def download_project_reports(project_id: str):
     """Download all reports for a project as ZIP"""
-    # Find project directory
-    output_dir = Path("output")
-    project_dirs = list(output_dir.glob(f"*{project_id}*"))
-    
-    if not project_dirs:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    project_dir = project_dirs[0]
+    project_dir = find_project_directory(project_id)
     
-    # Create ZIP file
-    import zipfile
-    zip_path = f"temp_project_{project_id}.zip"
-    
-    try:
-        with zipfile.ZipFile(zip_path, 'w') as zip_file:
-            for file_path in project_dir.rglob("*"):
-                if file_path.is_file():
-                    zip_file.write(file_path, file_path.relative_to(project_dir))
-        
-        return FileResponse(
-            zip_path,
-            filename=f"project_{project_id}_reports.zip",
-            media_type="application/zip"
-        )
-    finally:
-        # Clean up temp file after response
-        if os.path.exists(zip_path):
-            os.remove(zip_path)
+    # Stream the ZIP while it is built; nothing is written to disk or held in memory
+    files = sorted(
+        (file_path, file_path.relative_to(project_dir).as_posix())
+        for file_path in project_dir.rglob("*") if file_path.is_file()
+    )
+    return zip_response(files, filename=f"project_{project_id}_reports.zip")
 
 # Background Processing
 async def process_environmental_screening(screening_id: str, request: ProjectRequest):
@@ -496,23 +482,24 @@ async def process_environmental_screening(screening_id: str, request: ProjectReq
         # Convert request to screening request format
         screening_request = create_screening_request(request)
         
-        # Update status
-        update_screening_status(screening_id, 'running', 20, 'property', 'Starting property analysis...')
-        
         # Generate the environmental screening command
         command = generate_screening_command(screening_request)
         
-        # Update status
-        update_screening_status(screening_id, 'running', 40, 'environmental', 'Running environmental analysis...')
-        
-        # Execute the screening using our agent
-        response = await run_agent_screening(command)
+        # Execute the screening using our agent inside an isolated workspace; the
+        # agent's tool calls report the step and progress as they run
+        tracker = ScreeningProgressTracker(job_store, screening_id)
+        with screening_workspace(screening_id) as workspace, screening_metrics(screening_id) as metrics, \
+                screening_trace(screening_id) as trace:
+            response = await run_agent_screening(command, screening_id, tracker, trace)
+        metrics.write_summary(workspace.current_project_dir)
+        trace.write(workspace.current_project_dir)
         
-        # Update status
-        update_screening_status(screening_id, 'running', 80, 'reports', 'Generating reports...')
+        tracker.step('reports', 'Collecting generated reports...')
         
-        # Process the response and extract files
-        await process_screening_response(screening_id, response, request)
+        # Make the new files visible to downloads, then process the response and extract files
+        if workspace.current_project_dir:
+            file_index.index_directory(workspace.current_project_dir)
+        await process_screening_response(screening_id, response, request, workspace.current_project_dir)
         
         # Update final status
         update_screening_status(screening_id, 'completed', 100, 'reports', 'Screening completed successfully!')
@@ -522,11 +509,7 @@ async def process_environmental_screening(screening_id: str, request: ProjectReq
         
     except Exception as e:
         # Update error status
-        active_screenings[screening_id].update({
-            'status': 'failed',
-            'error': str(e),
-            'message': f'Screening failed: {str(e)}'
-        })
+        job_store.update_job(screening_id, status='failed', error=str(e), message=f'Screening failed: {str(e)}')
         
         # Update project status
         update_project_status(screening_id, 'failed')
@@ -569,11 +552,24 @@ def generate_screening_command(screening_request: ProjectRequest) -> str:
     
     return command
 
-async def run_agent_screening(command: str) -> str:
-    """Run the environmental screening agent"""
+async def run_agent_screening(command: str, screening_id: Optional[str] = None,
+                              tracker: Optional[ScreeningProgressTracker] = None,
+                              trace: Optional[ScreeningTrace] = None) -> str:
+    """Run the environmental screening agent, reporting tool progress to the tracker and spans to the trace"""
     try:
-        # Use our comprehensive environmental agent
-        result = agent.graph.invoke({"messages": [{"role": "user", "content": command}]})
+        # Use our comprehensive environmental agent; run it in a worker thread (which
+        # inherits the caller's screening workspace) so other screenings keep progressing
+        thread_id = screening_id or str(uuid.uuid4())
+        config = {"configurable": {"thread_id": thread_id}, "callbacks": [MetricsCallbackHandler()]}
+        if tracker is not None:
+            config["callbacks"].append(ScreeningProgressCallback(tracker))
+        if trace is not None:
+            config["callbacks"].append(TracingCallbackHandler(trace))
+        result = await asyncio.to_thread(
+            agent.graph.invoke,
+            {"messages": [{"role": "user", "content": command}]},
+            config=config
+        )
         
         # Extract the response
         if result and 'messages' in result:
@@ -588,8 +584,9 @@ async def run_agent_screening(command: str) -> str:
     except Exception as e:
         raise Exception(f"Agent execution failed: {str(e)}")
 
-async def process_screening_response(screening_id: str, response: str, request: ProjectRequest):
-    """Process the agent response and extract generated files"""
+async def process_screening_response(screening_id: str, response: str, request: ProjectRequest,
+                                     project_directory: Optional[str] = None):
+    """Process the agent response and record the generated project"""
     try:
         # Extract project information
         project_info = ResponseProcessingTemplates.extract_project_info(response)
@@ -600,76 +597,19 @@ async def process_screening_response(screening_id: str, response: str, request:
         # Extract generated files
         files_info = ResponseProcessingTemplates.extract_generated_files(response)
         
-        # Find the most recent project directory
-        output_dir = Path("output")
-        project_dirs = sorted([d for d in output_dir.glob("*") if d.is_dir()], key=lambda x: x.stat().st_mtime, reverse=True)
-        
-        if project_dirs:
-            latest_dir = project_dirs[0]
-            
-            # Scan for generated files
-            report_files = []
-            
-            # Check reports/pdfs directory (comprehensive PDFs)
-            pdf_dir = latest_dir / "reports" / "pdfs"
-            if pdf_dir.exists():
-                for file_path in pdf_dir.rglob("*"):
-                    if file_path.is_file():
-                        report_files.append(file_path)
-            
-            # Check reports directory
-            reports_dir = latest_dir / "reports"
-            if reports_dir.exists():
-                for file_path in reports_dir.rglob("*"):
-                    if file_path.is_file() and file_path not in report_files:  # Avoid duplicates
-                        report_files.append(file_path)
-            
-            # Check main directory
-            for file_path in latest_dir.rglob("*"):
-                if file_path.is_file() and file_path.parent == latest_dir:
-                    report_files.append(file_path)
-            
-            # Add files to reports database with proper categorization
-            for file_path in report_files:
-                file_stat = file_path.stat()
-                
-                # Determine file category based on location and name
-                file_category = "report"
-                if "comprehensive" in file_path.name.lower():
-                    file_category = "comprehensive_pdf"
-                elif file_path.suffix.lower() == '.pdf':
-                    file_category = "pdf"
-                elif file_path.suffix.lower() in ['.json', '.md']:
-                    file_category = "data"
-                
-                reports_db.append({
-                    'filename': file_path.name,
-                    'title': file_path.stem.replace('_', ' ').title(),
-                    'project_id': screening_id,
-                    'size': file_stat.st_size,
-                    'created_date': datetime.fromtimestamp(file_stat.st_mtime).isoformat(),
-                    'file_path': str(file_path),
-                    'category': file_category,
-                    'is_pdf': file_path.suffix.lower() == '.pdf',
-                    'relative_path': str(file_path.relative_to(latest_dir))
-                })
-            
-            # Update project with file count and risk assessment
-            project = next((p for p in projects_db if p['id'] == screening_id), None)
-            if project:
-                project['reports_count'] = len([r for r in reports_db if r.get('project_id') == screening_id])
-                
-                # Count PDFs specifically
-                pdf_count = len([r for r in reports_db if r.get('project_id') == screening_id and r.get('is_pdf')])
-                project['pdf_count'] = pdf_count
-                
-                # Assess risk level based on findings
-                if findings:
-                    risk_level = assess_risk_level(findings)
-                    project['risk_level'] = risk_level
+        # Record the project directory created by this screening's workspace together
+        # with its risk assessment; its files are listed from the file index
+        reports_count = 0
+        if project_directory and Path(project_directory).is_dir():
+            risk_level = assess_risk_level(findings) if findings else None
+            record = project_catalogue.record_screening(
+                screening_id, project_directory, risk_level=risk_level, location_name=request.location_name
+            )
+            project = project_catalogue.get_project(record['id'])
+            reports_count = project['reports_count'] if project else 0
         
         # Log completion
-        update_screening_log(screening_id, f"Generated {len(report_files)} reports and documents")
+        update_screening_log(screening_id, f"Generated {reports_count} reports and documents")
         
     except Exception as e:
         print(f"Error processing screening response: {str(e)}")
@@ -705,35 +645,39 @@ def assess_risk_level(findings: dict) -> str:
 
 def update_screening_status(screening_id: str, status: str, progress: float, step: str, message: str):
     """Update screening status"""
-    if screening_id in active_screenings:
-        active_screenings[screening_id].update({
-            'status': status,
-            'progress': progress,
-            'current_step': step,
-            'message': message
-        })
-        
+    if job_store.update_job(screening_id, status=status, progress=progress, current_step=step, message=message):
         # Add log entry
-        active_screenings[screening_id]['log_entries'].append({
-            'timestamp': datetime.now().isoformat(),
-            'message': message
-        })
+        job_store.append_log(screening_id, message)
 
 def update_screening_log(screening_id: str, message: str):
     """Add log entry to screening"""
-    if screening_id in active_screenings:
-        active_screenings[screening_id]['log_entries'].append({
-            'timestamp': datetime.now().isoformat(),
-            'message': message
-        })
+    job_store.append_log(screening_id, message)
 
 def update_project_status(screening_id: str, status: str):
-    """Update project status in database"""
-    project = next((p for p in projects_db if p['id'] == screening_id), None)
-    if project:
-        project['status'] = status
-        if status == 'completed':
-            project['completed_date'] = datetime.now().isoformat()
+    """Update the status of the project produced by a screening"""
+    project_catalogue.update_status(screening_id, status)
+
+def get_in_progress_projects() -> List[Dict]:
+    """Screenings that have not produced a project directory yet, shown as in-progress projects"""
+    projects = []
+    for status in IN_PROGRESS_STATUSES:
+        for job in job_store.list_jobs(status=status, kind=JOB_KIND):
+            request_data = job['request_data']
+            projects.append({
+                'id': job['id'],
+                'name': request_data.get('project_name'),
+                'location_name': request_data.get('location_name'),
+                'cadastral_number': request_data.get('cadastral_number'),
+                'coordinates': request_data.get('coordinates'),
+                'status': 'in-progress',
+                'created_date': job['created_at'],
+                'analyses_requested': request_data.get('analyses_requested', []),
+                'analyses_count': len(request_data.get('analyses_requested', [])),
+                'reports_count': 0,
+                'risk_level': None
+            })
+    projects.sort(key=lambda p: p['created_date'], reverse=True)
+    return projects
 
 def get_file_icon(file_extension: str) -> str:
     """Get Font Awesome icon class for file type"""
@@ -749,152 +693,47 @@ def get_file_icon(file_extension: str) -> str:
     return icon_map.get(file_extension, 'fas fa-file')
 
 # Load existing data on startup
-def load_existing_data():
-    """Load existing projects and reports from output directory"""
-    output_dir = Path("output")
-    if not output_dir.exists():
-        return
-    
-    for project_dir in output_dir.glob("*"):
-        if project_dir.is_dir():
-            # Try to extract project info from directory name
-            dir_name = project_dir.name
-            
-            # Create project entry
-            project_id = str(uuid.uuid4())
-            project = {
-                'id': project_id,
-                'name': dir_name.replace('_', ' ').split(' Environmental')[0],
-                'description': 'Imported project',
-                'location_name': None,
-                'status': 'completed',
-                'created_date': datetime.fromtimestamp(project_dir.stat().st_mtime).isoformat(),
-                'analyses_count': 6,  # Assume full analysis
-                'reports_count': 0,
-                'risk_level': 'Low'
-            }
-            
-            # Count reports
-            report_count = 0
-            reports_dir = project_dir / "reports"
-            if reports_dir.exists():
-                for file_path in reports_dir.rglob("*"):
-                    if file_path.is_file():
-                        report_count += 1
-                        file_stat = file_path.stat()
-                        reports_db.append({
-                            'filename': file_path.name,
-                            'title': file_path.stem.replace('_', ' ').title(),
-                            'project_id': project_id,
-                            'size': file_stat.st_size,
-                            'created_date': datetime.fromtimestamp(file_stat.st_mtime).isoformat(),
-                            'file_path': str(file_path)
-                        })
-            
-            project['reports_count'] = report_count
-            projects_db.append(project)
+def run_screening_job(job: Dict):
+    """Worker pool handler: run a claimed screening (standalone or batch item)"""
+    request = ProjectRequest(**job["request_data"])
+    asyncio.run(process_environmental_screening(job["id"], request))
+    
+    screening = job_store.get_job(job["id"], include_logs=False)
+    if screening and screening["status"] == "failed":
+        raise Exception(screening.get("error") or "Screening failed")
+
+def index_map_update(project_dir: str, entry: Dict):
+    """Index a project's files when one of its maps gets a preview or a final"""
+    file_index.index_directory(project_dir)
 
 # Initialize on startup
 @app.on_event("startup")
 async def startup_event():
-    """Load existing data on startup"""
-    load_existing_data()
-    print(f"Loaded {len(projects_db)} existing projects and {len(reports_db)} reports")
-
-async def run_environmental_screening(screening_id: str, request: ProjectRequest):
-    """Background task to run environmental screening"""
-    try:
-        screening = active_screenings[screening_id]
-        screening["status"] = "running"
-        screening["message"] = "Starting environmental analysis..."
-        screening["progress"] = 10
-        
-        # Create project entry
-        project = {
-            'id': screening_id,
-            'name': request.project_name,
-            'location_name': request.location_name,
-            'cadastral_number': request.cadastral_number,
-            'coordinates': request.coordinates,
-            'status': 'in-progress',
-            'created_date': datetime.now().isoformat(),
-            'analyses_requested': request.analyses_requested,
-            'analyses_count': len(request.analyses_requested),
-            'reports_count': 0,
-            'risk_level': None
-        }
-        
-        projects_db.append(project)
-        
-        # Update progress
-        screening["progress"] = 30
-        screening["message"] = "Running environmental agent..."
-        
-        # Here you would run the actual environmental screening
-        # For now, we'll simulate the process
-        await asyncio.sleep(5)  # Simulate processing time
-        
-        screening["progress"] = 80
-        screening["message"] = "Generating reports..."
-        
-        await asyncio.sleep(2)  # Simulate report generation
-        
-        # Complete the screening
-        screening["status"] = "completed"
-        screening["progress"] = 100
-        screening["message"] = "Environmental screening completed successfully"
-        screening["result"] = {
-            "project_directory": f"output/{request.project_name}_{screening_id}",
-            "reports_generated": ["comprehensive_report.md", "environmental_analysis.pdf"],
-            "risk_assessment": "Low to Medium Risk"
-        }
-        
-        # Update project status
-        project['status'] = 'completed'
-        project['risk_level'] = 'Medium'
-        project['reports_count'] = 2
-        
-        logger.info(f"Screening {screening_id} completed successfully")
-        
-    except Exception as e:
-        logger.error(f"Error in screening {screening_id}: {e}")
-        screening = active_screenings.get(screening_id, {})
-        screening["status"] = "failed"
-        screening["error"] = str(e)
-        screening["message"] = f"Screening failed: {str(e)}"
-
-async def run_batch_screening(batch_id: str, batch_requests: List[ProjectRequest]):
-    """Background task to run batch environmental screening"""
-    try:
-        batch = active_batches[batch_id]
-        
-        for i, request in enumerate(batch_requests):
-            screening_id = f"{batch_id}_item_{i}"
-            
-            # Update batch status
-            batch["status"] = "processing"
-            
-            # Run individual screening
-            await run_environmental_screening(screening_id, request)
-            
-            # Update batch counters based on result
-            screening = active_screenings[screening_id]
-            if screening["status"] == "completed":
-                batch["completed_items"] += 1
-            elif screening["status"] == "failed":
-                batch["failed_items"] += 1
-        
-        # Complete batch
-        batch["status"] = "completed"
-        batch["end_time"] = datetime.now()
-        
-        logger.info(f"Batch {batch_id} completed: {batch['completed_items']}/{batch['total_items']} successful")
-        
-    except Exception as e:
-        logger.error(f"Error in batch {batch_id}: {e}")
-        batch = active_batches.get(batch_id, {})
-        batch["status"] = "failed"
-        batch["error"] = str(e)
+    """Start the screening workers and the file index on startup"""
+    global worker_pool
+    
+    # Workers also resume jobs left pending or interrupted by a previous process
+    worker_pool = ScreeningWorkerPool(
+        job_store,
+        run_screening_job,
+        num_workers=int(os.getenv("SCREENING_WORKERS", str(BATCH_CONCURRENCY))),
+        lease_seconds=float(os.getenv("SCREENING_LEASE_SECONDS", "300")),
+        kinds=[JOB_KIND]
+    )
+    worker_pool.start()
+    
+    # Keep the output file index in sync with files written outside the workers
+    file_index.start()
+    
+    # Map previews and print-quality maps finished in the background are listed right away
+    get_map_pipeline().add_listener(index_map_update)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop claiming new screening jobs"""
+    if worker_pool is not None:
+        worker_pool.stop(timeout=5)
+    file_index.stop(timeout=5)
 
 if __name__ == "__main__":
     uvicorn.run(
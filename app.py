@@ -13,12 +13,11 @@ import uuid
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from pathlib import Path
-import threading
 import time
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request, Query
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
@@ -28,6 +27,14 @@ print("⚠️ WebSocket disabled - using HTTP API only for better compatibility"
 
 from langchain_core.messages import HumanMessage
 from comprehensive_environmental_agent import create_comprehensive_environmental_agent
+from output_directory_manager import screening_workspace
+from screening_job_store import ScreeningJobStore, ScreeningWorkerPool
+from screening_events import ScreeningProgressTracker, ScreeningProgressCallback, job_event_stream
+from output_file_index import get_file_index
+from file_delivery import file_response, JSONCompressionMiddleware
+from progressive_maps import MapManifest, get_map_pipeline
+from screening_metrics import screening_metrics, MetricsCallbackHandler, render_prometheus
+from screening_tracing import screening_trace, TracingCallbackHandler
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -45,6 +52,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON API responses; files are served with ETag/range support instead
+app.add_middleware(JSONCompressionMiddleware, minimum_size=1024)
+
 # Create static directory if it doesn't exist
 static_dir = Path("static")
 static_dir.mkdir(exist_ok=True)
@@ -56,12 +66,19 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 output_dir = Path("output")
 output_dir.mkdir(exist_ok=True)
 
+# Index of the output tree used by the listing and download endpoints
+file_index = get_file_index(str(output_dir))
+
 # Global agent instance
 agent = None
 
-# In-memory storage for screening jobs (in production, use a database)
-screening_jobs = {}
-screening_lock = threading.Lock()
+# Durable screening job store shared by all server processes on this host
+job_store = ScreeningJobStore()
+
+# Kind of the jobs this server creates and runs; the advanced frontend server shares the
+# job database with its own kind and request payload
+JOB_KIND = "screening"
+worker_pool = None
 
 # Pydantic models
 class ChatMessage(BaseModel):
@@ -95,6 +112,7 @@ class ScreeningStatus(BaseModel):
     status: str
     progress: int
     message: str
+    current_step: Optional[str] = None
     start_time: str
     end_time: Optional[str] = None
     output_directory: Optional[str] = None
@@ -142,34 +160,24 @@ def initialize_agent():
 
 def create_screening_job(screening_id: str, request_data: ScreeningRequest):
     """Create a new screening job"""
-    with screening_lock:
-        screening_jobs[screening_id] = {
-            "id": screening_id,
-            "status": "pending",
-            "progress": 0,
-            "message": "Screening queued",
-            "start_time": datetime.now().isoformat(),
-            "end_time": None,
-            "request_data": request_data.dict(),
-            "output_directory": None,
-            "generated_files": [],
-            "error": None
-        }
+    job_store.create_job(screening_id, request_data.dict(), kind=JOB_KIND)
 
 def update_screening_status(screening_id: str, status: str, progress: int = None, message: str = None, error: str = None):
     """Update screening job status"""
-    with screening_lock:
-        if screening_id in screening_jobs:
-            job = screening_jobs[screening_id]
-            job["status"] = status
-            if progress is not None:
-                job["progress"] = progress
-            if message is not None:
-                job["message"] = message
-            if error is not None:
-                job["error"] = error
-            if status in ["completed", "failed"]:
-                job["end_time"] = datetime.now().isoformat()
+    fields = {"status": status}
+    if progress is not None:
+        fields["progress"] = progress
+    if message is not None:
+        fields["message"] = message
+        job_store.append_log(screening_id, message)
+    if error is not None:
+        fields["error"] = error
+    job_store.update_job(screening_id, **fields)
+
+def run_screening_job(job: Dict[str, Any]):
+    """Worker pool handler: run a claimed screening job to completion"""
+    request_data = ScreeningRequest(**job["request_data"])
+    asyncio.run(process_screening(job["id"], request_data))
 
 async def process_screening(screening_id: str, request_data: ScreeningRequest):
     """Process a single environmental screening"""
@@ -253,46 +261,49 @@ async def process_screening(screening_id: str, request_data: ScreeningRequest):
         
         print(f"🔄 Processing screening {screening_id}: {screening_query}")
         
-        # Update progress
-        update_screening_status(screening_id, "processing", 25, "Running environmental analysis...")
-        
-        # Run the agent
-        response = agent.invoke(
-            {"messages": [HumanMessage(content=screening_query)]},
-            config={"configurable": {"thread_id": screening_id}}
-        )
-        
-        # Update progress
-        update_screening_status(screening_id, "processing", 75, "Generating reports...")
+        # Progress from here on is reported by the agent's tool calls
+        tracker = ScreeningProgressTracker(job_store, screening_id)
+        
+        # Run the agent in a worker thread inside this screening's own workspace so
+        # concurrent screenings never share a project directory
+        with screening_workspace(screening_id, base_output_dir=str(output_dir)) as workspace, \
+                screening_metrics(screening_id) as metrics, screening_trace(screening_id) as trace:
+            response = await asyncio.to_thread(
+                agent.invoke,
+                {"messages": [HumanMessage(content=screening_query)]},
+                config={
+                    "configurable": {"thread_id": screening_id},
+                    "callbacks": [ScreeningProgressCallback(tracker), MetricsCallbackHandler(),
+                                  TracingCallbackHandler(trace)]
+                }
+            )
+        
+        # Per-screening upstream/tool timings and the span trace land next to the screening's logs
+        metrics.write_summary(workspace.current_project_dir)
+        trace.write(workspace.current_project_dir)
+        
+        tracker.step("reports", "Collecting generated files...")
         
         # Extract response
         last_message = response["messages"][-1]
         agent_response = last_message.content
         
-        # Find the output directory for this screening
-        output_directory = None
+        # The workspace records the project directory this screening created
+        output_directory = workspace.current_project_dir
         generated_files = []
         
-        # Look for the most recent directory in output/
-        if output_dir.exists():
-            # Get all directories sorted by creation time
-            dirs = [d for d in output_dir.iterdir() if d.is_dir()]
-            if dirs:
-                # Sort by modification time, newest first
-                dirs.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-                output_directory = str(dirs[0])
-                
-                # Get all files in the directory
-                for file_path in dirs[0].rglob("*"):
-                    if file_path.is_file():
-                        relative_path = file_path.relative_to(dirs[0])
-                        generated_files.append(str(relative_path))
+        if output_directory and Path(output_directory).exists():
+            project_path = Path(output_directory)
+            for file_path in project_path.rglob("*"):
+                if file_path.is_file():
+                    relative_path = file_path.relative_to(project_path)
+                    generated_files.append(str(relative_path))
+            
+            # Make the new files visible to listings and downloads right away
+            file_index.index_directory(output_directory)
         
         # Update final status
-        with screening_lock:
-            if screening_id in screening_jobs:
-                screening_jobs[screening_id]["output_directory"] = output_directory
-                screening_jobs[screening_id]["generated_files"] = generated_files
+        job_store.update_job(screening_id, output_directory=output_directory, generated_files=generated_files)
         
         update_screening_status(screening_id, "completed", 100, "Environmental screening completed successfully")
         
@@ -303,14 +314,42 @@ async def process_screening(screening_id: str, request_data: ScreeningRequest):
         print(f"❌ Screening {screening_id} failed: {error_msg}")
         update_screening_status(screening_id, "failed", 0, "Screening failed", error_msg)
 
+def index_map_update(project_dir: str, entry: Dict[str, Any]):
+    """Index a project's files when one of its maps gets a preview or a final"""
+    file_index.index_directory(project_dir)
+
 @app.on_event("startup")
 async def startup_event():
-    """Initialize the agent on startup"""
+    """Initialize the agent and start the screening workers on startup"""
+    global worker_pool
     try:
         initialize_agent()
     except Exception as e:
         print(f"⚠️ Warning: Could not initialize agent on startup: {e}")
         print("Agent will be initialized on first request")
+    
+    # Workers also pick up jobs left pending or interrupted by a previous process
+    worker_pool = ScreeningWorkerPool(
+        job_store,
+        run_screening_job,
+        num_workers=int(os.getenv("SCREENING_WORKERS", "2")),
+        lease_seconds=float(os.getenv("SCREENING_LEASE_SECONDS", "300")),
+        kinds=[JOB_KIND]
+    )
+    worker_pool.start()
+    
+    # Keep the output file index in sync with files written outside the workers
+    file_index.start()
+    
+    # Map previews and print-quality maps finished in the background are listed right away
+    get_map_pipeline().add_listener(index_map_update)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop claiming new screening jobs"""
+    if worker_pool is not None:
+        worker_pool.stop(timeout=5)
+    file_index.stop(timeout=5)
 
 # Main interface routes
 @app.get("/", response_class=HTMLResponse)
@@ -350,18 +389,15 @@ async def get_main_interface():
 
 # API Routes for Environmental Screening
 @app.post("/api/environmental-screening", response_model=ScreeningResponse)
-async def submit_screening(request: ScreeningRequest, background_tasks: BackgroundTasks):
+async def submit_screening(request: ScreeningRequest):
     """Submit a new environmental screening request"""
     
     # Generate unique screening ID
     screening_id = str(uuid.uuid4())
     
-    # Create screening job
+    # Create screening job; a worker from the pool claims it
     create_screening_job(screening_id, request)
     
-    # Start processing in background
-    background_tasks.add_task(process_screening, screening_id, request)
-    
     return ScreeningResponse(
         screening_id=screening_id,
         status="pending",
@@ -372,49 +408,61 @@ async def submit_screening(request: ScreeningRequest, background_tasks: Backgrou
 async def get_screening_status(screening_id: str):
     """Get the status of a screening request"""
     
-    with screening_lock:
-        if screening_id not in screening_jobs:
-            raise HTTPException(status_code=404, detail="Screening not found")
-        
-        job = screening_jobs[screening_id]
-        
-        # Create proper ScreeningStatus response
-        return ScreeningStatus(
-            screening_id=job["id"],
-            status=job["status"],
-            progress=job["progress"],
-            message=job["message"],
-            start_time=job["start_time"],
-            end_time=job.get("end_time"),
-            output_directory=job.get("output_directory"),
-            generated_files=job.get("generated_files"),
-            error=job.get("error")
-        )
+    job = job_store.get_job(screening_id, include_logs=False)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Screening not found")
+    
+    # Create proper ScreeningStatus response
+    return ScreeningStatus(
+        screening_id=job["id"],
+        status=job["status"],
+        progress=int(job["progress"]),
+        message=job["message"],
+        current_step=job.get("current_step"),
+        start_time=job["start_time"] or job["created_at"],
+        end_time=job.get("end_time"),
+        output_directory=job.get("output_directory"),
+        generated_files=job.get("generated_files"),
+        error=job.get("error")
+    )
+
+@app.get("/api/environmental-screening/{screening_id}/events")
+async def stream_screening_events(screening_id: str, request: Request):
+    """Stream screening status and log events (Server-Sent Events) until the screening ends"""
+    
+    if job_store.get_job(screening_id, include_logs=False) is None:
+        raise HTTPException(status_code=404, detail="Screening not found")
+    
+    # EventSource reconnects send the last log id they received
+    last_event_id = request.headers.get("last-event-id", "0")
+    last_log_id = int(last_event_id) if last_event_id.isdigit() else 0
+    
+    return StreamingResponse(
+        job_event_stream(job_store, screening_id, last_log_id=last_log_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/api/dashboard", response_model=DashboardData)
 async def get_dashboard_data():
     """Get dashboard statistics and recent activity"""
     
     # Count completed screenings
-    with screening_lock:
-        total_projects = len([job for job in screening_jobs.values() if job["status"] == "completed"])
-        reports_generated = sum(len(job.get("generated_files", [])) for job in screening_jobs.values())
+    completed_jobs = job_store.list_jobs(status="completed", kind=JOB_KIND)
+    total_projects = len(completed_jobs)
+    reports_generated = sum(len(job.get("generated_files", [])) for job in completed_jobs)
     
     # Count output directories
-    project_dirs = len([d for d in output_dir.iterdir() if d.is_dir()]) if output_dir.exists() else 0
+    project_dirs = file_index.count_projects()
     
     # Generate recent activity
     recent_activity = []
-    with screening_lock:
-        # Get recent completed jobs
-        completed_jobs = [job for job in screening_jobs.values() if job["status"] == "completed"]
-        completed_jobs.sort(key=lambda x: x["start_time"], reverse=True)
-        
-        for job in completed_jobs[:5]:  # Last 5 activities
-            recent_activity.append({
-                "timestamp": job["end_time"] or job["start_time"],
-                "description": f"Completed screening for {job['request_data'].get('projectName', 'Unknown Project')}"
-            })
+    # Get recent completed jobs (list_jobs returns newest first)
+    for job in completed_jobs[:5]:  # Last 5 activities
+        recent_activity.append({
+            "timestamp": job["end_time"] or job["start_time"],
+            "description": f"Completed screening for {job['request_data'].get('projectName', 'Unknown Project')}"
+        })
     
     return DashboardData(
         total_projects=max(total_projects, project_dirs),
@@ -425,70 +473,67 @@ async def get_dashboard_data():
     )
 
 @app.get("/api/projects")
-async def get_projects():
-    """Get list of projects"""
+async def get_projects(offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1)):
+    """Get list of projects (optionally one page of it): completed screenings first, then output directories"""
     
-    projects = []
+    # The page may start among the completed screenings and continue into the output directories
+    job_total = job_store.count_by_status(kind=JOB_KIND).get("completed", 0)
+    jobs = job_store.list_jobs(status="completed", kind=JOB_KIND, offset=offset, limit=limit) if offset < job_total else []
     
-    # Get projects from screening jobs
-    with screening_lock:
-        for job in screening_jobs.values():
-            if job["status"] == "completed":
-                request_data = job["request_data"]
-                projects.append(ProjectData(
-                    id=job["id"],
-                    name=request_data.get("projectName", "Unknown Project"),
-                    location=request_data.get("locationName") or request_data.get("cadastralNumber", "Unknown Location"),
-                    status="completed",
-                    created_date=job["start_time"],
-                    risk_level="low",  # This would need to be extracted from analysis results
-                    reports_count=len(job.get("generated_files", []))
-                ))
-    
-    # Also check output directories
-    if output_dir.exists():
-        for project_dir in output_dir.iterdir():
-            if project_dir.is_dir():
-                # Check if we already have this project from screening jobs
-                existing_ids = [p.id for p in projects]
-                if project_dir.name not in existing_ids:
-                    projects.append(ProjectData(
-                        id=project_dir.name,
-                        name=project_dir.name.replace("_", " "),
-                        location="Unknown",
-                        status="completed",
-                        created_date=datetime.fromtimestamp(project_dir.stat().st_mtime).isoformat(),
-                        risk_level="unknown",
-                        reports_count=len(list(project_dir.rglob("*.pdf"))) + len(list(project_dir.rglob("*.json")))
-                    ))
-    
-    return {"projects": [p.dict() for p in projects]}
+    projects = []
+    for job in jobs:
+        request_data = job["request_data"]
+        projects.append(ProjectData(
+            id=job["id"],
+            name=request_data.get("projectName", "Unknown Project"),
+            location=request_data.get("locationName") or request_data.get("cadastralNumber", "Unknown Location"),
+            status="completed",
+            created_date=job["start_time"] or job["created_at"],
+            risk_level="low",  # This would need to be extracted from analysis results
+            reports_count=len(job.get("generated_files", []))
+        ))
+    
+    # Also include output directories (named after projects, so they never collide with job ids)
+    directory_offset = max(offset - job_total, 0)
+    directory_limit = None if limit is None else limit - len(projects)
+    if directory_limit is None or directory_limit > 0:
+        project_dirs, directory_total = file_index.list_projects(directory_offset, directory_limit)
+    else:
+        project_dirs, directory_total = [], file_index.count_projects()
+    for project_dir in project_dirs:
+        projects.append(ProjectData(
+            id=project_dir["project"],
+            name=project_dir["project"].replace("_", " "),
+            location="Unknown",
+            status="completed",
+            created_date=datetime.fromtimestamp(project_dir["last_modified"] or 0).isoformat(),
+            risk_level="unknown",
+            reports_count=project_dir["report_count"]
+        ))
+    
+    return {"projects": [p.dict() for p in projects], "total": job_total + directory_total, "offset": offset, "limit": limit}
 
 @app.get("/api/reports")
-async def get_reports():
-    """Get list of generated reports"""
-    
-    reports = []
-    
-    if output_dir.exists():
-        for project_dir in output_dir.iterdir():
-            if project_dir.is_dir():
-                # Look for reports in the reports subdirectory
-                reports_dir = project_dir / "reports"
-                if reports_dir.exists():
-                    for report_file in reports_dir.iterdir():
-                        if report_file.is_file() and report_file.suffix in ['.pdf', '.json', '.md']:
-                            reports.append(ReportData(
-                                id=f"{project_dir.name}_{report_file.name}",
-                                filename=report_file.name,
-                                project_name=project_dir.name.replace("_", " "),
-                                created_date=datetime.fromtimestamp(report_file.stat().st_mtime).isoformat(),
-                                file_size=report_file.stat().st_size,
-                                category=report_file.suffix[1:].upper(),
-                                download_url=f"/api/files/{project_dir.name}/{report_file.name}"
-                            ))
-    
-    return {"reports": [r.dict() for r in reports]}
+async def get_reports(offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1)):
+    """Get list of generated reports (optionally one page of it)"""
+    
+    # Files directly in each project's reports subdirectory
+    report_files, total = file_index.list_files(category="reports", extensions=['.pdf', '.json', '.md'],
+                                                offset=offset, limit=limit)
+    reports = [
+        ReportData(
+            id=f"{report_file['project']}_{report_file['name']}",
+            filename=report_file["name"],
+            project_name=report_file["project"].replace("_", " "),
+            created_date=datetime.fromtimestamp(report_file["mtime"]).isoformat(),
+            file_size=report_file["size"],
+            category=report_file["ext"][1:].upper(),
+            download_url=f"/api/files/{report_file['project']}/{report_file['name']}"
+        )
+        for report_file in report_files
+    ]
+    
+    return {"reports": [r.dict() for r in reports], "total": total, "offset": offset, "limit": limit}
 
 # Legacy chat endpoint for backward compatibility
 @app.post("/chat", response_model=ChatResponse)
@@ -553,13 +598,19 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "agent_initialized": agent is not None,
-        "active_screenings": len(screening_jobs),
+        "active_screenings": sum(job_store.count_by_status(kind=JOB_KIND).values()),
+        "screening_jobs_by_status": job_store.count_by_status(kind=JOB_KIND),
         "output_directory": str(output_dir),
         "output_directory_exists": output_dir.exists()
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Upstream, tool and LLM metrics in Prometheus text format"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/files/{project_name}/{filename}")
-async def download_project_file(project_name: str, filename: str):
+async def download_project_file(project_name: str, filename: str, request: Request):
     """Download a specific file from a project"""
     
     project_path = output_dir / project_name
@@ -577,38 +628,64 @@ async def download_project_file(project_name: str, filename: str):
     
     for file_path in possible_paths:
         if file_path.exists() and file_path.is_file():
-            return FileResponse(file_path, filename=filename)
+            return file_response(request, file_path, filename=filename)
     
     raise HTTPException(status_code=404, detail="File not found")
 
+@app.get("/api/projects/{project_name}/maps")
+async def get_project_maps(project_name: str):
+    """Map manifest of a project: per domain map, its status and preview/final download URLs"""
+    project_path = output_dir / project_name
+    if not project_path.is_dir():
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    return MapManifest(str(project_path)).with_urls(f"/api/projects/{project_name}/maps")
+
+@app.get("/api/projects/{project_name}/maps/{domain}")
+async def download_project_map(project_name: str, domain: str, request: Request, variant: Optional[str] = None):
+    """A domain map: the print-quality PDF once rendered, its preview PNG until then"""
+    if variant not in (None, "preview", "final"):
+        raise HTTPException(status_code=400, detail="variant must be 'preview' or 'final'")
+    
+    project_path = output_dir / project_name
+    if not project_path.is_dir():
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    file_path = MapManifest(str(project_path)).artifact(domain, variant)
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="Map not found")
+    
+    # The final map gets a new ETag, so a client revalidating the preview receives it
+    return file_response(request, file_path, filename=file_path.name, inline=True)
+
 @app.get("/files")
-async def list_files():
-    """List all generated files"""
-    files = []
-    
-    if output_dir.exists():
-        for file_path in output_dir.rglob("*"):
-            if file_path.is_file():
-                relative_path = file_path.relative_to(output_dir)
-                files.append({
-                    "name": file_path.name,
-                    "path": str(relative_path),
-                    "size": file_path.stat().st_size,
-                    "modified": datetime.fromtimestamp(file_path.stat().st_mtime).isoformat(),
-                    "type": file_path.suffix[1:] if file_path.suffix else "unknown"
-                })
-    
-    return {"files": files}
+async def list_files(offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1)):
+    """List all generated files (optionally one page of them)"""
+    indexed_files, total = file_index.list_files(offset=offset, limit=limit)
+    files = [
+        {
+            "name": indexed_file["name"],
+            "path": indexed_file["path"],
+            "size": indexed_file["size"],
+            "modified": datetime.fromtimestamp(indexed_file["mtime"]).isoformat(),
+            "type": indexed_file["ext"][1:] if indexed_file["ext"] else "unknown"
+        }
+        for indexed_file in indexed_files
+    ]
+    
+    return {"files": files, "total": total, "offset": offset, "limit": limit}
 
 @app.get("/files/{filename}")
-async def download_file(filename: str):
-    """Download a file from the output directory"""
+async def download_file(filename: str, request: Request):
+    """Download a file from the output directory (bare names are looked up in the project folders)"""
     file_path = output_dir / filename
     
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="File not found")
+    if not file_path.is_file():
+        file_path = file_index.resolve(filename)
+        if file_path is None:
+            raise HTTPException(status_code=404, detail="File not found")
     
-    return FileResponse(file_path, filename=filename)
+    return file_response(request, file_path, filename=filename)
 
 @app.delete("/files/{filename}")
 async def delete_file(filename: str):
@@ -620,6 +697,7 @@ async def delete_file(filename: str):
     
     try:
         file_path.unlink()
+        file_index.remove_file(str(file_path))
         return {"message": f"File {filename} deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting file: {str(e)}")
@@ -8,8 +8,12 @@ single-page PDF reports for each one using the PDF report generator tool.
 
 import os
 import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from pathlib import Path
 from pdf_report_generator import generate_pdf_report
+from report_regeneration_runner import is_up_to_date
 
 def find_report_files(base_dir: str = "output") -> list:
     """Find all report.txt files in subdirectories"""
@@ -47,13 +51,33 @@ def read_report_content(file_path: str) -> tuple:
         print(f"❌ Error reading {file_path}: {str(e)}")
         return None, None, None, None
 
+def _safe_project_name(project_name: str) -> str:
+    """Filesystem-safe project name used in single-page PDF filenames"""
+    return project_name.replace(' ', '_').replace('/', '_').replace('\\', '_')
+
+def find_existing_pdfs(project_name: str, base_dir: str = "output") -> list:
+    """Find previously generated single-page PDFs for a project"""
+    
+    pattern = os.path.join(base_dir, f"single_page_report_{glob.escape(_safe_project_name(project_name))}_*.pdf")
+    return glob.glob(pattern)
+
+def is_pdf_up_to_date(file_path: str, base_dir: str = "output") -> bool:
+    """Check whether the newest single-page PDF for a report.txt is newer than the report"""
+    
+    project_name = os.path.basename(os.path.dirname(file_path))
+    existing = find_existing_pdfs(project_name, base_dir)
+    if not existing:
+        return False
+    latest = max(existing, key=os.path.getmtime)
+    return is_up_to_date([Path(file_path)], [Path(latest)])
+
 def generate_single_pdf(file_path: str, content: str, title: str, subtitle: str, project_name: str) -> dict:
     """Generate a single-page PDF for one report"""
     
     print(f"\n📄 Processing: {project_name}")
     
     # Create safe filename
-    safe_project_name = project_name.replace(' ', '_').replace('/', '_').replace('\\', '_')
+    safe_project_name = _safe_project_name(project_name)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_filename = f"single_page_report_{safe_project_name}_{timestamp}"
     
@@ -84,49 +108,79 @@ def generate_single_pdf(file_path: str, content: str, title: str, subtitle: str,
         print(f"   ❌ Exception: {str(e)}")
         return {"success": False, "error": str(e)}
 
-def batch_generate_pdfs():
-    """Main function to batch generate PDFs for all report files"""
+def process_report_file(file_path: str) -> dict:
+    """Read one report.txt and generate its single-page PDF (process pool entry point)"""
+    
+    content, title, subtitle, project_name = read_report_content(file_path)
+    if content is None:
+        return {
+            "project": os.path.basename(os.path.dirname(file_path)),
+            "source_file": file_path,
+            "result": {"success": False, "error": "Could not read report content"}
+        }
+    
+    result = generate_single_pdf(file_path, content, title, subtitle, project_name)
+    return {
+        "project": project_name,
+        "source_file": file_path,
+        "result": result
+    }
+
+def batch_generate_pdfs(base_dir: str = "output", max_workers: int = 1,
+                        force: bool = False, dry_run: bool = False):
+    """
+    Main function to batch generate PDFs for all report files
+    
+    Args:
+        base_dir: Base output directory to search for report.txt files
+        max_workers: Number of worker processes (1 = serial)
+        force: Regenerate PDFs even when they are newer than their report.txt
+        dry_run: Only list the reports that would be regenerated
+    """
     
     print("📄 Batch PDF Report Generator")
     print("=" * 60)
     print(f"🕒 Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     # Find all report files
-    report_files = find_report_files()
+    report_files = find_report_files(base_dir)
     
     if not report_files:
         print("\n⚠️  No report.txt files found in output subdirectories.")
         return
     
-    print(f"\n🚀 Starting batch processing of {len(report_files)} reports...")
+    # Skip reports whose single-page PDF is already newer than the source text
+    if not force:
+        stale_files = [f for f in report_files if not is_pdf_up_to_date(f, base_dir)]
+        skipped = len(report_files) - len(stale_files)
+        if skipped:
+            print(f"\n⏭️  Skipping {skipped} up-to-date reports")
+        report_files = stale_files
     
-    # Process each report
-    results = []
-    successful = 0
-    failed = 0
+    if dry_run:
+        print(f"\n🧪 DRY RUN - {len(report_files)} reports would be regenerated:")
+        for file_path in report_files:
+            print(f"   • {os.path.basename(os.path.dirname(file_path))}/report.txt")
+        return []
     
-    for i, file_path in enumerate(report_files, 1):
-        print(f"\n📋 Processing {i}/{len(report_files)}")
-        
-        # Read content
-        content, title, subtitle, project_name = read_report_content(file_path)
-        
-        if content is None:
-            failed += 1
-            continue
-        
-        # Generate PDF
-        result = generate_single_pdf(file_path, content, title, subtitle, project_name)
-        results.append({
-            "project": project_name,
-            "source_file": file_path,
-            "result": result
-        })
-        
-        if result.get('success'):
-            successful += 1
-        else:
-            failed += 1
+    if not report_files:
+        print("\n✅ All single-page PDFs are up to date.")
+        return []
+    
+    print(f"\n🚀 Starting batch processing of {len(report_files)} reports with {max_workers} worker(s)...")
+    
+    # Process each report
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(process_report_file, report_files))
+    else:
+        results = []
+        for i, file_path in enumerate(report_files, 1):
+            print(f"\n📋 Processing {i}/{len(report_files)}")
+            results.append(process_report_file(file_path))
+    
+    successful = sum(1 for r in results if r["result"].get('success'))
+    failed = len(results) - successful
     
     # Summary
     print(f"\n{'='*60}")
@@ -154,13 +208,25 @@ def batch_generate_pdfs():
                 print(f"   • {result_info['project']}: {error}")
     
     print(f"\n🕒 Completed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"📁 All PDF files saved to: output/")
+    print(f"📁 All PDF files saved to: {base_dir}/")
     
     return results
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Batch generate single-page PDF reports from report.txt files')
+    parser.add_argument('--base-dir', default='output', help='Base output directory (default: output)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes (default: 1)')
+    parser.add_argument('--force', action='store_true', help='Regenerate PDFs even if they are up to date')
+    parser.add_argument('--dry-run', action='store_true', help='List reports that would be regenerated')
+    args = parser.parse_args()
+    
     try:
-        results = batch_generate_pdfs()
+        results = batch_generate_pdfs(
+            base_dir=args.base_dir,
+            max_workers=args.workers,
+            force=args.force,
+            dry_run=args.dry_run
+        )
         
         if results:
             successful_count = sum(1 for r in results if r["result"].get("success"))
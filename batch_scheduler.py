@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Batch Screening Scheduler
+
+Ordering and progress helpers for batch environmental screenings:
+
+- Locality ordering: items that are close together (same cadastral prefix or
+  the same coordinate grid cell) are queued next to each other, so concurrent
+  screenings hit the same FIRM panels, map extents and upstream caches
+- Progress metrics: per-item durations, throughput and an ETA for the items
+  still queued, used by the batch status endpoint
+"""
+
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Grid cell size in degrees (~5.5 km in Puerto Rico, about one FIRM panel)
+LOCALITY_CELL_DEGREES = 0.05
+
+
+def locality_key(request: Dict[str, Any], cell_degrees: float = LOCALITY_CELL_DEGREES) -> Tuple:
+    """
+    Get a sort key that groups nearby screening requests
+
+    Args:
+        request: Screening request data (coordinates as [longitude, latitude],
+            cadastral_number and/or location_name)
+        cell_degrees: Grid cell size used to bucket coordinates
+
+    Returns:
+        Tuple sort key; coordinates sort before cadastral numbers, which sort
+        before location names
+    """
+    coordinates = request.get("coordinates")
+    if coordinates and len(coordinates) >= 2:
+        try:
+            longitude, latitude = float(coordinates[0]), float(coordinates[1])
+            return (0, math.floor(latitude / cell_degrees), math.floor(longitude / cell_degrees))
+        except (TypeError, ValueError):
+            pass
+
+    cadastral_number = (request.get("cadastral_number") or "").strip()
+    if cadastral_number:
+        # Puerto Rico cadastral numbers start with the municipality/quadrangle segment
+        return (1, cadastral_number.split("-")[0], cadastral_number)
+
+    location_name = (request.get("location_name") or "").strip().lower()
+    return (2, location_name, "")
+
+
+def order_by_locality(requests: Sequence[Dict[str, Any]],
+                      cell_degrees: float = LOCALITY_CELL_DEGREES) -> List[int]:
+    """
+    Order batch items so that nearby requests run together
+
+    The sort is stable: items in the same locality keep their submission order.
+
+    Args:
+        requests: Screening request data in submission order
+        cell_degrees: Grid cell size used to bucket coordinates
+
+    Returns:
+        Indexes into requests in the order they should be queued
+    """
+    return sorted(range(len(requests)), key=lambda i: locality_key(requests[i], cell_degrees))
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def batch_progress_metrics(items: Sequence[Dict[str, Any]], concurrency: Optional[int] = None,
+                           now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Calculate throughput and ETA for a batch
+
+    Args:
+        items: Batch jobs with status, start_time and end_time (ISO format)
+        concurrency: Maximum items of the batch running at once (optional)
+        now: Current time (defaults to datetime.now())
+
+    Returns:
+        Dictionary with per-item durations, average duration, throughput in
+        items per minute and estimated seconds remaining
+    """
+    now = now or datetime.now()
+    durations: Dict[str, float] = {}
+    first_start: Optional[datetime] = None
+    finished = 0
+
+    for item in items:
+        start = _parse_time(item.get("start_time"))
+        end = _parse_time(item.get("end_time"))
+        if start and (first_start is None or start < first_start):
+            first_start = start
+        if start and end:
+            durations[item["id"]] = round((end - start).total_seconds(), 2)
+            finished += 1
+
+    remaining = len(items) - finished
+    elapsed = (now - first_start).total_seconds() if first_start else 0.0
+    throughput = finished / (elapsed / 60) if finished and elapsed > 0 else None
+    average_duration = sum(durations.values()) / len(durations) if durations else None
+
+    eta_seconds = None
+    if remaining == 0:
+        eta_seconds = 0.0
+    elif throughput:
+        eta_seconds = remaining / throughput * 60
+    elif average_duration and concurrency:
+        eta_seconds = math.ceil(remaining / concurrency) * average_duration
+
+    return {
+        "item_durations": durations,
+        "average_item_seconds": round(average_duration, 2) if average_duration is not None else None,
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_per_minute": round(throughput, 3) if throughput is not None else None,
+        "eta_seconds": round(eta_seconds, 1) if eta_seconds is not None else None,
+        "concurrency": concurrency,
+    }
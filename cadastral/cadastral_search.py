@@ -7,10 +7,14 @@ Search and retrieve MIPR data by cadastral numbers
 import sys
 import os
 import json
-import requests
+
 from typing import Dict, List, Any, Optional, Tuple, Union
 from collections import defaultdict
 
+from upstream_http import shared_session
+
+http = shared_session()
+
 # Add the parent directory to the path to access mapmaker
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
@@ -56,7 +60,7 @@ class MIPRCadastralSearch:
             # Query the service
             query_url = f"{self.service_url}/0/query"
             
-            response = requests.get(query_url, params=params, verify=False, timeout=15)
+            response = http.get(query_url, params=params, verify=False, timeout=15)
             response.raise_for_status()
             data = response.json()
             
@@ -124,7 +128,7 @@ class MIPRCadastralSearch:
             # Query the service
             query_url = f"{self.service_url}/0/query"
             
-            response = requests.get(query_url, params=params, verify=False, timeout=20)
+            response = http.get(query_url, params=params, verify=False, timeout=20)
             response.raise_for_status()
             data = response.json()
             
@@ -250,7 +254,7 @@ class MIPRCadastralSearch:
                 'orderByFields': 'SHAPE.STArea() DESC'
             }
             
-            response = requests.get(query_url, params=params, verify=False, timeout=15)
+            response = http.get(query_url, params=params, verify=False, timeout=15)
             response.raise_for_status()
             data = response.json()
             
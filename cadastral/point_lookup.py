@@ -7,10 +7,14 @@ Retrieve MIPR land use classification and cadastral data for specific coordinate
 import sys
 import os
 import json
-import requests
+
 from typing import Dict, List, Any, Optional, Tuple
 from collections import defaultdict
 
+from upstream_http import shared_session
+
+http = shared_session()
+
 # Add the parent directory to the path to access mapmaker
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
@@ -54,7 +58,7 @@ class MIPRPointLookup:
             # Query the service with exact point intersection (no buffer)
             query_url = f"{self.service_url}/0/query"
             
-            response = requests.get(query_url, params=params, verify=False, timeout=15)
+            response = http.get(query_url, params=params, verify=False, timeout=15)
             response.raise_for_status()
             data = response.json()
             
@@ -115,7 +119,7 @@ class MIPRPointLookup:
             # Query the service
             query_url = f"{self.service_url}/0/query"
             
-            response = requests.get(query_url, params=params, verify=False, timeout=15)
+            response = http.get(query_url, params=params, verify=False, timeout=15)
             response.raise_for_status()
             data = response.json()
             
@@ -418,7 +422,7 @@ class MIPRPointLookup:
             
             # Query the service
             query_url = f"{self.service_url}/0/query"
-            response = requests.get(query_url, params=params, verify=False, timeout=15)
+            response = http.get(query_url, params=params, verify=False, timeout=15)
             response.raise_for_status()
             data = response.json()
             
@@ -29,22 +29,14 @@ import os
 import sys
 from typing import Annotated
 from langchain_core.messages import HumanMessage
-from langgraph.prebuilt import create_react_agent
-from comprehensive_flood_tool import COMPREHENSIVE_FLOOD_TOOLS, get_comprehensive_tool_description
-from wetland_analysis_tool import COMPREHENSIVE_WETLAND_TOOL
-from cadastral.cadastral_data_tool import CADASTRAL_DATA_TOOLS
-from comprehensive_screening_report_tool import COMPREHENSIVE_SCREENING_TOOLS
-from output_directory_manager import get_output_manager, create_screening_directory, PROJECT_DIRECTORY_TOOLS
+from langgraph.prebuilt import create_react_agent, ToolNode
 
-# Add karst tools
-from karst.karst_tools import KARST_TOOLS
+# Tool modules (flood, wetland, cadastral, karst, habitat, nonattainment, reports)
+# are imported by the registry on first use, not here
+from tool_registry import get_agent_tools
 
-# Add habitat tools
+# Habitat tools resolve their own modules from the HabitatINFO directory
 sys.path.append(os.path.join(os.path.dirname(__file__), 'HabitatINFO'))
-from HabitatINFO.tools import habitat_tools
-
-# Add comprehensive nonattainment analysis tool
-from nonattainment_analysis_tool import COMPREHENSIVE_NONATTAINMENT_TOOL
 
 from langgraph.checkpoint.memory import MemorySaver
 
@@ -60,12 +52,15 @@ def create_comprehensive_environmental_agent():
     model = "google_genai:gemini-2.5-flash-preview-04-17"
     memory = MemorySaver()
     # Combine all comprehensive tools including cadastral data tools, karst tools, habitat tools, nonattainment analysis, and PDF generation
-    all_tools = COMPREHENSIVE_FLOOD_TOOLS + COMPREHENSIVE_WETLAND_TOOL + CADASTRAL_DATA_TOOLS + KARST_TOOLS + habitat_tools + [COMPREHENSIVE_NONATTAINMENT_TOOL] + COMPREHENSIVE_SCREENING_TOOLS + PROJECT_DIRECTORY_TOOLS
+    # (lazy proxies: each tool's module is imported when the agent first calls it)
+    all_tools = get_agent_tools()
     
     # Create the agent with comprehensive environmental tools
+    # The tool node runs all tool calls of one LLM turn concurrently; each tool enforces
+    # its own timeout and reports failures as error results instead of aborting the turn
     agent = create_react_agent(
         model=model,
-        tools=all_tools,
+        tools=ToolNode(all_tools),
         checkpointer=memory,
         prompt="""You are a comprehensive environmental screening specialist agent. Your mission is to perform complete environmental analysis for any location using powerful comprehensive tools and generate professional screening reports.
 
@@ -131,6 +126,12 @@ Provide thorough environmental screening that integrates property characteristic
    ✓ generate_adaptive_critical_habitat_map
    ✓ analyze_nonattainment_with_map
 
+   ⚡ BATCH INDEPENDENT ANALYSES IN ONE TURN:
+   • Once the coordinates are known, request karst, flood, wetland, critical habitat and air quality
+     analyses TOGETHER as multiple tool calls in a SINGLE response - they run concurrently
+   • Do not wait for one domain's result before requesting the next; they do not depend on each other
+   • If one analysis fails or times out, continue with the others and note the gap in the report
+
 4️⃣ MANDATORY COMPREHENSIVE REPORT GENERATION
    IMMEDIATELY AFTER completing all environmental analyses, ALWAYS execute:
    
@@ -212,6 +213,7 @@ Provide thorough environmental screening that integrates property characteristic
 
 1. ONE CALL PER TOOL: Never repeat the same analysis
 2. COORDINATE CONSISTENCY: Use same coordinates for all environmental analyses
+   - Batch the site analyses: one response with all their tool calls, executed in parallel
 3. FLOOD ANALYSIS ONCE: comprehensive_flood_analysis generates ONE comprehensive report containing all flood components (FIRMette, Preliminary Comparison, ABFE) - never call multiple times
 4. MANDATORY REPORTING: ALWAYS finish with find_latest_screening_directory + generate_comprehensive_screening_report
 5. NEVER SKIP REPORTING: The comprehensive report generation is REQUIRED for every screening
@@ -224,6 +226,9 @@ Provide thorough environmental screening that integrates property characteristic
      • "Environmental screening for residential development in Miami" → "Residential_Development_Environmental_Assessment_Miami"
      • "Property assessment for marina project" → "Marina_Project_Property_Assessment"
      • "Due diligence for commercial property" → "Commercial_Property_Due_Diligence_Assessment"
+9. COMPACT TOOL RESULTS: Large tool results are summarized; "_details.full_result_file" points to the full data on disk
+   - Base your analysis on the summary and cite the referenced files
+   - NEVER re-run a tool to recover omitted details - the comprehensive report reads the full data files
 
 🎯 SPECIFIC SCENARIOS
 
@@ -295,7 +300,7 @@ Puerto Rico example: (-66.150906, 18.434059)
 1. User requests environmental screening for Location X
 2. Agent extracts project context from user query (development type, purpose, etc.) - OPTIONAL
 3. Agent calls create_intelligent_project_directory with optional project_description
-4. Agent performs all applicable environmental analyses (using existing project directory)
+4. Agent requests all applicable environmental analyses in ONE turn (using existing project directory)
 5. Agent AUTOMATICALLY calls find_latest_screening_directory
 6. Agent AUTOMATICALLY calls generate_comprehensive_screening_report
 7. Agent provides user with complete analysis PLUS comprehensive report confirmation
@@ -377,6 +382,7 @@ def main():
     ]
     
     print(f"\n📋 Available Tools:")
+    from comprehensive_flood_tool import get_comprehensive_tool_description
     flood_description = get_comprehensive_tool_description()
     print(f"   • Property/Cadastral Analysis: Retrieve property data, land use classification, zoning, and development potential")
     print(f"   • Karst Analysis: PRAPEC karst area assessment and regulatory compliance (Puerto Rico)")
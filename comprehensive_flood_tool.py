@@ -22,6 +22,7 @@ from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
 from pydantic.v1 import BaseModel, Field
 import asyncio
+import contextvars
 import concurrent.futures
 
 # PDF merging imports
@@ -40,11 +41,25 @@ except ImportError:
 sys.path.append(os.path.join(os.path.dirname(__file__), 'FloodINFO'))
 
 from langchain_core.tools import tool
-from query_coordinates_data import query_coordinate_data, save_results_to_file, extract_panel_information
+from query_coordinates_data import query_coordinate_data, save_results_to_file, extract_panel_information, preliminary_data_availability
 from firmette_client import FEMAFIRMetteClient
 from preliminary_comparison_client import FEMAPreliminaryComparisonClient
 from abfe_client import FEMAABFEClient
 from output_directory_manager import get_output_manager
+from screening_tracing import span, traced
+
+# ABFE map policy:
+# - "when_data" (default): skip the ABFE print job when every layer query succeeds and finds
+#   no ABFE data; the precheck summary is returned in place of the map. A failed service or
+#   layer query never skips the map
+# - "always": always print a map, a regional reference map when there is no ABFE data
+ABFE_MAP_POLICY = os.getenv("ABFE_MAP_POLICY", "when_data").lower()
+
+# Preliminary Comparison policy:
+# - "when_data" (default): skip the MSC print job when step 1 found the Preliminary Data
+#   Availability layer empty at the point (the job would fail or return an empty comparison)
+# - "always": always submit the job
+PRELIMINARY_COMPARISON_POLICY = os.getenv("PRELIMINARY_COMPARISON_POLICY", "when_data").lower()
 
 # Remove the old output directory creation
 # os.makedirs('output', exist_ok=True)
@@ -151,7 +166,8 @@ def comprehensive_flood_analysis(
     try:
         # Step 1: Query comprehensive flood data
         print("📊 Step 1: Querying comprehensive FEMA flood data...")
-        flood_data = query_coordinate_data(longitude, latitude, location_name)
+        with span("query flood data", kind="step"):
+            flood_data = query_coordinate_data(longitude, latitude, location_name)
         
         # Save flood data to project logs directory
         logs_dir = output_manager.get_subdirectory("logs")
@@ -193,19 +209,31 @@ def comprehensive_flood_analysis(
         if generate_reports:
             print("📄 Step 3: Generating flood reports...")
             
-            # Use concurrent execution for faster report generation
+            # Use concurrent execution for faster report generation; each job runs in a
+            # copy of the caller's context so it resolves to the same screening workspace
             with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
                 futures = {}
                 
                 # Submit FIRMette generation
-                futures['firmette'] = executor.submit(_generate_firmette_safe, longitude, latitude, location_name, output_manager)
+                futures['firmette'] = executor.submit(contextvars.copy_context().run, _generate_firmette_safe, longitude, latitude, location_name, output_manager)
                 
-                # Submit Preliminary Comparison generation
-                futures['preliminary_comparison'] = executor.submit(_generate_preliminary_safe, longitude, latitude, location_name, output_manager)
+                # Submit Preliminary Comparison generation, unless step 1 showed there is no preliminary data
+                preliminary_available = preliminary_data_availability(flood_data)
+                if preliminary_available is False and PRELIMINARY_COMPARISON_POLICY != "always":
+                    print("⏭️  No preliminary FIRM data at this location - skipping Preliminary Comparison job")
+                    result["reports_generated"]["preliminary_comparison"].update({
+                        "skipped": True,
+                        "data_available": False,
+                        "message": "No preliminary FIRM data available for this location - Preliminary Comparison report not generated",
+                        "note": f"Skipped by PRELIMINARY_COMPARISON_POLICY={PRELIMINARY_COMPARISON_POLICY}; "
+                                "the Preliminary Data Availability layer is empty at this point"
+                    })
+                else:
+                    futures['preliminary_comparison'] = executor.submit(contextvars.copy_context().run, _generate_preliminary_safe, longitude, latitude, location_name, output_manager)
                 
                 # Submit ABFE generation if requested
                 if include_abfe:
-                    futures['abfe_map'] = executor.submit(_generate_abfe_safe, longitude, latitude, location_name, output_manager)
+                    futures['abfe_map'] = executor.submit(contextvars.copy_context().run, _generate_abfe_safe, longitude, latitude, location_name, output_manager)
                 
                 # Collect results
                 for report_type, future in futures.items():
@@ -219,7 +247,8 @@ def comprehensive_flood_analysis(
         # Step 4: Merge PDFs if requested and reports were generated
         if generate_reports and merge_pdfs:
             print("📄 Step 4: Merging generated PDFs...")
-            merge_result = _merge_generated_pdfs(result, location_name, output_manager)
+            with span("merge PDFs", kind="step"):
+                merge_result = _merge_generated_pdfs(result, location_name, output_manager)
             result["pdf_merge"] = merge_result
         else:
             result["pdf_merge"] = {"requested": False, "success": False, "message": "PDF merging not requested"}
@@ -491,6 +520,7 @@ def _generate_overall_summary(extracted: Dict[str, Any]):
         "primary_identifiers": primary_identifiers
     }
 
+@traced("FIRMette report")
 def _generate_firmette_safe(longitude: float, latitude: float, location_name: str, output_manager) -> Dict[str, Any]:
     """Safely generate FIRMette report with error handling"""
     try:
@@ -526,6 +556,7 @@ def _generate_firmette_safe(longitude: float, latitude: float, location_name: st
             "message": f"FIRMette generation error: {str(e)}"
         }
 
+@traced("Preliminary Comparison report")
 def _generate_preliminary_safe(longitude: float, latitude: float, location_name: str, output_manager) -> Dict[str, Any]:
     """Safely generate Preliminary Comparison report with error handling"""
     try:
@@ -561,13 +592,28 @@ def _generate_preliminary_safe(longitude: float, latitude: float, location_name:
             "message": f"Preliminary Comparison generation error: {str(e)}"
         }
 
+@traced("ABFE report")
 def _generate_abfe_safe(longitude: float, latitude: float, location_name: str, output_manager) -> Dict[str, Any]:
     """Safely generate ABFE map with error handling - always generates a map with point location"""
     try:
         client = FEMAABFEClient()
         
         # First check if ABFE data is available
-        abfe_summary = client.get_abfe_summary(longitude, latitude, location_name)
+        with span("ABFE data precheck", kind="step"):
+            abfe_summary = client.get_abfe_summary(longitude, latitude, location_name)
+        
+        if abfe_summary['abfe_data_absent'] and ABFE_MAP_POLICY != "always":
+            print("⏭️  No ABFE data available - skipping ABFE map job")
+            return {
+                "success": False,
+                "skipped": True,
+                "message": "No ABFE data available for this location - ABFE map not generated",
+                "data_available": False,
+                "abfe_values": [],
+                "layers_summary": abfe_summary['layers_summary'],
+                "recommendations": abfe_summary['recommendations'],
+                "note": f"Skipped by ABFE_MAP_POLICY={ABFE_MAP_POLICY}; set ABFE_MAP_POLICY=always for a reference map"
+            }
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         safe_name = location_name.replace(' ', '_').replace(',', '').replace('(', '').replace(')', '')
@@ -578,7 +624,9 @@ def _generate_abfe_safe(longitude: float, latitude: float, location_name: str, o
             # No ABFE data - generate larger area map with point marker
             buffer_miles = 2.0  # Larger radius for context
             map_title = f"ABFE Reference Map - {location_name}"
-            map_message = "No ABFE data available for this location - showing regional context"
+            map_message = ("No ABFE data available for this location - showing regional context"
+                           if abfe_summary['abfe_data_absent'] else
+                           "ABFE data could not be checked for this location - showing regional context")
             print(f"🗺️  No ABFE data available - generating reference map with {buffer_miles}-mile radius")
         else:
             # ABFE data available - use standard parameters
@@ -787,7 +835,8 @@ def _generate_analysis_summary(result: Dict[str, Any]) -> Dict[str, Any]:
     
     # Count successful reports
     successful_reports = sum(1 for report in reports.values() if report.get("success", False))
-    requested_reports = sum(1 for report in reports.values() if report.get("requested", False))
+    requested_reports = sum(1 for report in reports.values() if report.get("requested", False) and not report.get("skipped", False))
+    skipped_reports = [name for name, report in reports.items() if report.get("skipped", False)]
     
     # Extract key findings
     current_summary = flood_info["current_effective"]["summary"]
@@ -809,6 +858,7 @@ def _generate_analysis_summary(result: Dict[str, Any]) -> Dict[str, Any]:
         "reports_summary": {
             "reports_requested": requested_reports,
             "reports_generated": successful_reports,
+            "reports_skipped": skipped_reports,
             "firmette_success": reports["firmette"].get("success", False),
             "preliminary_comparison_success": reports["preliminary_comparison"].get("success", False),
             "abfe_map_success": reports["abfe_map"].get("success", False),
@@ -865,9 +915,13 @@ def _generate_recommendations(flood_info: Dict[str, Any], reports: Dict[str, Any
     
     if reports["preliminary_comparison"]["success"]:
         recommendations.append("Review the preliminary comparison report to understand upcoming flood map changes.")
+    elif reports["preliminary_comparison"].get("skipped"):
+        recommendations.append("No preliminary FIRM data exists at this location; current effective maps apply and no Preliminary Comparison report was generated.")
     
     if reports["abfe_map"]["success"]:
         recommendations.append("ABFE data provides advisory flood elevation guidance for planning purposes.")
+    elif reports["abfe_map"].get("skipped"):
+        recommendations.append("No Advisory Base Flood Elevation (ABFE) data exists at this location; no ABFE map was generated.")
     
     # PDF merge recommendations
     if result:
@@ -24,24 +24,42 @@ from typing import Dict, List, Any, Optional
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
 
-# Import the enhanced generator
-try:
-    from llm_enhanced_report_generator import EnhancedComprehensiveReportGenerator
-    LLM_AVAILABLE = True
-except ImportError:
-    print("⚠️ Warning: LLM-enhanced generator not available, using standard generator")
-    LLM_AVAILABLE = False
-
 # Always import the base generator
 from comprehensive_report_generator import ComprehensiveReportGenerator
+from progressive_maps import wait_for_maps
+
+# The LLM-enhanced and PDF generators pull in the LLM stack and reportlab, so they
+# are imported the first time a report needs them rather than at import time
+_optional_generators: Dict[str, Any] = {}
+
+
+def _enhanced_generator_class():
+    """EnhancedComprehensiveReportGenerator, or None when the LLM stack is unavailable"""
+    if "llm" not in _optional_generators:
+        try:
+            from llm_enhanced_report_generator import EnhancedComprehensiveReportGenerator
+            _optional_generators["llm"] = EnhancedComprehensiveReportGenerator
+        except ImportError:
+            print("⚠️ Warning: LLM-enhanced generator not available, using standard generator")
+            _optional_generators["llm"] = None
+    return _optional_generators["llm"]
+
+
+def _pdf_generator_class():
+    """ScreeningPDFGenerator, or None when reportlab / Pillow are missing"""
+    if "pdf" not in _optional_generators:
+        try:
+            from pdf_report_generator import ScreeningPDFGenerator
+            _optional_generators["pdf"] = ScreeningPDFGenerator
+        except ImportError:
+            print("⚠️ Warning: PDF generation not available - install reportlab pillow")
+            _optional_generators["pdf"] = None
+    return _optional_generators["pdf"]
 
-# Import PDF generator
-try:
-    from pdf_report_generator import ScreeningPDFGenerator
-    PDF_AVAILABLE = True
-except ImportError:
-    print("⚠️ Warning: PDF generation not available - install reportlab pillow")
-    PDF_AVAILABLE = False
+
+def llm_available() -> bool:
+    """Whether the LLM-enhanced generator can be used"""
+    return _enhanced_generator_class() is not None
 
 # Pydantic input models for LangChain tools
 class ScreeningReportInput(BaseModel):
@@ -60,6 +78,8 @@ class AutoDiscoveryInput(BaseModel):
     include_pdf: bool = Field(default=True, description="Whether to generate PDF reports with embedded maps")
     use_llm: bool = Field(default=True, description="Whether to use LLM enhancement for analysis")
     model_name: str = Field(default="grok-3-mini", description="LLM model to use for enhancement")
+    max_workers: int = Field(default=1, description="Number of worker processes for parallel regeneration")
+    skip_up_to_date: bool = Field(default=False, description="Skip projects whose reports are newer than their data files")
 
 class ScreeningReportTool:
     """Tool for generating comprehensive reports from screening output directories"""
@@ -67,12 +87,16 @@ class ScreeningReportTool:
     def __init__(self, output_directory: str, use_llm: bool = True, model_name: str = "grok-3-mini"):
         self.output_directory = Path(output_directory).resolve()
         self.data_directory = self.output_directory / "data"
-        self.use_llm = use_llm and LLM_AVAILABLE
+        self.use_llm = use_llm and llm_available()
         self.model_name = model_name
         
         # Validate directory structure
         self._validate_directory_structure()
         
+        # Print-quality maps still rendering in the background are embedded, not their previews
+        if not wait_for_maps(str(self.output_directory)):
+            print("⚠️ Some print-quality maps are still rendering; the report embeds the maps finished so far")
+        
         # Initialize appropriate generator
         self._initialize_generator()
     
@@ -101,10 +125,10 @@ class ScreeningReportTool:
         
         data_dir_str = str(self.data_directory)
         
-        if self.use_llm and LLM_AVAILABLE:
+        if self.use_llm:
             print(f"🤖 Initializing LLM-enhanced generator with model: {self.model_name}")
             try:
-                self.generator = EnhancedComprehensiveReportGenerator(
+                self.generator = _enhanced_generator_class()(
                     data_directory=data_dir_str,
                     model_name=self.model_name,
                     use_llm=True
@@ -171,7 +195,8 @@ class ScreeningReportTool:
             # MANDATORY PDF GENERATION - Always attempt to generate PDF
             pdf_generation_attempted = False
             if include_pdf:
-                if PDF_AVAILABLE:
+                ScreeningPDFGenerator = _pdf_generator_class()
+                if ScreeningPDFGenerator is not None:
                     try:
                         print(f"📄 Generating MANDATORY PDF report...")
                         pdf_generator = ScreeningPDFGenerator(
@@ -319,8 +344,17 @@ def find_screening_directories(base_path: str = "output") -> List[Path]:
 def auto_discover_and_process(base_output_dir: str = "output", 
                              use_llm: bool = True, 
                              output_format: str = "both",
-                             include_pdf: bool = True) -> Dict[str, List[str]]:
-    """Auto-discover and process all screening directories"""
+                             include_pdf: bool = True,
+                             max_workers: int = 1,
+                             llm_concurrency: int = 2,
+                             skip_up_to_date: bool = False) -> Dict[str, List[str]]:
+    """
+    Auto-discover and process all screening directories
+    
+    With max_workers > 1 or skip_up_to_date, processing is delegated to the
+    parallel regeneration runner, which skips directories whose reports are newer
+    than their data inputs and bounds concurrent LLM calls to llm_concurrency.
+    """
     
     print(f"🔍 Auto-discovering screening directories in: {base_output_dir}")
     
@@ -331,6 +365,23 @@ def auto_discover_and_process(base_output_dir: str = "output",
     
     print(f"📄 PDF Generation: ENABLED (MANDATORY) for all discovered projects")
     
+    if max_workers > 1 or skip_up_to_date:
+        from report_regeneration_runner import regenerate_reports_parallel, get_latest_report_outputs
+        
+        outcome = regenerate_reports_parallel(
+            base_output_dir=base_output_dir,
+            max_workers=max_workers,
+            llm_concurrency=llm_concurrency,
+            use_llm=use_llm,
+            output_format=output_format,
+            force=not skip_up_to_date
+        )
+        results = {directory: result["output_files"] for directory, result in outcome["results"].items()}
+        # Up-to-date directories report their existing outputs
+        for directory in outcome["skipped"]:
+            results[directory] = [str(f) for f in get_latest_report_outputs(Path(directory), output_format)]
+        return results
+    
     screening_dirs = find_screening_directories(base_output_dir)
     
     if not screening_dirs:
@@ -384,6 +435,12 @@ Examples:
   # Auto-discover and process all screening directories
   python comprehensive_screening_report_tool.py --auto-discover
 
+  # Rebuild only stale directories with 8 workers and at most 2 concurrent LLM calls
+  python comprehensive_screening_report_tool.py --auto-discover --skip-up-to-date --workers 8 --llm-concurrency 2
+
+  # List stale directories without regenerating anything
+  python comprehensive_screening_report_tool.py --auto-discover --skip-up-to-date --dry-run
+
   # Generate only JSON format with custom filename
   python comprehensive_screening_report_tool.py output/MyProject --format json --output my_report
 
@@ -409,6 +466,14 @@ Examples:
                        help='Display summary only, do not generate report files')
     parser.add_argument('--base-dir', default='output',
                        help='Base directory for auto-discovery (default: output)')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Worker processes for auto-discovery (default: 1, serial)')
+    parser.add_argument('--llm-concurrency', type=int, default=2,
+                       help='Maximum concurrent LLM calls across workers (default: 2)')
+    parser.add_argument('--skip-up-to-date', action='store_true',
+                       help='Skip directories whose reports are newer than their data inputs')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='With --auto-discover, list directories that would be rebuilt and exit')
     
     args = parser.parse_args()
     
@@ -419,6 +484,18 @@ Examples:
     print("🌍 Comprehensive Environmental Screening Report Tool")
     print("=" * 60)
     
+    if args.auto_discover and args.dry_run:
+        # Dry run: list stale directories only
+        from report_regeneration_runner import regenerate_reports_parallel
+        
+        regenerate_reports_parallel(
+            base_output_dir=args.base_dir,
+            output_format=args.format,
+            force=not args.skip_up_to_date,
+            dry_run=True
+        )
+        return 0
+    
     if args.auto_discover:
         # Auto-discover mode
         print(f"🔄 Auto-discovering screening directories...")
@@ -427,7 +504,10 @@ Examples:
             base_output_dir=args.base_dir,
             use_llm=not args.no_llm,
             output_format=args.format,
-            include_pdf=not args.no_pdf
+            include_pdf=not args.no_pdf,
+            max_workers=args.workers,
+            llm_concurrency=args.llm_concurrency,
+            skip_up_to_date=args.skip_up_to_date
         )
         
         # Summary
@@ -468,7 +548,7 @@ Examples:
             print(f"❌ Error: {e}")
             return 1
     
-    print(f"\n{'🤖' if not args.no_llm and LLM_AVAILABLE else '📋'} Processing complete!")
+    print(f"\n{'🤖' if not args.no_llm and llm_available() else '📋'} Processing complete!")
     return 0
 
 
@@ -599,7 +679,7 @@ def generate_comprehensive_screening_report(
             },
             "summary": summary,
             "file_counts": file_counts,
-            "llm_enhanced": use_llm and LLM_AVAILABLE,
+            "llm_enhanced": use_llm and llm_available(),
             "pdf_mandatory_status": "PDF generation is MANDATORY and was attempted",
             "output_directory": output_directory
         }
@@ -622,7 +702,9 @@ def auto_discover_and_generate_reports(
     output_format: str = "both", 
     include_pdf: bool = True,
     use_llm: bool = True,
-    model_name: str = "grok-3-mini"
+    model_name: str = "grok-3-mini",
+    max_workers: int = 1,
+    skip_up_to_date: bool = False
 ) -> Dict[str, Any]:
     """
     Auto-discover screening directories and generate comprehensive reports for all projects.
@@ -646,6 +728,8 @@ def auto_discover_and_generate_reports(
         include_pdf: Whether to generate PDF reports with embedded maps (ALWAYS FORCED TO TRUE)
         use_llm: Whether to use LLM enhancement for analysis
         model_name: LLM model to use for enhancement
+        max_workers: Number of worker processes for parallel regeneration
+        skip_up_to_date: Skip projects whose reports are newer than their data files
         
     Returns:
         Dictionary containing:
@@ -671,7 +755,9 @@ def auto_discover_and_generate_reports(
             base_output_dir=base_output_dir,
             use_llm=use_llm,
             output_format=output_format,
-            include_pdf=True  # Always force PDF generation
+            include_pdf=True,  # Always force PDF generation
+            max_workers=max_workers,
+            skip_up_to_date=skip_up_to_date
         )
         
         # Process results
@@ -743,7 +829,7 @@ def auto_discover_and_generate_reports(
             "summary_stats": summary_stats,
             "pdf_generation_summary": pdf_generation_summary,
             "base_directory": base_output_dir,
-            "llm_enhanced": use_llm and LLM_AVAILABLE,
+            "llm_enhanced": use_llm and llm_available(),
             "pdf_mandatory_status": "PDF generation is MANDATORY and was attempted for all projects"
         }
         
@@ -783,6 +869,22 @@ def find_latest_screening_directory(base_dir: str = "output") -> Dict[str, Any]:
     try:
         print(f"🔍 Finding latest screening directory in: {base_dir}")
         
+        # Prefer the directory created by the current screening's workspace; the newest
+        # directory on disk may belong to a concurrent screening
+        from output_directory_manager import get_output_manager
+        workspace_dir = get_output_manager().current_project_dir
+        if workspace_dir and Path(workspace_dir).is_dir():
+            latest_dir = Path(workspace_dir)
+            print(f"✅ Using current screening workspace: {latest_dir.name}")
+            return {
+                "success": True,
+                "latest_directory": str(latest_dir),
+                "project_name": latest_dir.name,
+                "creation_time": datetime.fromtimestamp(latest_dir.stat().st_mtime).isoformat(),
+                "available_directories": [str(latest_dir)],
+                "total_directories": 1
+            }
+        
         # Find all screening directories
         screening_dirs = find_screening_directories(base_dir)
         
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Efficient File Delivery for the Web Servers
+
+Helpers shared by app.py and advanced_frontend_server.py:
+
+- file_response(): FileResponse with strong ETag / Last-Modified validators,
+  If-None-Match / If-Modified-Since (304) handling and single byte-range
+  requests (206) so PDF viewers can fetch large reports piecewise
+- stream_zip(): builds a ZIP archive while it is being sent, without a
+  temporary file and without holding the archive in memory
+- JSONCompressionMiddleware: gzip (or brotli, when installed) compression of
+  JSON API responses only; files and event streams are passed through untouched
+"""
+
+import gzip
+import mimetypes
+import os
+import zipfile
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+from urllib.parse import quote
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Chunk size used when streaming file ranges and ZIP members
+CHUNK_SIZE = 64 * 1024
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """Strong ETag from the file's size, modification time and inode"""
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}-{stat_result.st_ino:x}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag (weak comparison)"""
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _if_range_matches(header: str, etag: str, last_modified: str) -> bool:
+    """Check an If-Range header value; entity tags use strong comparison, so weak validators never match"""
+    validator = header.strip()
+    if validator.startswith("W/"):
+        return False
+    return validator == etag or validator == last_modified
+
+
+def is_not_modified(request_headers: Headers, etag: str, mtime: float) -> bool:
+    """
+    Evaluate conditional GET headers
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110).
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+    return False
+
+
+def parse_range(header: str, size: int) -> Union[Tuple[int, int], str, None]:
+    """
+    Parse a single byte range
+
+    Args:
+        header: Range header value, e.g. 'bytes=0-1023', 'bytes=1024-', 'bytes=-500'
+        size: File size in bytes
+
+    Returns:
+        (start, end) inclusive, 'unsatisfiable', or None to send the whole file
+        (malformed or multi-range requests)
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, dash, end_text = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if start_text == "":
+            suffix = int(end_text)
+            if suffix <= 0:
+                return "unsatisfiable"
+            return max(size - suffix, 0), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return "unsatisfiable"
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _content_disposition(filename: str, inline: bool) -> str:
+    disposition = "inline" if inline else "attachment"
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+def _iter_file_range(path: Path, start: int, end: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def file_response(
+    request: Request,
+    path: Union[str, Path],
+    filename: Optional[str] = None,
+    media_type: Optional[str] = None,
+    inline: bool = False
+) -> Response:
+    """
+    Serve a file with conditional GET and byte-range support
+
+    Args:
+        request: Incoming request (for If-None-Match, If-Modified-Since, Range, If-Range)
+        path: File to serve
+        filename: Download name (defaults to the file name)
+        media_type: Content type (guessed from the file name if omitted)
+        inline: Display in the browser instead of downloading
+
+    Returns:
+        304, 206, 416 or full 200 response
+    """
+    path = Path(path)
+    stat_result = path.stat()
+    filename = filename or path.name
+    media_type = media_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    etag = file_etag(stat_result)
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+    headers: Dict[str, str] = {
+        "etag": etag,
+        "last-modified": last_modified,
+        "accept-ranges": "bytes",
+        # Cache, but revalidate: reports can be regenerated under the same name
+        "cache-control": "no-cache",
+    }
+
+    if is_not_modified(request.headers, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    headers["content-disposition"] = _content_disposition(filename, inline)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    range_valid = if_range is None or _if_range_matches(if_range, etag, last_modified)
+    if range_header and range_valid:
+        byte_range = parse_range(range_header, stat_result.st_size)
+        if byte_range == "unsatisfiable":
+            return Response(status_code=416, headers={"content-range": f"bytes */{stat_result.st_size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+            headers["content-length"] = str(end - start + 1)
+            return StreamingResponse(_iter_file_range(path, start, end), status_code=206,
+                                     media_type=media_type, headers=headers)
+
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+
+class _ZipStreamBuffer:
+    """Write-only, non-seekable sink that hands written bytes to the response"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def seekable(self) -> bool:
+        return False
+
+    def drain(self) -> Iterator[bytes]:
+        if self._chunks:
+            data = b"".join(self._chunks)
+            self._chunks = []
+            yield data
+
+
+def stream_zip(files: Iterable[Tuple[Path, str]]) -> Iterator[bytes]:
+    """
+    Generate a ZIP archive chunk by chunk
+
+    Members are written with data descriptors, so nothing is buffered beyond the
+    chunk currently being compressed.
+
+    Args:
+        files: (path, name inside the archive) pairs
+
+    Yields:
+        Archive bytes
+    """
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for path, arcname in files:
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with open(path, "rb") as source, archive.open(info, "w") as target:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    yield from buffer.drain()
+            yield from buffer.drain()
+    yield from buffer.drain()
+
+
+def zip_response(files: Iterable[Tuple[Path, str]], filename: str) -> StreamingResponse:
+    """Stream a ZIP archive of the given files as a download"""
+    return StreamingResponse(
+        stream_zip(files),
+        media_type="application/zip",
+        headers={"content-disposition": _content_disposition(filename, inline=False)}
+    )
+
+
+class JSONCompressionMiddleware:
+    """
+    Compress JSON responses for clients that accept gzip or brotli
+
+    Only application/json bodies of at least minimum_size bytes are compressed;
+    other responses (files, ranges, event streams) are passed through as-is.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, compresslevel: int = 6):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "").lower()
+        if BROTLI_AVAILABLE and "br" in accept_encoding:
+            encoding = "br"
+        elif "gzip" in accept_encoding:
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        body_parts = []
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (headers.get("content-type", "").startswith("application/json")
+                        and "content-encoding" not in headers):
+                    start_message = message
+                    return
+                await send(message)
+                return
+
+            if message["type"] == "http.response.body" and start_message is not None:
+                body_parts.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                body = b"".join(body_parts)
+                headers = MutableHeaders(raw=start_message["headers"])
+                if len(body) >= self.minimum_size:
+                    if encoding == "br":
+                        body = brotli.compress(body)
+                    else:
+                        body = gzip.compress(body, compresslevel=self.compresslevel)
+                    headers["content-encoding"] = encoding
+                    headers.add_vary_header("Accept-Encoding")
+                headers["content-length"] = str(len(body))
+                await send(start_message)
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -5,9 +5,14 @@ Karst Map Generator (using ArcGIS Export Web Map Task)
 This module generates a map image (PDF or PNG) showing PRAPEC karst areas (Layer 15)
 and specific zones (APE-ZC, ZA from Layer 0) around a given location, using an ArcGIS
 Export Web Map Task service for direct static map generation.
+
+Map-only raster maps (layout_template="MAP_ONLY" with a PNG or JPG format) need no
+print layout, so they are composited locally by mapmaker.SiteMapCompositor over the
+cached basemap export instead of being sent to the print service.
 """
 
 import requests
+
 import json
 import os
 from typing import Dict, Any, List, Tuple, Optional
@@ -16,8 +21,14 @@ import urllib3
 import time
 import sys
 
+from upstream_http import UpstreamSession
+from mapmaker.map_compositor import SiteMapCompositor, fit_extent_to_size
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Print formats rendered locally by the compositor when no layout is requested
+COMPOSITED_FORMATS = {"PNG32": "PNG", "PNG8": "PNG", "PNG": "PNG", "JPG": "JPEG"}
+
 class KarstMapGenerator:
     """Generates maps for karst analysis using ArcGIS Export Web Map Task."""
 
@@ -41,7 +52,7 @@ class KarstMapGenerator:
             "USA_Topo_Maps": "https://services.arcgisonline.com/ArcGIS/rest/services/USA_Topo_Maps/MapServer"
         }
 
-        self.session = requests.Session()
+        self.session = UpstreamSession()
         self.session.headers.update({
             'User-Agent': 'KarstMapGenerator/1.0',
             'Accept': 'application/json',
@@ -65,47 +76,9 @@ class KarstMapGenerator:
             "spatialReference": {"wkid": 4326} # WGS84
         }
 
-    def generate_map_export(
-        self,
-        longitude: float, 
-        latitude: float,
-        location_name: Optional[str] = None,
-        buffer_miles: float = 1.0,
-        base_map_name: str = "World_Topo_Map",
-        output_format: str = "PDF", # PDF, PNG32, PNG8, JPG, GIF, EPS, SVG, SVGZ
-        layout_template: str = "Letter ANSI A Landscape", # Common templates: MAP_ONLY, Letter ANSI A Landscape/Portrait
-        dpi: int = 300,
-        output_filename_prefix: str = "karst_map"
-    ) -> Optional[str]:
-        """Generates and saves the karst map using an Export Web Map Task."""
-
-        if location_name is None:
-            location_name = f"Karst Analysis at {latitude:.4f}, {longitude:.4f}"
-
-        print(f"\n��️  Generating karst map ({output_format}) for: {location_name}")
-        print(f"📍 Coordinates: ({longitude:.6f}, {latitude:.6f})")
-        print(f"📏 Buffer: {buffer_miles} miles")
-
-        # Try to integrate with output directory manager like other tools
-        try:
-            # Import output directory manager
-            sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            from output_directory_manager import get_output_manager
-            
-            # Try to use output manager if available
-            output_manager = get_output_manager()
-            if output_manager.current_project_dir:
-                maps_dir = output_manager.get_subdirectory("maps")
-                print(f"📁 Using project maps directory: {maps_dir}")
-            else:
-                # Fallback to self.output_directory if no project is set up
-                maps_dir = self.output_directory
-                print(f"📁 Using fallback output directory: {maps_dir}")
-        except:
-            # If output manager fails, use the original self.output_directory
-            maps_dir = self.output_directory
-            print(f"📁 Using standalone output directory: {maps_dir}")
-
+    def _create_web_map_json(self, longitude: float, latitude: float, location_name: str,
+                             buffer_miles: float, base_map_name: str, dpi: int) -> Dict[str, Any]:
+        """Create the Web Map JSON specification for the karst map (letter landscape layout)."""
         extent = self._calculate_extent(longitude, latitude, buffer_miles)
         
         # Define operational layers for the Web Map JSON
@@ -211,7 +184,7 @@ class KarstMapGenerator:
             }
         })
 
-        web_map_json_payload = {
+        return {
             "mapOptions": {
                 "extent": extent,
                 "spatialReference": {"wkid": 4326},
@@ -236,11 +209,59 @@ class KarstMapGenerator:
                 "scaleBarOptions": {"metricUnit": "esriKilometers", "nonMetricUnit": "esriMiles"}
             }
         }
+
+    def generate_map_export(
+        self,
+        longitude: float, 
+        latitude: float,
+        location_name: Optional[str] = None,
+        buffer_miles: float = 1.0,
+        base_map_name: str = "World_Topo_Map",
+        output_format: str = "PDF", # PDF, PNG32, PNG8, JPG, GIF, EPS, SVG, SVGZ
+        layout_template: str = "Letter ANSI A Landscape", # Common templates: MAP_ONLY, Letter ANSI A Landscape/Portrait
+        dpi: int = 300,
+        output_filename_prefix: str = "karst_map"
+    ) -> Optional[str]:
+        """Generates and saves the karst map using an Export Web Map Task."""
+
+        if location_name is None:
+            location_name = f"Karst Analysis at {latitude:.4f}, {longitude:.4f}"
+
+        print(f"\n��️  Generating karst map ({output_format}) for: {location_name}")
+        print(f"📍 Coordinates: ({longitude:.6f}, {latitude:.6f})")
+        print(f"📏 Buffer: {buffer_miles} miles")
+
+        # Try to integrate with output directory manager like other tools
+        try:
+            # Import output directory manager
+            sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            from output_directory_manager import get_output_manager
+            
+            # Try to use output manager if available
+            output_manager = get_output_manager()
+            if output_manager.current_project_dir:
+                maps_dir = output_manager.get_subdirectory("maps")
+                print(f"📁 Using project maps directory: {maps_dir}")
+            else:
+                # Fallback to self.output_directory if no project is set up
+                maps_dir = self.output_directory
+                print(f"📁 Using fallback output directory: {maps_dir}")
+        except:
+            # If output manager fails, use the original self.output_directory
+            maps_dir = self.output_directory
+            print(f"📁 Using standalone output directory: {maps_dir}")
+
+        web_map_json_payload = self._create_web_map_json(longitude, latitude, location_name, buffer_miles,
+                                                         base_map_name, dpi)
         
         if layout_template == "MAP_ONLY":
             web_map_json_payload["exportOptions"]["outputSize"] = [1024, 768] # Adjust for map_only if needed
             web_map_json_payload.pop("layoutOptions", None)
 
+            if output_format.upper() in COMPOSITED_FORMATS:
+                return self._composite_map_only(web_map_json_payload, longitude, latitude, output_format,
+                                                maps_dir, output_filename_prefix)
+
         export_params = {
             "f": "json",
             "Web_Map_as_JSON": json.dumps(web_map_json_payload),
@@ -291,6 +312,43 @@ class KarstMapGenerator:
             print(f"❌ Error generating map: {e}")
             return None
 
+    def _composite_map_only(
+        self,
+        web_map_json_payload: Dict[str, Any],
+        longitude: float,
+        latitude: float,
+        output_format: str,
+        maps_dir: str,
+        output_filename_prefix: str
+    ) -> Optional[str]:
+        """Render a map-only raster map locally: basemap and karst layers as exports, marker drawn by Pillow."""
+        width_px, height_px = web_map_json_payload["exportOptions"]["outputSize"]
+        compositor = SiteMapCompositor(
+            basemap_url=web_map_json_payload["baseMap"]["baseMapLayers"][0]["url"],
+            width_px=width_px,
+            height_px=height_px,
+            dpi=web_map_json_payload["exportOptions"]["dpi"]
+        )
+        extent = fit_extent_to_size(web_map_json_payload["mapOptions"]["extent"], width_px, height_px)
+        layers = [layer for layer in web_map_json_payload["operationalLayers"] if layer.get("url")]
+
+        try:
+            print(f"🧩 Compositing karst map from {len(layers)} layer exports")
+            basemap, images = compositor.fetch_layers(extent, layers)
+            image = compositor.compose(basemap, extent, [(longitude, latitude)], list(zip(layers, images)),
+                                       polygon_color="lime")
+
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{output_filename_prefix}_{timestamp}.{output_format.lower()}"
+            filepath = os.path.join(maps_dir, filename)
+            image.save(filepath, format=COMPOSITED_FORMATS[output_format.upper()])
+            print(f"🗺️ Karst map ({output_format}) saved to: {filepath}")
+            return filepath
+
+        except Exception as e:
+            print(f"❌ Error compositing map: {e}")
+            return None
+
 # Example Usage:
 if __name__ == "__main__":
     import math # Required for _calculate_extent helper
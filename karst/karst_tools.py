@@ -28,6 +28,7 @@ from karst.prapec_karst_checker import PrapecKarstChecker
 from cadastral.cadastral_search import MIPRCadastralSearch
 from output_directory_manager import get_output_manager
 from karst.karst_map_generator import KarstMapGenerator
+from progressive_maps import deliver_map, web_map_preview, PREVIEW_DPI
 
 # Pydantic models for tool input schemas
 class SingleCadastralKarstInput(BaseModel):
@@ -972,18 +973,29 @@ def generate_karst_analysis_map(
         # Initialize map generator
         map_generator = KarstMapGenerator(output_directory=maps_dir)
         
-        # Generate the map
-        map_path = map_generator.generate_map_export(
-            longitude=longitude,
-            latitude=latitude,
-            location_name=location_name,
-            buffer_miles=buffer_miles,
-            base_map_name="World_Topo_Map",
-            output_format="PDF",
-            layout_template="Letter ANSI A Landscape",
-            dpi=300,
-            output_filename_prefix="karst_analysis_map"
-        )
+        def render_final() -> Optional[str]:
+            return map_generator.generate_map_export(
+                longitude=longitude,
+                latitude=latitude,
+                location_name=location_name,
+                buffer_miles=buffer_miles,
+                base_map_name="World_Topo_Map",
+                output_format="PDF",
+                layout_template="Letter ANSI A Landscape",
+                dpi=300,
+                output_filename_prefix="karst_analysis_map"
+            )
+        
+        def render_preview(path: str):
+            # Same extent and layers as the print request, exported at preview DPI
+            web_map_json = map_generator._create_web_map_json(
+                longitude, latitude, location_name, buffer_miles, "World_Topo_Map", PREVIEW_DPI
+            )
+            web_map_preview(web_map_json, path, site=[(longitude, latitude)], polygon_color="lime")
+        
+        # Preview now, print-quality PDF in the background (inline when progressive maps are off)
+        delivery = deliver_map(output_manager.current_project_dir, "karst", render_final, render_preview)
+        map_path = delivery["path"]
         
         if map_path:
             # Calculate coverage area
@@ -992,8 +1004,11 @@ def generate_karst_analysis_map(
             
             return {
                 "success": True,
-                "message": "Karst analysis map generated successfully",
+                "message": ("Karst analysis map generated successfully" if delivery["status"] == "final"
+                            else "Karst map preview ready; the print-quality map is rendering"),
                 "map_file": map_path,
+                "status": delivery["status"],
+                "preview": delivery.get("preview"),
                 "map_details": {
                     "buffer_miles": buffer_miles,
                     "coverage_area_sq_miles": coverage_area,
@@ -9,10 +9,14 @@ the PRAPEC (Plan y Reglamento del Área de Planificación Especial del Carso) ka
 import sys
 import os
 import json
-import requests
+
 import urllib3
 from typing import Dict, List, Any, Optional, Tuple, Union
 
+from upstream_http import shared_session
+
+http = shared_session()
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # Add parent directory to path for imports
@@ -87,7 +91,7 @@ class PrapecKarstChecker:
                 'f': 'json'
             }
             
-            response = requests.get(self.query_url, params=params, verify=False, timeout=15)
+            response = http.get(self.query_url, params=params, verify=False, timeout=15)
             response.raise_for_status()
             data = response.json()
             
@@ -125,7 +129,7 @@ class PrapecKarstChecker:
                     'f': 'json'
                 }
                 
-                buffer_response = requests.get(self.query_url, params=buffer_params, verify=False, timeout=15)
+                buffer_response = http.get(self.query_url, params=buffer_params, verify=False, timeout=15)
                 buffer_response.raise_for_status()
                 buffer_data = buffer_response.json()
                 
@@ -246,7 +250,7 @@ class PrapecKarstChecker:
                 'f': 'json'
             }
             
-            response = requests.get(self.query_url, params=params, verify=False, timeout=15)
+            response = http.get(self.query_url, params=params, verify=False, timeout=15)
             response.raise_for_status()
             data = response.json()
             
@@ -285,7 +289,7 @@ class PrapecKarstChecker:
                     'f': 'json'
                 }
                 
-                buffer_response = requests.get(self.query_url, params=buffer_params, verify=False, timeout=15)
+                buffer_response = http.get(self.query_url, params=buffer_params, verify=False, timeout=15)
                 buffer_response.raise_for_status()
                 buffer_data = buffer_response.json()
                 
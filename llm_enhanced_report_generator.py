@@ -19,6 +19,7 @@ import glob
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Union
 from dataclasses import dataclass, asdict
+from contextlib import nullcontext
 import argparse
 
 # LangChain imports
@@ -59,6 +60,22 @@ class ExecutiveSummaryGeneration(BaseModel):
     recommendations: List[str] = Field(description="Primary recommendations for project development")
 
 
+# Optional limiter shared by batch runners to bound concurrent LLM calls
+# across worker processes (see report_regeneration_runner.py)
+_llm_concurrency_limiter = None
+
+
+def set_llm_concurrency_limiter(semaphore) -> None:
+    """
+    Install a semaphore that every LLM enhancement pass must acquire
+    
+    Args:
+        semaphore: A threading or multiprocessing semaphore, or None to disable limiting
+    """
+    global _llm_concurrency_limiter
+    _llm_concurrency_limiter = semaphore
+
+
 class DataExtractionSummary(BaseModel):
     """LLM-processed summary of environmental data findings"""
     
@@ -251,6 +268,13 @@ Be conservative in your assumptions and clearly flag areas needing additional in
     def _run_enhancement_chains(self, llm_input: Dict[str, str]) -> Dict[str, Any]:
         """Run LLM enhancement chains"""
         
+        limiter = _llm_concurrency_limiter if _llm_concurrency_limiter is not None else nullcontext()
+        with limiter:
+            return self._invoke_enhancement_chains(llm_input)
+    
+    def _invoke_enhancement_chains(self, llm_input: Dict[str, str]) -> Dict[str, Any]:
+        """Invoke the risk, integration and executive summary chains in order"""
+        
         # Risk assessment
         risk_assessment = self.risk_assessment_chain.invoke(llm_input)
         
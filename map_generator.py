@@ -11,7 +11,11 @@ from typing import List, Tuple, Optional, Dict, Any
 # Add the mapmaker module to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from mapmaker import MapExporter
+from mapmaker import MapExporter, SiteMapCompositor
+
+# MIPR land use classification (calificación) service and its classification layer
+MIPR_SERVICE_URL = "https://sige.pr.gov/server/rest/services/MIPR/Calificacion/MapServer"
+MIPR_LAYER_ID = 0
 
 class MIPRMapGenerator:
     """
@@ -60,7 +64,7 @@ class MIPRMapGenerator:
             True if successful, False otherwise
         """
         try:
-            fig, ax = self.exporter.overlay_polygon_with_mipr(
+            return self._render_mipr_map(
                 polygon_coords=polygon_coords,
                 image_width_pixels=image_width,
                 image_height_pixels=image_height,
@@ -68,17 +72,84 @@ class MIPRMapGenerator:
                 mipr_layer_opacity=mipr_opacity,
                 title=title,
                 save_path=save_path,
-                show=False,
                 show_buffer_circle=show_buffer,
                 buffer_circle_radius_miles=buffer_radius_miles
             )
             
-            return fig is not None
-            
         except Exception as e:
             print(f"❌ Error creating basic MIPR map: {e}")
             return False
     
+    def _render_mipr_map(
+        self,
+        polygon_coords: List[Tuple[float, float]],
+        save_path: str,
+        title: Optional[str] = None,
+        image_width_pixels: int = 1600,
+        image_height_pixels: int = 1200,
+        show_mipr_layer: bool = True,
+        mipr_layer_opacity: float = 0.7,
+        mipr_classification_filter: Optional[str] = None,
+        show_buffer_circle: bool = False,
+        buffer_circle_radius_miles: Optional[float] = None,
+        buffer_miles: Optional[float] = None,
+        **style: Any
+    ) -> bool:
+        """
+        Composite a MIPR map locally over the current base map service.
+        
+        The base map and the MIPR classification layer are fetched as map exports
+        by SiteMapCompositor (the base map export is cached for maps of the same
+        extent); the polygon, buffer circle, legend and scale bar are drawn locally.
+        Style keywords (polygon_color, outline_width, ...) default to the base map
+        service defaults and are passed to SiteMapCompositor.compose().
+        
+        Returns:
+            True if the map was saved, False otherwise
+        """
+        defaults = self.exporter.service_defaults
+        for key in ('polygon_color', 'polygon_alpha', 'outline_color', 'outline_width', 'buffer_circle_color',
+                    'buffer_circle_width', 'buffer_circle_dashed', 'show_legend', 'show_scale_bar'):
+            style.setdefault(key, defaults[key])
+        if buffer_miles is None:
+            buffer_miles = defaults['buffer_miles']
+        if show_buffer_circle:
+            buffer_circle_radius_miles = buffer_circle_radius_miles or defaults['buffer_circle_radius_miles']
+            # Keep the whole circle (plus a 20% margin) in view
+            buffer_miles = max(buffer_miles, buffer_circle_radius_miles * 1.2)
+        
+        layers = []
+        if show_mipr_layer:
+            mipr_layer = {
+                "id": "mipr_calificacion",
+                "title": "MIPR Land Use Classification",
+                "url": MIPR_SERVICE_URL,
+                "visibleLayers": [MIPR_LAYER_ID],
+                "opacity": mipr_layer_opacity
+            }
+            if mipr_classification_filter:
+                mipr_layer["layerDefinition"] = {"definitionExpression": mipr_classification_filter}
+            layers.append(mipr_layer)
+        
+        compositor = SiteMapCompositor(
+            basemap_url=self.exporter.service_url,
+            width_px=image_width_pixels,
+            height_px=image_height_pixels,
+            dpi=defaults['output_dpi']
+        )
+        image = compositor.render_map(
+            polygon_coords, layers, buffer_miles,
+            title=title,
+            buffer_circle_miles=buffer_circle_radius_miles if show_buffer_circle else None,
+            **style
+        )
+        save_dir = os.path.dirname(save_path)
+        if save_dir:
+            os.makedirs(save_dir, exist_ok=True)
+        image.save(save_path)
+        print(f"🗺️ MIPR map saved to: {save_path}")
+        return True
+    
     def create_filtered_mipr_map(
         self,
         polygon_coords: List[Tuple[float, float]],
@@ -105,7 +176,7 @@ class MIPRMapGenerator:
             True if successful, False otherwise
         """
         try:
-            fig, ax = self.exporter.overlay_polygon_with_mipr(
+            return self._render_mipr_map(
                 polygon_coords=polygon_coords,
                 image_width_pixels=image_width,
                 image_height_pixels=image_height,
@@ -113,12 +184,9 @@ class MIPRMapGenerator:
                 mipr_layer_opacity=mipr_opacity,
                 mipr_classification_filter=classification_filter,
                 title=title,
-                save_path=save_path,
-                show=False
+                save_path=save_path
             )
             
-            return fig is not None
-            
         except Exception as e:
             print(f"❌ Error creating filtered MIPR map: {e}")
             return False
@@ -281,7 +349,7 @@ class MIPRMapGenerator:
         
         Args:
             polygon_coords: List of (longitude, latitude) coordinate pairs
-            **kwargs: All parameters supported by overlay_polygon_with_mipr()
+            **kwargs: All parameters supported by _render_mipr_map()
             
         Returns:
             True if successful, False otherwise
@@ -293,19 +361,18 @@ class MIPRMapGenerator:
                 'mipr_layer_opacity': 0.7,
                 'image_width_pixels': 1600,
                 'image_height_pixels': 1200,
-                'show': False
+                'save_path': 'mipr_custom_map.png'
             }
             
-            # Merge defaults with provided kwargs
+            # Merge defaults with provided kwargs (rendering is headless, so 'show' has no effect)
             params = {**defaults, **kwargs}
+            params.pop('show', None)
             
-            fig, ax = self.exporter.overlay_polygon_with_mipr(
+            return self._render_mipr_map(
                 polygon_coords=polygon_coords,
                 **params
             )
             
-            return fig is not None
-            
         except Exception as e:
             print(f"❌ Error creating custom MIPR map: {e}")
             return False
@@ -3,6 +3,10 @@
 # Main classes
 from .map_exporter import MapExporter
 from .common import MapServerClient
+from .map_compositor import SiteMapCompositor, BasemapCache, get_basemap_cache
+from .tile_mosaic import TileMosaicker, TileCache, get_tile_cache
+from .legend_sprites import legend_sprite, scale_bar_sprite
+from .figures import map_figure, new_map_figure, release_figure
 
 # Map overlay utilities
 from .map_overlays import (
@@ -43,6 +47,17 @@ __all__ = [
     # Main classes
     'MapExporter',
     'MapServerClient',
+    'SiteMapCompositor',
+    'BasemapCache',
+    'get_basemap_cache',
+    'TileMosaicker',
+    'TileCache',
+    'get_tile_cache',
+    'legend_sprite',
+    'scale_bar_sprite',
+    'map_figure',
+    'new_map_figure',
+    'release_figure',
     
     # Map overlay classes
     'PrintServiceClient',
@@ -6,12 +6,19 @@ import warnings
 from dataclasses import dataclass
 from typing import Any, Dict, Sequence, Tuple, Union
 
-import requests
 from pyproj import Geod
+from upstream_http import shared_session
+from service_metadata import get_metadata_registry
+
+http = shared_session()
 
 # Suppress insecure HTTPS warnings for self-signed certs
 warnings.filterwarnings("ignore", message="Unverified HTTPS request")
 
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
+}
+
 # Constants
 DEFAULT_DPI = 180
 METERS_PER_INCH = 0.0254
@@ -80,16 +87,37 @@ class MapServerClient:
         self.tile_info: Dict[str, Any] = {}
         self.scales: Dict[int, Scale] = {}
 
-    def fetch_metadata(self) -> None:
-        """Populate all service, spatial, and tiling metadata from ?f=pjson."""
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
-        }
-        # Increased timeout from 5 to 15 seconds for potentially slow server
-        resp = requests.get(f"{self.service_url}?f=pjson", verify=False, timeout=15, headers=headers)
+    def _get_pjson(self, url: str, timeout: float) -> Dict[str, Any]:
+        resp = http.get(f"{url}?f=pjson", verify=False, timeout=timeout, headers=HEADERS)
         resp.raise_for_status()
-        data = resp.json()
+        return resp.json()
+
+    def _service_pjson(self) -> Dict[str, Any]:
+        # Increased timeout from 5 to 15 seconds for potentially slow server
+        return self._get_pjson(self.service_url, timeout=15)
 
+    @staticmethod
+    def _parse_scales(data: Dict[str, Any]) -> Dict[int, Scale]:
+        """Parse LODs into Scale objects"""
+        scales = {}
+        for lod in data.get("tileInfo", {}).get("lods", []):
+            s = Scale.from_lod(lod)
+            scales[s.level] = s
+        return scales
+
+    def fetch_metadata(self) -> None:
+        """
+        Populate all service, spatial, and tiling metadata from ?f=pjson.
+
+        The document and its parsed scales come from the shared service
+        metadata registry, so repeated clients for one service fetch it once.
+        """
+        registry = get_metadata_registry()
+        data = registry.get(self.service_url, self._service_pjson)
+        scales = registry.derived(self.service_url, "scales", self._service_pjson, self._parse_scales)
+        self._apply_metadata(data, scales)
+
+    def _apply_metadata(self, data: Dict[str, Any], scales: Dict[int, Scale]) -> None:
         # Service info
         self.service_description = data.get("serviceDescription", "")
         self.capabilities = data.get("capabilities", "")
@@ -109,10 +137,8 @@ class MapServerClient:
         self.full_extent = data.get("fullExtent", {})
         self.tile_info = data.get("tileInfo", {})
 
-        # Parse LODs into Scale objects
-        for lod in self.tile_info.get("lods", []):
-            s = Scale.from_lod(lod)
-            self.scales[s.level] = s
+        # Scale objects are shared between clients; copy the mapping only
+        self.scales = dict(scales)
 
     def describe(self) -> None:
         """Prints a summary of the MapServer's key metadata."""
@@ -132,10 +158,8 @@ class MapServerClient:
 
     def get_layer_definition(self, layer_id: int) -> Dict[str, Any]:
         """Fetch detailed metadata for a specific layer via /<layer_id>?f=pjson."""
-        resp = requests.get(f"{self.service_url}/{layer_id}?f=pjson",
-                            verify=False, timeout=5)
-        resp.raise_for_status()
-        return resp.json()
+        layer_url = f"{self.service_url}/{layer_id}"
+        return get_metadata_registry().get(layer_url, lambda: self._get_pjson(layer_url, timeout=5))
 
     def describe_layers(self) -> None:
         """Prints detailed metadata for each layer: fields, geometryType, renderer."""
@@ -339,7 +363,7 @@ class MapServerClient:
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
         }
-        resp = requests.get(
+        resp = http.get(
             request_url,
             params=params, verify=False, timeout=5,
             headers=headers
@@ -0,0 +1,51 @@
+# mapmaker/figures.py
+"""
+Thread-safe matplotlib figures for map rendering.
+
+pyplot keeps global state: the current figure and axes, and a registry that holds
+every figure until plt.close(). Concurrent renders in threads race on that state,
+and figures that are never closed keep their basemap arrays alive. Map rendering
+therefore uses explicit Figure objects with their own FigureCanvasAgg. They are
+never registered with pyplot, so they are freed as soon as the caller drops them.
+release_figure() frees them immediately on error paths.
+
+    with map_figure(width_px, height_px, dpi) as (fig, ax):
+        ax.imshow(image)
+        save_figure(fig, "map.png", dpi)
+"""
+
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+def new_map_figure(width_px: float, height_px: float, dpi: int) -> Tuple[Figure, Axes]:
+    """Figure of width_px x height_px at dpi with a single axes, outside pyplot"""
+    fig = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(1, 1, 1)
+    return fig, ax
+
+
+def release_figure(fig: Optional[Figure]):
+    """Drop the figure's artists and image data right away"""
+    if fig is not None:
+        fig.clear()
+
+
+@contextmanager
+def map_figure(width_px: float, height_px: float, dpi: int) -> Iterator[Tuple[Figure, Axes]]:
+    """new_map_figure() that is released when the block exits"""
+    fig, ax = new_map_figure(width_px, height_px, dpi)
+    try:
+        yield fig, ax
+    finally:
+        release_figure(fig)
+
+
+def save_figure(fig: Figure, path: str, dpi: int, bbox_inches: Optional[str] = 'tight'):
+    """Render the figure with its Agg canvas and write it to path"""
+    fig.savefig(path, dpi=dpi, bbox_inches=bbox_inches)
@@ -0,0 +1,154 @@
+# mapmaker/legend_sprites.py
+"""
+Pillow-native legend and scale-bar sprites.
+
+The template map post-processing used to render these with a matplotlib figure per
+map: draw, save to PNG in a BytesIO, reload with Pillow, paste. Both only depend on
+a handful of parameters (colors, radius label, bar width and label, style), so
+they are drawn directly with Pillow and memoized with functools.lru_cache, which
+is thread-safe. Pasting a cached sprite takes well under a millisecond.
+
+Sprites are shared between callers: paste them, don't draw on them.
+"""
+
+import os
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+Color = Tuple[int, int, int, int]
+
+SPRITE_CACHE_SIZE = 256
+
+# Sizes match the 180 DPI matplotlib sprites they replace (12 pt items, 14 pt title)
+LEGEND_TITLE_SIZE = 34
+LEGEND_ITEM_SIZE = 30
+SCALE_LABEL_SIZE = 27
+
+
+@lru_cache(maxsize=None)
+def _font(size: int, bold: bool = False) -> ImageFont.ImageFont:
+    name = "DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf"
+    try:
+        return ImageFont.truetype(name, size)
+    except OSError:
+        pass
+    try:
+        # matplotlib ships DejaVu Sans; only its data path is used, not pyplot
+        import matplotlib
+        return ImageFont.truetype(os.path.join(matplotlib.get_data_path(), "fonts", "ttf", name), size)
+    except (ImportError, OSError):
+        return ImageFont.load_default()
+
+
+def to_rgba(color, alpha: float = 1.0) -> Color:
+    """
+    RGBA tuple for a CSS/matplotlib color name, hex string or RGB(A) sequence
+
+    Sequences whose components are all within 0-1 are matplotlib colors, e.g. (1, 0, 0);
+    anything larger is read as 0-255.
+    """
+    if isinstance(color, (list, tuple)):
+        scale = 255 if all(0 <= c <= 1 for c in color[:3]) else 1
+        rgb = tuple(int(round(c * scale)) for c in color[:3])
+    else:
+        try:
+            rgb = ImageColor.getrgb(color)[:3]
+        except ValueError:
+            from matplotlib import colors
+            rgb = tuple(int(c * 255) for c in colors.to_rgb(color))
+    return (*rgb, int(round(255 * alpha)))
+
+
+def _dashed_ellipse(draw: ImageDraw.ImageDraw, box, color: Color, width: int, dashes: int = 8):
+    step = 360 / dashes
+    for index in range(dashes):
+        start = index * step
+        draw.arc(box, start, start + step * 0.6, fill=color, width=width)
+
+
+@lru_cache(maxsize=SPRITE_CACHE_SIZE)
+def legend_sprite(polygon_color: Color, outline_color: Color, circle_label: Optional[str] = None,
+                  circle_color: Optional[Color] = None, circle_fill: Optional[Color] = None,
+                  circle_dashed: bool = True) -> Image.Image:
+    """
+    Legend box with the site swatch and, when circle_label is given, the buffer circle
+
+    Colors are RGBA tuples (see to_rgba()) so the arguments are hashable cache keys.
+    """
+    title_font = _font(LEGEND_TITLE_SIZE, bold=True)
+    item_font = _font(LEGEND_ITEM_SIZE)
+    items = ["Site"] + ([circle_label] if circle_label else [])
+
+    padding, swatch_w, swatch_h, row = 24, 60, 36, 60
+    text_x = padding + swatch_w + 24
+    probe = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    title_w = probe.textlength("Legend", font=title_font)
+    items_w = max(probe.textlength(item, font=item_font) for item in items)
+    width = int(max(title_w + 2 * padding, text_x + items_w + padding))
+    top = padding + LEGEND_TITLE_SIZE + 20
+    height = top + row * len(items)
+
+    sprite = Image.new("RGBA", (width, height), (255, 255, 255, 240))
+    draw = ImageDraw.Draw(sprite)
+    draw.rectangle((0, 0, width - 1, height - 1), outline=(0, 0, 0, 255), width=2)
+    draw.text(((width - title_w) / 2, padding), "Legend", fill=(0, 0, 0, 255), font=title_font)
+
+    # Site swatch: fill blended over the white background, then the outline
+    y = top + (row - swatch_h) // 2
+    swatch = Image.new("RGBA", sprite.size, (0, 0, 0, 0))
+    ImageDraw.Draw(swatch).rectangle((padding, y, padding + swatch_w, y + swatch_h), fill=polygon_color)
+    sprite.alpha_composite(swatch)
+    draw.rectangle((padding, y, padding + swatch_w, y + swatch_h), outline=outline_color, width=4)
+    draw.text((text_x, top + row / 2), "Site", fill=(0, 0, 0, 255), font=item_font, anchor="lm")
+
+    if circle_label:
+        center_y = top + row + row / 2
+        box = (padding + swatch_w / 2 - 18, center_y - 18, padding + swatch_w / 2 + 18, center_y + 18)
+        if circle_fill is not None:
+            fill = Image.new("RGBA", sprite.size, (0, 0, 0, 0))
+            ImageDraw.Draw(fill).ellipse(box, fill=circle_fill)
+            sprite.alpha_composite(fill)
+        if circle_dashed:
+            _dashed_ellipse(draw, box, circle_color, 4)
+        else:
+            draw.ellipse(box, outline=circle_color, width=4)
+        draw.text((text_x, center_y), circle_label, fill=(0, 0, 0, 255), font=item_font, anchor="lm")
+    return sprite
+
+
+@lru_cache(maxsize=SPRITE_CACHE_SIZE)
+def scale_bar_sprite(bar_width_pixels: int, label_text: str, style: str = "classic") -> Image.Image:
+    """Scale bar of bar_width_pixels with "0" and label_text above its ends, on a white panel"""
+    font = _font(SCALE_LABEL_SIZE, bold=True)
+    probe = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    label_w = probe.textlength(label_text, font=font)
+    padding, bar_height, gap = 14, 20, 8
+    width = int(padding * 2 + bar_width_pixels + label_w / 2)
+    height = padding * 2 + SCALE_LABEL_SIZE + gap + bar_height
+
+    sprite = Image.new("RGBA", (width, height), (255, 255, 255, 240))
+    draw = ImageDraw.Draw(sprite)
+    left, bottom = padding, height - padding
+    top = bottom - bar_height
+    draw.text((left, top - gap), "0", fill=(0, 0, 0, 255), font=font, anchor="lb")
+    draw.text((left + bar_width_pixels, top - gap), label_text, fill=(0, 0, 0, 255), font=font, anchor="mb")
+
+    if style == "classic":
+        segments = 4
+        for index in range(segments):
+            x1 = left + bar_width_pixels * index / segments
+            x2 = left + bar_width_pixels * (index + 1) / segments
+            draw.rectangle((x1, top, x2, bottom), fill=(0, 0, 0, 255) if index % 2 == 0 else (255, 255, 255, 255),
+                           outline=(0, 0, 0, 255), width=1)
+    elif style == "simple":
+        draw.rectangle((left, top, left + bar_width_pixels, bottom), outline=(0, 0, 0, 255), width=3)
+    else:  # modern
+        draw.rectangle((left, top, left + bar_width_pixels, bottom), fill=(0, 0, 0, 204))
+    return sprite
+
+
+def sprite_cache_info():
+    """lru_cache statistics of the legend and scale bar sprites"""
+    return {"legend": legend_sprite.cache_info(), "scale_bar": scale_bar_sprite.cache_info()}
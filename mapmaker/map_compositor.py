@@ -0,0 +1,411 @@
+# mapmaker/map_compositor.py
+"""
+Local map compositing engine.
+
+Maps that need no print layout are composited here from MapServer exports
+instead of being sent to the print service as full print jobs. The compositor:
+
+- fetches the basemap once per extent (memoized in BasemapCache),
+- fetches every thematic layer as a transparent MapServer export, in parallel,
+- draws the site polygon, buffer circle, legend and scale bar locally with Pillow.
+
+It renders the MIPR cadastral maps, map-only karst rasters and the
+progressive_maps previews of print requests. The domain maps of a screening
+(wetlands, nonattainment, karst, critical habitat) each use their own extent
+and basemap, and their finals stay print-service layouts, so they do not share
+a basemap; render_maps() shares one only between maps of the same extent:
+
+    compositor = SiteMapCompositor()
+    maps = compositor.render_maps(polygon, {
+        "wetlands": [wetlands_layer],
+        "karst": karst_layers,
+    }, buffer_circle_miles=0.5)
+    maps["wetlands"].save("wetlands.png")
+
+Thematic layers are given as Web Map JSON operational layers (the dicts the
+print-based generators already build): url, visibleLayers, opacity and an
+optional layerDefinition with a definitionExpression and drawingInfo.
+
+All exports use bboxSR=imageSR=4326 on an extent fitted to the image aspect
+ratio, so every layer lines up pixel for pixel with lonlat_to_pixel().
+
+Environment:
+- MAP_COMPOSITOR_WORKERS: concurrent export requests (default 6)
+- MAP_BASEMAP_CACHE_SIZE: basemap images kept in memory (default 16)
+"""
+
+import concurrent.futures
+import contextvars
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+from mapmaker.common import http, HEADERS, DEFAULT_DPI, METERS_PER_MILE
+from mapmaker.map_overlays import calculate_map_extent, generate_circle_points, lonlat_to_pixel
+from upstream_http import redirect_url
+from screening_metrics import record_cache
+
+MAP_COMPOSITOR_WORKERS = int(os.getenv("MAP_COMPOSITOR_WORKERS", "6"))
+MAP_BASEMAP_CACHE_SIZE = int(os.getenv("MAP_BASEMAP_CACHE_SIZE", "16"))
+
+DEFAULT_BASEMAP_URL = "https://services.arcgisonline.com/ArcGIS/rest/services/World_Topo_Map/MapServer"
+
+# Extents are rounded to this many decimals (~1 cm) when keying the basemap cache
+EXTENT_DECIMALS = 7
+
+FEET_PER_MILE = 5280
+SCALE_BAR_STEPS_FEET = (50, 100, 200, 250, 500, 1000, 2000)
+SCALE_BAR_STEPS_MILES = (0.5, 1, 2, 5, 10, 20, 50)
+
+
+def fit_extent_to_size(extent: Dict[str, Any], width_px: int, height_px: int) -> Dict[str, Any]:
+    """Grow a WGS84 extent so its aspect ratio matches the image (ArcGIS would otherwise adjust it)"""
+    width_deg = extent["xmax"] - extent["xmin"]
+    height_deg = extent["ymax"] - extent["ymin"]
+    center_x = (extent["xmin"] + extent["xmax"]) / 2
+    center_y = (extent["ymin"] + extent["ymax"]) / 2
+    target = width_px / height_px
+    if width_deg / height_deg < target:
+        width_deg = height_deg * target
+    else:
+        height_deg = width_deg / target
+    return {
+        "xmin": center_x - width_deg / 2, "ymin": center_y - height_deg / 2,
+        "xmax": center_x + width_deg / 2, "ymax": center_y + height_deg / 2,
+        "spatialReference": {"wkid": 4326},
+    }
+
+
+def export_params(layer: Dict[str, Any], extent: Dict[str, Any], width_px: int, height_px: int,
+                  dpi: int = DEFAULT_DPI, transparent: bool = True) -> Dict[str, str]:
+    """MapServer /export parameters for a Web Map JSON operational layer"""
+    params = {
+        "bbox": f"{extent['xmin']},{extent['ymin']},{extent['xmax']},{extent['ymax']}",
+        "bboxSR": "4326",
+        "imageSR": "4326",
+        "size": f"{width_px},{height_px}",
+        "dpi": str(dpi),
+        "format": "png32",
+        "transparent": "true" if transparent else "false",
+        "f": "image",
+    }
+    visible_layers = layer.get("visibleLayers")
+    if visible_layers:
+        params["layers"] = "show:" + ",".join(str(layer_id) for layer_id in visible_layers)
+
+    definition = layer.get("layerDefinition") or {}
+    expression = definition.get("definitionExpression")
+    drawing_info = definition.get("drawingInfo")
+    if drawing_info and visible_layers:
+        # Custom renderers need dynamic layers; they carry the definition expression too
+        params["dynamicLayers"] = json.dumps([
+            {
+                "id": layer_id,
+                "source": {"type": "mapLayer", "mapLayerId": layer_id},
+                "drawingInfo": drawing_info,
+                **({"definitionExpression": expression} if expression else {}),
+            }
+            for layer_id in visible_layers
+        ], separators=(",", ":"))
+    elif expression and visible_layers:
+        params["layerDefs"] = json.dumps({str(layer_id): expression for layer_id in visible_layers},
+                                         separators=(",", ":"))
+    return params
+
+
+def _layer_legend_color(layer: Dict[str, Any]) -> Tuple[int, int, int, int]:
+    """Swatch color for a layer: its renderer fill color, or grey"""
+    symbol = (((layer.get("layerDefinition") or {}).get("drawingInfo") or {}).get("renderer") or {}).get("symbol") or {}
+    color = symbol.get("color")
+    if isinstance(color, (list, tuple)) and len(color) >= 3:
+        alpha = color[3] if len(color) > 3 else 255
+        return int(color[0]), int(color[1]), int(color[2]), int(alpha)
+    return 128, 128, 128, int(255 * float(layer.get("opacity", 0.6)))
+
+
+def _rgba(color: Any, alpha: float = 1.0) -> Tuple[int, int, int, int]:
+    if isinstance(color, (list, tuple)):
+        red, green, blue = (int(c) for c in color[:3])
+    else:
+        red, green, blue = ImageColor.getrgb(color)[:3]
+    return red, green, blue, int(round(255 * alpha))
+
+
+class BasemapCache:
+    """In-memory LRU of basemap images keyed by service, extent and size, fetched once per key"""
+
+    def __init__(self, max_entries: int = MAP_BASEMAP_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._images: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._fetch_locks: Dict[tuple, threading.Lock] = {}
+
+    @staticmethod
+    def key(url: str, extent: Dict[str, Any], width_px: int, height_px: int, dpi: int) -> tuple:
+        bounds = tuple(round(extent[name], EXTENT_DECIMALS) for name in ("xmin", "ymin", "xmax", "ymax"))
+        return redirect_url(url.rstrip("/")), bounds, width_px, height_px, dpi
+
+    def get(self, key: tuple, fetch) -> Image.Image:
+        """Basemap image for key, calling fetch() -> PNG bytes at most once per key"""
+        with self._lock:
+            content = self._images.get(key)
+            if content is not None:
+                self._images.move_to_end(key)
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+        if content is None:
+            with fetch_lock:
+                with self._lock:
+                    content = self._images.get(key)
+                if content is None:
+                    record_cache("basemap", False)
+                    content = fetch()
+                    with self._lock:
+                        self._images[key] = content
+                        while len(self._images) > self.max_entries:
+                            evicted, _ = self._images.popitem(last=False)
+                            self._fetch_locks.pop(evicted, None)
+                    return Image.open(BytesIO(content)).convert("RGBA")
+        record_cache("basemap", True)
+        return Image.open(BytesIO(content)).convert("RGBA")
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._fetch_locks.clear()
+
+
+_basemap_cache = BasemapCache()
+
+
+def get_basemap_cache() -> BasemapCache:
+    """The process-wide basemap cache shared by all compositors"""
+    return _basemap_cache
+
+
+class SiteMapCompositor:
+    """
+    Renders several thematic maps of one site over a single shared basemap.
+
+    Args:
+        basemap_url: MapServer URL of the basemap (topographic or imagery)
+        width_px / height_px: Output image size
+        dpi: Export DPI passed to the map services
+        verify_ssl: Whether to verify SSL certificates on export requests
+        basemap_cache: Basemap cache (defaults to the process-wide one)
+    """
+
+    def __init__(self, basemap_url: str = DEFAULT_BASEMAP_URL, width_px: int = 1600, height_px: int = 1200,
+                 dpi: int = DEFAULT_DPI, verify_ssl: bool = False, basemap_cache: Optional[BasemapCache] = None):
+        self.basemap_url = basemap_url.rstrip("/")
+        self.width_px = width_px
+        self.height_px = height_px
+        self.dpi = dpi
+        self.verify_ssl = verify_ssl
+        self.basemap_cache = basemap_cache or get_basemap_cache()
+
+    # -- Fetching -----------------------------------------------------------------
+
+    def site_extent(self, polygon: Sequence[Tuple[float, float]], buffer_miles: float = 0.5) -> Dict[str, Any]:
+        """Map extent around the site, fitted to the output aspect ratio"""
+        return fit_extent_to_size(calculate_map_extent(polygon, buffer_miles), self.width_px, self.height_px)
+
+    def _export(self, service_url: str, params: Dict[str, str]) -> bytes:
+        response = http.get(f"{service_url.rstrip('/')}/export", params=params, headers=HEADERS,
+                            verify=self.verify_ssl, timeout=60)
+        response.raise_for_status()
+        if not response.content.startswith((b"\x89PNG", b"\xff\xd8", b"GIF8")):
+            # ArcGIS reports export errors as a JSON body with status 200
+            raise ValueError(f"Export from {service_url} did not return an image: {response.text[:200]}")
+        return response.content
+
+    def basemap(self, extent: Dict[str, Any]) -> Image.Image:
+        """Opaque basemap image for the extent, fetched once per extent"""
+        key = self.basemap_cache.key(self.basemap_url, extent, self.width_px, self.height_px, self.dpi)
+        params = export_params({}, extent, self.width_px, self.height_px, self.dpi, transparent=False)
+        return self.basemap_cache.get(key, lambda: self._export(self.basemap_url, params))
+
+    def thematic_layer(self, layer: Dict[str, Any], extent: Dict[str, Any]) -> Image.Image:
+        """Transparent export of one operational layer, with the layer opacity applied"""
+        params = export_params(layer, extent, self.width_px, self.height_px, self.dpi)
+        image = Image.open(BytesIO(self._export(layer["url"], params))).convert("RGBA")
+        if image.size != (self.width_px, self.height_px):
+            image = image.resize((self.width_px, self.height_px))
+        opacity = float(layer.get("opacity", 1.0))
+        if opacity < 1.0:
+            alpha = image.getchannel("A").point(lambda value: int(value * opacity))
+            image.putalpha(alpha)
+        return image
+
+    def fetch_layers(self, extent: Dict[str, Any], layers: Sequence[Dict[str, Any]]
+                     ) -> Tuple[Image.Image, List[Optional[Image.Image]]]:
+        """
+        Fetch the basemap and every thematic layer concurrently.
+
+        Returns the basemap and the layer images in input order; a layer whose
+        export fails is None (and reported) so the other maps still render.
+        """
+        workers = max(1, min(len(layers) + 1, MAP_COMPOSITOR_WORKERS))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            basemap_future = executor.submit(contextvars.copy_context().run, self.basemap, extent)
+            futures = [
+                executor.submit(contextvars.copy_context().run, self.thematic_layer, layer, extent)
+                for layer in layers
+            ]
+            images: List[Optional[Image.Image]] = []
+            for layer, future in zip(layers, futures):
+                try:
+                    images.append(future.result())
+                except Exception as e:
+                    print(f"⚠️ Could not export layer '{layer.get('title', layer.get('url'))}': {e}")
+                    images.append(None)
+            return basemap_future.result(), images
+
+    # -- Compositing --------------------------------------------------------------
+
+    def render_maps(self, polygon: Sequence[Tuple[float, float]], maps: Dict[str, Sequence[Dict[str, Any]]],
+                    buffer_miles: float = 0.5, **style: Any) -> Dict[str, Image.Image]:
+        """
+        Render one map per entry of maps (name -> operational layers) over a shared basemap.
+
+        Layers shared between maps (same dict contents) are exported once.
+        Keyword arguments are passed to compose().
+        """
+        extent = self.site_extent(polygon, buffer_miles)
+        unique: Dict[str, Dict[str, Any]] = {}
+        for layers in maps.values():
+            for layer in layers:
+                unique.setdefault(json.dumps(layer, sort_keys=True), layer)
+        basemap, images = self.fetch_layers(extent, list(unique.values()))
+        by_key = dict(zip(unique, images))
+        return {
+            name: self.compose(
+                basemap, extent, polygon,
+                [(layer, by_key[json.dumps(layer, sort_keys=True)]) for layer in layers],
+                **style,
+            )
+            for name, layers in maps.items()
+        }
+
+    def render_map(self, polygon: Sequence[Tuple[float, float]], layers: Sequence[Dict[str, Any]],
+                   buffer_miles: float = 0.5, **style: Any) -> Image.Image:
+        """Render a single thematic map"""
+        return self.render_maps(polygon, {"map": layers}, buffer_miles, **style)["map"]
+
+    def compose(self, basemap: Image.Image, extent: Dict[str, Any], polygon: Sequence[Tuple[float, float]],
+                layers: Sequence[Tuple[Dict[str, Any], Optional[Image.Image]]],
+                polygon_color: str = "red", polygon_alpha: float = 0.4,
+                outline_color: str = "black", outline_width: float = 3.0,
+                buffer_circle_miles: Optional[float] = None, buffer_circle_color: str = "yellow",
+                buffer_circle_width: float = 6.0, buffer_circle_dashed: bool = True,
+                show_legend: bool = True, show_scale_bar: bool = True,
+                title: Optional[str] = None) -> Image.Image:
+        """Stack the basemap, thematic layers and site graphics into one RGB image"""
+        image = basemap.copy()
+        for _, layer_image in layers:
+            if layer_image is not None:
+                image.alpha_composite(layer_image)
+
+        overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(overlay)
+        pixels = [self._to_pixel(lon, lat, extent) for lon, lat in polygon]
+        if len(pixels) >= 3:
+            draw.polygon(pixels, fill=_rgba(polygon_color, polygon_alpha))
+            draw.line(pixels + [pixels[0]], fill=_rgba(outline_color), width=max(1, int(outline_width)))
+        elif len(pixels) == 1:
+            # A point site (coordinates only) is drawn as a marker
+            (x, y), radius = pixels[0], 4 * max(1, int(outline_width))
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=_rgba(polygon_color),
+                         outline=_rgba(outline_color), width=max(1, int(outline_width)))
+
+        legend = [("Project site", _rgba(polygon_color, max(polygon_alpha, 0.4)))]
+        if buffer_circle_miles:
+            lons, lats = zip(*polygon)
+            circle = generate_circle_points(sum(lons) / len(lons), sum(lats) / len(lats), buffer_circle_miles)
+            circle_pixels = [self._to_pixel(lon, lat, extent) for lon, lat in circle]
+            self._draw_line(draw, circle_pixels, _rgba(buffer_circle_color), int(buffer_circle_width),
+                            dashed=buffer_circle_dashed)
+            legend.append((f"{buffer_circle_miles:g} mile radius", _rgba(buffer_circle_color)))
+        legend += [(layer.get("title", "Layer"), _layer_legend_color(layer)) for layer, layer_image in layers
+                   if layer_image is not None]
+        image.alpha_composite(overlay)
+
+        draw = ImageDraw.Draw(image)
+        font = ImageFont.load_default()
+        if title:
+            draw.rectangle((0, 0, image.width, 28), fill=(255, 255, 255, 220))
+            draw.text((10, 8), title, fill=(0, 0, 0, 255), font=font)
+        if show_legend:
+            self._draw_legend(draw, legend, font)
+        if show_scale_bar:
+            self._draw_scale_bar(draw, extent, font)
+        return image.convert("RGB")
+
+    def _to_pixel(self, lon: float, lat: float, extent: Dict[str, Any]) -> Tuple[float, float]:
+        return lonlat_to_pixel(lon, lat, extent, self.width_px, self.height_px)
+
+    @staticmethod
+    def _draw_line(draw: ImageDraw.ImageDraw, points: List[Tuple[float, float]], color, width: int,
+                   dashed: bool = False, dash: int = 18, gap: int = 12):
+        if not dashed:
+            draw.line(points, fill=color, width=width)
+            return
+        # Walk the polyline and draw alternating dash/gap segments of fixed pixel length
+        drawing, remaining = True, dash
+        for (x1, y1), (x2, y2) in zip(points, points[1:]):
+            length = math.hypot(x2 - x1, y2 - y1)
+            position = 0.0
+            while position < length:
+                step = min(remaining, length - position)
+                if drawing:
+                    start, end = position / length, (position + step) / length
+                    draw.line((x1 + (x2 - x1) * start, y1 + (y2 - y1) * start,
+                               x1 + (x2 - x1) * end, y1 + (y2 - y1) * end), fill=color, width=width)
+                position += step
+                remaining -= step
+                if remaining <= 0:
+                    drawing = not drawing
+                    remaining = dash if drawing else gap
+
+    def _draw_legend(self, draw: ImageDraw.ImageDraw, entries: List[Tuple[str, tuple]], font):
+        row, swatch, padding = 22, 16, 10
+        width = padding * 3 + swatch + max(int(draw.textlength(label, font=font)) for label, _ in entries)
+        height = padding * 2 + row * len(entries)
+        left, top = self.width_px - width - padding, self.height_px - height - padding
+        draw.rectangle((left, top, left + width, top + height), fill=(255, 255, 255, 230), outline=(0, 0, 0, 255))
+        for index, (label, color) in enumerate(entries):
+            y = top + padding + index * row
+            draw.rectangle((left + padding, y, left + padding + swatch, y + swatch),
+                           fill=color, outline=(0, 0, 0, 255))
+            draw.text((left + padding * 2 + swatch, y + 2), label, fill=(0, 0, 0, 255), font=font)
+
+    def _draw_scale_bar(self, draw: ImageDraw.ImageDraw, extent: Dict[str, Any], font):
+        center_lat = (extent["ymin"] + extent["ymax"]) / 2
+        metres_per_pixel = ((extent["xmax"] - extent["xmin"]) * 111320.0 * math.cos(math.radians(center_lat))
+                            / self.width_px)
+        target_miles = metres_per_pixel * self.width_px / 4 / METERS_PER_MILE
+        if target_miles < 0.5:
+            feet = max((step for step in SCALE_BAR_STEPS_FEET if step <= target_miles * FEET_PER_MILE),
+                       default=SCALE_BAR_STEPS_FEET[0])
+            length_m, label = feet / FEET_PER_MILE * METERS_PER_MILE, f"{feet:g} ft"
+        else:
+            miles = max((step for step in SCALE_BAR_STEPS_MILES if step <= target_miles),
+                        default=SCALE_BAR_STEPS_MILES[0])
+            length_m, label = miles * METERS_PER_MILE, f"{miles:g} mi"
+
+        bar_px = length_m / metres_per_pixel
+        left, bottom, height = 20, self.height_px - 20, 8
+        draw.rectangle((left - 8, bottom - height - 26, left + bar_px + 8 + draw.textlength(label, font=font),
+                        bottom + 6), fill=(255, 255, 255, 230))
+        for index in range(4):
+            x1 = left + bar_px * index / 4
+            x2 = left + bar_px * (index + 1) / 4
+            draw.rectangle((x1, bottom - height, x2, bottom),
+                           fill=(0, 0, 0, 255) if index % 2 == 0 else (255, 255, 255, 255), outline=(0, 0, 0, 255))
+        draw.text((left, bottom - height - 18), "0", fill=(0, 0, 0, 255), font=font)
+        draw.text((left + bar_px + 4, bottom - height - 18), label, fill=(0, 0, 0, 255), font=font)
@@ -5,10 +5,8 @@ import matplotlib
 if matplotlib.get_backend() != 'Agg':
     matplotlib.use('Agg')
 
-import matplotlib.pyplot as plt
 import numpy as np
 import requests
-from io import BytesIO
 from PIL import Image
 import warnings
 import math
@@ -16,13 +14,18 @@ import json
 from typing import List, Dict, Any, Tuple, Sequence, Optional, Union
 
 from mapmaker.common import MapServerClient, DEFAULT_DPI
+from mapmaker.tile_mosaic import TileMosaicker
+from mapmaker.legend_sprites import legend_sprite, scale_bar_sprite, to_rgba
+from mapmaker.figures import new_map_figure, release_figure, save_figure
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
 from mapmaker.map_overlays import (
     PrintServiceClient, convert_color_to_rgba_list, fetch_image_from_url,
     generate_circle_points, add_buffer_to_polygon, geodesic_point_at_distance_and_bearing,
     create_polygon_layer_json, create_circle_layer_json, draw_matplotlib_overlays,
     create_web_map_json, calculate_map_extent, lonlat_to_pixel
 )
-from matplotlib.patches import Rectangle, Polygon as MatplotlibPolygon
+from matplotlib.patches import Polygon as MatplotlibPolygon
 from matplotlib.lines import Line2D
 
 class MapExporter(MapServerClient):
@@ -387,7 +390,7 @@ class MapExporter(MapServerClient):
         scale_bar_position: str = 'bottom-left',  # Position of scale bar
         scale_bar_style: str = 'classic',  # Style of scale bar
         scale_bar_distance_miles: Optional[float] = None  # Distance for scale bar
-    ) -> Tuple[Optional[plt.Figure], Optional[plt.Axes]]:
+    ) -> Tuple[Optional[Figure], Optional[Axes]]:
         """
         Generates a map with an overlay of the given polygon using the ArcGIS Print Service.
         
@@ -399,7 +402,7 @@ class MapExporter(MapServerClient):
             image_width_pixels: Width of the output image in pixels
             image_height_pixels: Height of the output image in pixels
             save_path: Path to save the output image
-            show: Whether to display the image
+            show: Whether to display the image (rendering is headless Agg, so this only adds the title in template mode)
             title: Title for the map (auto-generated based on service if None)
             style_preset: Name of a predefined style preset to apply
             polygon_color: Color for the polygon fill (uses service default if None)
@@ -425,7 +428,8 @@ class MapExporter(MapServerClient):
             auto_adjust_extent: If True, automatically adjust the map extent to fit the buffer circle
             
         Returns:
-            Tuple of (figure, axes) for the plot, or (None, None) if an error occurred
+            Tuple of (figure, axes) for the plot, or (None, None) if an error occurred.
+            The figure is not registered with pyplot; it is freed once the caller drops it.
         """
         if not polygon_coords:
             print("Error: Polygon coordinates are empty.")
@@ -570,20 +574,16 @@ class MapExporter(MapServerClient):
         image_width_pixels, image_height_pixels, 
         show_buffer_circle, no_fill, verify_ssl,
         save_path, show, buffer_circle_fill_color, params
-    ) -> Tuple[Optional[plt.Figure], Optional[plt.Axes]]:
+    ) -> Tuple[Optional[Figure], Optional[Axes]]:
         """Render map using matplotlib (non-template mode)."""
+        fig = None
         try:
             # Get the basemap image
-            extent_str = f"{extent['xmin']},{extent['ymin']},{extent['xmax']},{extent['ymax']}"
-            basemap_url = f"{self.service_url}/export?bbox={extent_str}&bboxSR=4326&size={image_width_pixels},{image_height_pixels}&format=png32&transparent=true&f=image"
-            basemap_image = fetch_image_from_url(basemap_url, verify_ssl)
+            basemap_image = self._fetch_basemap_image(extent, image_width_pixels, image_height_pixels, verify_ssl)
             
             # Create the figure and plot the basemap
             basemap_array = np.array(basemap_image)
-            fig, ax = plt.subplots(
-                figsize=(image_width_pixels / params['output_dpi'], image_height_pixels / params['output_dpi']), 
-                dpi=params['output_dpi']
-            )
+            fig, ax = new_map_figure(image_width_pixels, image_height_pixels, params['output_dpi'])
             ax.imshow(basemap_array)
             
             # Get the appropriate scale denominator from LOD
@@ -620,30 +620,50 @@ class MapExporter(MapServerClient):
             
             # Set title and formatting
             if params['title']:
-                plt.title(params['title'])
-            plt.axis('off')
-            plt.tight_layout()
+                ax.set_title(params['title'])
+            ax.set_axis_off()
+            fig.tight_layout()
             
-            # Save and show
+            # Save (rendering is headless; the returned figure is not managed by pyplot)
             if save_path:
-                plt.savefig(save_path, dpi=params['output_dpi'], bbox_inches='tight')
-            if show:
-                plt.show()
+                save_figure(fig, save_path, params['output_dpi'])
                 
             return fig, ax
             
         except Exception as e:
             print(f"Error generating map without template: {e}")
+            release_figure(fig)
             return None, None
     
+    def _fetch_basemap_image(
+        self, extent: dict, image_width_pixels: int, image_height_pixels: int, verify_ssl: bool = False
+    ) -> Image.Image:
+        """
+        Basemap image for the extent: mosaicked from the local tile cache for cached
+        services, falling back to a server-side export.
+        """
+        if self.service_info['layer_info'].get('is_cached') and self.tile_info and self.scales:
+            try:
+                image, _ = TileMosaicker(self, verify_ssl=verify_ssl).mosaic(
+                    extent, image_width_pixels, image_height_pixels
+                )
+                return image
+            except Exception as e:
+                print(f"Warning: Tile mosaic failed, exporting basemap instead: {e}")
+
+        extent_str = f"{extent['xmin']},{extent['ymin']},{extent['xmax']},{extent['ymax']}"
+        basemap_url = f"{self.service_url}/export?bbox={extent_str}&bboxSR=4326&size={image_width_pixels},{image_height_pixels}&format=png32&transparent=true&f=image"
+        return fetch_image_from_url(basemap_url, verify_ssl)
+    
     def _render_template_map(
         self, polygon_coords, extent, center_lon, center_lat,
         image_width_pixels, image_height_pixels,
         show_buffer_circle, no_fill, verify_ssl,
         print_service_url, layout_template_name, target_map_scale,
         save_path, show, buffer_circle_fill_color, params
-    ) -> Tuple[Optional[plt.Figure], Optional[plt.Axes]]:
+    ) -> Tuple[Optional[Figure], Optional[Axes]]:
         """Render map using ArcGIS Print Service (template mode)."""
+        fig = None
         try:
             # Create Print Service Client
             pcs = PrintServiceClient(gp_root_url=print_service_url)
@@ -723,26 +743,22 @@ class MapExporter(MapServerClient):
                     image_width_pixels=image_width_pixels
                 )
             
-            fig, ax = plt.subplots(
-                figsize=(final_map_image.width / params['output_dpi'], final_map_image.height / params['output_dpi']), 
-                dpi=params['output_dpi']
-            )
+            fig, ax = new_map_figure(final_map_image.width, final_map_image.height, params['output_dpi'])
             ax.imshow(final_map_image)
             
             # Only add matplotlib title if showing
             if show and params['title']:
-                plt.title(params['title'])
-            plt.axis('off')
+                ax.set_title(params['title'])
+            ax.set_axis_off()
             
-            # Save and show
+            # Save (rendering is headless; the returned figure is not managed by pyplot)
             if save_path:
-                plt.savefig(save_path, dpi=params['output_dpi'], bbox_inches='tight')
-            if show:
-                plt.show()
+                save_figure(fig, save_path, params['output_dpi'])
             
             return fig, ax
             
         except requests.exceptions.HTTPError as e:
+            release_figure(fig)
             print(f"HTTP Error from print service: {e.response.status_code}")
             try:
                 print(f"Server response: {e.response.json()}")
@@ -751,6 +767,7 @@ class MapExporter(MapServerClient):
             return None, None
         except Exception as e:
             print(f"Error calling print service: {e}")
+            release_figure(fig)
             return None, None
     
     def _create_enhanced_web_map_json(
@@ -834,111 +851,46 @@ class MapExporter(MapServerClient):
         Add a custom legend overlay to the map image since ArcGIS Print Service
         doesn't automatically generate legends for feature collections.
         Also adds scale bar if requested.
-        """
-        import matplotlib.pyplot as plt
-        from matplotlib.patches import Rectangle, Polygon as MatplotlibPolygon
-        from matplotlib.lines import Line2D
-        import numpy as np
-        from io import BytesIO
-        
-        # Ensure matplotlib uses non-interactive backend
-        import matplotlib
-        current_backend = matplotlib.get_backend()
-        if current_backend != 'Agg':
-            matplotlib.use('Agg')
-        
-        # Create a figure for the legend (increased size)
-        fig, ax = plt.subplots(figsize=(4, 2.5), dpi=180)
-        ax.set_xlim(0, 10)
-        ax.set_ylim(0, 10)
-        ax.axis('off')
         
-        # Legend items
-        legend_items = []
-        y_pos = 8.5
-        
-        # Polygon legend item
-        polygon_patch = Rectangle((0.5, y_pos-0.3), 1, 0.6, 
-                                facecolor=params['polygon_color'], 
-                                alpha=params['polygon_alpha'],
-                                edgecolor=params['outline_color'],
-                                linewidth=2)
-        ax.add_patch(polygon_patch)
-        ax.text(2, y_pos, 'Site', fontsize=12, va='center')
-        y_pos -= 1.5
-        
-        # Buffer circle legend item (only if circle is actually shown)
+        The legend and scale bar are memoized Pillow sprites (see legend_sprites),
+        so this only pastes them and is safe to run from concurrent renders.
+        """
+        circle_label = circle_color = circle_fill = None
         if show_buffer_circle:
-            # Create a small circle representation
-            circle_x, circle_y = 1, y_pos
-            circle = plt.Circle((circle_x, circle_y), 0.3, 
-                              fill=params['buffer_circle_fill'],
-                              facecolor=params.get('buffer_circle_fill_color', params['buffer_circle_color']) if params['buffer_circle_fill'] else 'none',
-                              alpha=params['buffer_circle_fill_alpha'] if params['buffer_circle_fill'] else 1,
-                              edgecolor=params['buffer_circle_color'],
-                              linewidth=2,
-                              linestyle='--' if params['buffer_circle_dashed'] else '-')
-            ax.add_patch(circle)
-            ax.text(2, y_pos, f'{buffer_circle_radius_miles} Mile Radius', fontsize=12, va='center')
-        
-        # Add legend border with increased spacing
-        legend_border = Rectangle((0.2, 6.2 if show_buffer_circle else 7.2), 
-                                9.6, 3.1 if show_buffer_circle else 2.1,
-                                fill=False, edgecolor='black', linewidth=1)
-        ax.add_patch(legend_border)
-        
-        # Add legend title with increased spacing and font size
-        ax.text(5, 9.5, 'Legend', fontsize=14, weight='bold', ha='center')
-        
-        # Save legend to bytes
-        legend_buffer = BytesIO()
-        plt.savefig(legend_buffer, format='PNG', bbox_inches='tight', 
-                   facecolor='white', edgecolor='none', dpi=180)
-        plt.close(fig)
-        legend_buffer.seek(0)
-        
-        # Load legend as PIL image
-        legend_img = Image.open(legend_buffer)
+            circle_label = f'{buffer_circle_radius_miles} Mile Radius'
+            circle_color = to_rgba(params['buffer_circle_color'])
+            if params['buffer_circle_fill']:
+                circle_fill = to_rgba(
+                    params.get('buffer_circle_fill_color') or params['buffer_circle_color'],
+                    params['buffer_circle_fill_alpha']
+                )
+        legend_img = legend_sprite(
+            to_rgba(params['polygon_color'], params['polygon_alpha']),
+            to_rgba(params['outline_color']),
+            circle_label, circle_color, circle_fill,
+            bool(params['buffer_circle_dashed'])
+        )
         
         # Start with the main image
         main_img = image.copy()
         margin = 20
         
-        # Calculate positions for bottom-left layout (scale bar above legend)
+        # Position legend in bottom-left corner
         legend_width, legend_height = legend_img.size
+        legend_x_pos = margin
+        legend_y_pos = main_img.height - legend_height - margin
         
-        # First, create scale bar if requested
-        scale_bar_img = None
-        scale_bar_height = 0
+        # Scale bar above the legend, if requested
         if (params.get('show_scale_bar', True) and extent is not None and 
             polygon_coords is not None and image_width_pixels is not None):
             
             scale_bar_img = self._create_scale_bar_image(
                 extent, polygon_coords, image_width_pixels, params
             )
-            
             if scale_bar_img:
-                scale_bar_height = scale_bar_img.size[1]
-        
-        # Position legend in bottom-left corner
-        legend_x_pos = margin
-        legend_y_pos = main_img.height - legend_height - margin
-        
-        # Position scale bar above the legend (if it exists)
-        if scale_bar_img:
-            scale_bar_width, scale_bar_height = scale_bar_img.size
-            scale_bar_x_pos = margin
-            # Place scale bar above legend with some spacing
-            scale_bar_y_pos = legend_y_pos - scale_bar_height - 15  # 15px gap between scale and legend
-            
-            # Add scale bar first (so it appears above legend)
-            scale_bar_bg = Image.new('RGBA', (scale_bar_width + 10, scale_bar_height + 10), (255, 255, 255, 240))
-            main_img.paste(scale_bar_bg, (scale_bar_x_pos - 5, scale_bar_y_pos - 5), scale_bar_bg)
-            main_img.paste(scale_bar_img, (scale_bar_x_pos, scale_bar_y_pos), scale_bar_img)
+                scale_bar_y_pos = legend_y_pos - scale_bar_img.size[1] - 15  # 15px gap between scale and legend
+                main_img.paste(scale_bar_img, (margin, scale_bar_y_pos), scale_bar_img)
         
-        # Add legend below scale bar
-        legend_bg = Image.new('RGBA', (legend_width + 10, legend_height + 10), (255, 255, 255, 240))
-        main_img.paste(legend_bg, (legend_x_pos - 5, legend_y_pos - 5), legend_bg)
         main_img.paste(legend_img, (legend_x_pos, legend_y_pos), legend_img)
         
         return main_img
@@ -951,12 +903,9 @@ class MapExporter(MapServerClient):
         params: Dict[str, Any]
     ) -> Optional[Image.Image]:
         """
-        Create a scale bar image for template maps.
+        Create a scale bar image for template maps (a shared sprite: paste it, don't modify it).
         """
         try:
-            import matplotlib.pyplot as plt
-            from matplotlib.patches import Rectangle
-            from io import BytesIO
             from mapmaker.map_overlays import calculate_scale_bar_length, calculate_scale_bar_length_from_lod
             
             # Try to get scale denominator from LOD first
@@ -988,78 +937,9 @@ class MapExporter(MapServerClient):
                         extent, image_width_pixels, target_distance
                     )
             
-            # Ensure matplotlib uses non-interactive backend
-            import matplotlib
-            current_backend = matplotlib.get_backend()
-            if current_backend != 'Agg':
-                matplotlib.use('Agg')
-            
-            # Create scale bar figure (increased size)
-            fig, ax = plt.subplots(figsize=(5, 1.2), dpi=180)
-            ax.set_xlim(0, 100)
-            ax.set_ylim(0, 20)
-            ax.axis('off')
-            
-            # Scale bar dimensions (as percentage of figure width)
-            bar_width_percent = min(bar_width_pixels / image_width_pixels * 100, 80)  # Cap at 80% of figure
-            bar_height = 6  # Make scale bar taller (6 instead of 3)
-            bar_x = 10
-            bar_y = 8
-            
-            style = params.get('scale_bar_style', 'classic')
-            
-            if style == 'classic':
-                # Classic alternating black and white segments
-                num_segments = 4
-                segment_width = bar_width_percent / num_segments
-                
-                for i in range(num_segments):
-                    segment_color = 'black' if i % 2 == 0 else 'white'
-                    segment_x = bar_x + i * segment_width
-                    
-                    segment = Rectangle(
-                        (segment_x, bar_y), segment_width, bar_height,
-                        facecolor=segment_color,
-                        edgecolor='black',
-                        linewidth=0.5
-                    )
-                    ax.add_patch(segment)
-                    
-            elif style == 'simple':
-                # Simple single line
-                bar = Rectangle(
-                    (bar_x, bar_y), bar_width_percent, bar_height,
-                    facecolor='none',
-                    edgecolor='black',
-                    linewidth=2
-                )
-                ax.add_patch(bar)
-                
-            elif style == 'modern':
-                # Modern filled style
-                bar = Rectangle(
-                    (bar_x, bar_y), bar_width_percent, bar_height,
-                    facecolor='black',
-                    edgecolor='black',
-                    linewidth=1,
-                    alpha=0.8
-                )
-                ax.add_patch(bar)
-            
-            # Add scale labels (increased font size)
-            ax.text(bar_x, bar_y + bar_height + 1, '0', fontsize=11, ha='left', va='bottom', weight='bold')
-            ax.text(bar_x + bar_width_percent, bar_y + bar_height + 1, label_text, fontsize=11, ha='right', va='bottom', weight='bold')
-            
-            # Save scale bar to bytes
-            scale_bar_buffer = BytesIO()
-            plt.savefig(scale_bar_buffer, format='PNG', bbox_inches='tight', 
-                       facecolor='white', edgecolor='none', dpi=180, pad_inches=0.1)
-            plt.close(fig)
-            scale_bar_buffer.seek(0)
-            
-            # Load as PIL image
-            scale_bar_img = Image.open(scale_bar_buffer)
-            return scale_bar_img
+            # Cap at 80% of the map width
+            bar_width_pixels = int(round(min(bar_width_pixels, image_width_pixels * 0.8)))
+            return scale_bar_sprite(bar_width_pixels, label_text, params.get('scale_bar_style', 'classic'))
             
         except Exception as e:
             print(f"Warning: Could not create scale bar image: {e}")
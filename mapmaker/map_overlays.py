@@ -1,6 +1,5 @@
 # mapmaker/map_overlays.py
 
-import matplotlib.pyplot as plt
 import numpy as np
 import requests
 from matplotlib.patches import Polygon as MatplotlibPolygon, Rectangle
@@ -12,6 +11,11 @@ import math
 import json
 from typing import List, Dict, Any, Tuple, Sequence, Optional, Union
 
+from upstream_http import shared_session
+from print_cache import print_fingerprint, cached_output_url, remember_output_url, read_output
+
+http = shared_session()
+
 # Export all public functions and classes
 __all__ = [
     # Classes
@@ -64,8 +68,17 @@ class PrintServiceClient:
     ) -> dict:
         """
         Executes the Export Web Map task.
+
+        Identical requests are answered from the print output cache: the
+        result's Output_File URL is then a local file:// URL, which
+        fetch_image_from_url() reads like a remote one.
         """
         url = f"{self.gp_root}/Export%20Web%20Map/execute"
+        key = print_fingerprint(url, web_map_json, layout_template, fmt, dpi, **(extra_params or {}))
+        cached_url = cached_output_url(key)
+        if cached_url:
+            return {"results": [{"paramName": "Output_File", "dataType": "GPDataFile",
+                                 "value": {"url": cached_url}}], "cached": True}
         
         # Ensure Web_Map_as_JSON is a JSON string
         web_map_as_json_string = json.dumps(web_map_json)
@@ -86,9 +99,12 @@ class PrintServiceClient:
             "User-Agent": "Mozilla/5.0 (Python MapMaker Client)"
         }
 
-        resp = requests.post(url, data=payload, verify=False, timeout=60, headers=headers)
+        resp = http.post(url, data=payload, verify=False, timeout=60, headers=headers)
         resp.raise_for_status()
-        return resp.json()
+        result = resp.json()
+        for item in result.get("results", []):
+            remember_output_url(key, (item.get("value") or {}).get("url"))
+        return result
 
 def convert_color_to_rgba_list(color_name_or_hex, alpha_float):
     """Converts matplotlib color and alpha to RGBA list for ArcGIS JSON."""
@@ -108,11 +124,12 @@ def fetch_image_from_url(url, verify_ssl=False):
         from requests.packages.urllib3.exceptions import InsecureRequestWarning
         warnings.simplefilter('ignore', InsecureRequestWarning)
     
-    response = requests.get(url, verify=verify_ssl, timeout=60)
-    if response.status_code != 200:
-        raise Exception(f"Failed to fetch image: HTTP {response.status_code} from {url}")
+    try:
+        content = read_output(http, url, timeout=60, verify=verify_ssl)
+    except requests.HTTPError as e:
+        raise Exception(f"Failed to fetch image: HTTP {e.response.status_code} from {url}")
     
-    return Image.open(BytesIO(response.content))
+    return Image.open(BytesIO(content))
 
 def geodesic_point_at_distance_and_bearing(lon: float, lat: float, distance_meters: float, bearing_degrees: float) -> Tuple[float, float, float]:
     """
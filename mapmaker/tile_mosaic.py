@@ -0,0 +1,281 @@
+# mapmaker/tile_mosaic.py
+"""
+Tile-based basemap mosaicking with a local MBTiles cache.
+
+Cached map services (the PR topographic basemap, ArcGIS Online basemaps)
+publish pre-rendered tiles under <service>/tile/<level>/<row>/<col>. Using
+those tiles avoids a server-side export render for every request. This module:
+
+- computes the tile range covering an extent at a level of detail, from the
+  service tileInfo (origin, tile size and LOD resolutions in MapServerClient.scales),
+- downloads the missing tiles concurrently over the shared upstream session,
+- mosaics them with Pillow and crops and resizes to the requested extent and size.
+
+Tiles are stored in one MBTiles (SQLite) file per service under
+TILE_CACHE_DIR. Screenings share the files, so later renders of nearby sites
+mostly read local tiles. Rows and columns are stored in the service's own
+tiling scheme (metadata "scheme" = "arcgis"), not flipped to TMS, because PR
+services use State Plane tiling schemes that TMS does not cover.
+
+    client = MapServerClient(url); client.fetch_metadata()
+    image, native_extent = TileMosaicker(client).mosaic(extent_wgs84, 1600, 1200)
+
+Environment:
+- TILE_CACHE=0 disables the local tile cache
+- TILE_CACHE_DIR: MBTiles directory (default cache/tiles)
+- TILE_CACHE_MAX_AGE: seconds a cached tile is reused (default 90 days)
+- TILE_FETCH_WORKERS: concurrent tile downloads (default 8)
+"""
+
+import concurrent.futures
+import contextvars
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from PIL import Image
+
+from mapmaker.common import MapServerClient, http, HEADERS
+from upstream_http import redirect_url
+from screening_metrics import record_cache
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "tiles")
+DEFAULT_MAX_AGE = 90 * 24 * 3600
+TILE_FETCH_WORKERS = int(os.getenv("TILE_FETCH_WORKERS", "8"))
+
+# Refuse mosaics that would need more tiles than this (wrong LOD for the extent)
+MAX_TILES = 400
+
+WEB_MERCATOR_WKIDS = {3857, 102100, 102113, 900913}
+
+TileKey = Tuple[int, int, int]   # (level, row, col)
+
+
+def cache_enabled() -> bool:
+    return os.getenv("TILE_CACHE", "1").lower() not in ("0", "false", "no", "off")
+
+
+class TileCache:
+    """MBTiles (SQLite) tile store, one file per service, safe to share between threads and processes"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_age: Optional[float] = None):
+        self.cache_dir = Path(cache_dir or os.getenv("TILE_CACHE_DIR", DEFAULT_CACHE_DIR))
+        self.max_age = float(os.getenv("TILE_CACHE_MAX_AGE", DEFAULT_MAX_AGE)) if max_age is None else max_age
+        self._lock = threading.Lock()
+        self._initialized: set = set()
+
+    def path(self, service_url: str) -> Path:
+        url = redirect_url(service_url.rstrip("/"))
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", url.split("/rest/services/")[-1]).strip("_")[:60]
+        return self.cache_dir / f"{slug}-{hashlib.sha1(url.encode()).hexdigest()[:12]}.mbtiles"
+
+    def _connect(self, service_url: str) -> sqlite3.Connection:
+        path = self.path(service_url)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(path), timeout=30)
+        with self._lock:
+            if path in self._initialized:
+                return connection
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE IF NOT EXISTS tiles (
+                    zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB,
+                    fetched_at REAL,
+                    PRIMARY KEY (zoom_level, tile_column, tile_row)
+                );
+            """)
+            connection.executemany("INSERT OR IGNORE INTO metadata (name, value) VALUES (?, ?)", [
+                ("name", redirect_url(service_url.rstrip("/"))), ("type", "baselayer"),
+                ("version", "1.0"), ("format", "png"), ("scheme", "arcgis"),
+            ])
+            connection.commit()
+            self._initialized.add(path)
+        return connection
+
+    def get_many(self, service_url: str, keys: Iterable[TileKey]) -> Dict[TileKey, bytes]:
+        """Cached, unexpired tiles among keys"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        oldest = time.time() - self.max_age
+        found: Dict[TileKey, bytes] = {}
+        connection = self._connect(service_url)
+        try:
+            for level, row, col in keys:
+                hit = connection.execute(
+                    "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?"
+                    " AND fetched_at >= ?", (level, col, row, oldest)).fetchone()
+                if hit is not None:
+                    found[(level, row, col)] = hit[0]
+        finally:
+            connection.close()
+        return found
+
+    def put_many(self, service_url: str, tiles: Dict[TileKey, bytes]):
+        if not tiles:
+            return
+        now = time.time()
+        connection = self._connect(service_url)
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data, fetched_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [(level, col, row, sqlite3.Binary(data), now) for (level, row, col), data in tiles.items()])
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not cache tiles: {e}")
+        finally:
+            connection.close()
+
+
+_tile_cache: Optional[TileCache] = None
+_tile_cache_lock = threading.Lock()
+
+
+def get_tile_cache() -> TileCache:
+    """The process-wide tile cache"""
+    global _tile_cache
+    if _tile_cache is None:
+        with _tile_cache_lock:
+            if _tile_cache is None:
+                _tile_cache = TileCache()
+    return _tile_cache
+
+
+class TileMosaicker:
+    """
+    Builds basemap images for cached map services from their tiles.
+
+    Args:
+        client: MapServerClient with metadata fetched (tile_info and scales populated)
+        cache: Tile cache (defaults to the process-wide one; None when TILE_CACHE=0)
+        verify_ssl: Whether to verify SSL certificates on tile requests
+    """
+
+    def __init__(self, client: MapServerClient, cache: Optional[TileCache] = None, verify_ssl: bool = False):
+        if not client.tile_info or not client.scales:
+            raise ValueError(f"{client.service_url} is not a cached (tiled) map service")
+        self.client = client
+        self.cache = cache or (get_tile_cache() if cache_enabled() else None)
+        self.verify_ssl = verify_ssl
+        tile_info = client.tile_info
+        self.tile_width = int(tile_info.get("cols", 256))
+        self.tile_height = int(tile_info.get("rows", 256))
+        self.origin_x = float(tile_info["origin"]["x"])
+        self.origin_y = float(tile_info["origin"]["y"])
+        self.wkid = int(tile_info.get("spatialReference", {}).get("latestWkid")
+                        or tile_info.get("spatialReference", {}).get("wkid")
+                        or client.spatial_reference.get("latestWkid")
+                        or client.spatial_reference.get("wkid") or 0)
+
+    # -- Tile math ----------------------------------------------------------------
+
+    def native_extent(self, extent: Dict[str, Any]) -> Tuple[float, float, float, float]:
+        """WGS84 extent in the tiling scheme's spatial reference"""
+        if self.wkid in WEB_MERCATOR_WKIDS:
+            xmin, ymin = self.client.lonlat_to_webmercator(extent["xmin"], extent["ymin"])
+            xmax, ymax = self.client.lonlat_to_webmercator(extent["xmax"], extent["ymax"])
+            return xmin, ymin, xmax, ymax
+        return self.client.reproject_bbox_via_geometry_server(
+            extent["xmin"], extent["ymin"], extent["xmax"], extent["ymax"], in_sr=4326, out_sr=self.wkid)
+
+    def best_level(self, native: Tuple[float, float, float, float], width_px: int) -> int:
+        """LOD whose resolution is closest to the requested ground resolution (as pick_best_lod)"""
+        desired = abs(native[2] - native[0]) / width_px
+        return min(self.client.scales.values(), key=lambda scale: abs(scale.resolution - desired)).level
+
+    def tile_range(self, native: Tuple[float, float, float, float], level: int) -> Tuple[int, int, int, int]:
+        """(row_min, row_max, col_min, col_max) of the tiles covering a native extent"""
+        resolution = self.client.scales[level].resolution
+        span_x = resolution * self.tile_width
+        span_y = resolution * self.tile_height
+        xmin, ymin, xmax, ymax = native
+        col_min = math.floor((xmin - self.origin_x) / span_x)
+        col_max = math.floor((xmax - self.origin_x) / span_x)
+        row_min = math.floor((self.origin_y - ymax) / span_y)
+        row_max = math.floor((self.origin_y - ymin) / span_y)
+        return max(row_min, 0), max(row_max, 0), max(col_min, 0), max(col_max, 0)
+
+    # -- Fetching -----------------------------------------------------------------
+
+    def _download(self, key: TileKey) -> Optional[bytes]:
+        level, row, col = key
+        response = http.get(f"{self.client.service_url}/tile/{level}/{row}/{col}", headers=HEADERS,
+                            verify=self.verify_ssl, timeout=30)
+        if response.status_code == 404:
+            # Outside the cached area
+            return None
+        response.raise_for_status()
+        if not response.content.startswith((b"\x89PNG", b"\xff\xd8", b"GIF8")):
+            return None
+        return response.content
+
+    def fetch_tiles(self, keys: Iterable[TileKey]) -> Dict[TileKey, bytes]:
+        """Tiles for keys, from the cache where possible and downloaded concurrently otherwise"""
+        keys = list(keys)
+        tiles = self.cache.get_many(self.client.service_url, keys) if self.cache else {}
+        missing = [key for key in keys if key not in tiles]
+        for key in keys:
+            record_cache("tiles", key in tiles)
+        if not missing:
+            return tiles
+
+        downloaded: Dict[TileKey, bytes] = {}
+        workers = max(1, min(len(missing), TILE_FETCH_WORKERS))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(contextvars.copy_context().run, self._download, key): key
+                for key in missing
+            }
+            for future in concurrent.futures.as_completed(futures):
+                content = future.result()
+                if content is not None:
+                    downloaded[futures[future]] = content
+        if self.cache:
+            self.cache.put_many(self.client.service_url, downloaded)
+        tiles.update(downloaded)
+        return tiles
+
+    def mosaic(self, extent: Dict[str, Any], width_px: int, height_px: int,
+               level: Optional[int] = None) -> Tuple[Image.Image, Tuple[float, float, float, float]]:
+        """
+        Basemap image of a WGS84 extent at width_px x height_px.
+
+        Returns the image and the native extent it covers. Missing tiles are left transparent.
+        """
+        native = self.native_extent(extent)
+        if level is None:
+            level = self.best_level(native, width_px)
+        row_min, row_max, col_min, col_max = self.tile_range(native, level)
+        count = (row_max - row_min + 1) * (col_max - col_min + 1)
+        if count > MAX_TILES:
+            raise ValueError(f"Extent needs {count} tiles at level {level} (limit {MAX_TILES})")
+
+        keys = [(level, row, col) for row in range(row_min, row_max + 1) for col in range(col_min, col_max + 1)]
+        tiles = self.fetch_tiles(keys)
+
+        canvas = Image.new("RGBA", ((col_max - col_min + 1) * self.tile_width,
+                                    (row_max - row_min + 1) * self.tile_height), (0, 0, 0, 0))
+        for (_, row, col), content in tiles.items():
+            tile = Image.open(BytesIO(content)).convert("RGBA")
+            canvas.paste(tile, ((col - col_min) * self.tile_width, (row - row_min) * self.tile_height))
+
+        # Crop the tile grid to the extent, then scale to the requested size
+        resolution = self.client.scales[level].resolution
+        grid_x = self.origin_x + col_min * self.tile_width * resolution
+        grid_y = self.origin_y - row_min * self.tile_height * resolution
+        xmin, ymin, xmax, ymax = native
+        box = (
+            round((xmin - grid_x) / resolution), round((grid_y - ymax) / resolution),
+            round((xmax - grid_x) / resolution), round((grid_y - ymin) / resolution),
+        )
+        image = canvas.crop(box).resize((width_px, height_px), Image.LANCZOS)
+        return image, native
@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+Mock ArcGIS REST and Print Service Server
+
+Local stand-in for the upstream GIS services used by a screening (sige.pr.gov,
+the FEMA NFHL MapServer, the MSC print GP service, USFWS / NWI FeatureServers,
+EPA services), for load testing without touching the real services.
+
+Upstream URLs are served under the original host name as the first path
+segment, which is what upstream_http produces with UPSTREAM_REDIRECT set:
+
+    UPSTREAM_REDIRECT=http://127.0.0.1:8900 python app.py
+    https://hazards.fema.gov/arcgis/rest/services/public/NFHL/MapServer/28/query
+        -> http://127.0.0.1:8900/hazards.fema.gov/arcgis/rest/services/public/NFHL/MapServer/28/query
+
+Supported endpoints (GET or form POST, f=json / pjson / image):
+- <service>                                   service metadata (layers, extent)
+- <service>/<layer>                           layer metadata
+- <service>/<layer>/query, <service>/query    synthetic features around the query point
+- <service>/identify                          identify results
+- <service>/export, ImageServer/exportImage   PNG map image (or JSON with an href)
+- GPServer/<task>/submitJob                   async job: esriJobSubmitted -> Executing -> Succeeded
+- GPServer/<task>/jobs/<id>[/results/<name>]  job status and output URL
+- GPServer/<task>/execute                     synchronous print (Export Web Map Task)
+- <service>/tile/<level>/<row>/<col>          256 px PNG tile (Web Mercator tiling scheme)
+- anything else                               PNG image (legends, swatches)
+
+Latency, jitter, error and timeout injection, print job duration and job
+failures are configurable, globally and per upstream host.
+
+    python mock_arcgis_server.py --port 8900 --latency 0.2 --jitter 0.1 --error-rate 0.02
+"""
+
+import json
+import random
+import struct
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+SERVICE_TYPES = ("MapServer", "FeatureServer", "GPServer", "ImageServer", "GeometryServer")
+
+# Attributes of the synthetic features, by service name fragment (first match wins)
+FEATURE_PROFILES: List[Tuple[str, Dict[str, Any]]] = [
+    ("NFHL", {
+        "FLD_ZONE": "AE", "ZONE_SUBTY": None, "STATIC_BFE": 9.0, "DFIRM_ID": "72000C",
+        "FIRM_PAN": "72000C0355J", "PANEL": "0355", "SUFFIX": "J", "PANEL_TYP": "Countywide, Panel Printed",
+        "EFF_DATE": 1258934400000, "ST_FIPS": "72", "PCOMM": "720000", "CO_FIPS": "033",
+        "POL_NAME1": "Cataño", "POL_AR_ID": "72000C_1", "CID": "720000", "REGION": "2",
+    }),
+    ("Catastr", {
+        "NUM_CATASTRO": "227-052-007-20", "MUNICIPIO": "Cataño", "BARRIO": "Palmas", "CABIDA": 1234.5,
+        "CLASIFICACION": "SU", "CALIFICACION": "R-I", "DIRECCION_FISICA": "Calle Mock 1",
+    }),
+    ("Karst", {"NOMBRE": "PRAPEC", "TIPO": "Zona Cárstica", "REGLAMENTO": "PRAPEC"}),
+    ("Critical", {
+        "comname": "Puerto Rican boa", "sciname": "Chilabothrus inornatus", "status": "Final",
+        "listing_status": "Endangered", "unit": "Unit 1", "effectdate": 1262304000000,
+    }),
+    ("Wetlands", {"ATTRIBUTE": "PEM1C", "WETLAND_TYPE": "Freshwater Emergent Wetland", "ACRES": 2.31}),
+    ("NonAttainment", {"pollutant_name": "Sulfur Dioxide", "area_name": "San Juan", "current_status": "Nonattainment",
+                       "classification": "Primary", "designation_date": 1375315200000}),
+]
+DEFAULT_PROFILE: Dict[str, Any] = {"NAME": "Mock feature", "TYPE": "mock"}
+
+# Standard ArcGIS Online / Google tiling scheme, levels 0-19
+WEB_MERCATOR_TILE_INFO: Dict[str, Any] = {
+    "rows": 256, "cols": 256, "dpi": 96, "format": "PNG32",
+    "origin": {"x": -20037508.342787, "y": 20037508.342787},
+    "spatialReference": {"wkid": 102100, "latestWkid": 3857},
+    "lods": [{"level": level, "resolution": 156543.03392800014 / 2 ** level, "scale": 591657527.591555 / 2 ** level}
+             for level in range(20)],
+}
+
+
+@dataclass
+class MockConfig:
+    """Behaviour of the mock server"""
+    latency: float = 0.05               # base latency per request (seconds)
+    jitter: float = 0.0                 # extra uniform random latency (seconds)
+    error_rate: float = 0.0             # share of requests answered with an error
+    timeout_rate: float = 0.0           # share of requests that hang for timeout_seconds
+    timeout_seconds: float = 60.0
+    job_seconds: float = 2.0            # time until an async print job succeeds
+    job_failure_rate: float = 0.0       # share of async jobs that end in esriJobFailed
+    features: int = 1                   # features returned per query
+    empty_rate: float = 0.0             # share of queries that return no features
+    host_latency: Dict[str, float] = field(default_factory=dict)    # per-host base latency
+    host_error_rate: Dict[str, float] = field(default_factory=dict)  # per-host error rate
+    seed: Optional[int] = None
+
+
+def png_bytes(width: int, height: int, rgba: Tuple[int, int, int, int] = (200, 220, 240, 255)) -> bytes:
+    """Solid-colour PNG image"""
+    width, height = max(1, min(width, 2048)), max(1, min(height, 2048))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    row = b"\x00" + bytes(rgba) * width
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * height, 1))
+            + chunk(b"IEND", b""))
+
+
+def pdf_bytes(title: str) -> bytes:
+    """Minimal valid one-page PDF (mergeable by PyPDF2 / pypdf)"""
+    text = title.replace("\\", "").replace("(", "").replace(")", "")[:80]
+    stream = f"BT /F1 18 Tf 72 720 Td ({text}) Tj ET".encode("latin-1", "replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def _query_point(params: Dict[str, str]) -> Tuple[float, float]:
+    """Centre of the request geometry / extent (x, y), defaulting to Cataño"""
+    for key in ("geometry", "bbox", "mapExtent"):
+        value = params.get(key)
+        if not value:
+            continue
+        try:
+            geometry = json.loads(value)
+        except ValueError:
+            numbers = [float(n) for n in value.split(",") if n.strip()]
+            if len(numbers) >= 4:
+                return (numbers[0] + numbers[2]) / 2, (numbers[1] + numbers[3]) / 2
+            if len(numbers) >= 2:
+                return numbers[0], numbers[1]
+            continue
+        if isinstance(geometry, dict):
+            if "x" in geometry:
+                return float(geometry["x"]), float(geometry["y"])
+            if "xmin" in geometry:
+                return (geometry["xmin"] + geometry["xmax"]) / 2, (geometry["ymin"] + geometry["ymax"]) / 2
+            rings = geometry.get("rings") or geometry.get("paths")
+            if rings and rings[0]:
+                xs = [p[0] for p in rings[0]]
+                ys = [p[1] for p in rings[0]]
+                return sum(xs) / len(xs), sum(ys) / len(ys)
+    return -66.150906, 18.434059
+
+
+class MockArcGISServer:
+    """Threaded mock ArcGIS server; use as a context manager or start() / stop()"""
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockConfig()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.stats: Dict[str, int] = {"requests": 0, "errors_injected": 0, "timeouts_injected": 0,
+                                      "jobs_submitted": 0, "jobs_failed": 0}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockArcGISServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-arcgis", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockArcGISServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _chance(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    # -- request handling ------------------------------------------------------
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.handle(self, dict(parse_qsl(urlsplit(self.path).query, keep_blank_values=True)))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode("utf-8", "replace") if length else ""
+                params = dict(parse_qsl(urlsplit(self.path).query, keep_blank_values=True))
+                params.update(parse_qsl(body, keep_blank_values=True))
+                server.handle(self, params)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def handle(self, request: BaseHTTPRequestHandler, params: Dict[str, str]):
+        self._count("requests")
+        path = urlsplit(request.path).path
+        segments = [s for s in path.split("/") if s]
+        upstream_host = segments[0] if segments else ""
+        config = self.config
+
+        delay = config.host_latency.get(upstream_host, config.latency)
+        if config.jitter:
+            with self._lock:
+                delay += self._random.uniform(0, config.jitter)
+        if self._chance(config.timeout_rate):
+            self._count("timeouts_injected")
+            delay = config.timeout_seconds
+        if delay > 0:
+            time.sleep(delay)
+
+        if segments[:1] != ["_mock"] and self._chance(config.host_error_rate.get(upstream_host, config.error_rate)):
+            self._count("errors_injected")
+            if self._chance(0.5):
+                self._send(request, 500, b"Mock injected server error", "text/plain")
+            else:
+                self._json(request, {"error": {"code": 500, "message": "Mock injected error", "details": []}})
+            return
+
+        try:
+            self._route(request, segments, params)
+        except Exception as e:  # a broken mock response must not kill the load test
+            self._json(request, {"error": {"code": 400, "message": str(e), "details": []}})
+
+    def _route(self, request: BaseHTTPRequestHandler, segments: List[str], params: Dict[str, str]):
+        if segments[:1] == ["_mock"]:
+            if segments[1:2] == ["stats"]:
+                with self._lock:
+                    return self._json(request, {**self.stats, "jobs_active": len(self.jobs)})
+            name = segments[-1]
+            if name.endswith(".pdf"):
+                return self._send(request, 200, pdf_bytes(f"Mock print {name}"), "application/pdf")
+            return self._send(request, 200, png_bytes(400, 300), "image/png")
+
+        service_index = next((i for i, s in enumerate(segments) if s in SERVICE_TYPES), None)
+        if service_index is None:
+            return self._send(request, 200, png_bytes(256, 256), "image/png")
+
+        service_type = segments[service_index]
+        service_name = "/".join(segments[1:service_index])
+        rest = segments[service_index + 1:]
+
+        if service_type == "GPServer":
+            return self._gp(request, segments[:service_index + 1], rest, params)
+        if not rest:
+            return self._json(request, self._service_info(service_name, service_type))
+        if rest[0] == "tile" and len(rest) == 4:
+            # Checkerboard tiles so mosaics show their tile grid
+            shade = 20 if (int(rest[2]) + int(rest[3])) % 2 else 0
+            return self._send(request, 200, png_bytes(256, 256, (200 - shade, 220 - shade, 240 - shade, 255)),
+                              "image/png")
+        operation = rest[-1]
+        if operation in ("export", "exportImage"):
+            return self._export(request, params)
+        if operation == "identify":
+            x, y = _query_point(params)
+            features = self._features(service_name, x, y, params)
+            return self._json(request, {"results": [
+                {"layerId": 0, "layerName": service_name, "attributes": f["attributes"],
+                 "geometryType": "esriGeometryPolygon", "geometry": f.get("geometry")} for f in features
+            ]})
+        if operation == "query":
+            return self._query(request, service_name, params)
+        if operation.isdigit():
+            return self._json(request, self._layer_info(service_name, int(operation)))
+        if operation in ("legend",):
+            return self._json(request, {"layers": [
+                {"layerId": 0, "layerName": service_name, "legend": [
+                    {"label": "Mock", "imageData": "", "contentType": "image/png", "height": 20, "width": 20}]}]})
+        return self._json(request, {"error": {"code": 400, "message": f"Unsupported operation '{operation}'"}})
+
+    # -- ArcGIS resources ------------------------------------------------------
+
+    def _profile(self, service_name: str) -> Dict[str, Any]:
+        for fragment, attributes in FEATURE_PROFILES:
+            if fragment.lower() in service_name.lower():
+                return attributes
+        return DEFAULT_PROFILE
+
+    def _service_info(self, service_name: str, service_type: str) -> Dict[str, Any]:
+        return {
+            "currentVersion": 10.91,
+            "serviceDescription": f"Mock {service_type} {service_name}",
+            "mapName": service_name,
+            "layers": [{"id": i, "name": f"Layer {i}", "parentLayerId": -1, "defaultVisibility": True,
+                        "subLayerIds": None, "minScale": 0, "maxScale": 0} for i in range(40)],
+            "spatialReference": {"wkid": 102100, "latestWkid": 3857},
+            "fullExtent": {"xmin": -7600000, "ymin": 1960000, "xmax": -7260000, "ymax": 2110000,
+                           "spatialReference": {"wkid": 102100}},
+            "initialExtent": {"xmin": -7380000, "ymin": 2070000, "xmax": -7340000, "ymax": 2100000,
+                              "spatialReference": {"wkid": 102100}},
+            "singleFusedMapCache": True,
+            "tileInfo": WEB_MERCATOR_TILE_INFO,
+            "supportedImageFormatTypes": "PNG32,PNG24,PNG,JPG",
+            "capabilities": "Map,Query,Data",
+            "maxRecordCount": 2000,
+        }
+
+    def _layer_info(self, service_name: str, layer_id: int) -> Dict[str, Any]:
+        profile = self._profile(service_name)
+        return {
+            "id": layer_id, "name": f"Layer {layer_id}", "type": "Feature Layer",
+            "geometryType": "esriGeometryPolygon",
+            "fields": [{"name": "OBJECTID", "type": "esriFieldTypeOID", "alias": "OBJECTID"}] + [
+                {"name": name, "type": "esriFieldTypeDouble" if isinstance(value, float) else "esriFieldTypeString",
+                 "alias": name} for name, value in profile.items()],
+            "drawingInfo": {"renderer": {"type": "simple", "symbol": {
+                "type": "esriSFS", "style": "esriSFSSolid", "color": [0, 112, 255, 120],
+                "outline": {"type": "esriSLS", "style": "esriSLSSolid", "color": [0, 0, 0, 255], "width": 1}}}},
+            "maxRecordCount": 2000,
+        }
+
+    def _features(self, service_name: str, x: float, y: float, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        if self._chance(self.config.empty_rate):
+            return []
+        profile = self._profile(service_name)
+        # Degrees for geographic requests, metres for projected ones
+        size = 0.002 if abs(x) <= 180 and abs(y) <= 90 else 200.0
+        features = []
+        for index in range(self.config.features):
+            dx = size * index * 1.5
+            feature: Dict[str, Any] = {"attributes": {"OBJECTID": index + 1, **profile}}
+            if params.get("returnGeometry", "true").lower() != "false":
+                ring = [[x - size + dx, y - size], [x - size + dx, y + size], [x + size + dx, y + size],
+                        [x + size + dx, y - size], [x - size + dx, y - size]]
+                feature["geometry"] = {"rings": [ring]}
+            features.append(feature)
+        return features
+
+    def _query(self, request: BaseHTTPRequestHandler, service_name: str, params: Dict[str, str]):
+        x, y = _query_point(params)
+        features = self._features(service_name, x, y, params)
+        if params.get("returnCountOnly", "").lower() == "true":
+            return self._json(request, {"count": len(features)})
+        if params.get("returnIdsOnly", "").lower() == "true":
+            return self._json(request, {"objectIdFieldName": "OBJECTID",
+                                        "objectIds": [f["attributes"]["OBJECTID"] for f in features]})
+        profile = self._profile(service_name)
+        out_sr = params.get("outSR") or params.get("inSR") or "4326"
+        try:
+            wkid = int(json.loads(out_sr)["wkid"]) if out_sr.startswith("{") else int(out_sr)
+        except (ValueError, KeyError, TypeError):
+            wkid = 4326
+        return self._json(request, {
+            "displayFieldName": next(iter(profile)),
+            "geometryType": "esriGeometryPolygon",
+            "spatialReference": {"wkid": wkid},
+            "fields": [{"name": "OBJECTID", "type": "esriFieldTypeOID"}] + [
+                {"name": name, "type": "esriFieldTypeString"} for name in profile],
+            "features": features,
+            "exceededTransferLimit": False,
+        })
+
+    def _export(self, request: BaseHTTPRequestHandler, params: Dict[str, str]):
+        try:
+            width, height = (int(float(v)) for v in params.get("size", "400,400").split(",")[:2])
+        except ValueError:
+            width, height = 400, 400
+        if params.get("f", "image") in ("json", "pjson"):
+            name = f"{uuid.uuid4().hex}.png"
+            return self._json(request, {
+                "href": f"{self._base_url(request)}/_mock/output/{name}",
+                "width": width, "height": height,
+                "extent": {"xmin": 0, "ymin": 0, "xmax": width, "ymax": height},
+                "scale": 10000,
+            })
+        return self._send(request, 200, png_bytes(width, height), "image/png")
+
+    def _gp(self, request: BaseHTTPRequestHandler, service_segments: List[str], rest: List[str],
+            params: Dict[str, str]):
+        if not rest:
+            return self._json(request, {"tasks": ["Print FIRM or FIRMette", "Export Web Map Task"]})
+        task = rest[0]
+        base = f"{self._base_url(request)}/{'/'.join(service_segments)}/{task}"
+        output_format = (params.get("Format") or params.get("Graphic_Format") or "PDF").lower()
+        extension = "png" if "png" in output_format else "pdf"
+
+        if len(rest) == 1:
+            return self._json(request, {"name": task, "executionType": "esriExecutionTypeAsynchronous",
+                                        "parameters": []})
+        if rest[1] == "execute":
+            url = f"{self._base_url(request)}/_mock/output/{uuid.uuid4().hex}.{extension}"
+            return self._json(request, {"results": [
+                {"paramName": "Output_File", "dataType": "GPDataFile", "value": {"url": url}}], "messages": []})
+        if rest[1] == "submitJob":
+            job_id = uuid.uuid4().hex
+            failed = self._chance(self.config.job_failure_rate)
+            with self._lock:
+                self.jobs[job_id] = {"submitted": time.time(), "failed": failed, "extension": extension}
+                self.stats["jobs_submitted"] += 1
+                self.stats["jobs_failed"] += int(failed)
+            return self._json(request, {"jobId": job_id, "jobStatus": "esriJobSubmitted"})
+        if rest[1] == "jobs" and len(rest) >= 3:
+            with self._lock:
+                job = self.jobs.get(rest[2])
+            if job is None:
+                return self._json(request, {"error": {"code": 400, "message": "Invalid job id"}})
+            elapsed = time.time() - job["submitted"]
+            if elapsed < self.config.job_seconds * 0.2:
+                status = "esriJobSubmitted"
+            elif elapsed < self.config.job_seconds:
+                status = "esriJobExecuting"
+            else:
+                status = "esriJobFailed" if job["failed"] else "esriJobSucceeded"
+            if len(rest) >= 5 and rest[3] == "results":
+                url = f"{self._base_url(request)}/_mock/output/{rest[2]}.{job['extension']}"
+                return self._json(request, {"paramName": rest[4], "dataType": "GPDataFile", "value": {"url": url}})
+            payload: Dict[str, Any] = {"jobId": rest[2], "jobStatus": status, "messages": []}
+            if status == "esriJobSucceeded":
+                payload["results"] = {name: {"paramUrl": f"results/{name}"} for name in ("OutputFile", "Output_File")}
+            return self._json(request, payload)
+        return self._json(request, {"error": {"code": 400, "message": "Unsupported GP request"}})
+
+    # -- responses -------------------------------------------------------------
+
+    @staticmethod
+    def _base_url(request: BaseHTTPRequestHandler) -> str:
+        return f"http://{request.headers.get('Host') or '%s:%s' % request.server.server_address[:2]}"
+
+    def _json(self, request: BaseHTTPRequestHandler, payload: Dict[str, Any]):
+        self._send(request, 200, json.dumps(payload).encode("utf-8"), "application/json; charset=utf-8")
+
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler, status: int, body: bytes, content_type: str):
+        try:
+            request.send_response(status)
+            request.send_header("Content-Type", content_type)
+            request.send_header("Content-Length", str(len(body)))
+            request.end_headers()
+            request.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (e.g. its timeout fired first)
+
+
+def _parse_host_values(items: List[str]) -> Dict[str, float]:
+    values = {}
+    for item in items or []:
+        host, _, value = item.partition("=")
+        values[host.strip()] = float(value)
+    return values
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mock ArcGIS REST / print service for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.05, help="Base latency per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with errors")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Share of requests that hang")
+    parser.add_argument("--timeout-seconds", type=float, default=60.0)
+    parser.add_argument("--job-seconds", type=float, default=2.0, help="Async print job duration (s)")
+    parser.add_argument("--job-failure-rate", type=float, default=0.0)
+    parser.add_argument("--features", type=int, default=1, help="Features returned per query")
+    parser.add_argument("--empty-rate", type=float, default=0.0, help="Share of queries with no features")
+    parser.add_argument("--host-latency", nargs="*", metavar="HOST=SECONDS", help="Per-upstream latency")
+    parser.add_argument("--host-error-rate", nargs="*", metavar="HOST=RATE", help="Per-upstream error rate")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, timeout_rate=args.timeout_rate,
+        timeout_seconds=args.timeout_seconds, job_seconds=args.job_seconds,
+        job_failure_rate=args.job_failure_rate, features=args.features, empty_rate=args.empty_rate,
+        host_latency=_parse_host_values(args.host_latency), host_error_rate=_parse_host_values(args.host_error_rate),
+        seed=args.seed,
+    )
+    server = MockArcGISServer(config, args.host, args.port)
+    print(f"🧪 Mock ArcGIS server listening on {server.url}")
+    print(f"   Point the screening servers at it with UPSTREAM_REDIRECT={server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -28,6 +28,7 @@ from langchain_core.tools import tool
 from NonAttainmentINFO.nonattainment_client import NonAttainmentAreasClient
 from NonAttainmentINFO.generate_nonattainment_map_pdf import NonAttainmentMapGenerator
 from output_directory_manager import get_output_manager
+from progressive_maps import deliver_map, web_map_preview, PREVIEW_DPI, PREVIEW_WIDTH_PX, PREVIEW_HEIGHT_PX
 
 class NonAttainmentAnalysisInput(BaseModel):
     """Input schema for comprehensive nonattainment analysis"""
@@ -148,23 +149,39 @@ def analyze_nonattainment_with_map(longitude: float, latitude: float, location_n
         print(f"🗺️ Step 3: Generating adaptive nonattainment map...")
         generator = NonAttainmentMapGenerator()
         
+        settings = generator.adaptive_map_settings(result)
+        
         # Use adaptive map generation for optimal settings
-        map_filename = f"nonattainment_map_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        map_path = generator.generate_adaptive_nonattainment_map(
-            longitude=longitude,
-            latitude=latitude,
-            location_name=location_name,
-            analysis_result=result
-        )
+        def render_final():
+            return generator.generate_adaptive_nonattainment_map(
+                longitude=longitude,
+                latitude=latitude,
+                location_name=location_name,
+                analysis_result=result
+            )
+        
+        def render_preview(path):
+            web_map_json = generator._create_web_map_json(
+                longitude, latitude, f"{location_name} - Adaptive Analysis Map",
+                settings["buffer_miles"], settings["base_map"], PREVIEW_DPI,
+                (PREVIEW_WIDTH_PX, PREVIEW_HEIGHT_PX), True, settings["pollutants"], False,
+                settings["transparency"]
+            )
+            return web_map_preview(web_map_json, path, site=[(longitude, latitude)])
+        
+        delivery = deliver_map(output_manager.current_project_dir, "nonattainment", render_final, render_preview)
+        map_path = delivery["path"]
         
         # Determine map result
         map_result = {
             "success": map_path is not None,
             "filename": os.path.basename(map_path) if map_path else None,
             "full_path": map_path,
-            "file_type": "PDF" if map_path and map_path.endswith('.pdf') else "HTML",
+            "file_type": os.path.splitext(map_path)[1].lstrip('.').upper() if map_path else None,
+            "status": delivery.get("status"),
+            "preview": delivery.get("preview"),
             "adaptive_settings": {
-                "buffer_miles": 15.0 if result.has_nonattainment_areas else 50.0,
+                "buffer_miles": settings["buffer_miles"],
                 "reasoning": "Detailed view for violations found" if result.has_nonattainment_areas else "Regional overview for clean air area"
             }
         }
@@ -12,12 +12,16 @@ Features:
 - Provides consistent directory structure for all screening outputs
 - Handles both coordinate-based and cadastral-based screenings
 - Manages subdirectories for different file types (reports, maps, logs)
+- Isolates concurrent screenings with context-scoped workspaces
 """
 
 import os
 import re
+import threading
+import contextvars
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any, Tuple, List
+from typing import Optional, Dict, Any, Tuple, List, Iterator
 from pathlib import Path
 
 # LangChain tool imports for the new intelligent directory creation tool
@@ -242,16 +246,91 @@ class OutputDirectoryManager:
             f.write(f"├── logs/        (Analysis logs and raw data)\n")
             f.write(f"└── data/        (Structured data exports)\n")
 
-# Global instance for easy access
+# Global instance for easy access (used when no screening workspace is bound)
 _global_manager = None
 
+# Workspace bound to the current execution context. asyncio tasks, asyncio.to_thread
+# and LangGraph's tool executor copy the context, so every tool invoked on behalf of a
+# screening resolves to that screening's manager.
+_current_workspace: contextvars.ContextVar[Optional[OutputDirectoryManager]] = contextvars.ContextVar(
+    "screening_workspace", default=None
+)
+
+# Workspaces keyed by screening/thread id so callers outside the bound context
+# (status endpoints, report post-processing) can look them up
+_workspaces: Dict[str, OutputDirectoryManager] = {}
+_workspaces_lock = threading.Lock()
+
 def get_output_manager() -> OutputDirectoryManager:
-    """Get the global output directory manager instance"""
+    """
+    Get the output directory manager for the current screening
+    
+    Returns the workspace bound with screening_workspace() if there is one,
+    otherwise the process-global manager (CLI and single-screening usage).
+    """
+    workspace = _current_workspace.get()
+    if workspace is not None:
+        return workspace
+    
     global _global_manager
     if _global_manager is None:
         _global_manager = OutputDirectoryManager()
     return _global_manager
 
+def get_workspace(workspace_id: str, base_output_dir: str = "output") -> OutputDirectoryManager:
+    """
+    Get (or create) the workspace registered under a screening/thread id
+    
+    Args:
+        workspace_id: Screening id or LangGraph thread_id
+        base_output_dir: Base directory for the workspace's project directory
+        
+    Returns:
+        The OutputDirectoryManager owned by that workspace
+    """
+    with _workspaces_lock:
+        workspace = _workspaces.get(workspace_id)
+        if workspace is None:
+            workspace = OutputDirectoryManager(base_output_dir)
+            _workspaces[workspace_id] = workspace
+        return workspace
+
+def release_workspace(workspace_id: str) -> Optional[OutputDirectoryManager]:
+    """Remove a workspace from the registry and return it"""
+    with _workspaces_lock:
+        return _workspaces.pop(workspace_id, None)
+
+@contextmanager
+def screening_workspace(workspace_id: Optional[str] = None, base_output_dir: str = "output",
+                        release: bool = True) -> Iterator[OutputDirectoryManager]:
+    """
+    Bind an isolated output workspace to the current context
+    
+    Every call to get_output_manager() made from this context (including tools run by
+    the agent on its behalf) resolves to the bound workspace, so concurrent screenings
+    in one process never share a current_project_dir.
+    
+    Args:
+        workspace_id: Screening id or thread_id to register the workspace under (optional)
+        base_output_dir: Base directory for the workspace's project directory
+        release: Remove the workspace from the registry on exit
+        
+    Yields:
+        The workspace's OutputDirectoryManager
+    """
+    if workspace_id is not None:
+        workspace = get_workspace(workspace_id, base_output_dir)
+    else:
+        workspace = OutputDirectoryManager(base_output_dir)
+    
+    token = _current_workspace.set(workspace)
+    try:
+        yield workspace
+    finally:
+        _current_workspace.reset(token)
+        if workspace_id is not None and release:
+            release_workspace(workspace_id)
+
 def create_screening_directory(
     location_name: Optional[str] = None,
     coordinates: Optional[Tuple[float, float]] = None,
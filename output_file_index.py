@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Output File Index
+
+Persistent SQLite index of the files under the output directory, used by the
+web servers for file listings and filename lookups instead of walking the
+output tree on every request.
+
+Features:
+- O(1) filename -> path resolution (indexed by name, with project and
+  subdirectory preferences)
+- Paginated file and project listings with per-project file counts
+- Incremental reconciliation: directories whose mtime has not changed are not
+  listed again, so a reconcile of an unchanged tree costs one stat() per
+  directory
+- index_directory() to refresh a project as soon as a screening finishes
+- Optional background thread that reconciles periodically
+
+Files rewritten in place (same name, same directory) do not change their
+directory's mtime; their size/mtime are refreshed when the project is
+re-indexed with index_directory() or reconcile(force=True).
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Default index location (kept outside output/ so it is not indexed itself)
+DEFAULT_INDEX_DB = os.getenv("OUTPUT_INDEX_DB", "output_index.db")
+
+# Seconds between background reconciliations
+DEFAULT_RECONCILE_INTERVAL = float(os.getenv("OUTPUT_INDEX_RECONCILE_SECONDS", "60"))
+
+# Subdirectories preferred when a bare filename exists in several places
+DEFAULT_RESOLVE_ORDER = ("reports/pdfs", "reports", "", "maps", "data", "logs")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    project TEXT,
+    category TEXT NOT NULL,
+    ext TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_name ON files (name);
+CREATE INDEX IF NOT EXISTS idx_files_project ON files (project, category);
+CREATE INDEX IF NOT EXISTS idx_files_dir ON files (dir);
+CREATE INDEX IF NOT EXISTS idx_files_mtime ON files (mtime);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dirs_parent ON dirs (parent);
+"""
+
+
+def _split_relative(rel_path: str) -> Tuple[Optional[str], str]:
+    """Split a path relative to the output directory into (project, category)"""
+    parts = rel_path.split("/")
+    if len(parts) == 1:
+        return None, ""
+    return parts[0], "/".join(parts[1:-1])
+
+
+class OutputFileIndex:
+    """SQLite-backed index of the output directory tree"""
+
+    def __init__(self, output_dir: str = "output", db_path: str = DEFAULT_INDEX_DB):
+        """
+        Initialize the file index
+
+        Args:
+            output_dir: Root of the screening output tree
+            db_path: Path to the SQLite index database (created if missing)
+        """
+        self.output_dir = Path(output_dir)
+        self.db_path = db_path
+        self._local = threading.local()
+        self._reconcile_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it in WAL mode on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def _relative(self, path: Path) -> str:
+        """Path relative to the output directory in index form ('' for the root)"""
+        rel = Path(path).resolve().relative_to(self.output_dir.resolve()).as_posix()
+        return "" if rel == "." else rel
+
+    def _forget_dir(self, conn: sqlite3.Connection, rel_dir: str):
+        """Drop a directory and everything below it from the index"""
+        if rel_dir:
+            pattern = rel_dir.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "/%"
+            conn.execute("DELETE FROM files WHERE dir = ? OR dir LIKE ? ESCAPE '\\'", (rel_dir, pattern))
+            conn.execute("DELETE FROM dirs WHERE path = ? OR path LIKE ? ESCAPE '\\'", (rel_dir, pattern))
+        else:
+            conn.execute("DELETE FROM files")
+            conn.execute("DELETE FROM dirs")
+
+    def _scan_dir(self, conn: sqlite3.Connection, rel_dir: str, parent: Optional[str],
+                  force: bool, stats: Dict[str, int]):
+        """Reconcile one directory, listing it only if its mtime changed (or force)"""
+        abs_dir = self.output_dir / rel_dir if rel_dir else self.output_dir
+        try:
+            dir_stat = os.stat(abs_dir)
+        except FileNotFoundError:
+            self._forget_dir(conn, rel_dir)
+            return
+        stats["dirs_checked"] += 1
+
+        row = conn.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (rel_dir,)).fetchone()
+        if row is not None and row["mtime_ns"] == dir_stat.st_mtime_ns and not force:
+            # Entries unchanged: only the known subdirectories need checking
+            children = [r["path"] for r in conn.execute("SELECT path FROM dirs WHERE parent = ?", (rel_dir,))]
+            for child in children:
+                self._scan_dir(conn, child, rel_dir, force, stats)
+            return
+
+        stats["dirs_listed"] += 1
+        subdirs = []
+        seen_files = set()
+        rows = []
+        with os.scandir(abs_dir) as entries:
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(rel_path)
+                    elif entry.is_file():
+                        entry_stat = entry.stat()
+                        project, category = _split_relative(rel_path)
+                        seen_files.add(rel_path)
+                        rows.append((rel_path, rel_dir, entry.name, project, category,
+                                     os.path.splitext(entry.name)[1].lower(),
+                                     entry_stat.st_size, entry_stat.st_mtime))
+                except FileNotFoundError:
+                    continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            known = {r["path"] for r in conn.execute("SELECT path FROM files WHERE dir = ?", (rel_dir,))}
+            removed = known - seen_files
+            conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in removed])
+            conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+            known_dirs = {r["path"] for r in conn.execute("SELECT path FROM dirs WHERE parent = ?", (rel_dir,))}
+            for gone in known_dirs - set(subdirs):
+                self._forget_dir(conn, gone)
+
+            conn.execute("INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)",
+                         (rel_dir, parent, dir_stat.st_mtime_ns))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        stats["files_indexed"] += len(rows)
+        stats["files_removed"] += len(removed)
+        for child in subdirs:
+            self._scan_dir(conn, child, rel_dir, force, stats)
+
+    def reconcile(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Bring the index up to date with the output directory
+
+        Args:
+            force: List every directory even if its mtime is unchanged
+
+        Returns:
+            Statistics about the directories checked and files updated
+        """
+        stats = {"dirs_checked": 0, "dirs_listed": 0, "files_indexed": 0, "files_removed": 0}
+        started = time.time()
+        with self._reconcile_lock:
+            conn = self._connect()
+            if self.output_dir.exists():
+                self._scan_dir(conn, "", None, force, stats)
+            else:
+                self._forget_dir(conn, "")
+        stats["seconds"] = round(time.time() - started, 3)
+        return stats
+
+    def index_directory(self, path: str) -> Dict[str, Any]:
+        """
+        Re-index a directory below the output directory (e.g. a finished screening)
+
+        Args:
+            path: Directory path (absolute or relative to the working directory)
+        """
+        stats = {"dirs_checked": 0, "dirs_listed": 0, "files_indexed": 0, "files_removed": 0}
+        try:
+            rel_dir = self._relative(Path(path))
+        except ValueError:
+            # Not below the indexed output directory
+            return stats
+        parts = rel_dir.split("/") if rel_dir else []
+
+        with self._reconcile_lock:
+            conn = self._connect()
+            # Unknown ancestors are registered unlisted (mtime 0) so the next
+            # reconcile lists them and keeps checking this subtree
+            ancestors = [("", None)] + [("/".join(parts[:depth + 1]), "/".join(parts[:depth]))
+                                        for depth in range(len(parts) - 1)]
+            conn.executemany("INSERT OR IGNORE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, 0)",
+                             ancestors)
+            parent = "/".join(parts[:-1]) if parts else None
+            self._scan_dir(conn, rel_dir, parent, True, stats)
+        return stats
+
+    def remove_file(self, path: str):
+        """Drop a single file from the index (e.g. after deleting it)"""
+        rel_path = self._relative(path)
+        self._connect().execute("DELETE FROM files WHERE path = ?", (rel_path,))
+
+    def start(self, interval: float = DEFAULT_RECONCILE_INTERVAL):
+        """Reconcile now and then every `interval` seconds in a background thread"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.is_set():
+                try:
+                    self.reconcile()
+                except Exception as e:
+                    print(f"⚠️ Output index reconcile failed: {e}")
+                self._stop_event.wait(interval)
+
+        self._thread = threading.Thread(target=run, name="output-file-index", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the background reconcile thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _row_to_file(self, row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record["absolute_path"] = str(self.output_dir / row["path"])
+        return record
+
+    def resolve(
+        self,
+        filename: str,
+        project: Optional[str] = None,
+        categories: Iterable[str] = DEFAULT_RESOLVE_ORDER,
+        extensions: Optional[Iterable[str]] = None
+    ) -> Optional[Path]:
+        """
+        Find the file served for a bare filename
+
+        Args:
+            filename: File name without directories
+            project: Only look in this project directory (optional)
+            categories: Subdirectories to search, in order of preference
+            extensions: Only accept these extensions, e.g. ['.pdf'] (optional)
+
+        Returns:
+            Path of the newest match in the most preferred subdirectory, or None
+        """
+        categories = list(categories)
+        query = (f"SELECT path FROM files WHERE name = ? "
+                 f"AND category IN ({', '.join('?' * len(categories))})")
+        params: List[Any] = [filename, *categories]
+        if project is not None:
+            query += " AND project = ?"
+            params.append(project)
+        if extensions is not None:
+            extensions = [ext.lower() for ext in extensions]
+            query += f" AND ext IN ({', '.join('?' * len(extensions))})"
+            params.extend(extensions)
+        order = " ".join(f"WHEN ? THEN {i}" for i in range(len(categories)))
+        query += f" ORDER BY CASE category {order} END, mtime DESC"
+        params.extend(categories)
+
+        conn = self._connect()
+        for row in conn.execute(query, params).fetchall():
+            path = self.output_dir / row["path"]
+            if path.is_file():
+                return path
+            # Deleted since the last reconcile
+            conn.execute("DELETE FROM files WHERE path = ?", (row["path"],))
+        return None
+
+    def list_files(
+        self,
+        project: Optional[str] = None,
+        category: Optional[str] = None,
+        extensions: Optional[Iterable[str]] = None,
+        offset: int = 0,
+        limit: Optional[int] = 100,
+        newest_first: bool = False,
+        recursive: bool = False
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        List indexed files
+
+        Args:
+            project: Only files of this project (optional)
+            category: Only files directly in this project subdirectory, '' for the project root (optional)
+            extensions: Only files with these extensions (optional)
+            offset: Number of files to skip
+            limit: Maximum number of files to return (None for all)
+            newest_first: Order by modification time instead of path
+            recursive: Also include files below the category subdirectory
+
+        Returns:
+            Tuple of (files, total number of matching files)
+        """
+        where = "WHERE 1=1"
+        params: List[Any] = []
+        if project is not None:
+            where += " AND project = ?"
+            params.append(project)
+        if category is not None and recursive:
+            where += " AND (category = ? OR category LIKE ?)"
+            params.extend([category, f"{category}/%"])
+        elif category is not None:
+            where += " AND category = ?"
+            params.append(category)
+        if extensions is not None:
+            extensions = [ext.lower() for ext in extensions]
+            where += f" AND ext IN ({', '.join('?' * len(extensions))})"
+            params.extend(extensions)
+
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM files {where}", params).fetchone()[0]
+        order = "mtime DESC" if newest_first else "path"
+        query = f"SELECT * FROM files {where} ORDER BY {order} LIMIT ? OFFSET ?"
+        rows = conn.execute(query, [*params, -1 if limit is None else limit, offset]).fetchall()
+        return [self._row_to_file(row) for row in rows], total
+
+    def list_projects(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = 100,
+        extensions: Iterable[str] = (".pdf", ".json"),
+        projects: Optional[Iterable[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        List project directories with file counts
+
+        Args:
+            offset: Number of projects to skip
+            limit: Maximum number of projects to return (None for all)
+            extensions: Extensions counted in report_count
+            projects: Only these project directories (optional)
+
+        Returns:
+            Tuple of (projects newest first, total number of projects);
+            reports_dir_count counts the files under each project's reports/
+        """
+        extensions = [ext.lower() for ext in extensions]
+        where = "WHERE d.parent = ''"
+        params: List[Any] = []
+        if projects is not None:
+            projects = list(projects)
+            where += f" AND d.path IN ({', '.join('?' * len(projects))})"
+            params.extend(projects)
+
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM dirs AS d {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"""SELECT d.path AS project,
+                       COUNT(f.path) AS file_count,
+                       COALESCE(SUM(f.ext IN ({', '.join('?' * len(extensions))})), 0) AS report_count,
+                       COALESCE(SUM(f.category = 'reports' OR f.category LIKE 'reports/%'), 0) AS reports_dir_count,
+                       COALESCE(SUM(f.size), 0) AS total_size,
+                       MAX(f.mtime) AS last_modified
+                FROM dirs AS d LEFT JOIN files AS f ON f.project = d.path
+                {where}
+                GROUP BY d.path
+                ORDER BY COALESCE(MAX(f.mtime), 0) DESC, d.path
+                LIMIT ? OFFSET ?""",
+            [*extensions, *params, -1 if limit is None else limit, offset]
+        ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def count_projects(self) -> int:
+        """Number of project directories in the output directory"""
+        return self._connect().execute("SELECT COUNT(*) FROM dirs WHERE parent = ''").fetchone()[0]
+
+    def project_names(self) -> List[str]:
+        """Names of all project directories in the output directory"""
+        rows = self._connect().execute("SELECT path FROM dirs WHERE parent = '' ORDER BY path").fetchall()
+        return [row["path"] for row in rows]
+
+
+_file_index: Optional[OutputFileIndex] = None
+_file_index_lock = threading.Lock()
+
+
+def get_file_index(output_dir: str = "output", db_path: str = DEFAULT_INDEX_DB) -> OutputFileIndex:
+    """Get the process-wide output file index"""
+    global _file_index
+    if _file_index is None:
+        with _file_index_lock:
+            if _file_index is None:
+                _file_index = OutputFileIndex(output_dir, db_path)
+    return _file_index
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Print Service Output Cache
+
+Map generators render through remote print services (Export Web Map, the MSC
+FIRMette GP job) that take 5-60 s per map. Re-running a screening or
+regenerating a report asks for the same maps again. This cache keeps the
+downloaded artifacts (PDF / PNG) on disk, keyed by a fingerprint of the print
+request, and hands them back without contacting the print service.
+
+Generators keep their submit -> result URL -> download flow:
+
+    key = print_fingerprint(print_url, web_map_json, layout_template, "PDF")
+    result_url = cached_output_url(key)          # file:// URL on a hit
+    if result_url is None:
+        result_url = <submit the print job>
+        remember_output_url(key, result_url)
+    content = read_output(session, result_url)   # stores the download under key
+
+The fingerprint is the SHA-256 of the canonical request: the web map JSON with
+sorted keys, floats rounded to FINGERPRINT_DECIMALS and volatile keys (the
+"Generated <date>" copyright text) dropped, plus the print service URL,
+layout template, format and DPI. Near-identical requests for the same site
+therefore share one artifact.
+
+The cache is evicted least recently used first once it exceeds
+PRINT_CACHE_MAX_MB, and entries older than PRINT_CACHE_MAX_AGE are
+re-rendered. Lookups are recorded as "print_output" cache hits and misses.
+
+Environment:
+- PRINT_CACHE=0 disables the cache
+- PRINT_CACHE_DIR: artifact directory (default cache/print_outputs)
+- PRINT_CACHE_MAX_MB: size limit (default 500)
+- PRINT_CACHE_MAX_AGE: seconds an artifact is reused (default 30 days)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import unquote, urlsplit
+
+from screening_metrics import record_cache
+from upstream_http import redirect_url
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "print_outputs")
+DEFAULT_MAX_MB = 500
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+FINGERPRINT_DECIMALS = 6
+
+# Keys whose values change between otherwise identical requests
+VOLATILE_KEYS = {"copyrightText"}
+
+# Magic bytes of the artifacts print services return
+_EXTENSIONS = [(b"%PDF", ".pdf"), (b"\x89PNG", ".png"), (b"\xff\xd8", ".jpg"), (b"GIF8", ".gif")]
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _canonical(item) for key, item in value.items() if key not in VOLATILE_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, float):
+        rounded = round(value, FINGERPRINT_DECIMALS)
+        return 0.0 if rounded == 0 else rounded
+    if isinstance(value, str) and value[:1] in "{[":
+        # Nested JSON strings (e.g. a feature class passed as a GP parameter)
+        try:
+            return _canonical(json.loads(value))
+        except ValueError:
+            return value
+    return value
+
+
+def print_fingerprint(service_url: str, web_map_json: Any, layout_template: Optional[str],
+                      fmt: Optional[str], dpi: Optional[int] = None, **extra: Any) -> str:
+    """
+    Fingerprint of a print request
+
+    Args:
+        service_url: Print task URL (the redirect target under UPSTREAM_REDIRECT)
+        web_map_json: Web_Map_as_JSON as a dict or JSON string (or other job input)
+        layout_template: Layout template name
+        fmt: Output format (PDF, PNG32, ...)
+        dpi: Output DPI when passed separately from the web map
+        extra: Any other request parameters that change the output
+    """
+    request = {
+        "service": redirect_url(service_url.rstrip("/")),
+        "web_map": _canonical(web_map_json),
+        "layout_template": layout_template,
+        "format": (fmt or "").upper(),
+        "dpi": dpi,
+        "extra": _canonical(extra),
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def _extension(content: bytes) -> str:
+    for magic, extension in _EXTENSIONS:
+        if content.startswith(magic):
+            return extension
+    return ".bin"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(float(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+class PrintOutputCache:
+    """Size-bounded, least-recently-used cache of print service artifacts on disk"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None,
+                 max_age: Optional[float] = None):
+        self.cache_dir = Path(cache_dir or os.getenv("PRINT_CACHE_DIR", DEFAULT_CACHE_DIR))
+        self.max_bytes = _env_int("PRINT_CACHE_MAX_MB", DEFAULT_MAX_MB) * 1024 * 1024 if max_bytes is None else max_bytes
+        self.max_age = _env_int("PRINT_CACHE_MAX_AGE", DEFAULT_MAX_AGE) if max_age is None else max_age
+        self._lock = threading.Lock()
+        self._pending: Dict[str, str] = {}
+
+    def _files(self, key: str) -> List[Path]:
+        return list(self.cache_dir.glob(f"{key}.*")) if self.cache_dir.is_dir() else []
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Cached artifact for key, or None; a hit marks it recently used"""
+        with self._lock:
+            for path in self._files(key):
+                if path.suffix == ".tmp":
+                    continue
+                try:
+                    # mtime is when the artifact was rendered, atime when it was last used
+                    stat = path.stat()
+                    if time.time() - stat.st_mtime > self.max_age:
+                        path.unlink()
+                        continue
+                    os.utime(path, (time.time(), stat.st_mtime))
+                except OSError:
+                    continue
+                record_cache("print_output", True)
+                return path
+        record_cache("print_output", False)
+        return None
+
+    def store(self, key: str, content: bytes) -> Optional[Path]:
+        """Save an artifact under key and evict old artifacts beyond the size limit"""
+        if not content or self.max_bytes <= 0:
+            return None
+        path = self.cache_dir / f"{key}{_extension(content)}"
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temporary = self.cache_dir / f"{key}.{threading.get_ident()}.tmp"
+            temporary.write_bytes(content)
+            os.replace(temporary, path)
+        except OSError as e:
+            print(f"⚠️ Could not cache print output: {e}")
+            return None
+        self.evict()
+        return path
+
+    def evict(self):
+        """Remove least recently used artifacts until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.glob("*"):
+                if path.suffix == ".tmp":
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+
+    def size(self) -> int:
+        return sum(path.stat().st_size for path in self.cache_dir.glob("*")) if self.cache_dir.is_dir() else 0
+
+    # -- URL flow used by the generators ----------------------------------------
+
+    def cached_url(self, key: Optional[str]) -> Optional[str]:
+        if not key:
+            return None
+        path = self.lookup(key)
+        return path.resolve().as_uri() if path else None
+
+    def remember(self, key: Optional[str], url: Optional[str]):
+        if key and url:
+            with self._lock:
+                self._pending[url] = key
+
+    def read(self, session, url: str, timeout: float = 60, **kwargs) -> bytes:
+        if url.startswith("file://"):
+            return Path(unquote(urlsplit(url).path)).read_bytes()
+        with self._lock:
+            key = self._pending.pop(url, None)
+        response = session.get(url, timeout=timeout, **kwargs)
+        response.raise_for_status()
+        content = response.content
+        # Only PDFs and images are cached, never an error page served in their place
+        if key and _extension(content) != ".bin":
+            self.store(key, content)
+        return content
+
+
+_cache: Optional[PrintOutputCache] = None
+_cache_lock = threading.Lock()
+
+
+def cache_enabled() -> bool:
+    return os.getenv("PRINT_CACHE", "1").lower() not in ("0", "false", "no", "off")
+
+
+def get_print_cache() -> PrintOutputCache:
+    """The process-wide print output cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PrintOutputCache()
+    return _cache
+
+
+def cached_output_url(key: Optional[str]) -> Optional[str]:
+    """file:// URL of the cached artifact for a print fingerprint, or None to render it"""
+    return get_print_cache().cached_url(key) if cache_enabled() else None
+
+
+def remember_output_url(key: Optional[str], url: Optional[str]):
+    """Cache the artifact behind url under key when it is downloaded with read_output()"""
+    if cache_enabled():
+        get_print_cache().remember(key, url)
+
+
+def read_output(session, url: str, timeout: float = 60, **kwargs) -> bytes:
+    """Download a print artifact (or read a cached one), caching it if its URL was remembered"""
+    return get_print_cache().read(session, url, timeout, **kwargs)
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Progressive Map Delivery
+
+Domain maps are rendered by remote print services at 300 DPI, which takes
+5-60 s per map, and the dashboard showed nothing until every PDF was back. A
+96 DPI MapServer export of the same extent returns in well under a second, so
+maps are delivered in two phases:
+
+1. a low-resolution preview PNG, composited locally from the basemap and
+   thematic layer exports of the print request (web_map_preview()), written
+   before the tool returns;
+2. the print-quality PDF, rendered on a background worker and swapped in when
+   it is done.
+
+Both artifacts are tracked per domain in the project's map manifest,
+maps/map_manifest.json:
+
+    {"updated_at": "...", "maps": {"wetlands": {
+        "status": "rendering" | "final" | "failed",
+        "preview": "maps/previews/wetlands.png",
+        "final": "maps/wetland_map_....pdf",
+        "error": null, "updated_at": "..."}}}
+
+Paths are relative to the project directory. Previews live in maps/previews/
+so the report generators, which embed every file in maps/, only pick up the
+finals. Tools submit both phases with deliver_map():
+
+    delivery = deliver_map(project_dir, "wetlands", render_final, render_preview)
+    delivery["path"]     # the final if it is done, else the preview (None if neither)
+    delivery["status"]   # "rendering", "final" or "failed"
+
+render_preview(path) writes the preview PNG; render_final() renders the PDF
+and returns its path. Finals run with a copy of the caller's context, so the
+screening workspace stays the same. Report generation waits for them with
+wait_for_maps(project_dir).
+
+Environment:
+- PROGRESSIVE_MAPS=0 renders finals inline, without previews
+- MAP_FINAL_WORKERS: concurrent print-quality renders (default 2)
+- MAP_PREVIEW_DPI: preview export DPI (default 96)
+- MAP_FINAL_WAIT: seconds report generation waits for finals (default 300)
+"""
+
+import concurrent.futures
+import contextvars
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+MANIFEST_NAME = "map_manifest.json"
+PREVIEW_DIR = "previews"
+
+PREVIEW_DPI = int(os.getenv("MAP_PREVIEW_DPI", "96"))
+# Letter landscape at the preview DPI
+PREVIEW_WIDTH_PX = 11 * PREVIEW_DPI
+PREVIEW_HEIGHT_PX = int(8.5 * PREVIEW_DPI)
+
+MAP_FINAL_WORKERS = int(os.getenv("MAP_FINAL_WORKERS", "2"))
+MAP_FINAL_WAIT = float(os.getenv("MAP_FINAL_WAIT", "300"))
+
+
+def progressive_enabled() -> bool:
+    return os.getenv("PROGRESSIVE_MAPS", "1").lower() not in ("0", "false", "no", "off")
+
+
+# One lock per manifest file, shared by every MapManifest instance in the process
+_manifest_locks: Dict[str, threading.Lock] = {}
+_manifest_locks_lock = threading.Lock()
+
+
+def _manifest_lock(path: Path) -> threading.Lock:
+    key = str(path.resolve())
+    with _manifest_locks_lock:
+        return _manifest_locks.setdefault(key, threading.Lock())
+
+
+class MapManifest:
+    """The preview and final map artifacts of one project, by domain"""
+
+    def __init__(self, project_dir: str):
+        self.project_dir = Path(project_dir)
+        self.path = self.project_dir / "maps" / MANIFEST_NAME
+
+    def read(self) -> Dict[str, Any]:
+        """The whole manifest (an empty one if no map was submitted yet)"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"updated_at": None, "maps": {}}
+
+    def with_urls(self, url_prefix: str) -> Dict[str, Any]:
+        """The manifest with download URLs ({url_prefix}/{domain}?variant=...) for the servers' file APIs"""
+        manifest = self.read()
+        for domain, entry in manifest["maps"].items():
+            entry["url"] = f"{url_prefix}/{domain}"
+            for variant in ("preview", "final"):
+                entry[f"{variant}_url"] = f"{entry['url']}?variant={variant}" if entry.get(variant) else None
+        return manifest
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        return self.read()["maps"]
+
+    def get(self, domain: str) -> Optional[Dict[str, Any]]:
+        return self.entries().get(domain)
+
+    def update(self, domain: str, **fields: Any) -> Dict[str, Any]:
+        """Merge fields into the domain's entry and write the manifest atomically"""
+        now = datetime.now().isoformat()
+        with _manifest_lock(self.path):
+            manifest = self.read()
+            entry = manifest["maps"].setdefault(domain, {"domain": domain, "status": "rendering",
+                                                         "preview": None, "final": None, "error": None})
+            entry.update(fields)
+            entry["updated_at"] = manifest["updated_at"] = now
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, self.path)
+            return dict(entry)
+
+    def relative(self, path: str) -> str:
+        """Path as stored in the manifest: relative to the project directory when inside it"""
+        try:
+            return Path(path).resolve().relative_to(self.project_dir.resolve()).as_posix()
+        except ValueError:
+            return str(path)
+
+    def artifact(self, domain: str, variant: Optional[str] = None) -> Optional[Path]:
+        """
+        File of a domain map: the final once it exists, the preview until then
+
+        variant="preview" or "final" asks for that artifact only.
+        """
+        entry = self.get(domain)
+        if entry is None:
+            return None
+        variants = [variant] if variant else ["final", "preview"]
+        for name in variants:
+            value = entry.get(name)
+            if value:
+                path = Path(value) if Path(value).is_absolute() else self.project_dir / value
+                if path.is_file():
+                    return path
+        return None
+
+
+def preview_path(project_dir: str, domain: str) -> str:
+    """Where the preview PNG of a domain map is written"""
+    return os.path.join(project_dir, "maps", PREVIEW_DIR, f"{domain}.png")
+
+
+def web_map_preview(web_map_json: Dict[str, Any], path: str,
+                    site: Optional[Sequence[Tuple[float, float]]] = None,
+                    width_px: int = PREVIEW_WIDTH_PX, height_px: int = PREVIEW_HEIGHT_PX,
+                    dpi: int = PREVIEW_DPI, **style: Any) -> str:
+    """
+    Render a print request's Web Map JSON as a low-resolution PNG with MapServer exports
+
+    The first base map layer is the basemap, operational layers with a url are
+    exported as transparent overlays (feature collections such as markers are
+    skipped) and the site polygon, legend and scale bar are drawn locally.
+    site defaults to the centre of the map extent; keyword arguments are passed
+    to SiteMapCompositor.compose().
+    """
+    from mapmaker.map_compositor import SiteMapCompositor, fit_extent_to_size
+
+    base_layers = web_map_json.get("baseMap", {}).get("baseMapLayers", [])
+    compositor_args = {"width_px": width_px, "height_px": height_px, "dpi": dpi}
+    if base_layers and base_layers[0].get("url"):
+        compositor_args["basemap_url"] = base_layers[0]["url"]
+    compositor = SiteMapCompositor(**compositor_args)
+
+    extent = fit_extent_to_size(web_map_json["mapOptions"]["extent"], width_px, height_px)
+    if site is None:
+        site = [((extent["xmin"] + extent["xmax"]) / 2, (extent["ymin"] + extent["ymax"]) / 2)]
+    layers = [layer for layer in web_map_json.get("operationalLayers", [])
+              if layer.get("url") and layer.get("visibility", True)]
+
+    basemap, images = compositor.fetch_layers(extent, layers)
+    style.setdefault("title", web_map_json.get("layoutOptions", {}).get("titleText"))
+    image = compositor.compose(basemap, extent, site, list(zip(layers, images)), **style)
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    image.save(path, format="PNG", optimize=True)
+    return path
+
+
+class ProgressiveMapPipeline:
+    """
+    Writes map previews right away and renders the print-quality maps in the background.
+
+    Listeners added with add_listener() are called with (project_dir, entry)
+    after every manifest update, e.g. to index the new files.
+    """
+
+    def __init__(self, max_workers: int = MAP_FINAL_WORKERS):
+        self.max_workers = max_workers
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[concurrent.futures.Future]] = {}
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+    def add_listener(self, callback: Callable[[str, Dict[str, Any]], None]):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str, Dict[str, Any]], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, project_dir: str, entry: Dict[str, Any]):
+        for callback in list(self._listeners):
+            try:
+                callback(project_dir, entry)
+            except Exception as e:
+                print(f"⚠️ Map manifest listener failed: {e}")
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="map-final")
+            return self._executor
+
+    def submit(self, project_dir: str, domain: str, render_final: Callable[[], Optional[str]],
+               render_preview: Optional[Callable[[str], Any]] = None) -> concurrent.futures.Future:
+        """
+        Write the domain's preview now and schedule its final render
+
+        Returns a future of the final map path (None if it could not be rendered).
+        A failed preview is reported and does not stop the final.
+        """
+        manifest = MapManifest(project_dir)
+        manifest.update(domain, status="rendering", final=None, preview=None, error=None)
+
+        if not progressive_enabled():
+            future: concurrent.futures.Future = concurrent.futures.Future()
+            future.set_result(self._render_final(manifest, domain, render_final))
+            return future
+
+        if render_preview is not None:
+            path = preview_path(project_dir, domain)
+            try:
+                render_preview(path)
+                entry = manifest.update(domain, preview=manifest.relative(path))
+                print(f"🖼️ {domain} map preview ready: {path}")
+                self._notify(project_dir, entry)
+            except Exception as e:
+                print(f"⚠️ Could not render {domain} map preview: {e}")
+
+        future = self._get_executor().submit(
+            contextvars.copy_context().run, self._render_final, manifest, domain, render_final)
+        key = str(Path(project_dir).resolve())
+        with self._lock:
+            self._pending.setdefault(key, []).append(future)
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key: str, future: concurrent.futures.Future):
+        with self._lock:
+            pending = self._pending.get(key, [])
+            if future in pending:
+                pending.remove(future)
+            if not pending:
+                self._pending.pop(key, None)
+
+    def _render_final(self, manifest: MapManifest, domain: str,
+                      render_final: Callable[[], Optional[str]]) -> Optional[str]:
+        try:
+            path = render_final()
+        except Exception as e:
+            path, error = None, str(e)
+        else:
+            error = None if path else "Map generation failed"
+
+        if path:
+            entry = manifest.update(domain, status="final", final=manifest.relative(path), error=None)
+            print(f"🗺️ {domain} print-quality map ready: {path}")
+        else:
+            entry = manifest.update(domain, status="failed", error=error)
+            print(f"❌ {domain} print-quality map failed: {error}")
+        self._notify(str(manifest.project_dir), entry)
+        return path
+
+    def pending(self, project_dir: Optional[str] = None) -> int:
+        """Number of final renders still running (for one project, or in total)"""
+        with self._lock:
+            if project_dir is None:
+                return sum(len(futures) for futures in self._pending.values())
+            return len(self._pending.get(str(Path(project_dir).resolve()), []))
+
+    def wait(self, project_dir: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """Wait for the final renders of a project (or all of them); False on timeout"""
+        with self._lock:
+            if project_dir is None:
+                futures = [future for pending in self._pending.values() for future in pending]
+            else:
+                futures = list(self._pending.get(str(Path(project_dir).resolve()), []))
+        _, not_done = concurrent.futures.wait(futures, timeout=timeout)
+        return not not_done
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+_pipeline: Optional[ProgressiveMapPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_map_pipeline() -> ProgressiveMapPipeline:
+    """The process-wide progressive map pipeline"""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = ProgressiveMapPipeline()
+    return _pipeline
+
+
+def deliver_map(project_dir: str, domain: str, render_final: Callable[[], Optional[str]],
+                render_preview: Optional[Callable[[str], Any]] = None) -> Dict[str, Any]:
+    """
+    Submit a domain map and return what can be shown right away
+
+    Without a preview to show, waits for the final as tools did before.
+
+    Returns:
+        The domain's manifest entry plus "path": the final map once it is rendered,
+        the preview while the final is rendering, None if the map failed
+    """
+    future = get_map_pipeline().submit(project_dir, domain, render_final, render_preview)
+    manifest = MapManifest(project_dir)
+    if not future.done() and not (manifest.get(domain) or {}).get("preview"):
+        future.result()
+    entry = manifest.get(domain) or {}
+    variant = {"final": "final", "rendering": "preview"}.get(entry.get("status"))
+    path = manifest.artifact(domain, variant) if variant else None
+    return {**entry, "path": str(path) if path else None}
+
+
+def wait_for_maps(project_dir: str, timeout: Optional[float] = MAP_FINAL_WAIT) -> bool:
+    """Wait until the project's print-quality maps are rendered; False on timeout"""
+    if _pipeline is None:
+        return True
+    return _pipeline.wait(project_dir, timeout)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Project Catalogue
+
+Lazily hydrated catalogue of the screening projects in the output directory,
+used by advanced_frontend_server.py instead of loading every project and report
+into memory at startup.
+
+- Project IDs are derived from the project directory name, so they are the
+  same on every boot and in every server process
+- Projects and reports are read page by page from the OutputFileIndex; nothing
+  is enumerated until a request asks for it
+- Screening results that cannot be derived from the files (status, risk level,
+  the screening that produced the project) are stored per project in SQLite
+"""
+
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from output_file_index import OutputFileIndex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    directory TEXT NOT NULL UNIQUE,
+    screening_id TEXT,
+    status TEXT,
+    risk_level TEXT,
+    location_name TEXT,
+    completed_date TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_projects_screening ON projects (screening_id);
+CREATE INDEX IF NOT EXISTS idx_projects_risk ON projects (risk_level);
+"""
+
+# Defaults for projects found on disk without a recorded screening result
+DEFAULT_STATUS = "completed"
+DEFAULT_RISK_LEVEL = "Low"
+DEFAULT_ANALYSES_COUNT = 6
+
+
+def project_id_for(directory_name: str) -> str:
+    """Stable project ID derived from the project directory name"""
+    return hashlib.sha1(directory_name.encode("utf-8")).hexdigest()[:16]
+
+
+def report_category(filename: str) -> str:
+    """Categorize a report file by its name and extension"""
+    name = filename.lower()
+    if "comprehensive" in name:
+        return "comprehensive_pdf"
+    if name.endswith(".pdf"):
+        return "pdf"
+    if name.endswith((".json", ".md")):
+        return "data"
+    return "report"
+
+
+class ProjectCatalogue:
+    """Paginated, lazily hydrated view of the projects in the output directory"""
+
+    def __init__(self, file_index: OutputFileIndex, db_path: Optional[str] = None):
+        """
+        Initialize the catalogue
+
+        Args:
+            file_index: Index of the output directory
+            db_path: SQLite database for project records (defaults to the index database)
+        """
+        self.file_index = file_index
+        self.db_path = db_path or file_index.db_path
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _records(self, directories: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get (creating if needed) the stored records for project directories"""
+        if not directories:
+            return {}
+        conn = self._connect()
+        conn.executemany(
+            "INSERT OR IGNORE INTO projects (id, directory) VALUES (?, ?)",
+            [(project_id_for(directory), directory) for directory in directories]
+        )
+        rows = conn.execute(
+            f"SELECT * FROM projects WHERE directory IN ({', '.join('?' * len(directories))})",
+            directories
+        ).fetchall()
+        return {row["directory"]: dict(row) for row in rows}
+
+    def _hydrate(self, summary: Dict[str, Any], record: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the project dictionary returned by the API"""
+        directory = summary["project"]
+        last_modified = summary.get("last_modified")
+        return {
+            "id": record["id"],
+            "name": directory.replace("_", " ").split(" Environmental")[0],
+            "description": "Imported project" if not record.get("screening_id") else None,
+            "directory": directory,
+            "screening_id": record.get("screening_id"),
+            "location_name": record.get("location_name"),
+            "status": record.get("status") or DEFAULT_STATUS,
+            "created_date": datetime.fromtimestamp(last_modified).isoformat() if last_modified else None,
+            "completed_date": record.get("completed_date"),
+            "analyses_count": DEFAULT_ANALYSES_COUNT,
+            "reports_count": summary.get("reports_dir_count", 0),
+            "file_count": summary.get("file_count", 0),
+            "risk_level": record.get("risk_level") or DEFAULT_RISK_LEVEL,
+        }
+
+    def list_projects(self, offset: int = 0, limit: Optional[int] = 50) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Get one page of projects, newest first
+
+        Returns:
+            Tuple of (projects, total number of projects)
+        """
+        summaries, total = self.file_index.list_projects(offset=offset, limit=limit)
+        records = self._records([summary["project"] for summary in summaries])
+        return [self._hydrate(summary, records[summary["project"]]) for summary in summaries], total
+
+    def get_project_directory(self, project_id: str) -> Optional[Path]:
+        """Resolve a project ID (or the ID of the screening that produced it) to its directory"""
+        row = self._connect().execute(
+            "SELECT directory FROM projects WHERE id = ? OR screening_id = ? LIMIT 1",
+            (project_id, project_id)
+        ).fetchone()
+        if row is not None:
+            directory = row["directory"]
+        else:
+            # Project IDs are derived from directory names, so projects that no page has listed yet
+            # (e.g. in a freshly started process) are resolved from the file index
+            directory = next((name for name in self.file_index.project_names()
+                              if project_id_for(name) == project_id), None)
+            if directory is None:
+                return None
+            self._records([directory])
+        path = self.file_index.output_dir / directory
+        return path if path.is_dir() else None
+
+    def get_project(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single project by ID"""
+        directory = self.get_project_directory(project_id)
+        if directory is None:
+            return None
+        summaries, _ = self.file_index.list_projects(projects=[directory.name])
+        if not summaries:
+            return None
+        return self._hydrate(summaries[0], self._records([directory.name])[directory.name])
+
+    def list_reports(self, project_id: Optional[str] = None, offset: int = 0,
+                     limit: Optional[int] = 50) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Get one page of report files (everything under a project's reports/), newest first
+
+        Args:
+            project_id: Only reports of this project (optional)
+            offset: Number of reports to skip
+            limit: Maximum number of reports to return (None for all)
+
+        Returns:
+            Tuple of (reports, total number of reports)
+        """
+        project = None
+        if project_id is not None:
+            directory = self.get_project_directory(project_id)
+            if directory is None:
+                return [], 0
+            project = directory.name
+
+        files, total = self.file_index.list_files(project=project, category="reports", recursive=True,
+                                                  offset=offset, limit=limit, newest_first=True)
+        records = self._records(sorted({f["project"] for f in files}))
+        reports = []
+        for report_file in files:
+            reports.append({
+                "filename": report_file["name"],
+                "title": Path(report_file["name"]).stem.replace("_", " ").title(),
+                "project_id": records[report_file["project"]]["id"],
+                "size": report_file["size"],
+                "created_date": datetime.fromtimestamp(report_file["mtime"]).isoformat(),
+                "file_path": report_file["absolute_path"],
+                "relative_path": report_file["path"].split("/", 1)[1],
+                "category": report_category(report_file["name"]),
+                "is_pdf": report_file["ext"] == ".pdf",
+            })
+        return reports, total
+
+    def count_reports(self) -> int:
+        """Number of report files across all projects"""
+        return self.file_index.list_files(category="reports", recursive=True, limit=0)[1]
+
+    def count_by_risk_level(self, risk_level: str) -> int:
+        """Number of projects with a recorded risk level"""
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM projects WHERE risk_level = ?", (risk_level,)
+        ).fetchone()[0]
+
+    def count_by_status(self, status: str) -> int:
+        """Number of projects with a status (projects without a record count as completed)"""
+        conn = self._connect()
+        if status == DEFAULT_STATUS:
+            other = conn.execute(
+                "SELECT COUNT(*) FROM projects WHERE status IS NOT NULL AND status != ?", (status,)
+            ).fetchone()[0]
+            return max(self.file_index.count_projects() - other, 0)
+        return conn.execute("SELECT COUNT(*) FROM projects WHERE status = ?", (status,)).fetchone()[0]
+
+    def record_screening(self, screening_id: str, project_directory: str, status: Optional[str] = None,
+                         risk_level: Optional[str] = None, location_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Record which screening produced a project directory and its results
+
+        Args:
+            screening_id: Screening job identifier
+            project_directory: Project directory created by the screening
+            status: Project status (optional)
+            risk_level: Assessed risk level (optional)
+            location_name: Location label from the request (optional)
+
+        Returns:
+            The project record
+        """
+        directory = Path(project_directory).name
+        project_id = project_id_for(directory)
+        conn = self._connect()
+        conn.execute("INSERT OR IGNORE INTO projects (id, directory) VALUES (?, ?)", (project_id, directory))
+        conn.execute(
+            """UPDATE projects SET screening_id = ?,
+                   status = COALESCE(?, status),
+                   risk_level = COALESCE(?, risk_level),
+                   location_name = COALESCE(?, location_name),
+                   completed_date = CASE WHEN ? = 'completed' THEN ? ELSE completed_date END
+               WHERE id = ?""",
+            (screening_id, status, risk_level, location_name, status, datetime.now().isoformat(), project_id)
+        )
+        return dict(conn.execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone())
+
+    def update_status(self, screening_id: str, status: str) -> bool:
+        """Update the status of the project produced by a screening; False if it has no project"""
+        completed_date = datetime.now().isoformat() if status == "completed" else None
+        cursor = self._connect().execute(
+            "UPDATE projects SET status = ?, completed_date = COALESCE(?, completed_date) WHERE screening_id = ?",
+            (status, completed_date, screening_id)
+        )
+        return cursor.rowcount > 0
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Parallel Report Regeneration Runner
+
+Regenerates comprehensive screening reports for every screening directory under
+an output tree using a process pool. Directories whose report outputs are newer
+than all of their data inputs are skipped, and LLM enhancement calls are bounded
+by a semaphore shared across all worker processes.
+
+Features:
+- Up-to-date detection based on data/ and maps/ inputs vs. reports/ outputs
+- Process pool with configurable worker count
+- Cross-process limit on concurrent LLM calls
+- Dry-run mode that lists what would be rebuilt without touching anything
+
+Usage:
+    python report_regeneration_runner.py --workers 8 --llm-concurrency 2
+    python report_regeneration_runner.py --dry-run
+    python report_regeneration_runner.py --force --no-llm
+"""
+
+import os
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable
+
+# Prefix used by ScreeningReportTool.generate_reports for its output files
+REPORT_PREFIX = "comprehensive_screening_report_"
+
+# Output extensions produced for each --format choice (PDF is always generated)
+FORMAT_EXTENSIONS = {
+    "json": [".json", ".pdf"],
+    "markdown": [".md", ".pdf"],
+    "both": [".json", ".md", ".pdf"],
+}
+
+# Map files that are embedded into the PDF report and therefore count as inputs
+MAP_EXTENSIONS = {".pdf", ".png", ".jpg", ".jpeg"}
+
+
+def newest_mtime(paths: Iterable[Path]) -> Optional[float]:
+    """
+    Return the newest modification time among the given paths
+
+    Args:
+        paths: Files to inspect
+
+    Returns:
+        Newest st_mtime, or None if no path could be stat'ed
+    """
+    newest = None
+    for path in paths:
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            continue
+        if newest is None or mtime > newest:
+            newest = mtime
+    return newest
+
+
+def is_up_to_date(inputs: Iterable[Path], outputs: Iterable[Path]) -> bool:
+    """
+    Check whether every output is newer than all inputs
+
+    Args:
+        inputs: Source files the outputs are derived from
+        outputs: Generated files
+
+    Returns:
+        True if there is at least one output and the oldest output is newer than the newest input
+    """
+    output_mtimes = []
+    for path in outputs:
+        try:
+            output_mtimes.append(path.stat().st_mtime)
+        except OSError:
+            return False
+    if not output_mtimes:
+        return False
+
+    newest_input = newest_mtime(inputs)
+    if newest_input is None:
+        return True
+    return min(output_mtimes) > newest_input
+
+
+def get_report_inputs(screening_dir: Path) -> List[Path]:
+    """Data JSON files and map files that feed the comprehensive report"""
+
+    inputs = list((screening_dir / "data").glob("*.json"))
+    maps_dir = screening_dir / "maps"
+    if maps_dir.exists():
+        inputs.extend(f for f in maps_dir.iterdir() if f.suffix.lower() in MAP_EXTENSIONS)
+    return inputs
+
+
+def get_latest_report_outputs(screening_dir: Path, output_format: str = "both") -> List[Path]:
+    """
+    Find the most recent comprehensive report file for each expected format
+
+    Args:
+        screening_dir: Screening project directory
+        output_format: Output format ('json', 'markdown', 'both')
+
+    Returns:
+        Latest report file per expected extension; empty if any format is missing
+    """
+    reports_dir = screening_dir / "reports"
+    if not reports_dir.exists():
+        return []
+
+    latest = []
+    for extension in FORMAT_EXTENSIONS.get(output_format, FORMAT_EXTENSIONS["both"]):
+        candidates = list(reports_dir.glob(f"{REPORT_PREFIX}*{extension}"))
+        if not candidates:
+            return []
+        latest.append(max(candidates, key=lambda f: f.stat().st_mtime))
+    return latest
+
+
+def is_screening_report_up_to_date(screening_dir: Path, output_format: str = "both") -> bool:
+    """Check whether a screening directory's reports are newer than its data inputs"""
+
+    return is_up_to_date(
+        get_report_inputs(screening_dir),
+        get_latest_report_outputs(screening_dir, output_format)
+    )
+
+
+def plan_regeneration(base_output_dir: str = "output",
+                      output_format: str = "both",
+                      force: bool = False) -> Dict[str, List[Path]]:
+    """
+    Partition discovered screening directories into stale and up-to-date sets
+
+    Args:
+        base_output_dir: Base directory to search for screening projects
+        output_format: Output format ('json', 'markdown', 'both')
+        force: Treat every directory as stale
+
+    Returns:
+        Dictionary with 'rebuild' and 'skip' lists of screening directories
+    """
+    from comprehensive_screening_report_tool import find_screening_directories
+
+    plan = {"rebuild": [], "skip": []}
+    for screening_dir in sorted(find_screening_directories(base_output_dir)):
+        if not force and is_screening_report_up_to_date(screening_dir, output_format):
+            plan["skip"].append(screening_dir)
+        else:
+            plan["rebuild"].append(screening_dir)
+    return plan
+
+
+def _init_worker(llm_semaphore) -> None:
+    """Process pool initializer: install the shared LLM concurrency limiter"""
+
+    try:
+        from llm_enhanced_report_generator import set_llm_concurrency_limiter
+        set_llm_concurrency_limiter(llm_semaphore)
+    except ImportError:
+        # LLM enhancement unavailable; ScreeningReportTool falls back to the standard generator
+        pass
+
+
+def _regeneration_result(screening_dir: str, output_files: Dict[str, str], start_time: float) -> Dict[str, Any]:
+    """Result of one regenerated directory; a PDF failure is reported apart from the written files"""
+
+    # generate_reports() puts the PDF failure message among the file paths
+    pdf_error = output_files.get('pdf_error')
+    return {
+        "directory": screening_dir,
+        "success": True,
+        "output_files": [path for key, path in output_files.items() if key != 'pdf_error'],
+        "pdf_generated": bool(output_files.get('pdf')),
+        "pdf_error": pdf_error,
+        "duration_seconds": round(time.time() - start_time, 2)
+    }
+
+
+def _regenerate_directory(screening_dir: str, use_llm: bool, output_format: str,
+                          model_name: str) -> Dict[str, Any]:
+    """Worker entry point: regenerate reports for a single screening directory"""
+
+    from comprehensive_screening_report_tool import ScreeningReportTool
+
+    start_time = time.time()
+    try:
+        tool = ScreeningReportTool(
+            output_directory=screening_dir,
+            use_llm=use_llm,
+            model_name=model_name
+        )
+        output_files = tool.generate_reports(output_format=output_format, include_pdf=True)
+        return _regeneration_result(screening_dir, output_files, start_time)
+    except Exception as e:
+        return {
+            "directory": screening_dir,
+            "success": False,
+            "error": str(e),
+            "output_files": [],
+            "duration_seconds": round(time.time() - start_time, 2)
+        }
+
+
+def regenerate_reports_parallel(base_output_dir: str = "output",
+                                max_workers: Optional[int] = None,
+                                llm_concurrency: int = 2,
+                                use_llm: bool = True,
+                                output_format: str = "both",
+                                model_name: str = "grok-3-mini",
+                                force: bool = False,
+                                dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Regenerate stale screening reports in parallel
+
+    Args:
+        base_output_dir: Base directory to search for screening projects
+        max_workers: Number of worker processes (default: CPU count)
+        llm_concurrency: Maximum concurrent LLM enhancement passes across all workers
+        use_llm: Whether to use LLM enhancement for analysis
+        output_format: Output format ('json', 'markdown', 'both')
+        model_name: LLM model to use for enhancement
+        force: Rebuild every directory regardless of timestamps
+        dry_run: Only report which directories would be rebuilt
+
+    Returns:
+        Dictionary containing:
+        - rebuild: Directories that were (or would be) rebuilt
+        - skipped: Directories whose reports were already up to date
+        - results: Per-directory results keyed by directory path (empty in dry-run mode)
+        - summary: Counts and timing
+    """
+    start_time = time.time()
+    max_workers = max_workers or os.cpu_count() or 1
+    llm_concurrency = max(1, llm_concurrency)
+
+    print(f"🔍 Planning report regeneration in: {base_output_dir}")
+    plan = plan_regeneration(base_output_dir, output_format, force)
+    print(f"📋 {len(plan['rebuild'])} to rebuild, {len(plan['skip'])} up to date")
+
+    if dry_run:
+        print(f"\n🧪 DRY RUN - the following directories would be rebuilt:")
+        for screening_dir in plan["rebuild"]:
+            print(f"   • {screening_dir.name}")
+
+    results = {}
+    if plan["rebuild"] and not dry_run:
+        print(f"🚀 Regenerating with {max_workers} workers, LLM concurrency {llm_concurrency}")
+
+        ctx = multiprocessing.get_context()
+        llm_semaphore = ctx.BoundedSemaphore(llm_concurrency)
+
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx,
+                                 initializer=_init_worker, initargs=(llm_semaphore,)) as executor:
+            futures = {
+                executor.submit(_regenerate_directory, str(screening_dir), use_llm,
+                                output_format, model_name): screening_dir
+                for screening_dir in plan["rebuild"]
+            }
+            for i, future in enumerate(as_completed(futures), 1):
+                screening_dir = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"directory": str(screening_dir), "success": False,
+                              "error": str(e), "output_files": []}
+                results[str(screening_dir)] = result
+
+                if not result["success"]:
+                    status, detail = "❌", f" - {result.get('error', 'Unknown error')}"
+                elif result.get("pdf_error"):
+                    status, detail = "⚠️", f" - {result['pdf_error']}"
+                else:
+                    status, detail = "✅", ""
+                print(f"{status} [{i}/{len(futures)}] {screening_dir.name}{detail}")
+
+    successful = sum(1 for r in results.values() if r["success"])
+    pdf_failed = sum(1 for r in results.values() if r["success"] and not r.get("pdf_generated"))
+    return {
+        "rebuild": [str(d) for d in plan["rebuild"]],
+        "skipped": [str(d) for d in plan["skip"]],
+        "results": results,
+        "summary": {
+            "dry_run": dry_run,
+            "total_directories": len(plan["rebuild"]) + len(plan["skip"]),
+            "rebuilt": len(results),
+            "successful": successful,
+            "failed": len(results) - successful,
+            "pdf_failed": pdf_failed,
+            "skipped_up_to_date": len(plan["skip"]),
+            "duration_seconds": round(time.time() - start_time, 2)
+        }
+    }
+
+
+def main():
+    """Main function for command-line usage"""
+
+    parser = argparse.ArgumentParser(
+        description='Regenerate stale comprehensive screening reports in parallel'
+    )
+    parser.add_argument('--base-dir', default='output',
+                       help='Base directory for auto-discovery (default: output)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--llm-concurrency', type=int, default=2,
+                       help='Maximum concurrent LLM calls across all workers (default: 2)')
+    parser.add_argument('--format', choices=['json', 'markdown', 'both'], default='both',
+                       help='Output format (default: both)')
+    parser.add_argument('--model', default='grok-3-mini',
+                       help='LLM model to use for enhanced processing (default: grok-3-mini)')
+    parser.add_argument('--no-llm', action='store_true',
+                       help='Disable LLM enhancement and use standard processing')
+    parser.add_argument('--force', action='store_true',
+                       help='Rebuild every directory even if its reports are up to date')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='List directories that would be rebuilt without regenerating')
+
+    args = parser.parse_args()
+
+    print("🔄 Parallel Report Regeneration Runner")
+    print("=" * 60)
+    print(f"🕒 Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    outcome = regenerate_reports_parallel(
+        base_output_dir=args.base_dir,
+        max_workers=args.workers,
+        llm_concurrency=args.llm_concurrency,
+        use_llm=not args.no_llm,
+        output_format=args.format,
+        model_name=args.model,
+        force=args.force,
+        dry_run=args.dry_run
+    )
+
+    summary = outcome["summary"]
+    print(f"\n📊 REGENERATION SUMMARY:")
+    print(f"   Directories found: {summary['total_directories']}")
+    print(f"   Up to date (skipped): {summary['skipped_up_to_date']}")
+    if summary["dry_run"]:
+        print(f"   Would rebuild: {len(outcome['rebuild'])}")
+    else:
+        print(f"   Rebuilt: {summary['rebuilt']} ({summary['successful']} ok, {summary['failed']} failed)")
+        if summary["pdf_failed"]:
+            print(f"   PDF reports missing: {summary['pdf_failed']}")
+    print(f"   Duration: {summary['duration_seconds']}s")
+
+    # PDF reports are mandatory, so a missing one fails the run like a failed directory
+    return 1 if summary["failed"] or summary["pdf_failed"] else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Offline Screening Benchmark Suite
+
+Measures screening performance repeatably by running the real clients, tools and
+report generation against recorded upstream exchanges (see upstream_replay):
+
+    # 1. Record fixtures once (needs network access)
+    python screening_benchmark.py --mode record
+
+    # 2. Benchmark offline, replaying the recorded upstream latency
+    python screening_benchmark.py --latency recorded --save-baseline
+
+    # 3. After a change, compare against the baseline
+    python screening_benchmark.py --latency recorded --baseline --fail-on-regression
+
+Benchmark groups:
+- client.*: one domain client call each (cadastral, flood, wetlands, habitat, air quality, karst)
+- tool.comprehensive_flood_analysis: the full flood tool (data, three reports, PDF merge)
+- pipeline.full: the screening workflow's tools in order, without the LLM
+- report.generate: comprehensive report and PDF generation for the pipeline's project
+
+The LLM is not part of the suite (its calls are not upstream GIS exchanges), so
+pipeline.full measures the deterministic tool workflow the agent drives.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import tempfile
+import traceback
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = "fixtures/benchmark_baseline.json"
+DEFAULT_RESULTS = "benchmark_results.json"
+
+# Relative change in median latency reported as a regression / improvement
+DEFAULT_THRESHOLD = 0.10
+
+# Location used by every benchmark (Cataño, Puerto Rico)
+BENCHMARK_LOCATION = {
+    "longitude": -66.150906,
+    "latitude": 18.434059,
+    "location_name": "Cataño, Puerto Rico",
+    "cadastral_number": "227-052-007-20",
+}
+
+
+@dataclass
+class BenchmarkContext:
+    """Inputs and state shared by the benchmarks of one run"""
+    location: Dict[str, Any]
+    work_dir: str
+    state: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    group: str
+    func: Callable[[BenchmarkContext], Any]
+    description: str = ""
+
+
+BENCHMARKS: List[BenchmarkCase] = []
+
+
+class BenchmarkSkipped(Exception):
+    """A benchmark cannot run in this environment or run (e.g. missing prerequisites)"""
+
+
+def benchmark(name: str, group: str):
+    """Register a benchmark case (run in registration order)"""
+    def decorator(func):
+        BENCHMARKS.append(BenchmarkCase(name, group, func, (func.__doc__ or "").strip()))
+        return func
+    return decorator
+
+
+def _ensure_paths():
+    """Make the domain packages importable the way the agent's tools do"""
+    for package in ("FloodINFO", "WetlandsINFO", "HabitatINFO", "NonAttainmentINFO"):
+        path = str(ROOT_DIR / package)
+        if path not in sys.path:
+            sys.path.append(path)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark cases
+# ---------------------------------------------------------------------------
+
+@benchmark("client.cadastral_lookup", group="client")
+def bench_cadastral_lookup(ctx: BenchmarkContext):
+    """Cadastral data lookup by number (MIPR cadastre)"""
+    from cadastral.cadastral_data_tool import get_cadastral_data_from_number
+    return get_cadastral_data_from_number.invoke({
+        "cadastral_number": ctx.location["cadastral_number"], "include_geometry": True
+    })
+
+
+@benchmark("client.flood_query", group="client")
+def bench_flood_query(ctx: BenchmarkContext):
+    """FEMA NFHL effective and preliminary data query"""
+    _ensure_paths()
+    from query_coordinates_data import query_coordinate_data
+    return query_coordinate_data(ctx.location["longitude"], ctx.location["latitude"], ctx.location["location_name"])
+
+
+@benchmark("client.wetlands_query", group="client")
+def bench_wetlands_query(ctx: BenchmarkContext):
+    """NWI / RIBITS / NHD wetland analysis"""
+    _ensure_paths()
+    from query_wetland_location import WetlandLocationAnalyzer
+    return WetlandLocationAnalyzer().analyze_location(
+        ctx.location["longitude"], ctx.location["latitude"], ctx.location["location_name"]
+    )
+
+
+@benchmark("client.habitat_query", group="client")
+def bench_habitat_query(ctx: BenchmarkContext):
+    """USFWS critical habitat analysis"""
+    from HabitatINFO.habitat_client import CriticalHabitatClient
+    return CriticalHabitatClient().analyze_location(ctx.location["longitude"], ctx.location["latitude"])
+
+
+@benchmark("client.nonattainment_query", group="client")
+def bench_nonattainment_query(ctx: BenchmarkContext):
+    """EPA nonattainment area analysis"""
+    from NonAttainmentINFO.nonattainment_client import NonAttainmentAreasClient
+    return NonAttainmentAreasClient().analyze_location(ctx.location["longitude"], ctx.location["latitude"])
+
+
+@benchmark("client.karst_check", group="client")
+def bench_karst_check(ctx: BenchmarkContext):
+    """PRAPEC karst check for the cadastral"""
+    from karst.karst_tools import check_cadastral_karst
+    return check_cadastral_karst.invoke({"cadastral_number": ctx.location["cadastral_number"]})
+
+
+@benchmark("tool.comprehensive_flood_analysis", group="tool")
+def bench_comprehensive_flood(ctx: BenchmarkContext):
+    """Flood data, FIRMette / Preliminary Comparison / ABFE reports and PDF merge"""
+    from comprehensive_flood_tool import comprehensive_flood_analysis
+    return comprehensive_flood_analysis.invoke({
+        "longitude": ctx.location["longitude"],
+        "latitude": ctx.location["latitude"],
+        "location_name": ctx.location["location_name"],
+    })
+
+
+@benchmark("pipeline.full", group="pipeline")
+def bench_full_pipeline(ctx: BenchmarkContext):
+    """Every screening tool in workflow order, then the comprehensive report (no LLM)"""
+    _ensure_paths()
+    from output_directory_manager import get_output_manager, create_intelligent_project_directory
+    from cadastral.cadastral_data_tool import get_cadastral_data_from_number
+    from comprehensive_flood_tool import comprehensive_flood_analysis
+    from wetland_analysis_tool import analyze_wetland_location_with_map
+    from HabitatINFO.map_tools import generate_adaptive_critical_habitat_map
+    from nonattainment_analysis_tool import analyze_nonattainment_with_map
+    from karst.karst_tools import check_cadastral_karst
+    from comprehensive_screening_report_tool import generate_comprehensive_screening_report
+
+    location = ctx.location
+    point = {"longitude": location["longitude"], "latitude": location["latitude"]}
+    named_point = {**point, "location_name": location["location_name"]}
+
+    create_intelligent_project_directory.invoke({
+        "project_description": "Benchmark Environmental Assessment",
+        "location_name": location["location_name"],
+        "cadastral_number": location["cadastral_number"],
+        "coordinates": [location["longitude"], location["latitude"]],
+    })
+    get_cadastral_data_from_number.invoke({"cadastral_number": location["cadastral_number"], "include_geometry": True})
+    comprehensive_flood_analysis.invoke(named_point)
+    analyze_wetland_location_with_map.invoke(named_point)
+    generate_adaptive_critical_habitat_map.invoke(named_point)
+    analyze_nonattainment_with_map.invoke(named_point)
+    check_cadastral_karst.invoke({"cadastral_number": location["cadastral_number"]})
+
+    project_dir = get_output_manager().current_project_dir
+    generate_comprehensive_screening_report.invoke({"output_directory": project_dir, "use_llm": False})
+    ctx.state["project_dir"] = project_dir
+
+
+@benchmark("report.generate", group="report")
+def bench_report_generation(ctx: BenchmarkContext):
+    """Comprehensive JSON / Markdown / PDF report for the pipeline's project"""
+    project_dir = ctx.state.get("project_dir")
+    if not project_dir:
+        raise BenchmarkSkipped("needs the project directory produced by pipeline.full")
+    from comprehensive_screening_report_tool import generate_comprehensive_screening_report
+    return generate_comprehensive_screening_report.invoke({"output_directory": project_dir, "use_llm": False})
+
+
+# ---------------------------------------------------------------------------
+# Running and comparing
+# ---------------------------------------------------------------------------
+
+def summarize_timings(durations: List[float]) -> Dict[str, float]:
+    """Latency statistics (seconds) of one benchmark's iterations"""
+    ordered = sorted(durations)
+    return {
+        "iterations": len(ordered),
+        "min": round(ordered[0], 4),
+        "median": round(statistics.median(ordered), 4),
+        "mean": round(statistics.fmean(ordered), 4),
+        "p95": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 4),
+        "max": round(ordered[-1], 4),
+        "stdev": round(statistics.stdev(ordered), 4) if len(ordered) > 1 else 0.0,
+    }
+
+
+def run_case(case: BenchmarkCase, ctx: BenchmarkContext, iterations: int = 3, warmup: int = 1) -> Dict[str, Any]:
+    """
+    Run one benchmark
+
+    Each iteration runs in its own screening workspace under the run's work
+    directory, with replay sequences restarted so every iteration sees the same
+    upstream responses.
+    """
+    from output_directory_manager import screening_workspace
+    from screening_metrics import screening_metrics
+    try:
+        from upstream_replay import get_config
+    except ImportError:
+        get_config = None
+
+    durations: List[float] = []
+    upstream_calls: List[int] = []
+    for iteration in range(warmup + iterations):
+        if get_config is not None:
+            get_config().store.reset()
+        workspace_id = f"bench_{case.name}_{iteration}"
+        try:
+            with screening_workspace(workspace_id, base_output_dir=ctx.work_dir), \
+                    screening_metrics(workspace_id) as metrics:
+                started = time.perf_counter()
+                case.func(ctx)
+                duration = time.perf_counter() - started
+        except BenchmarkSkipped as e:
+            return {"name": case.name, "group": case.group, "status": "skipped", "reason": str(e)}
+        except Exception as e:
+            return {"name": case.name, "group": case.group, "status": "error", "error": str(e),
+                    "traceback": traceback.format_exc(limit=5)}
+
+        if iteration >= warmup:
+            durations.append(duration)
+            upstream_calls.append(sum(row["calls"] for row in metrics.summary()["upstreams"]))
+
+    return {
+        "name": case.name,
+        "group": case.group,
+        "status": "ok",
+        "timings": summarize_timings(durations),
+        "upstream_calls": max(upstream_calls) if upstream_calls else 0,
+    }
+
+
+def run_suite(cases: Optional[List[str]] = None, iterations: int = 3, warmup: int = 1,
+              location: Optional[Dict[str, Any]] = None, work_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run the benchmark suite
+
+    Args:
+        cases: Benchmark names or name prefixes to run (all if omitted)
+        iterations: Measured iterations per benchmark
+        warmup: Unmeasured iterations per benchmark (imports, caches)
+        location: Location to screen (defaults to BENCHMARK_LOCATION)
+        work_dir: Output directory for generated projects (temporary if omitted)
+
+    Returns:
+        Results document with per-benchmark timings
+    """
+    selected = [case for case in BENCHMARKS
+                if not cases or any(case.name == c or case.name.startswith(c) for c in cases)]
+    temporary = None
+    if work_dir is None:
+        temporary = tempfile.TemporaryDirectory(prefix="screening_benchmark_")
+        work_dir = temporary.name
+
+    ctx = BenchmarkContext(location={**BENCHMARK_LOCATION, **(location or {})}, work_dir=work_dir)
+    try:
+        results = []
+        for case in selected:
+            print(f"⏱️  {case.name} ...", flush=True)
+            result = run_case(case, ctx, iterations, warmup)
+            if result["status"] == "ok":
+                print(f"   median {result['timings']['median']:.3f}s, "
+                      f"p95 {result['timings']['p95']:.3f}s, {result['upstream_calls']} upstream calls")
+            else:
+                print(f"   {result['status']}: {result.get('reason') or result.get('error')}")
+            results.append(result)
+    finally:
+        if temporary is not None:
+            temporary.cleanup()
+
+    try:
+        from upstream_replay import get_config
+        config = get_config()
+        replay = {"mode": config.mode, "fixtures_dir": str(config.store.fixtures_dir), "latency": config.latency}
+    except ImportError:
+        replay = None
+
+    return {
+        "created": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "iterations": iterations,
+        "warmup": warmup,
+        "replay": replay,
+        "results": results,
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compare median latencies against a baseline run
+
+    Returns:
+        One row per benchmark with baseline / current medians, relative change
+        and a verdict: regression, improvement, unchanged, new, missing or failed
+    """
+    baseline_results = {r["name"]: r for r in baseline.get("results", [])}
+    current_results = {r["name"]: r for r in current.get("results", [])}
+    rows = []
+    for name in list(current_results) + [n for n in baseline_results if n not in current_results]:
+        now = current_results.get(name)
+        before = baseline_results.get(name)
+        row = {"name": name, "baseline": None, "current": None, "change": None}
+        if before and before.get("status") == "ok":
+            row["baseline"] = before["timings"]["median"]
+        if now and now.get("status") == "ok":
+            row["current"] = now["timings"]["median"]
+
+        if now is None:
+            row["verdict"] = "missing"
+        elif now.get("status") != "ok":
+            row["verdict"] = "failed" if now.get("status") == "error" else now["status"]
+        elif row["baseline"] is None:
+            row["verdict"] = "new"
+        else:
+            change = (row["current"] - row["baseline"]) / row["baseline"] if row["baseline"] else 0.0
+            row["change"] = round(change, 4)
+            if change > threshold:
+                row["verdict"] = "regression"
+            elif change < -threshold:
+                row["verdict"] = "improvement"
+            else:
+                row["verdict"] = "unchanged"
+        rows.append(row)
+    return rows
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    """Markdown table of a baseline comparison"""
+    icons = {"regression": "🔴", "improvement": "🟢", "unchanged": "⚪", "new": "🆕",
+             "missing": "❔", "failed": "❌", "skipped": "⏭️"}
+    lines = ["| Benchmark | Baseline (s) | Current (s) | Change | |",
+             "|---|---:|---:|---:|---|"]
+    for row in rows:
+        baseline = f"{row['baseline']:.3f}" if row["baseline"] is not None else "-"
+        current = f"{row['current']:.3f}" if row["current"] is not None else "-"
+        change = f"{row['change'] * 100:+.1f}%" if row["change"] is not None else "-"
+        lines.append(f"| {row['name']} | {baseline} | {current} | {change} | "
+                     f"{icons.get(row['verdict'], '')} {row['verdict']} |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline screening benchmark suite")
+    parser.add_argument("--mode", choices=["replay", "record", "off"], default="replay",
+                        help="replay fixtures (default), record new fixtures, or use the live services")
+    parser.add_argument("--fixtures", default=None, help="Fixture directory (default: UPSTREAM_FIXTURES_DIR)")
+    parser.add_argument("--latency", default=os.getenv("UPSTREAM_REPLAY_LATENCY", ""),
+                        help="Synthetic replay latency: seconds, 'recorded' or 'recorded*<scale>'")
+    parser.add_argument("--cases", nargs="*", help="Benchmark names or prefixes (e.g. client. pipeline.full)")
+    parser.add_argument("--iterations", type=int, default=3, help="Measured iterations per benchmark")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured warm-up iterations per benchmark")
+    parser.add_argument("--output", default=DEFAULT_RESULTS, help="Where to write the results JSON")
+    parser.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE,
+                        help="Compare against a baseline results file")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE,
+                        help="Save this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative median change treated as a regression (default: 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on regressions")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for case in BENCHMARKS:
+            print(f"{case.name:<40} {case.description}")
+        return 0
+
+    from upstream_replay import configure, parse_latency
+    configure(args.mode, args.fixtures, parse_latency(args.latency))
+    iterations, warmup = args.iterations, args.warmup
+    if args.mode == "record":
+        # One pass captures every exchange; repeated passes would only add duplicates
+        iterations, warmup = 1, 0
+
+    print(f"🚀 Screening benchmarks ({args.mode} mode, {iterations} iteration(s))")
+    results = run_suite(args.cases, iterations, warmup)
+
+    Path(args.output).write_text(json.dumps(results, indent=2, default=str))
+    print(f"💾 Results saved to {args.output}")
+
+    if args.save_baseline:
+        Path(args.save_baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2, default=str))
+        print(f"📌 Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        rows = compare_results(results, baseline, args.threshold)
+        print()
+        print(format_comparison(rows))
+        if args.fail_on_regression and any(row["verdict"] == "regression" for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Screening Progress Events
+
+Real-time progress for running screenings:
+
+- ScreeningProgressTracker: records tool start/finish events for a job in the
+  ScreeningJobStore, deriving current_step and progress from the tools the agent
+  actually runs instead of fixed milestones
+- ScreeningProgressCallback: LangChain callback handler that feeds agent tool
+  calls into a tracker (pass it in the agent invoke config)
+- job_event_stream(): Server-Sent Events stream of status and log events for a
+  job, used by the /events endpoints of both servers
+
+The stream tails the job store, so it works no matter which worker process runs
+the screening.
+"""
+
+import json
+import time
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from screening_job_store import ScreeningJobStore, TERMINAL_STATUSES
+
+try:
+    from langchain_core.callbacks import BaseCallbackHandler
+except ImportError:
+    # Tracker and event stream remain usable without LangChain
+    BaseCallbackHandler = object
+
+# Progress range of each frontend step (matches the data-step names in the UI)
+STEP_PROGRESS: Dict[str, Tuple[float, float]] = {
+    "setup": (5, 15),
+    "property": (15, 35),
+    "environmental": (35, 80),
+    "reports": (80, 95),
+}
+STEP_ORDER = list(STEP_PROGRESS)
+
+# Share of the remaining step range each finished tool advances progress by
+TOOL_PROGRESS_FRACTION = 0.4
+
+
+def tool_step(tool_name: str) -> str:
+    """Map an agent tool name to the frontend step it belongs to"""
+    name = tool_name.lower()
+    if "report" in name or name == "find_latest_screening_directory":
+        return "reports"
+    if "directory" in name:
+        return "setup"
+    if "cadastral" in name and "karst" not in name:
+        return "property"
+    return "environmental"
+
+
+class ScreeningProgressTracker:
+    """Record tool progress events for one screening job"""
+
+    def __init__(self, store: ScreeningJobStore, job_id: str):
+        """
+        Initialize the tracker
+
+        Args:
+            store: Job store holding the screening
+            job_id: Screening job identifier
+        """
+        self.store = store
+        self.job_id = job_id
+        self._lock = threading.Lock()
+        self._running: Dict[Any, Tuple[str, float]] = {}
+        self._step = "setup"
+        job = store.get_job(job_id, include_logs=False)
+        self._progress = float(job["progress"]) if job else 0.0
+
+    def _advance_step(self, step: str):
+        """Move forward to a step; steps never move backwards"""
+        if STEP_ORDER.index(step) > STEP_ORDER.index(self._step):
+            self._step = step
+        self._progress = max(self._progress, STEP_PROGRESS[self._step][0])
+
+    def tool_started(self, tool_name: str, run_id: Any = None):
+        """Record that the agent started a tool"""
+        with self._lock:
+            self._running[run_id or tool_name] = (tool_name, time.time())
+            self._advance_step(tool_step(tool_name))
+            message = f"Running {tool_name}"
+            self.store.update_job(self.job_id, current_step=self._step,
+                                  progress=round(self._progress, 1), message=message)
+            self.store.append_log(self.job_id, f"▶ {message}")
+
+    def tool_finished(self, tool_name: Optional[str] = None, run_id: Any = None,
+                      error: Optional[str] = None):
+        """Record that a tool finished (or failed) and advance progress within its step"""
+        with self._lock:
+            name, started = self._running.pop(run_id or tool_name, (tool_name or "tool", None))
+            duration = f" in {time.time() - started:.1f}s" if started else ""
+
+            ceiling = STEP_PROGRESS[self._step][1]
+            self._progress += (ceiling - self._progress) * TOOL_PROGRESS_FRACTION
+
+            if error:
+                message = f"{name} failed{duration}: {error}"
+                log = f"✗ {message}"
+            else:
+                message = f"{name} finished{duration}"
+                log = f"✓ {message}"
+            self.store.update_job(self.job_id, current_step=self._step,
+                                  progress=round(self._progress, 1), message=message)
+            self.store.append_log(self.job_id, log)
+
+    def step(self, step: str, message: str):
+        """Record a step reached outside of tool calls (e.g. collecting output files)"""
+        with self._lock:
+            self._advance_step(step)
+            self.store.update_job(self.job_id, current_step=self._step,
+                                  progress=round(self._progress, 1), message=message)
+            self.store.append_log(self.job_id, message)
+
+
+class ScreeningProgressCallback(BaseCallbackHandler):
+    """LangChain callback handler that reports agent tool calls to a progress tracker"""
+
+    def __init__(self, tracker: ScreeningProgressTracker):
+        super().__init__()
+        self.tracker = tracker
+
+    def on_tool_start(self, serialized: Optional[Dict[str, Any]], input_str: str, *,
+                      run_id: Any = None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        self.tracker.tool_started(name, run_id)
+
+    def on_tool_end(self, output: Any, *, run_id: Any = None, **kwargs):
+        self.tracker.tool_finished(kwargs.get("name"), run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: Any = None, **kwargs):
+        self.tracker.tool_finished(kwargs.get("name"), run_id, error=str(error))
+
+
+def _sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """Format one Server-Sent Event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _status_payload(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "screening_id": job["id"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "current_step": job.get("current_step"),
+        "message": job.get("message"),
+        "error": job.get("error"),
+        "output_directory": job.get("output_directory"),
+    }
+
+
+async def job_event_stream(
+    store: ScreeningJobStore,
+    job_id: str,
+    last_log_id: int = 0,
+    poll_interval: float = 0.5,
+    heartbeat_interval: float = 15.0
+) -> AsyncIterator[str]:
+    """
+    Stream a job's progress as Server-Sent Events
+
+    Emits a 'status' event whenever status, progress, step or message change,
+    a 'log' event per log entry (the event id is the log id, so reconnecting
+    clients resume with Last-Event-ID), and a final 'end' event once the job
+    reaches a terminal state.
+
+    Args:
+        store: Job store holding the screening
+        job_id: Screening job identifier
+        last_log_id: Only send log entries after this id
+        poll_interval: Seconds between checks of the job store
+        heartbeat_interval: Seconds between keep-alive comments while idle
+    """
+    last_status = None
+    last_sent = time.time()
+
+    while True:
+        job = await asyncio.to_thread(store.get_job, job_id, False)
+        if job is None:
+            yield _sse("error", {"screening_id": job_id, "error": "Screening not found"})
+            return
+
+        logs = await asyncio.to_thread(store.get_logs, job_id, last_log_id)
+        for entry in logs:
+            last_log_id = entry["id"]
+            yield _sse("log", entry, event_id=entry["id"])
+            last_sent = time.time()
+
+        status = _status_payload(job)
+        if status != last_status:
+            last_status = status
+            yield _sse("status", status)
+            last_sent = time.time()
+
+        if job["status"] in TERMINAL_STATUSES:
+            yield _sse("end", status)
+            return
+
+        if time.time() - last_sent >= heartbeat_interval:
+            yield ": keep-alive\n\n"
+            last_sent = time.time()
+
+        await asyncio.sleep(poll_interval)
@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+Durable Screening Job Store and Worker Pool
+
+SQLite-backed storage for environmental screening jobs shared by the web servers.
+Jobs survive restarts and can be processed by any number of worker processes on
+the same machine: workers claim jobs with time-limited leases, renew the lease
+while they run, and jobs whose lease expires (e.g. the process was killed by a
+deploy) are claimed again and resumed.
+
+Features:
+- SQLite in WAL mode so readers never block the worker that is writing
+- Atomic status transitions (UPDATE ... WHERE status IN (...))
+- Lease-based job claiming with heartbeat renewal and bounded retry attempts
+- Append-only per-job log entries
+- ScreeningWorkerPool that runs a handler for each claimed job in worker threads
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Callable, Iterable
+
+# Default database location, shared by app.py and advanced_frontend_server.py
+DEFAULT_JOB_DB = os.getenv("SCREENING_JOB_DB", "screening_jobs.db")
+
+# Terminal job states; a job in one of these states is never claimed again
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+# States of a claimed job while its handler runs (servers report progress with either)
+ACTIVE_STATUSES = ("processing", "running")
+
+# Columns callers may set through update_job()
+UPDATABLE_FIELDS = {
+    "status", "progress", "message", "current_step", "output_directory",
+    "generated_files", "result", "error", "start_time"
+}
+
+# Columns stored as JSON text
+JSON_FIELDS = {"request_data", "generated_files", "result"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL DEFAULT 'screening',
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    current_step TEXT,
+    request_data TEXT,
+    output_directory TEXT,
+    generated_files TEXT,
+    result TEXT,
+    error TEXT,
+    batch_id TEXT,
+    batch_index INTEGER,
+    queue_order INTEGER,
+    concurrency_limit INTEGER,
+    created_at TEXT NOT NULL,
+    start_time TEXT,
+    end_time TEXT,
+    updated_at TEXT NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_logs_job ON job_logs (job_id, id);
+"""
+
+# Columns added after the initial schema, applied to existing databases on open
+MIGRATIONS = {
+    "queue_order": "ALTER TABLE jobs ADD COLUMN queue_order INTEGER",
+    "concurrency_limit": "ALTER TABLE jobs ADD COLUMN concurrency_limit INTEGER",
+}
+
+INSERT_JOB = """INSERT INTO jobs (id, kind, status, progress, message, request_data,
+                                 batch_id, batch_index, queue_order, concurrency_limit,
+                                 created_at, updated_at)
+               VALUES (?, ?, 'pending', 0, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (batch_id, batch_index);
+CREATE INDEX IF NOT EXISTS idx_jobs_batch_lease ON jobs (batch_id, lease_owner);
+"""
+
+
+def default_worker_id() -> str:
+    """Identify a worker thread uniquely across processes on this host"""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+class ScreeningJobStore:
+    """Durable SQLite store for screening jobs"""
+
+    def __init__(self, db_path: str = DEFAULT_JOB_DB, max_attempts: int = 3):
+        """
+        Initialize the job store
+
+        Args:
+            db_path: Path to the SQLite database file (created if missing)
+            max_attempts: Claims allowed per job before an expired lease fails it
+        """
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        self._migrate(conn)
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """Add columns missing from databases created by older versions"""
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                conn.execute(statement)
+        conn.executescript(INDEXES)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it in WAL mode on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; multi-statement operations use explicit BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _row_to_job(self, row: sqlite3.Row, include_logs: bool = True) -> Dict[str, Any]:
+        """Convert a jobs row into the status dictionary returned by the APIs"""
+        job = dict(row)
+        for field in JSON_FIELDS:
+            if job.get(field) is not None:
+                job[field] = json.loads(job[field])
+        if job.get("generated_files") is None:
+            job["generated_files"] = []
+        if include_logs:
+            job["log_entries"] = self.get_logs(job["id"])
+        return job
+
+    def create_job(
+        self,
+        job_id: Optional[str] = None,
+        request_data: Optional[Dict[str, Any]] = None,
+        kind: str = "screening",
+        batch_id: Optional[str] = None,
+        batch_index: Optional[int] = None,
+        message: str = "Screening queued"
+    ) -> Dict[str, Any]:
+        """
+        Enqueue a new pending job
+
+        Args:
+            job_id: Job identifier (generated if not provided)
+            request_data: JSON-serializable request payload handed to the worker
+            kind: Job kind, used by worker pools to select the jobs they handle
+            batch_id: Batch the job belongs to (optional)
+            batch_index: Position of the job within its batch (optional)
+            message: Initial status message
+
+        Returns:
+            The created job
+        """
+        job_id = job_id or str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        self._connect().execute(
+            INSERT_JOB,
+            (job_id, kind, message, json.dumps(request_data or {}, default=str),
+             batch_id, batch_index, batch_index, None, now, now)
+        )
+        return self.get_job(job_id)
+
+    def create_batch(
+        self,
+        batch_id: str,
+        items: List[Dict[str, Any]],
+        queue_order: Optional[List[int]] = None,
+        concurrency_limit: Optional[int] = None,
+        kind: str = "screening",
+        message: str = "Waiting to start..."
+    ) -> List[str]:
+        """
+        Enqueue all jobs of a batch in one transaction
+
+        Args:
+            batch_id: Batch identifier; job ids are f"{batch_id}_item_{batch_index}"
+            items: Request payloads in submission order (batch_index)
+            queue_order: Indexes into items in the order they should be claimed
+                (defaults to submission order)
+            concurrency_limit: Maximum jobs of this batch running at once (optional)
+            kind: Job kind
+            message: Initial status message
+
+        Returns:
+            Job ids in submission order
+        """
+        job_ids = [f"{batch_id}_item_{i}" for i in range(len(items))]
+        queue_order = list(queue_order) if queue_order is not None else list(range(len(items)))
+        if sorted(queue_order) != list(range(len(items))):
+            raise ValueError("queue_order must be a permutation of the item indexes")
+
+        # One shared created_at keeps the batch together; queue_order orders it
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for position, index in enumerate(queue_order):
+                conn.execute(
+                    INSERT_JOB,
+                    (job_ids[index], kind, message, json.dumps(items[index], default=str),
+                     batch_id, index, position, concurrency_limit, now, now)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return job_ids
+
+    def get_job(self, job_id: str, include_logs: bool = True) -> Optional[Dict[str, Any]]:
+        """Get a job by id, or None if it does not exist"""
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row, include_logs) if row else None
+
+    def list_jobs(
+        self,
+        status: Optional[str] = None,
+        batch_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        include_logs: bool = False,
+        kind: Optional[str] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        List jobs, newest first (batch jobs in batch order)
+
+        Args:
+            status: Only jobs in this status (optional)
+            batch_id: Only jobs in this batch (optional)
+            limit: Maximum number of jobs to return (optional)
+            include_logs: Attach log entries to each job
+            kind: Only jobs of this kind, i.e. one server's jobs (optional)
+            offset: Number of jobs to skip
+        """
+        query = "SELECT * FROM jobs WHERE 1=1"
+        params: List[Any] = []
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        if batch_id is not None:
+            query += " AND batch_id = ? ORDER BY batch_index"
+            params.append(batch_id)
+        else:
+            query += " ORDER BY created_at DESC"
+        if limit is not None or offset:
+            query += " LIMIT ? OFFSET ?"
+            params.extend([-1 if limit is None else limit, offset])
+        rows = self._connect().execute(query, params).fetchall()
+        return [self._row_to_job(row, include_logs) for row in rows]
+
+    def count_by_status(self, batch_id: Optional[str] = None, kind: Optional[str] = None) -> Dict[str, int]:
+        """Count jobs per status, optionally within one batch or one kind"""
+        query = "SELECT status, COUNT(*) AS n FROM jobs WHERE 1=1"
+        params: List[Any] = []
+        if batch_id is not None:
+            query += " AND batch_id = ?"
+            params.append(batch_id)
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        query += " GROUP BY status"
+        return {row["status"]: row["n"] for row in self._connect().execute(query, params)}
+
+    def update_job(self, job_id: str, **fields) -> bool:
+        """
+        Update job fields; setting a terminal status also records end_time and drops the lease
+
+        Returns:
+            True if the job exists
+        """
+        unknown = set(fields) - UPDATABLE_FIELDS
+        if unknown:
+            raise ValueError(f"Cannot update job fields: {', '.join(sorted(unknown))}")
+
+        assignments, params = self._build_assignments(fields)
+        params.append(job_id)
+        cursor = self._connect().execute(
+            f"UPDATE jobs SET {', '.join(assignments)} WHERE id = ?", params
+        )
+        return cursor.rowcount > 0
+
+    def transition(self, job_id: str, from_statuses: Iterable[str], to_status: str,
+                   lease_owner: Optional[str] = None, **fields) -> bool:
+        """
+        Atomically move a job between states
+
+        Args:
+            job_id: Job identifier
+            from_statuses: States the job must currently be in
+            to_status: New state
+            lease_owner: If given, the job's lease must be held by this worker
+            **fields: Additional fields to set (see update_job)
+
+        Returns:
+            True if the transition was applied
+        """
+        from_statuses = list(from_statuses)
+        assignments, params = self._build_assignments({**fields, "status": to_status})
+        query = (f"UPDATE jobs SET {', '.join(assignments)} WHERE id = ? "
+                 f"AND status IN ({', '.join('?' * len(from_statuses))})")
+        params.extend([job_id, *from_statuses])
+        if lease_owner is not None:
+            query += " AND lease_owner = ?"
+            params.append(lease_owner)
+        return self._connect().execute(query, params).rowcount > 0
+
+    def _build_assignments(self, fields: Dict[str, Any]):
+        """Build SET clauses for an update, serializing JSON columns"""
+        now = datetime.now().isoformat()
+        assignments = ["updated_at = ?"]
+        params: List[Any] = [now]
+        for field, value in fields.items():
+            if field in JSON_FIELDS and value is not None:
+                value = json.dumps(value, default=str)
+            assignments.append(f"{field} = ?")
+            params.append(value)
+        if fields.get("status") in TERMINAL_STATUSES:
+            assignments.extend(["end_time = ?", "lease_owner = NULL", "lease_expires = NULL"])
+            params.append(now)
+        return assignments, params
+
+    def append_log(self, job_id: str, message: str):
+        """Append a timestamped log entry to a job"""
+        self._connect().execute(
+            "INSERT INTO job_logs (job_id, timestamp, message) VALUES (?, ?, ?)",
+            (job_id, datetime.now().isoformat(), message)
+        )
+
+    def get_logs(self, job_id: str, after_id: int = 0) -> List[Dict[str, Any]]:
+        """Get a job's log entries in order, optionally only those after a log id"""
+        rows = self._connect().execute(
+            "SELECT id, timestamp, message FROM job_logs WHERE job_id = ? AND id > ? ORDER BY id",
+            (job_id, after_id)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def claim_next(self, worker_id: str, lease_seconds: float = 300,
+                   kinds: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Claim the oldest runnable job under a lease
+
+        Runnable jobs are pending jobs and processing jobs whose lease has expired
+        (their worker died). Jobs that have used up max_attempts are failed instead
+        of being claimed again. A batch job is skipped while its batch already has
+        concurrency_limit jobs under a live lease, so one large batch cannot occupy
+        every worker. Jobs are claimed oldest first, ties broken by queue_order.
+
+        Args:
+            worker_id: Identifier of the claiming worker
+            lease_seconds: Lease duration; renew with renew_lease() while running
+            kinds: Only claim jobs of these kinds (optional)
+
+        Returns:
+            The claimed job, or None if nothing is runnable
+        """
+        conn = self._connect()
+        now = time.time()
+        kind_filter = ""
+        kind_params: List[Any] = []
+        if kinds is not None:
+            kinds = list(kinds)
+            kind_filter = f" AND kind IN ({', '.join('?' * len(kinds))})"
+            kind_params = kinds
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Expired leases on jobs that are out of attempts become failures
+            conn.execute(
+                f"""UPDATE jobs SET status = 'failed', error = 'Lease expired after maximum attempts',
+                        end_time = ?, updated_at = ?, lease_owner = NULL, lease_expires = NULL
+                    WHERE lease_owner IS NOT NULL AND lease_expires < ? AND attempts >= ?{kind_filter}""",
+                [datetime.now().isoformat(), datetime.now().isoformat(), now, self.max_attempts, *kind_params]
+            )
+            row = conn.execute(
+                f"""SELECT id, status FROM jobs AS j
+                    WHERE (status = 'pending' OR (lease_owner IS NOT NULL AND lease_expires < ?)){kind_filter}
+                      AND (j.concurrency_limit IS NULL OR j.batch_id IS NULL OR
+                           (SELECT COUNT(*) FROM jobs AS running
+                            WHERE running.batch_id = j.batch_id AND running.lease_owner IS NOT NULL
+                              AND running.lease_expires >= ?) < j.concurrency_limit)
+                    ORDER BY created_at, queue_order LIMIT 1""",
+                [now, *kind_params, now]
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            resumed = row["status"] != "pending"
+            timestamp = datetime.now().isoformat()
+            conn.execute(
+                """UPDATE jobs SET status = 'processing', lease_owner = ?, lease_expires = ?,
+                        attempts = attempts + 1, updated_at = ?, start_time = COALESCE(start_time, ?)
+                   WHERE id = ?""",
+                (worker_id, now + lease_seconds, timestamp, timestamp, row["id"])
+            )
+            conn.execute(
+                "INSERT INTO job_logs (job_id, timestamp, message) VALUES (?, ?, ?)",
+                (row["id"], timestamp,
+                 f"{'Resumed' if resumed else 'Claimed'} by worker {worker_id}")
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return self.get_job(row["id"])
+
+    def renew_lease(self, job_id: str, worker_id: str, lease_seconds: float = 300) -> bool:
+        """Extend a held lease; returns False if the lease was lost"""
+        cursor = self._connect().execute(
+            """UPDATE jobs SET lease_expires = ?
+               WHERE id = ? AND lease_owner = ?""",
+            (time.time() + lease_seconds, job_id, worker_id)
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id: str, worker_id: str, **fields) -> bool:
+        """Mark a claimed job completed (no-op if the handler already finished it)"""
+        return self.transition(job_id, ACTIVE_STATUSES, "completed", lease_owner=worker_id, **fields)
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Mark a claimed job failed (no-op if the handler already finished it)"""
+        return self.transition(job_id, ACTIVE_STATUSES, "failed", lease_owner=worker_id, error=error)
+
+
+class ScreeningWorkerPool:
+    """Pool of worker threads that claim and run jobs from a ScreeningJobStore"""
+
+    def __init__(
+        self,
+        store: ScreeningJobStore,
+        handler: Callable[[Dict[str, Any]], Any],
+        num_workers: int = 2,
+        lease_seconds: float = 300,
+        poll_interval: float = 1.0,
+        kinds: Optional[Iterable[str]] = None
+    ):
+        """
+        Initialize the worker pool
+
+        Args:
+            store: Job store to claim jobs from
+            handler: Called with each claimed job; raising marks the job failed
+            num_workers: Number of worker threads in this process
+            lease_seconds: Lease duration; renewed every lease_seconds / 3 while running
+            poll_interval: Seconds to wait between claims when the queue is empty
+            kinds: Only run jobs of these kinds (optional)
+        """
+        self.store = store
+        self.handler = handler
+        self.num_workers = num_workers
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.kinds = list(kinds) if kinds is not None else None
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        """Start the worker threads"""
+        self._stop_event.clear()
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"screening-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"👷 Started {self.num_workers} screening workers (db: {self.store.db_path})")
+
+    def stop(self, timeout: Optional[float] = None):
+        """Signal workers to stop after their current job and wait for them"""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _worker_loop(self):
+        """Claim and run jobs until stopped"""
+        worker_id = default_worker_id()
+        while not self._stop_event.is_set():
+            try:
+                job = self.store.claim_next(worker_id, self.lease_seconds, self.kinds)
+            except sqlite3.Error as e:
+                print(f"⚠️ Worker {worker_id} could not claim a job: {e}")
+                job = None
+
+            if job is None:
+                self._stop_event.wait(self.poll_interval)
+                continue
+
+            self._run_job(job, worker_id)
+
+    def _run_job(self, job: Dict[str, Any], worker_id: str):
+        """Run one claimed job while a heartbeat thread keeps its lease alive"""
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(self.lease_seconds / 3):
+                if not self.store.renew_lease(job["id"], worker_id, self.lease_seconds):
+                    print(f"⚠️ Lost lease on job {job['id']}")
+                    return
+
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+        try:
+            self.handler(job)
+            self.store.complete(job["id"], worker_id)
+        except Exception as e:
+            print(f"❌ Job {job['id']} failed: {e}")
+            self.store.fail(job["id"], worker_id, str(e))
+        finally:
+            done.set()
+            heartbeat_thread.join()
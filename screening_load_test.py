@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Screening Load Test Driver
+
+Submits N screenings at increasing concurrency levels and reports throughput,
+p50/p95/p99 end-to-end latency, failures and resource usage per level, to find
+the concurrency at which the process stops scaling.
+
+Targets:
+- HTTP (--target): a running app.py or advanced_frontend_server.py. Start the
+  server with UPSTREAM_REDIRECT pointing at a mock_arcgis_server.py instance so
+  upstream services are not hit; pass --server-pid to sample its CPU and memory.
+  With --batch (advanced server only) each level is one batch submission whose
+  concurrency parameter equals the level.
+- In-process (--in-process): runs the screening tool pipeline (no LLM, see
+  screening_benchmark.py) on a thread pool inside this process against the
+  bundled mock server, measuring the tool and upstream layer on its own.
+
+    python mock_arcgis_server.py --port 8900 --latency 0.2 &
+    UPSTREAM_REDIRECT=http://127.0.0.1:8900 python app.py &
+    python screening_load_test.py --target http://localhost:8000 --server app \\
+        --screenings 16 --concurrency 1 2 4 8 --server-pid <pid>
+
+    python screening_load_test.py --in-process --mock --screenings 16 --concurrency 1 2 4 8
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import threading
+import tempfile
+import concurrent.futures
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# Statuses after which a screening no longer changes
+FINAL_STATUSES = ("completed", "failed", "cancelled", "error")
+
+# Throughput gain below which a higher concurrency level is not considered scaling
+SCALING_GAIN_THRESHOLD = 0.10
+
+# Locations cycled through by the submitted screenings
+LOAD_LOCATIONS = [
+    {"name": "Cataño, Puerto Rico", "longitude": -66.150906, "latitude": 18.434059, "cadastral": "227-052-007-20"},
+    {"name": "Bayamón, Puerto Rico", "longitude": -66.199399, "latitude": 18.408303, "cadastral": "115-053-432-02"},
+    {"name": "Ponce, Puerto Rico", "longitude": -66.614, "latitude": 18.011, "cadastral": "060-000-009-58"},
+    {"name": "Mayagüez, Puerto Rico", "longitude": -67.145, "latitude": 18.201, "cadastral": "227-052-007-21"},
+]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100.0 * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class ResourceSampler:
+    """Sample CPU, memory and thread count of a process while a load level runs"""
+
+    def __init__(self, pid: Optional[int] = None, interval: float = 0.5):
+        self.pid = pid or os.getpid()
+        self.interval = interval
+        self.samples: List[Dict[str, float]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def _cpu_seconds_and_rss(self):
+        if PSUTIL_AVAILABLE:
+            process = psutil.Process(self.pid)
+            times = process.cpu_times()
+            return times.user + times.system, process.memory_info().rss, process.num_threads()
+        # Linux /proc fallback
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / self._clock_ticks
+        threads = int(fields[17])
+        with open(f"/proc/{self.pid}/statm") as f:
+            rss = int(f.read().split()[1]) * self._page_size
+        return cpu, rss, threads
+
+    def _run(self):
+        try:
+            last_cpu, _, _ = self._cpu_seconds_and_rss()
+        except Exception:
+            return
+        last_time = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            try:
+                cpu, rss, threads = self._cpu_seconds_and_rss()
+            except Exception:
+                return
+            now = time.perf_counter()
+            self.samples.append({
+                "cpu_percent": round((cpu - last_cpu) / max(now - last_time, 1e-6) * 100, 1),
+                "rss_mb": round(rss / 1024 / 1024, 1),
+                "threads": threads,
+            })
+            last_cpu, last_time = cpu, now
+
+    def __enter__(self) -> "ResourceSampler":
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.samples:
+            return {"pid": self.pid, "samples": 0}
+        cpu = [s["cpu_percent"] for s in self.samples]
+        return {
+            "pid": self.pid,
+            "samples": len(self.samples),
+            "cpu_percent_avg": round(sum(cpu) / len(cpu), 1),
+            "cpu_percent_peak": max(cpu),
+            "rss_mb_peak": max(s["rss_mb"] for s in self.samples),
+            "threads_peak": max(s["threads"] for s in self.samples),
+        }
+
+
+@dataclass
+class ScreeningOutcome:
+    index: int
+    ok: bool
+    latency: float
+    status: str
+    error: Optional[str] = None
+    screening_id: Optional[str] = None
+
+
+@dataclass
+class LevelResult:
+    concurrency: int
+    outcomes: List[ScreeningOutcome]
+    wall_seconds: float
+    resources: Dict[str, Any] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = [o.latency for o in self.outcomes if o.ok]
+        completed = len(latencies)
+        errors: Dict[str, int] = {}
+        for outcome in self.outcomes:
+            if not outcome.ok:
+                key = (outcome.error or outcome.status)[:80]
+                errors[key] = errors.get(key, 0) + 1
+        return {
+            "concurrency": self.concurrency,
+            "submitted": len(self.outcomes),
+            "completed": completed,
+            "failed": len(self.outcomes) - completed,
+            "error_rate": round((len(self.outcomes) - completed) / max(len(self.outcomes), 1), 3),
+            "wall_seconds": round(self.wall_seconds, 2),
+            "throughput_per_minute": round(completed / self.wall_seconds * 60, 2) if self.wall_seconds else 0.0,
+            "latency_p50": _round(percentile(latencies, 50)),
+            "latency_p95": _round(percentile(latencies, 95)),
+            "latency_p99": _round(percentile(latencies, 99)),
+            "latency_max": _round(max(latencies) if latencies else None),
+            "errors": errors,
+            "resources": self.resources,
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def find_scaling_limit(levels: List[Dict[str, Any]], gain_threshold: float = SCALING_GAIN_THRESHOLD,
+                       max_error_rate: float = 0.05) -> Optional[int]:
+    """
+    Highest concurrency level that still scaled
+
+    A level scales when its throughput is at least gain_threshold higher than
+    the best lower level and its error rate stays within max_error_rate.
+    """
+    best_throughput = 0.0
+    limit = None
+    for level in sorted(levels, key=lambda l: l["concurrency"]):
+        if level["error_rate"] > max_error_rate:
+            break
+        throughput = level["throughput_per_minute"]
+        if limit is None or throughput >= best_throughput * (1 + gain_threshold):
+            best_throughput = max(best_throughput, throughput)
+            limit = level["concurrency"]
+    return limit
+
+
+# ---------------------------------------------------------------------------
+# HTTP target (app.py / advanced_frontend_server.py)
+# ---------------------------------------------------------------------------
+
+def screening_payload(server: str, index: int) -> Dict[str, Any]:
+    """Screening request body in the target server's schema"""
+    location = LOAD_LOCATIONS[index % len(LOAD_LOCATIONS)]
+    name = f"Load Test {index + 1} - {location['name']}"
+    if server == "app":
+        return {
+            "projectName": name,
+            "locationName": location["name"],
+            "coordinates": {"longitude": location["longitude"], "latitude": location["latitude"]},
+            "includeComprehensiveReport": True,
+            "includePdf": True,
+            "useLlmEnhancement": False,
+        }
+    return {
+        "project_name": name,
+        "location_name": location["name"],
+        "coordinates": [location["longitude"], location["latitude"]],
+        "include_comprehensive_report": True,
+        "include_pdf": True,
+        "use_llm_enhancement": False,
+    }
+
+
+def wait_for_screening(session, target: str, screening_id: str, started: float, timeout: float,
+                       poll_interval: float) -> ScreeningOutcome:
+    """Poll a screening's status until it finishes"""
+    status_url = f"{target}/api/environmental-screening/{screening_id}/status"
+    status = "unknown"
+    while time.perf_counter() - started < timeout:
+        try:
+            response = session.get(status_url, timeout=30)
+            if response.ok:
+                job = response.json()
+                status = job.get("status", "unknown")
+                if status in FINAL_STATUSES:
+                    return ScreeningOutcome(0, status == "completed", time.perf_counter() - started, status,
+                                            job.get("error"), screening_id)
+        except Exception as e:
+            status = f"poll error: {e}"
+        time.sleep(poll_interval)
+    return ScreeningOutcome(0, False, time.perf_counter() - started, status, "timed out", screening_id)
+
+
+def run_http_level(target: str, server: str, screenings: int, concurrency: int, batch: bool = False,
+                   timeout: float = 1800, poll_interval: float = 2.0) -> List[ScreeningOutcome]:
+    """Run one load level against a screening server"""
+    import requests
+
+    session = requests.Session()
+
+    if batch:
+        payload = [screening_payload(server, i) for i in range(screenings)]
+        started = time.perf_counter()
+        response = session.post(f"{target}/api/batch-environmental-screening",
+                                params={"concurrency": concurrency}, json=payload, timeout=60)
+        response.raise_for_status()
+        screening_ids = response.json()["screening_ids"]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(screening_ids), 32)) as pool:
+            futures = [pool.submit(wait_for_screening, session, target, sid, started, timeout, poll_interval)
+                       for sid in screening_ids]
+            outcomes = [future.result() for future in futures]
+        for index, outcome in enumerate(outcomes):
+            outcome.index = index
+        return outcomes
+
+    def submit_and_wait(index: int) -> ScreeningOutcome:
+        started = time.perf_counter()
+        try:
+            response = session.post(f"{target}/api/environmental-screening",
+                                    json=screening_payload(server, index), timeout=60)
+            response.raise_for_status()
+            screening_id = response.json()["screening_id"]
+        except Exception as e:
+            return ScreeningOutcome(index, False, time.perf_counter() - started, "submit failed", str(e))
+        outcome = wait_for_screening(session, target, screening_id, started, timeout, poll_interval)
+        outcome.index = index
+        return outcome
+
+    # Keep `concurrency` screenings in flight: a new one starts when one finishes
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(submit_and_wait, range(screenings)))
+
+
+# ---------------------------------------------------------------------------
+# In-process target (tool pipeline without the LLM)
+# ---------------------------------------------------------------------------
+
+def run_in_process_level(screenings: int, concurrency: int, work_dir: str) -> List[ScreeningOutcome]:
+    """Run the screening tool pipeline `screenings` times on `concurrency` threads"""
+    import contextvars
+    from output_directory_manager import screening_workspace
+    from screening_benchmark import BenchmarkContext, bench_full_pipeline
+
+    def run_one(index: int) -> ScreeningOutcome:
+        location = LOAD_LOCATIONS[index % len(LOAD_LOCATIONS)]
+        ctx = BenchmarkContext(location={
+            "longitude": location["longitude"], "latitude": location["latitude"],
+            "location_name": location["name"], "cadastral_number": location["cadastral"],
+        }, work_dir=work_dir)
+        started = time.perf_counter()
+        try:
+            with screening_workspace(f"load_{concurrency}_{index}", base_output_dir=work_dir):
+                bench_full_pipeline(ctx)
+            return ScreeningOutcome(index, True, time.perf_counter() - started, "completed")
+        except Exception as e:
+            return ScreeningOutcome(index, False, time.perf_counter() - started, "failed", str(e))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, run_one, i) for i in range(screenings)]
+        return [future.result() for future in futures]
+
+
+def run_load_test(run_level: Callable[[int], List[ScreeningOutcome]], levels: List[int],
+                  pid: Optional[int] = None) -> Dict[str, Any]:
+    """Run every concurrency level and summarize"""
+    results = []
+    for concurrency in levels:
+        print(f"🚦 Concurrency {concurrency} ...", flush=True)
+        with ResourceSampler(pid) as sampler:
+            started = time.perf_counter()
+            outcomes = run_level(concurrency)
+            wall = time.perf_counter() - started
+        summary = LevelResult(concurrency, outcomes, wall, sampler.summary()).summary()
+        results.append(summary)
+        print(f"   {summary['completed']}/{summary['submitted']} completed, "
+              f"{summary['throughput_per_minute']}/min, p50 {summary['latency_p50']}s, "
+              f"p95 {summary['latency_p95']}s, p99 {summary['latency_p99']}s, "
+              f"peak RSS {summary['resources'].get('rss_mb_peak', '-')} MB")
+    return {"levels": results, "scaling_limit": find_scaling_limit(results)}
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Markdown table of a load test"""
+    lines = ["| Concurrency | Done | Failed | Throughput/min | p50 (s) | p95 (s) | p99 (s) | CPU avg/peak % | Peak RSS MB | Peak threads |",
+             "|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|"]
+    for level in report["levels"]:
+        resources = level["resources"]
+        cpu = (f"{resources['cpu_percent_avg']}/{resources['cpu_percent_peak']}"
+               if "cpu_percent_avg" in resources else "-")
+        lines.append(f"| {level['concurrency']} | {level['completed']} | {level['failed']} | "
+                     f"{level['throughput_per_minute']} | {level['latency_p50']} | {level['latency_p95']} | "
+                     f"{level['latency_p99']} | {cpu} | {resources.get('rss_mb_peak', '-')} | "
+                     f"{resources.get('threads_peak', '-')} |")
+    limit = report.get("scaling_limit")
+    lines.append("")
+    lines.append(f"Scaling limit: {'concurrency ' + str(limit) if limit else 'not reached / undetermined'}")
+    return "\n".join(lines)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load test the screening servers or tool pipeline")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--target", help="Base URL of a running screening server")
+    target.add_argument("--in-process", action="store_true", help="Run the tool pipeline in this process")
+    parser.add_argument("--server", choices=["app", "advanced"], default="app", help="Request schema of --target")
+    parser.add_argument("--batch", action="store_true", help="Submit each level as one batch (advanced server)")
+    parser.add_argument("--screenings", type=int, default=8, help="Screenings per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--server-pid", type=int, help="Server process to sample CPU / memory from")
+    parser.add_argument("--timeout", type=float, default=1800, help="Per-screening timeout (s)")
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--mock", action="store_true", help="Start the bundled mock ArcGIS server (in-process)")
+    parser.add_argument("--mock-latency", type=float, default=0.1)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--mock-job-seconds", type=float, default=2.0)
+    parser.add_argument("--output", help="Write the report JSON here")
+    args = parser.parse_args()
+
+    mock = None
+    if args.mock:
+        from mock_arcgis_server import MockArcGISServer, MockConfig
+        mock = MockArcGISServer(MockConfig(latency=args.mock_latency, error_rate=args.mock_error_rate,
+                                           job_seconds=args.mock_job_seconds)).start()
+        print(f"🧪 Mock ArcGIS server on {mock.url}")
+
+    try:
+        if args.in_process:
+            if mock is not None:
+                from upstream_http import set_upstream_redirect
+                set_upstream_redirect(mock.url)
+            work_dir = tempfile.mkdtemp(prefix="screening_load_")
+            print(f"📁 Screening output in {work_dir}")
+            report = run_load_test(
+                lambda c: run_in_process_level(args.screenings, c, work_dir), args.concurrency, os.getpid()
+            )
+        else:
+            if mock is not None:
+                print(f"   Start the target server with UPSTREAM_REDIRECT={mock.url}")
+            target_url = args.target.rstrip("/")
+            report = run_load_test(
+                lambda c: run_http_level(target_url, args.server, args.screenings, c, args.batch,
+                                         args.timeout, args.poll_interval),
+                args.concurrency, args.server_pid
+            )
+        if mock is not None:
+            with mock._lock:
+                report["mock_stats"] = dict(mock.stats)
+    finally:
+        if mock is not None:
+            mock.stop()
+
+    print()
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
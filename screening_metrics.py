@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Screening Metrics
+
+Process-wide metrics for upstream services, agent tools and the LLM, exposed in
+Prometheus text format by the web servers (/metrics), plus per-screening
+summaries written to each screening's output directory.
+
+Recorded by:
+- upstream_http.UpstreamSession for every upstream HTTP request (count, latency,
+  payload size, errors and timeouts per host / ArcGIS service / layer)
+- MetricsCallbackHandler for agent tool calls and LLM turns
+- record_cache() from the caching layers (hit / miss per cache)
+- record_tool_result() from tool result compaction (tokens returned vs. full)
+
+Per-screening attribution uses a context variable, so the summary of a screening
+only contains the calls made on its behalf even when screenings run concurrently.
+"""
+
+import json
+import re
+import threading
+import time
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    from langchain_core.callbacks import BaseCallbackHandler
+except ImportError:
+    # Metrics remain usable without LangChain
+    BaseCallbackHandler = object
+
+# Histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# ArcGIS REST service types that end the service path in a URL
+_SERVICE_TYPES = ("MapServer", "FeatureServer", "GPServer", "ImageServer", "GeometryServer")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def describe_url(url: str) -> Tuple[str, str, str]:
+    """
+    Split an upstream URL into (host, service, layer) metric labels
+
+    For ArcGIS REST URLs the service is e.g. 'Public/NFHL/MapServer' and the
+    layer is the layer id, GP task or operation that follows it.
+    """
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    parts = [part for part in parsed.path.split("/") if part]
+
+    for index, part in enumerate(parts):
+        if part in _SERVICE_TYPES:
+            start = parts.index("services") + 1 if "services" in parts[:index] else max(index - 1, 0)
+            service = "/".join(parts[start:index + 1])
+            layer = parts[index + 1] if index + 1 < len(parts) else ""
+            # Async GP job URLs carry a job id; keep the label set bounded
+            if re.fullmatch(r"[0-9a-f]{32}", layer):
+                layer = "job"
+            return host, service, layer
+
+    return host, "/".join(parts[:2]), ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.total += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                return
+        self.counts[-1] += 1
+
+
+class MetricsRegistry:
+    """Thread-safe registry of labelled counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._help: Dict[str, Tuple[str, str]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str):
+        """Register a metric's type and help text"""
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = _labels(**labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels):
+        key = _labels(**labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def get(self, name: str, **labels) -> float:
+        """Current value of a counter series (0 if never incremented)"""
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(**labels), 0.0)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        def fmt_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+            items = list(labels) + ([extra] if extra else [])
+            if not items:
+                return ""
+            escaped = (f'{key}="{_escape(value)}"' for key, value in items)
+            return "{" + ",".join(escaped) + "}"
+
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                kind, help_text = self._help.get(name, ("counter", name))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{fmt_labels(labels)} {value:g}")
+            for name in sorted(self._histograms):
+                _, help_text = self._help.get(name, ("histogram", name))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{fmt_labels(labels, ('le', f'{bound:g}'))} {cumulative}")
+                    lines.append(f"{name}_bucket{fmt_labels(labels, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{name}_sum{fmt_labels(labels)} {histogram.total:g}")
+                    lines.append(f"{name}_count{fmt_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+REGISTRY.describe("upstream_requests_total", "counter", "Upstream HTTP requests by host, service, layer and status")
+REGISTRY.describe("upstream_errors_total", "counter", "Failed upstream HTTP requests by error kind")
+REGISTRY.describe("upstream_request_duration_seconds", "histogram", "Upstream HTTP request latency")
+REGISTRY.describe("upstream_response_bytes", "histogram", "Upstream HTTP response payload size")
+REGISTRY.describe("cache_requests_total", "counter", "Cache lookups by cache and result (hit/miss)")
+REGISTRY.describe("tool_calls_total", "counter", "Agent tool calls by tool and status")
+REGISTRY.describe("tool_duration_seconds", "histogram", "Agent tool call duration")
+REGISTRY.describe("llm_calls_total", "counter", "LLM calls by model and status")
+REGISTRY.describe("llm_duration_seconds", "histogram", "LLM call latency")
+REGISTRY.describe("tool_result_tokens_total", "counter", "Estimated tokens of tool results by tool and form (full/returned)")
+REGISTRY.describe("llm_history_tokens_saved_total", "counter",
+                  "Estimated prompt tokens per LLM turn saved by compacted tool results")
+
+
+class ScreeningMetrics:
+    """Metrics recorded on behalf of one screening"""
+
+    def __init__(self, screening_id: str):
+        self.screening_id = screening_id
+        self.started = datetime.now()
+        self._lock = threading.Lock()
+        self.upstreams: Dict[str, Dict[str, Any]] = {}
+        self.tools: Dict[str, Dict[str, Any]] = {}
+        self.llm: Dict[str, Any] = {"calls": 0, "errors": 0, "seconds": 0.0}
+        self.caches: Dict[str, Dict[str, int]] = {}
+        self.context: Dict[str, Any] = {"tool_results": 0, "full_tokens": 0, "returned_tokens": 0,
+                                        "saved_per_turn": []}
+
+    def _add(self, table: Dict[str, Dict[str, Any]], key: str, duration: float, error: bool, size: int = 0):
+        with self._lock:
+            entry = table.setdefault(key, {"calls": 0, "errors": 0, "seconds": 0.0, "bytes": 0, "durations": []})
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["seconds"] += duration
+            entry["bytes"] += size
+            entry["durations"].append(duration)
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarize calls per upstream service and tool, slowest first"""
+        def summarize(table: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+            rows = []
+            for key, entry in table.items():
+                durations = sorted(entry["durations"])
+                rows.append({
+                    "name": key,
+                    "calls": entry["calls"],
+                    "errors": entry["errors"],
+                    "total_seconds": round(entry["seconds"], 3),
+                    "p50_seconds": round(durations[len(durations) // 2], 3),
+                    "p95_seconds": round(durations[min(int(len(durations) * 0.95), len(durations) - 1)], 3),
+                    "max_seconds": round(durations[-1], 3),
+                    "bytes": entry["bytes"],
+                })
+            return sorted(rows, key=lambda row: row["total_seconds"], reverse=True)
+
+        with self._lock:
+            caches = {
+                name: {**counts, "hit_rate": round(counts["hit"] / max(counts["hit"] + counts["miss"], 1), 3)}
+                for name, counts in self.caches.items()
+            }
+            return {
+                "screening_id": self.screening_id,
+                "started": self.started.isoformat(),
+                "finished": datetime.now().isoformat(),
+                "upstreams": summarize(self.upstreams),
+                "tools": summarize(self.tools),
+                "llm": {**self.llm, "seconds": round(self.llm["seconds"], 3)},
+                "caches": caches,
+                "context": {**self.context, "saved_per_turn": list(self.context["saved_per_turn"]),
+                            "history_tokens_saved": sum(self.context["saved_per_turn"])},
+            }
+
+    def write_summary(self, project_dir: Optional[str]) -> Optional[str]:
+        """Write the summary to <project_dir>/logs/metrics_summary.json"""
+        if not project_dir or not Path(project_dir).is_dir():
+            return None
+        path = Path(project_dir) / "logs" / "metrics_summary.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.summary(), indent=2))
+        return str(path)
+
+
+_current_screening: contextvars.ContextVar[Optional[ScreeningMetrics]] = contextvars.ContextVar(
+    "screening_metrics", default=None
+)
+
+
+@contextmanager
+def screening_metrics(screening_id: str) -> Iterator[ScreeningMetrics]:
+    """Attribute metrics recorded in this context (and threads that copy it) to a screening"""
+    collector = ScreeningMetrics(screening_id)
+    token = _current_screening.set(collector)
+    try:
+        yield collector
+    finally:
+        _current_screening.reset(token)
+
+
+def record_http(method: str, url: str, status: Optional[int], duration: float,
+                size: int = 0, error_kind: Optional[str] = None):
+    """Record one upstream HTTP request (4xx/5xx statuses count as errors)"""
+    if error_kind is None and status is not None and status >= 400:
+        error_kind = "http_5xx" if status >= 500 else "http_4xx"
+    host, service, layer = describe_url(url)
+    status_label = str(status) if status is not None else "error"
+    REGISTRY.inc("upstream_requests_total", host=host, service=service, layer=layer,
+                 method=method.upper(), status=status_label)
+    REGISTRY.observe("upstream_request_duration_seconds", duration, host=host, service=service)
+    if size:
+        REGISTRY.observe("upstream_response_bytes", size, SIZE_BUCKETS, host=host, service=service)
+    if error_kind:
+        REGISTRY.inc("upstream_errors_total", host=host, service=service, kind=error_kind)
+
+    collector = _current_screening.get()
+    if collector is not None:
+        collector._add(collector.upstreams, f"{host}/{service}" if service else host,
+                       duration, error_kind is not None, size)
+
+
+def record_tool(tool: str, duration: float, ok: bool = True):
+    """Record one agent tool call"""
+    REGISTRY.inc("tool_calls_total", tool=tool, status="ok" if ok else "error")
+    REGISTRY.observe("tool_duration_seconds", duration, tool=tool)
+    collector = _current_screening.get()
+    if collector is not None:
+        collector._add(collector.tools, tool, duration, not ok)
+
+
+def record_llm(model: str, duration: float, ok: bool = True):
+    """Record one LLM call"""
+    REGISTRY.inc("llm_calls_total", model=model, status="ok" if ok else "error")
+    REGISTRY.observe("llm_duration_seconds", duration, model=model)
+    collector = _current_screening.get()
+    if collector is not None:
+        with collector._lock:
+            collector.llm["calls"] += 1
+            collector.llm["errors"] += int(not ok)
+            collector.llm["seconds"] += duration
+            # Every turn re-sends the history, so each compacted result saves its difference again
+            saved = collector.context["full_tokens"] - collector.context["returned_tokens"]
+            collector.context["saved_per_turn"].append(saved)
+        if saved:
+            REGISTRY.inc("llm_history_tokens_saved_total", saved, model=model)
+
+
+def record_tool_result(tool: str, full_tokens: int, returned_tokens: int):
+    """Record the estimated size of a tool result before and after compaction"""
+    REGISTRY.inc("tool_result_tokens_total", full_tokens, tool=tool, form="full")
+    REGISTRY.inc("tool_result_tokens_total", returned_tokens, tool=tool, form="returned")
+    collector = _current_screening.get()
+    if collector is not None:
+        with collector._lock:
+            collector.context["tool_results"] += 1
+            collector.context["full_tokens"] += full_tokens
+            collector.context["returned_tokens"] += returned_tokens
+
+
+def record_cache(cache: str, hit: bool):
+    """Record a cache lookup"""
+    result = "hit" if hit else "miss"
+    REGISTRY.inc("cache_requests_total", cache=cache, result=result)
+    collector = _current_screening.get()
+    if collector is not None:
+        with collector._lock:
+            counts = collector.caches.setdefault(cache, {"hit": 0, "miss": 0})
+            counts[result] += 1
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition of the process-wide metrics"""
+    return REGISTRY.render()
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """LangChain callback handler that records tool and LLM call metrics"""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._started: Dict[Any, Tuple[str, float]] = {}
+
+    def _start(self, run_id: Any, name: str):
+        with self._lock:
+            self._started[run_id] = (name, time.perf_counter())
+
+    def _finish(self, run_id: Any) -> Tuple[str, float]:
+        with self._lock:
+            name, started = self._started.pop(run_id, ("unknown", time.perf_counter()))
+        return name, time.perf_counter() - started
+
+    def on_tool_start(self, serialized: Optional[Dict[str, Any]], input_str: str, *,
+                      run_id: Any = None, **kwargs):
+        self._start(run_id, kwargs.get("name") or (serialized or {}).get("name") or "tool")
+
+    def on_tool_end(self, output: Any, *, run_id: Any = None, **kwargs):
+        # Handled tool errors and timeouts end normally with an error-status ToolMessage
+        name, duration = self._finish(run_id)
+        record_tool(name, duration, ok=getattr(output, "status", None) != "error")
+
+    def on_tool_error(self, error: BaseException, *, run_id: Any = None, **kwargs):
+        name, duration = self._finish(run_id)
+        record_tool(name, duration, ok=False)
+
+    def on_chat_model_start(self, serialized: Optional[Dict[str, Any]], messages: Any, *,
+                            run_id: Any = None, **kwargs):
+        metadata = kwargs.get("metadata") or {}
+        model = metadata.get("ls_model_name") or (serialized or {}).get("name") or "llm"
+        self._start(run_id, model)
+
+    def on_llm_start(self, serialized: Optional[Dict[str, Any]], prompts: Any, *,
+                     run_id: Any = None, **kwargs):
+        self.on_chat_model_start(serialized, prompts, run_id=run_id, **kwargs)
+
+    def on_llm_end(self, response: Any, *, run_id: Any = None, **kwargs):
+        record_llm(*self._finish(run_id))
+
+    def on_llm_error(self, error: BaseException, *, run_id: Any = None, **kwargs):
+        model, duration = self._finish(run_id)
+        record_llm(model, duration, ok=False)
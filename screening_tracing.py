@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Screening Tracing
+
+Hierarchical span tracing of a screening, so the critical path of a slow
+screening can be found:
+
+    screening
+    └── turn N                    (one agent step: LLM call plus the tools it requested)
+        ├── llm
+        └── tool <name>
+            └── <sub-step>        (span() blocks inside tools, e.g. FIRMette report)
+                └── HTTP GET ...  (every UpstreamSession request, print job polling)
+
+Spans are attributed through context variables: screening_trace() binds a trace
+to the running screening, span() opens a child of the current span, and
+TracingCallbackHandler turns agent LLM and tool calls into spans. Code that
+runs outside a traced screening pays nothing; span() is then a no-op.
+
+Finished traces are exported as JSON lines (one span per line) to
+<project>/logs/trace.jsonl. View one as a waterfall with its critical path, or
+convert it for chrome://tracing / Perfetto:
+
+    python screening_tracing.py output/<project>/logs/trace.jsonl
+    python screening_tracing.py output/<project>/logs/trace.jsonl --chrome trace.json
+"""
+
+import json
+import time
+import functools
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    from langchain_core.callbacks import BaseCallbackHandler
+except ImportError:
+    # Tracing remains usable without LangChain
+    BaseCallbackHandler = object
+
+
+class Span:
+    """One timed operation in a screening trace"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start", "end",
+                 "attributes", "status", "error", "thread")
+
+    def __init__(self, trace_id: str, name: str, kind: str = "internal",
+                 parent_id: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.thread = threading.current_thread().name
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, error: Any):
+        self.status = "error"
+        self.error = str(error)[:500]
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.end if self.end is not None else time.time()
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.start, 6),
+            "end": round(end, 6),
+            "duration_ms": round((end - self.start) * 1000, 3),
+            "status": self.status,
+            "error": self.error,
+            "thread": self.thread,
+            "attributes": self.attributes,
+        }
+
+
+class ScreeningTrace:
+    """Spans recorded for one screening"""
+
+    def __init__(self, screening_id: str):
+        self.screening_id = screening_id
+        self.trace_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._spans: List[Span] = []
+        self.root = self.start_span("screening", kind="screening", screening_id=screening_id)
+
+    def start_span(self, name: str, kind: str = "internal", parent: Optional[Span] = None,
+                   **attributes) -> Span:
+        new_span = Span(self.trace_id, name, kind, parent.span_id if parent else None, attributes)
+        with self._lock:
+            self._spans.append(new_span)
+        return new_span
+
+    @staticmethod
+    def end_span(finished: Span):
+        if finished.end is None:
+            finished.end = time.time()
+
+    def close(self):
+        """End the root span and any span left open (e.g. the last agent turn)"""
+        now = time.time()
+        with self._lock:
+            for open_span in self._spans:
+                if open_span.end is None:
+                    open_span.end = now
+
+    def spans(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [recorded.to_dict() for recorded in sorted(self._spans, key=lambda s: s.start)]
+
+    def write(self, project_dir: Optional[str]) -> Optional[str]:
+        """Export the trace to <project_dir>/logs/trace.jsonl"""
+        if not project_dir or not Path(project_dir).is_dir():
+            return None
+        path = Path(project_dir) / "logs" / "trace.jsonl"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            for recorded in self.spans():
+                f.write(json.dumps(recorded, default=str) + "\n")
+        return str(path)
+
+
+_current_trace: contextvars.ContextVar[Optional[ScreeningTrace]] = contextvars.ContextVar(
+    "screening_trace", default=None
+)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "screening_span", default=None
+)
+
+
+@contextmanager
+def screening_trace(screening_id: str) -> Iterator[ScreeningTrace]:
+    """Trace everything run in this context (and threads that copy it) as one screening"""
+    trace = ScreeningTrace(screening_id)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.root.fail(e)
+        raise
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        trace.close()
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes) -> Iterator[Optional[Span]]:
+    """
+    Time a block as a child of the current span
+
+    Yields the span (None outside a traced screening) so callers can add
+    attributes once results are known.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    current = trace.start_span(name, kind, _current_span.get() or trace.root, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.fail(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.end_span(current)
+
+
+def traced(name: str, kind: str = "step"):
+    """Decorator that runs a function inside span(name)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler that records agent turns, LLM calls and tool calls as spans
+
+    Each LLM call starts a new turn; tools run until the next LLM call belong to it.
+    Tool spans become the current span inside the tool, so span() blocks and
+    HTTP requests made by the tool nest under it.
+    """
+
+    def __init__(self, trace: ScreeningTrace):
+        super().__init__()
+        self.trace = trace
+        self._lock = threading.Lock()
+        self._spans: Dict[Any, Any] = {}
+        self._turn: Optional[Span] = None
+        self._turns = 0
+
+    def on_chat_model_start(self, serialized: Optional[Dict[str, Any]], messages: Any, *,
+                            run_id: Any = None, **kwargs):
+        trace = self.trace
+        metadata = kwargs.get("metadata") or {}
+        model = metadata.get("ls_model_name") or (serialized or {}).get("name") or "llm"
+        with self._lock:
+            if self._turn is not None:
+                trace.end_span(self._turn)
+            self._turns += 1
+            self._turn = trace.start_span(f"turn {self._turns}", "turn", trace.root, turn=self._turns)
+            self._spans[run_id] = (trace.start_span("llm", "llm", self._turn, model=model), None, None)
+
+    def on_llm_start(self, serialized: Optional[Dict[str, Any]], prompts: Any, *,
+                     run_id: Any = None, **kwargs):
+        self.on_chat_model_start(serialized, prompts, run_id=run_id, **kwargs)
+
+    def _finish(self, run_id: Any, error: Optional[BaseException] = None) -> Optional[Span]:
+        with self._lock:
+            finished, parent, token = self._spans.pop(run_id, (None, None, None))
+        if finished is None:
+            return None
+        if error is not None:
+            finished.fail(error)
+        finished.end = time.time()
+        if token is not None:
+            # Tool finished: later work in this context nests under the tool's parent again
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # The tool ended in a different context than it started in
+                _current_span.set(parent)
+        return finished
+
+    def on_llm_end(self, response: Any, *, run_id: Any = None, **kwargs):
+        finished = self._finish(run_id)
+        usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+        if finished is not None and usage:
+            finished.set_attributes(**{f"tokens_{key}": value for key, value in usage.items()
+                                       if isinstance(value, int)})
+
+    def on_llm_error(self, error: BaseException, *, run_id: Any = None, **kwargs):
+        self._finish(run_id, error)
+
+    def on_tool_start(self, serialized: Optional[Dict[str, Any]], input_str: str, *,
+                      run_id: Any = None, **kwargs):
+        trace = self.trace
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        with self._lock:
+            parent = self._turn or trace.root
+            tool_span = trace.start_span(f"tool {name}", "tool", parent, tool=name,
+                                         input_chars=len(input_str or ""))
+            self._spans[run_id] = (tool_span, parent, _current_span.set(tool_span))
+
+    def on_tool_end(self, output: Any, *, run_id: Any = None, **kwargs):
+        # Handled tool errors and timeouts end normally with an error-status ToolMessage
+        error = getattr(output, "content", output) if getattr(output, "status", None) == "error" else None
+        finished = self._finish(run_id, error)
+        if finished is not None:
+            finished.set_attributes(output_chars=len(str(output)))
+
+    def on_tool_error(self, error: BaseException, *, run_id: Any = None, **kwargs):
+        self._finish(run_id, error)
+
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    """Read the spans of an exported trace.jsonl"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Chain of spans that determined the end of the trace
+
+    From the root, repeatedly follows the child that finished last.
+    """
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for recorded in spans:
+        children.setdefault(recorded["parent_id"], []).append(recorded)
+
+    path = []
+    current = max(children.get(None, []), key=lambda s: s["end"], default=None)
+    while current is not None:
+        path.append(current)
+        current = max(children.get(current["span_id"], []), key=lambda s: s["end"], default=None)
+    return path
+
+
+def to_chrome_trace(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convert spans to the Chrome Trace Event format (chrome://tracing, Perfetto)"""
+    threads = {name: index for index, name in enumerate(sorted({s["thread"] for s in spans}))}
+    events = [{
+        "name": recorded["name"],
+        "cat": recorded["kind"],
+        "ph": "X",
+        "ts": recorded["start"] * 1_000_000,
+        "dur": recorded["duration_ms"] * 1000,
+        "pid": 1,
+        "tid": threads[recorded["thread"]],
+        "args": {**recorded["attributes"], "status": recorded["status"], "error": recorded["error"]},
+    } for recorded in spans]
+    events.extend({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+                  for name, tid in threads.items())
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def format_waterfall(spans: List[Dict[str, Any]], width: int = 50) -> str:
+    """Render spans as an indented text waterfall, marking the critical path with '*'"""
+    if not spans:
+        return "(empty trace)"
+    start = min(s["start"] for s in spans)
+    total = max(max(s["end"] for s in spans) - start, 1e-9)
+    on_path = {s["span_id"] for s in critical_path(spans)}
+
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for recorded in spans:
+        children.setdefault(recorded["parent_id"], []).append(recorded)
+
+    lines = []
+
+    def walk(parent_id: Optional[str], depth: int):
+        for recorded in sorted(children.get(parent_id, []), key=lambda s: s["start"]):
+            offset = int((recorded["start"] - start) / total * width)
+            length = max(int(recorded["duration_ms"] / 1000 / total * width), 1)
+            bar = " " * offset + "█" * min(length, width - offset)
+            marker = "*" if recorded["span_id"] in on_path else " "
+            failed = " ✗" if recorded["status"] == "error" else ""
+            label = ("  " * depth + recorded["name"])[:48]
+            lines.append(f"{marker} {label:<48} {recorded['duration_ms'] / 1000:>8.2f}s |{bar:<{width}}|{failed}")
+            walk(recorded["span_id"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show a screening trace as a waterfall")
+    parser.add_argument("trace", help="Path to a trace.jsonl file")
+    parser.add_argument("--chrome", help="Also write a Chrome/Perfetto trace JSON file")
+    args = parser.parse_args()
+
+    trace_spans = load_trace(args.trace)
+    print(format_waterfall(trace_spans))
+    print("\n🔥 Critical path:")
+    for step in critical_path(trace_spans):
+        print(f"   {step['name']} ({step['duration_ms'] / 1000:.2f}s)")
+
+    if args.chrome:
+        with open(args.chrome, "w") as f:
+            json.dump(to_chrome_trace(trace_spans), f)
+        print(f"\n💾 Chrome trace written to {args.chrome}")
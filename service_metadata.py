@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Service Metadata Registry
+
+ArcGIS service metadata (?f=pjson: layers, LODs, extents, capabilities)
+changes perhaps monthly. Map exporters and flood clients used to fetch it on
+every construction or point query. This registry keeps it process-wide and on
+disk with a TTL, so only the first use after the TTL expires pays for the
+fetch.
+
+- get(url, fetch): the metadata for url, from memory, then disk, then fetch().
+  Concurrent callers for the same url share one fetch.
+- An expired entry is still returned immediately and refreshed in a
+  background thread, so callers do not block on a refetch. A failed refresh
+  keeps the stale copy.
+- ArcGIS error documents ({"error": ...} with HTTP 200) raise
+  ServiceMetadataError and are never cached, so an outage cannot replace
+  good metadata for a TTL.
+- derived(url, key, build): values parsed from the metadata (e.g. Scale
+  objects), rebuilt only when the metadata is refreshed.
+
+Lookups are recorded as cache hits and misses ("service_metadata") in
+screening_metrics.
+
+Environment:
+- SERVICE_METADATA_TTL: seconds before metadata is refreshed (default 7 days, 0 disables caching)
+- SERVICE_METADATA_CACHE_DIR: on-disk cache directory (default cache/service_metadata)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from screening_metrics import record_cache
+from upstream_http import redirect_url
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_CACHE_DIR = os.path.join("cache", "service_metadata")
+
+
+def _env_ttl() -> float:
+    try:
+        return float(os.getenv("SERVICE_METADATA_TTL", DEFAULT_TTL))
+    except ValueError:
+        return DEFAULT_TTL
+
+
+def normalize_url(url: str) -> str:
+    """Cache key for a service or layer URL (the redirect target under UPSTREAM_REDIRECT, so mock metadata stays separate)"""
+    return redirect_url(url.strip().rstrip("/"))
+
+
+class ServiceMetadataError(RuntimeError):
+    """The service answered with an ArcGIS error document instead of metadata"""
+
+
+def _fetch_document(key: str, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    data = fetch()
+    if isinstance(data, dict) and "error" in data:
+        error = data["error"] if isinstance(data["error"], dict) else {"message": data["error"]}
+        raise ServiceMetadataError(f"{key}: {error.get('code', '')} {error.get('message', 'service error')}".strip())
+    return data
+
+
+class _Entry:
+    __slots__ = ("data", "fetched_at", "derived")
+
+    def __init__(self, data: Dict[str, Any], fetched_at: float):
+        self.data = data
+        self.fetched_at = fetched_at
+        self.derived: Dict[str, Any] = {}
+
+
+class ServiceMetadataRegistry:
+    """Process-wide, disk-backed cache of service metadata documents"""
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl: Optional[float] = None):
+        self.cache_dir = Path(cache_dir or os.getenv("SERVICE_METADATA_CACHE_DIR", DEFAULT_CACHE_DIR))
+        self.ttl = _env_ttl() if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._refreshing: set = set()
+
+    # -- persistence -----------------------------------------------------------
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(key.encode()).hexdigest()[:20]}.json"
+
+    def _load(self, key: str) -> Optional[_Entry]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get("url") != key or not isinstance(stored.get("data"), dict):
+            return None
+        return _Entry(stored["data"], float(stored.get("fetched_at", 0)))
+
+    def _store(self, key: str, entry: _Entry):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            temporary = path.with_suffix(f".{threading.get_ident()}.tmp")
+            temporary.write_text(json.dumps({"url": key, "fetched_at": entry.fetched_at, "data": entry.data}))
+            os.replace(temporary, path)
+        except OSError as e:
+            print(f"⚠️ Could not persist service metadata for {key}: {e}")
+
+    # -- lookups ---------------------------------------------------------------
+
+    def _fresh(self, entry: _Entry) -> bool:
+        return time.time() - entry.fetched_at < self.ttl
+
+    def _fetch(self, key: str, fetch: Callable[[], Dict[str, Any]]) -> _Entry:
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+        with fetch_lock:
+            with self._lock:
+                current = self._entries.get(key)
+            if current is not None and self._fresh(current):
+                return current  # another caller fetched it while we waited
+            entry = _Entry(_fetch_document(key, fetch), time.time())
+            with self._lock:
+                self._entries[key] = entry
+            if self.ttl > 0:
+                self._store(key, entry)
+            return entry
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Dict[str, Any]]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._fetch(key, fetch)
+            except Exception as e:
+                print(f"⚠️ Service metadata refresh failed for {key}, keeping cached copy: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="service-metadata-refresh", daemon=True).start()
+
+    def _entry(self, url: str, fetch: Callable[[], Dict[str, Any]]) -> _Entry:
+        key = normalize_url(url)
+        if self.ttl <= 0:
+            record_cache("service_metadata", False)
+            return _Entry(_fetch_document(key, fetch), time.time())
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            entry = self._load(key)
+            if entry is not None:
+                with self._lock:
+                    entry = self._entries.setdefault(key, entry)
+
+        if entry is None:
+            record_cache("service_metadata", False)
+            return self._fetch(key, fetch)
+
+        record_cache("service_metadata", True)
+        if not self._fresh(entry):
+            self._refresh_in_background(key, fetch)
+        return entry
+
+    def get(self, url: str, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Metadata document for url
+
+        Args:
+            url: Service or layer URL (the cache key)
+            fetch: Callable returning the parsed JSON document when it must be fetched
+
+        Returns:
+            The metadata dict; treat it as read-only, it is shared between callers.
+            Raises ServiceMetadataError when nothing is cached and the service returned an error document.
+        """
+        return self._entry(url, fetch).data
+
+    def derived(self, url: str, key: str, fetch: Callable[[], Dict[str, Any]],
+                build: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Value built from url's metadata by build(), cached until the metadata is refreshed"""
+        entry = self._entry(url, fetch)
+        with self._lock:
+            if key in entry.derived:
+                return entry.derived[key]
+        value = build(entry.data)
+        with self._lock:
+            return entry.derived.setdefault(key, value)
+
+    def invalidate(self, url: Optional[str] = None):
+        """Forget one URL's metadata (memory and disk), or everything"""
+        with self._lock:
+            keys = [normalize_url(url)] if url else list(self._entries)
+            for key in keys:
+                self._entries.pop(key, None)
+        if url:
+            self._path(normalize_url(url)).unlink(missing_ok=True)
+        elif self.cache_dir.is_dir():
+            for path in self.cache_dir.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+
+_registry: Optional[ServiceMetadataRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metadata_registry() -> ServiceMetadataRegistry:
+    """The process-wide service metadata registry"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ServiceMetadataRegistry()
+    return _registry
+
+
+def service_metadata(url: str, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """Shortcut for get_metadata_registry().get(url, fetch)"""
+    return get_metadata_registry().get(url, fetch)
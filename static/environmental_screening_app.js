@@ -470,7 +470,50 @@ class EnvironmentalScreeningApp {
         this.clearProgressLog();
     }
 
-    async monitorScreeningProgress(screeningId) {
+    monitorScreeningProgress(screeningId) {
+        // Progress is pushed by the server as it happens; poll only without EventSource
+        if (!window.EventSource) {
+            this.pollScreeningProgress(screeningId);
+            return;
+        }
+        
+        const source = new EventSource(`/api/environmental-screening/${screeningId}/events`);
+        
+        source.addEventListener('status', (event) => {
+            const data = JSON.parse(event.data);
+            this.updateProgress(data.progress || 0, data.message || 'Processing...');
+            this.updateProgressStep(data.current_step || 'setup');
+        });
+        
+        source.addEventListener('log', (event) => {
+            const entry = JSON.parse(event.data);
+            this.addProgressLogEntry(entry.timestamp, entry.message);
+        });
+        
+        source.addEventListener('end', async (event) => {
+            source.close();
+            const data = JSON.parse(event.data);
+            if (data.status === 'completed') {
+                await this.handleScreeningComplete(screeningId);
+            } else {
+                this.handleScreeningFailed(data.error);
+            }
+        });
+        
+        source.addEventListener('error', (event) => {
+            if (event.data) {
+                // Error event sent by the server (e.g. unknown screening)
+                source.close();
+                this.handleScreeningFailed(JSON.parse(event.data).error);
+            } else if (source.readyState === EventSource.CLOSED) {
+                // The stream could not be (re)opened; keep monitoring by polling
+                this.pollScreeningProgress(screeningId);
+            }
+            // Otherwise the browser reconnects and resumes from the last log entry
+        });
+    }
+
+    async pollScreeningProgress(screeningId) {
         const maxAttempts = 120; // 10 minutes max
         let attempts = 0;
         
@@ -1464,6 +1507,42 @@ class EnvironmentalScreeningApp {
     }
 
     async monitorBatchItemProgress(item) {
+        if (!window.EventSource) {
+            return this.pollBatchItemProgress(item);
+        }
+        
+        return new Promise((resolve) => {
+            const source = new EventSource(`/api/environmental-screening/${item.screeningId}/events`);
+            
+            const finish = (status) => {
+                source.close();
+                if (status.status === 'completed') {
+                    item.status = 'completed';
+                    this.updateBatchItemStatus(item.id, 'completed');
+                    this.currentBatch.completedItems++;
+                    this.logBatchMessage(`Completed: ${item.projectName}`, 'success');
+                } else {
+                    item.status = 'failed';
+                    item.error = status.error || 'Unknown error';
+                    this.updateBatchItemStatus(item.id, 'failed');
+                    this.currentBatch.failedItems++;
+                    this.logBatchMessage(`Failed: ${item.projectName} - ${item.error}`, 'error');
+                }
+                resolve();
+            };
+            
+            source.addEventListener('end', (event) => finish(JSON.parse(event.data)));
+            source.addEventListener('error', (event) => {
+                if (event.data) {
+                    finish({ status: 'failed', error: JSON.parse(event.data).error });
+                } else if (source.readyState === EventSource.CLOSED) {
+                    this.pollBatchItemProgress(item).then(resolve);
+                }
+            });
+        });
+    }
+
+    async pollBatchItemProgress(item) {
         return new Promise((resolve) => {
             const checkProgress = async () => {
                 try {
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test concurrent ABFE layer queries and the ABFE data precheck against the mock server
+"""
+
+import contextlib
+import os
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "FloodINFO"))
+
+import service_metadata
+from abfe_client import FEMAABFEClient
+from mock_arcgis_server import MockArcGISServer, MockConfig
+from upstream_http import set_upstream_redirect
+
+
+@contextlib.contextmanager
+def _mock_upstream(config, cache_dir):
+    """Redirect upstream requests to a mock server, with a private metadata cache"""
+    registry = service_metadata._registry
+    service_metadata._registry = service_metadata.ServiceMetadataRegistry(cache_dir=str(cache_dir))
+    try:
+        with MockArcGISServer(config) as mock:
+            set_upstream_redirect(mock.url)
+            yield mock
+    finally:
+        set_upstream_redirect(None)
+        service_metadata._registry = registry
+
+
+def test_abfe_layers_are_queried_concurrently(tmp_path):
+    """All layers are queried, in parallel, and reported in layer order"""
+
+    print("🧪 Testing concurrent ABFE layer queries")
+
+    with _mock_upstream(MockConfig(latency=0.05, seed=1), tmp_path):
+        client = FEMAABFEClient()
+        layers = client.get_layers_info()
+
+        started = time.perf_counter()
+        results = client.query_abfe_at_point(-66.15, 18.43)
+        elapsed = time.perf_counter() - started
+
+    assert list(results["layers"]) == [layer["id"] for layer in layers]
+    assert results["summary"]["total_layers_queried"] == len(layers)
+    assert results["abfe_data_found"]
+    assert elapsed < len(layers) * 0.05 / 2, f"{len(layers)} layer queries took {elapsed:.2f}s"
+
+    print("✅ Concurrent ABFE layer queries work")
+
+
+def test_abfe_precheck_reports_missing_data(tmp_path):
+    """The summary used to skip the ABFE map job reports when no layer has data"""
+
+    print("🧪 Testing ABFE data precheck")
+
+    with _mock_upstream(MockConfig(latency=0.0, empty_rate=1.0, seed=1), tmp_path):
+        summary = FEMAABFEClient().get_abfe_summary(-66.15, 18.43, "Interior parcel")
+
+    assert summary["abfe_data_available"] is False and summary["abfe_data_absent"] is True
+    assert summary["layers_summary"]["layers_with_data"] == 0
+    assert summary["layers_summary"]["layers_failed"] == 0
+    assert summary["abfe_values"] == []
+
+    print("✅ ABFE data precheck works")
+
+
+def test_abfe_precheck_does_not_mistake_failures_for_missing_data(tmp_path):
+    """Error bodies, failed requests and an unreachable service never confirm that data is absent"""
+
+    print("🧪 Testing ABFE precheck under service errors")
+
+    with _mock_upstream(MockConfig(latency=0.0, seed=1), tmp_path) as mock:
+        client = FEMAABFEClient()
+        layers = client.get_layers_info()
+        mock.config.error_rate = 1.0
+        summary = client.get_abfe_summary(-66.15, 18.43, "Outage")
+
+    assert layers and summary["abfe_data_available"] is False
+    assert summary["abfe_data_absent"] is False
+    assert summary["layers_summary"]["layers_failed"] == len(layers)
+
+    with _mock_upstream(MockConfig(latency=0.0, error_rate=1.0, seed=1), tmp_path / "cold"):
+        summary = FEMAABFEClient().get_abfe_summary(-66.15, 18.43, "Outage")
+
+    assert summary["layers_summary"]["total_layers"] == 0
+    assert summary["abfe_data_available"] is False and summary["abfe_data_absent"] is False
+
+    print("✅ ABFE precheck keeps failures distinct from missing data")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    for test in (test_abfe_layers_are_queried_concurrently, test_abfe_precheck_reports_missing_data,
+                 test_abfe_precheck_does_not_mistake_failures_for_missing_data):
+        with tempfile.TemporaryDirectory() as directory:
+            test(Path(directory))
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test batch locality ordering and throughput/ETA metrics
+"""
+
+from datetime import datetime, timedelta
+
+from batch_scheduler import order_by_locality, batch_progress_metrics
+
+
+def test_locality_ordering_groups_nearby_items():
+    """Nearby coordinates and matching cadastral prefixes are queued together, stably"""
+
+    print("🧪 Testing locality ordering")
+
+    requests = [
+        {"coordinates": [-66.15, 18.40]},           # San Juan
+        {"cadastral_number": "115-053-432-02"},
+        {"coordinates": [-67.15, 18.20]},           # Mayagüez
+        {"coordinates": [-66.151, 18.401]},         # San Juan again
+        {"cadastral_number": "060-000-009-58"},
+        {"cadastral_number": "115-053-432-03"},
+        {"location_name": "Ponce"},
+    ]
+
+    order = order_by_locality(requests)
+    assert sorted(order) == list(range(len(requests)))
+    assert abs(order.index(0) - order.index(3)) == 1
+    assert order.index(1) + 1 == order.index(5)
+    assert order[-1] == 6
+
+    print("✅ Locality ordering works")
+
+
+def test_batch_progress_metrics():
+    """Throughput and ETA are derived from finished items"""
+
+    print("🧪 Testing batch progress metrics")
+
+    start = datetime(2025, 1, 1, 12, 0, 0)
+    items = [
+        {"id": "a", "start_time": start.isoformat(), "end_time": (start + timedelta(seconds=60)).isoformat()},
+        {"id": "b", "start_time": start.isoformat(), "end_time": (start + timedelta(seconds=120)).isoformat()},
+        {"id": "c", "start_time": (start + timedelta(seconds=60)).isoformat(), "end_time": None},
+        {"id": "d", "start_time": None, "end_time": None},
+    ]
+
+    metrics = batch_progress_metrics(items, concurrency=2, now=start + timedelta(seconds=120))
+    assert metrics["item_durations"] == {"a": 60.0, "b": 120.0}
+    assert metrics["average_item_seconds"] == 90.0
+    assert metrics["throughput_per_minute"] == 1.0
+    assert metrics["eta_seconds"] == 120.0
+
+    empty = batch_progress_metrics([{"id": "x"}], concurrency=2)
+    assert empty["throughput_per_minute"] is None and empty["eta_seconds"] is None
+
+    print("✅ Batch progress metrics work")
+
+
+if __name__ == "__main__":
+    test_locality_ordering_groups_nearby_items()
+    test_batch_progress_metrics()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test conditional GET, byte-range parsing and streamed ZIP archives
+"""
+
+import io
+import os
+import zipfile
+
+import pytest
+
+pytest.importorskip("starlette")
+
+from starlette.requests import Request
+
+from file_delivery import file_etag, file_response, is_not_modified, parse_range, stream_zip
+
+
+def test_conditional_get_and_ranges(tmp_path):
+    """Matching validators give 304; single ranges are parsed and clamped"""
+
+    print("🧪 Testing conditional GET and ranges")
+
+    report = tmp_path / "report.pdf"
+    report.write_bytes(b"%PDF" + b"x" * 1000)
+    stat_result = report.stat()
+    etag = file_etag(stat_result)
+
+    assert is_not_modified({"if-none-match": etag}, etag, stat_result.st_mtime)
+    assert is_not_modified({"if-none-match": f'"other", W/{etag}'}, etag, stat_result.st_mtime)
+    assert not is_not_modified({"if-none-match": '"other"'}, etag, stat_result.st_mtime)
+    assert is_not_modified({"if-modified-since": "Fri, 01 Jan 2100 00:00:00 GMT"}, etag, stat_result.st_mtime)
+
+    assert parse_range("bytes=0-99", 1004) == (0, 99)
+    assert parse_range("bytes=1000-", 1004) == (1000, 1003)
+    assert parse_range("bytes=-4", 1004) == (1000, 1003)
+    assert parse_range("bytes=0-5000", 1004) == (0, 1003)
+    assert parse_range("bytes=2000-", 1004) == "unsatisfiable"
+    assert parse_range("bytes=0-1,5-6", 1004) is None
+
+    print("✅ Conditional GET and ranges work")
+
+
+def test_if_range_uses_strong_comparison(tmp_path):
+    """A range is honoured only when If-Range carries the current strong ETag"""
+
+    print("🧪 Testing If-Range")
+
+    report = tmp_path / "report.pdf"
+    report.write_bytes(b"%PDF" + b"x" * 1000)
+    etag = file_etag(report.stat())
+
+    def status(if_range):
+        headers = [(b"range", b"bytes=0-99"), (b"if-range", if_range.encode())]
+        request = Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+        return file_response(request, report).status_code
+
+    assert status(etag) == 206
+    assert status(f"W/{etag}") == 200
+    assert status('"stale"') == 200
+
+    print("✅ If-Range works")
+
+
+def test_streamed_zip_matches_files(tmp_path):
+    """The streamed archive is a valid ZIP containing every file"""
+
+    print("🧪 Testing streamed ZIP")
+
+    files = []
+    for name in ("reports/report.pdf", "maps/flood_map.png", "data/flood.json"):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(os.urandom(150_000))
+        files.append((path, name))
+
+    chunks = list(stream_zip(files))
+    assert len(chunks) > 3
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    for path, name in files:
+        assert archive.read(name) == path.read_bytes()
+
+    print("✅ Streamed ZIP works")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_conditional_get_and_ranges(Path(tmp))
+        test_if_range_uses_strong_comparison(Path(tmp))
+        test_streamed_zip_matches_files(Path(tmp))
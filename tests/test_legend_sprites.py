@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test the Pillow legend and scale bar sprites used by MapExporter
+"""
+
+import concurrent.futures
+import time
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("pyproj")
+pytest.importorskip("matplotlib")
+
+from PIL import Image
+
+from mapmaker import MapExporter
+from mapmaker.legend_sprites import legend_sprite, scale_bar_sprite, to_rgba
+from mapmaker.map_overlays import calculate_map_extent
+
+SITE = [(-66.1510, 18.4335), (-66.1500, 18.4335), (-66.1500, 18.4345), (-66.1510, 18.4345)]
+
+
+def test_sprites_are_memoized():
+    """Sprites with the same parameters are drawn once; different labels give different sprites"""
+
+    print("🧪 Testing sprite cache")
+
+    red, black, yellow = to_rgba("red", 0.4), to_rgba("black"), to_rgba("#ffff00")
+    assert red == (255, 0, 0, 102) and yellow == (255, 255, 0, 255)
+    assert to_rgba((1, 0, 0)) == to_rgba((1.0, 0.0, 0.0)) == to_rgba((255, 0, 0)) == (255, 0, 0, 255)
+    assert to_rgba([0.5, 0.5, 0.5]) == (128, 128, 128, 255)
+
+    legend = legend_sprite(red, black, "0.5 Mile Radius", yellow, None, True)
+    assert legend_sprite(red, black, "0.5 Mile Radius", yellow, None, True) is legend
+    assert legend_sprite(red, black, "1.0 Mile Radius", yellow, None, True) is not legend
+    assert legend_sprite(red, black).size[1] < legend.size[1]
+
+    bar = scale_bar_sprite(300, "1/2 mile")
+    assert scale_bar_sprite(300, "1/2 mile") is bar
+    assert bar.size[0] > 300 and bar.getpixel((20, bar.size[1] - 20))[:3] == (0, 0, 0)
+
+    print("✅ Sprite cache works")
+
+
+def test_legend_post_processing_is_fast_and_thread_safe():
+    """Concurrent post-processing of template maps yields identical images in milliseconds"""
+
+    print("🧪 Testing legend post-processing")
+
+    exporter = MapExporter(fetch_metadata=False)
+    params = exporter._apply_defaults(show_scale_bar=True, scale_bar_style='classic')
+    extent = calculate_map_extent(SITE, params['buffer_miles'])
+    base = Image.new("RGBA", (1600, 978), (200, 220, 240, 255))
+
+    def post_process(_):
+        started = time.perf_counter()
+        image = exporter._add_custom_legend_to_image(base, True, 0.5, params, extent, SITE, 1600)
+        return image.tobytes(), time.perf_counter() - started
+
+    post_process(0)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(post_process, range(16)))
+
+    assert len({image for image, _ in results}) == 1
+    assert results[0][0] != base.tobytes()
+    assert max(elapsed for _, elapsed in results) < 0.25
+
+    print("✅ Legend post-processing works")
+
+
+if __name__ == "__main__":
+    test_sprites_are_memoized()
+    test_legend_post_processing_is_fast_and_thread_safe()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test the local map compositing engine against the mock server
+"""
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("pyproj")
+pytest.importorskip("matplotlib")
+
+from mapmaker.map_compositor import BasemapCache, SiteMapCompositor, export_params, fit_extent_to_size
+from mock_arcgis_server import MockArcGISServer, MockConfig
+from upstream_http import set_upstream_redirect
+
+SITE = [(-66.1510, 18.4335), (-66.1500, 18.4335), (-66.1500, 18.4345), (-66.1510, 18.4345)]
+
+WETLANDS = {"id": "wetlands_layer", "title": "National Wetlands Inventory", "opacity": 0.75,
+            "url": "https://fwsprimary.wim.usgs.gov/server/rest/services/Wetlands/MapServer", "visibleLayers": [0, 1]}
+KARST = {"id": "ape_zc_zones", "title": "APE-ZC (Special Karst Zone)", "opacity": 0.6,
+         "url": "https://sige.pr.gov/server/rest/services/MIPR/Reglamentario_va2/MapServer", "visibleLayers": [0],
+         "layerDefinition": {"definitionExpression": "UPPER(CALI_SOBRE) LIKE '%APE-ZC%'",
+                             "drawingInfo": {"renderer": {"type": "simple", "symbol": {"color": [255, 0, 0, 153]}}}}}
+NONATTAINMENT = {"id": "nonattainment_ozone", "title": "Nonattainment: Ozone", "opacity": 0.5,
+                 "url": "https://gispub.epa.gov/arcgis/rest/services/OAR_OAQPS/NonattainmentAreas/MapServer",
+                 "visibleLayers": [2], "layerDefinition": {"definitionExpression": "STATE_ABBR = 'PR'"}}
+
+
+def test_export_parameters():
+    """Operational layers become transparent export requests on an aspect-fitted extent"""
+
+    print("🧪 Testing export parameters")
+
+    extent = fit_extent_to_size({"xmin": 0.0, "ymin": 0.0, "xmax": 1.0, "ymax": 1.0}, 400, 200)
+    assert extent["xmax"] - extent["xmin"] == pytest.approx(2 * (extent["ymax"] - extent["ymin"]))
+
+    params = export_params(NONATTAINMENT, extent, 400, 200)
+    assert params["layers"] == "show:2" and params["transparent"] == "true"
+    assert params["layerDefs"] == '{"2":"STATE_ABBR = \'PR\'"}'
+    assert "dynamicLayers" in export_params(KARST, extent, 400, 200)
+
+    print("✅ Export parameters work")
+
+
+def test_maps_share_one_basemap():
+    """Three maps cost one basemap export plus one export per distinct thematic layer"""
+
+    print("🧪 Testing shared basemap compositing")
+
+    compositor = SiteMapCompositor(width_px=400, height_px=300, basemap_cache=BasemapCache())
+    with MockArcGISServer(MockConfig(latency=0.0, seed=1)) as mock:
+        set_upstream_redirect(mock.url)
+        try:
+            maps = compositor.render_maps(SITE, {
+                "wetlands": [WETLANDS],
+                "karst": [KARST],
+                "nonattainment": [NONATTAINMENT, WETLANDS],
+            }, buffer_circle_miles=0.5, title="Test site")
+            first_requests = mock.stats["requests"]
+            compositor.render_map(SITE, [KARST], buffer_circle_miles=0.5)
+            second_requests = mock.stats["requests"] - first_requests
+        finally:
+            set_upstream_redirect(None)
+
+    assert first_requests == 1 + 3
+    assert second_requests == 1          # the basemap for this extent is already cached
+    assert set(maps) == {"wetlands", "karst", "nonattainment"}
+    assert all(image.size == (400, 300) and image.mode == "RGB" for image in maps.values())
+    assert maps["wetlands"].tobytes() != maps["karst"].tobytes()   # different legends
+
+    print("✅ Shared basemap compositing works")
+
+
+def test_mipr_cadastral_maps_are_composited(tmp_path):
+    """MIPR cadastral maps are composited locally over the MapExporter basemap, without print jobs"""
+
+    print("🧪 Testing composited MIPR maps")
+
+    from PIL import Image
+    from map_generator import MIPRMapGenerator
+
+    with MockArcGISServer(MockConfig(latency=0.0, seed=1)) as mock:
+        set_upstream_redirect(mock.url)
+        try:
+            saved = MIPRMapGenerator("topografico").create_residential_map(
+                SITE, save_path=str(tmp_path / "mipr_residential_map.png"))
+        finally:
+            set_upstream_redirect(None)
+        jobs_submitted = mock.stats["jobs_submitted"]
+
+    assert saved and jobs_submitted == 0
+    assert Image.open(tmp_path / "mipr_residential_map.png").size == (1600, 1200)
+
+    print("✅ Composited MIPR maps work")
+
+
+def test_map_only_karst_maps_are_composited(tmp_path):
+    """Map-only karst PNGs are composited locally; layout PDFs still go to the print service"""
+
+    print("🧪 Testing composited karst maps")
+
+    pytest.importorskip("pydantic")   # the karst package imports the cadastral tools
+    from PIL import Image
+    from karst.karst_map_generator import KarstMapGenerator
+
+    with MockArcGISServer(MockConfig(latency=0.0, seed=1)) as mock:
+        set_upstream_redirect(mock.url)
+        try:
+            karst_map = KarstMapGenerator(output_directory=str(tmp_path)).generate_map_export(
+                -66.6990, 18.4274, buffer_miles=0.5, output_format="PNG32", layout_template="MAP_ONLY")
+        finally:
+            set_upstream_redirect(None)
+        jobs_submitted = mock.stats["jobs_submitted"]
+
+    assert jobs_submitted == 0
+    assert karst_map is not None and Image.open(karst_map).size == (1024, 768)
+
+    print("✅ Composited karst maps work")
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_export_parameters()
+    test_maps_share_one_basemap()
+    with tempfile.TemporaryDirectory() as directory:
+        test_mipr_cadastral_maps_are_composited(Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_map_only_karst_maps_are_composited(Path(directory))
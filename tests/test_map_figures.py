@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test concurrent, pyplot-free map rendering in MapExporter against the mock server
+"""
+
+import concurrent.futures
+import contextlib
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("pyproj")
+plt = pytest.importorskip("matplotlib.pyplot")
+
+import service_metadata
+from mapmaker import MapExporter
+from mapmaker import tile_mosaic
+from mapmaker.figures import map_figure
+from mock_arcgis_server import MockArcGISServer, MockConfig
+from upstream_http import set_upstream_redirect
+
+SITE = [(-66.1510, 18.4335), (-66.1500, 18.4335), (-66.1500, 18.4345), (-66.1510, 18.4345)]
+
+
+@contextlib.contextmanager
+def _mock_upstream(cache_dir):
+    """Redirect upstream requests to a mock server, with private metadata and tile caches"""
+    registry, tiles = service_metadata._registry, tile_mosaic._tile_cache
+    service_metadata._registry = service_metadata.ServiceMetadataRegistry(cache_dir=str(cache_dir / "metadata"))
+    tile_mosaic._tile_cache = tile_mosaic.TileCache(cache_dir=str(cache_dir / "tiles"))
+    try:
+        with MockArcGISServer(MockConfig(latency=0.0, seed=1)) as mock:
+            set_upstream_redirect(mock.url)
+            yield mock
+    finally:
+        set_upstream_redirect(None)
+        service_metadata._registry, tile_mosaic._tile_cache = registry, tiles
+
+
+def test_map_figure_is_released():
+    """Figures come from their own Agg canvas, never pyplot, and are cleared on exit"""
+
+    print("🧪 Testing map figures")
+
+    figures_before = plt.get_fignums()
+    with map_figure(400, 300, 100) as (fig, ax):
+        ax.plot([0, 1], [0, 1])
+        assert fig.get_size_inches().tolist() == [4.0, 3.0]
+        assert plt.get_fignums() == figures_before
+    assert fig.axes == []
+
+    print("✅ Map figures work")
+
+
+def test_maps_render_concurrently(tmp_path):
+    """Non-template maps rendered from several threads are complete and identical"""
+
+    print("🧪 Testing concurrent map rendering")
+
+    figures_before = plt.get_fignums()
+    with _mock_upstream(tmp_path):
+        exporter = MapExporter('topografico')
+
+        def render(index):
+            path = tmp_path / f"map_{index}.png"
+            fig, ax = exporter.overlay_polygon(
+                SITE, image_width_pixels=480, image_height_pixels=360, save_path=str(path),
+                show=False, use_template=False, show_buffer_circle=True, title="Test site"
+            )
+            assert fig is not None and ax.get_title() == "Test site"
+            return path.read_bytes()
+
+        render(0)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=6) as executor:
+            outputs = list(executor.map(render, range(1, 13)))
+
+    assert len(set(outputs)) == 1 and outputs[0].startswith(b"\x89PNG")
+    assert plt.get_fignums() == figures_before
+
+    print("✅ Concurrent map rendering works")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_map_figure_is_released()
+    with tempfile.TemporaryDirectory() as directory:
+        test_maps_render_concurrently(Path(directory))
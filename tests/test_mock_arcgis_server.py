@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test the mock ArcGIS server, upstream redirection and load test statistics
+"""
+
+import time
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from mock_arcgis_server import MockArcGISServer, MockConfig
+from screening_load_test import percentile, find_scaling_limit
+from upstream_http import UpstreamSession, redirect_url, set_upstream_redirect
+
+
+def test_mock_query_and_print_job():
+    """Queries return features and print jobs move through jobStatus to a PDF"""
+
+    print("🧪 Testing mock ArcGIS server")
+
+    with MockArcGISServer(MockConfig(job_seconds=0.3, seed=1)) as mock:
+        layer = f"{mock.url}/hazards.fema.gov/arcgis/rest/services/public/NFHL/MapServer/28"
+        query = requests.get(f"{layer}/query", params={
+            "geometry": "-66.15,18.43", "geometryType": "esriGeometryPoint", "f": "json"}).json()
+        assert query["features"] and "attributes" in query["features"][0]
+
+        gp = f"{mock.url}/msc.fema.gov/arcgis/rest/services/NFHL_Print/GPServer/Print FIRM or FIRMette"
+        job_id = requests.post(f"{gp}/submitJob", data={"f": "json"}).json()["jobId"]
+        statuses = []
+        while not statuses or statuses[-1] not in ("esriJobSucceeded", "esriJobFailed"):
+            statuses.append(requests.get(f"{gp}/jobs/{job_id}", params={"f": "json"}).json()["jobStatus"])
+            time.sleep(0.05)
+        assert statuses[0] in ("esriJobSubmitted", "esriJobExecuting")
+        assert statuses[-1] == "esriJobSucceeded"
+
+        result = requests.get(f"{gp}/jobs/{job_id}/results/OutputFile", params={"f": "json"}).json()
+        assert requests.get(result["value"]["url"]).content.startswith(b"%PDF")
+
+    print("✅ Mock ArcGIS server works")
+
+
+def test_error_injection_and_redirect():
+    """Injected errors reach UpstreamSession through UPSTREAM_REDIRECT routing"""
+
+    print("🧪 Testing error injection and upstream redirect")
+
+    with MockArcGISServer(MockConfig(error_rate=1.0, seed=2)) as mock:
+        set_upstream_redirect(mock.url)
+        try:
+            url = "https://hazards.fema.gov/arcgis/rest/services/public/NFHL/MapServer?f=json"
+            assert redirect_url(url) == f"{mock.url}/hazards.fema.gov/arcgis/rest/services/public/NFHL/MapServer?f=json"
+            assert redirect_url(redirect_url(url)) == redirect_url(url)
+            response = UpstreamSession().get(url, timeout=5)
+            assert response.status_code == 500 or "error" in response.json()
+            assert requests.get(f"{mock.url}/_mock/stats").json()["errors_injected"] == 1
+        finally:
+            set_upstream_redirect("")
+    assert redirect_url(url) == url
+
+    print("✅ Error injection and redirect work")
+
+
+def test_load_statistics():
+    """Percentiles use nearest rank and the scaling limit stops at the knee"""
+
+    print("🧪 Testing load test statistics")
+
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0 and percentile(values, 95) == 95.0 and percentile(values, 99) == 99.0
+    assert percentile([], 50) is None
+
+    levels = [
+        {"concurrency": 1, "throughput_per_minute": 10.0, "error_rate": 0.0},
+        {"concurrency": 2, "throughput_per_minute": 19.0, "error_rate": 0.0},
+        {"concurrency": 4, "throughput_per_minute": 30.0, "error_rate": 0.0},
+        {"concurrency": 8, "throughput_per_minute": 31.0, "error_rate": 0.0},
+        {"concurrency": 16, "throughput_per_minute": 40.0, "error_rate": 0.25},
+    ]
+    assert find_scaling_limit(levels) == 4
+
+    print("✅ Load test statistics work")
+
+
+if __name__ == "__main__":
+    test_mock_query_and_print_job()
+    test_error_injection_and_redirect()
+    test_load_statistics()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test the incrementally maintained output file index
+"""
+
+import time
+from pathlib import Path
+
+from output_file_index import OutputFileIndex
+
+
+def _write(path: Path, content: str = "x"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def test_index_resolution_and_incremental_reconcile(tmp_path):
+    """Files are resolved by bare name and only changed directories are listed again"""
+
+    print("🧪 Testing output file index")
+
+    output_dir = tmp_path / "output"
+    _write(output_dir / "Project_A" / "reports" / "report.pdf")
+    _write(output_dir / "Project_A" / "reports" / "pdfs" / "report.pdf")
+    _write(output_dir / "Project_A" / "maps" / "flood_map.pdf")
+    _write(output_dir / "Project_B" / "data" / "flood_analysis.json")
+
+    index = OutputFileIndex(str(output_dir), str(tmp_path / "index.db"))
+    stats = index.reconcile()
+    assert stats["files_indexed"] == 4
+
+    # reports/pdfs is preferred over reports for the same bare name
+    assert index.resolve("report.pdf") == output_dir / "Project_A" / "reports" / "pdfs" / "report.pdf"
+    assert index.resolve("flood_map.pdf", categories=("reports",)) is None
+    assert index.resolve("flood_analysis.json", project="Project_B") is not None
+
+    files, total = index.list_files(offset=1, limit=2)
+    assert total == 4 and len(files) == 2
+    projects, project_total = index.list_projects()
+    assert project_total == 2
+    assert {p["project"]: p["report_count"] for p in projects} == {"Project_A": 3, "Project_B": 1}
+
+    # Nothing changed: every directory is checked but none is listed
+    stats = index.reconcile()
+    assert stats["dirs_listed"] == 0 and stats["dirs_checked"] == 7
+
+    # A new file and a removed project are picked up by the next reconcile
+    time.sleep(0.01)
+    _write(output_dir / "Project_B" / "data" / "wetland_analysis.json")
+    for path in (output_dir / "Project_A").rglob("*"):
+        if path.is_file():
+            path.unlink()
+    for path in sorted((output_dir / "Project_A").rglob("*"), reverse=True):
+        path.rmdir()
+    (output_dir / "Project_A").rmdir()
+
+    index.reconcile()
+    assert index.resolve("report.pdf") is None
+    assert index.resolve("wetland_analysis.json") is not None
+    assert index.count_projects() == 1
+
+    # index_directory picks up a project created between reconciles
+    _write(output_dir / "Project_C" / "reports" / "summary.md")
+    index.index_directory(str(output_dir / "Project_C"))
+    assert index.resolve("summary.md") == output_dir / "Project_C" / "reports" / "summary.md"
+    assert index.count_projects() == 2
+
+    print("✅ Output file index works")
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_index_resolution_and_incremental_reconcile(Path(tmp))
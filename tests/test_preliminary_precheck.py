@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test the preliminary FIRM data availability precheck against the mock server
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("requests")
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "FloodINFO"))
+
+from mock_arcgis_server import MockArcGISServer, MockConfig
+from query_coordinates_data import preliminary_data_availability, query_coordinate_data
+from upstream_http import set_upstream_redirect
+
+
+def _availability(config):
+    with MockArcGISServer(config) as mock:
+        set_upstream_redirect(mock.url)
+        try:
+            return preliminary_data_availability(query_coordinate_data(-66.15, 18.43, "Test site"))
+        finally:
+            set_upstream_redirect(None)
+
+
+def test_preliminary_availability_from_step_one():
+    """Availability is True or False only when the availability layer answered"""
+
+    print("🧪 Testing preliminary data availability precheck")
+
+    assert _availability(MockConfig(latency=0.0, seed=1)) is True
+    assert _availability(MockConfig(latency=0.0, empty_rate=1.0, seed=1)) is False
+    # Failed queries leave the answer unknown, so the comparison job still runs
+    assert _availability(MockConfig(latency=0.0, error_rate=1.0, seed=1)) is None
+    assert preliminary_data_availability({"services": {}}) is None
+
+    print("✅ Preliminary data availability precheck works")
+
+
+if __name__ == "__main__":
+    test_preliminary_availability_from_step_one()
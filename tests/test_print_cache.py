@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test the print service output cache
+"""
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+import print_cache
+from print_cache import PrintOutputCache, print_fingerprint
+
+PRINT_URL = "https://utility.arcgisonline.com/arcgis/rest/services/Utilities/PrintingTools/GPServer/Export%20Web%20Map%20Task/execute"
+
+WEB_MAP = {
+    "mapOptions": {"extent": {"xmin": -66.1581, "ymin": 18.4268, "xmax": -66.1436, "ymax": 18.4413}},
+    "operationalLayers": [{"id": "wetlands", "opacity": 0.75, "copyrightText": "NWI | Generated 2026-10-18"}],
+    "exportOptions": {"dpi": 300, "outputSize": [1224, 792]},
+}
+
+
+def test_fingerprint_is_canonical():
+    """Key order, float jitter and generation dates do not change the key; template, format and DPI do"""
+
+    print("🧪 Testing print request fingerprints")
+
+    key = print_fingerprint(PRINT_URL, WEB_MAP, "Letter ANSI A Portrait", "PDF")
+    reordered = {
+        "exportOptions": {"outputSize": [1224, 792], "dpi": 300},
+        "operationalLayers": [{"copyrightText": "NWI | Generated 2026-10-19", "opacity": 0.75, "id": "wetlands"}],
+        "mapOptions": {"extent": {"ymax": 18.4413, "xmax": -66.1436000000001, "ymin": 18.4268, "xmin": -66.1581}},
+    }
+    assert print_fingerprint(PRINT_URL, json.dumps(reordered), "Letter ANSI A Portrait", "pdf") == key
+
+    assert print_fingerprint(PRINT_URL, WEB_MAP, "MAP_ONLY", "PDF") != key
+    assert print_fingerprint(PRINT_URL, WEB_MAP, "Letter ANSI A Portrait", "PNG32") != key
+    assert print_fingerprint(PRINT_URL, WEB_MAP, "Letter ANSI A Portrait", "PDF", 150) != key
+    moved = json.loads(json.dumps(WEB_MAP))
+    moved["mapOptions"]["extent"]["xmin"] = -66.1591
+    assert print_fingerprint(PRINT_URL, moved, "Letter ANSI A Portrait", "PDF") != key
+
+    print("✅ Print request fingerprints work")
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Artifacts beyond the size limit are evicted oldest-use first, and expired ones are re-rendered"""
+
+    print("🧪 Testing print output eviction")
+
+    cache = PrintOutputCache(cache_dir=str(tmp_path), max_bytes=2500, max_age=3600)
+    for index, key in enumerate(("a", "b", "c")):
+        cache.store(key, b"%PDF" + bytes(1000))
+        os.utime(tmp_path / f"{key}.pdf", (time.time() - 100 + index, time.time()))
+        if key == "b":
+            assert cache.lookup("a").suffix == ".pdf"   # "a" is now the most recently used
+
+    assert cache.lookup("a") is not None and cache.lookup("c") is not None
+    assert cache.lookup("b") is None
+    assert cache.size() <= 2500
+
+    expired = PrintOutputCache(cache_dir=str(tmp_path), max_bytes=2500, max_age=0)
+    assert expired.lookup("a") is None and not (tmp_path / "a.pdf").exists()
+
+    print("✅ Print output eviction works")
+
+
+class _Response:
+    def __init__(self, content: bytes, status_code: int = 200):
+        self.content = content
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class _Session:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def get(self, url, timeout=None, **kwargs):
+        return self.responses.pop(0)
+
+
+def test_only_print_artifacts_are_cached(tmp_path):
+    """Error pages and failed downloads are not cached, and a failed download forgets its URL"""
+
+    print("🧪 Testing print output validation")
+
+    cache = PrintOutputCache(cache_dir=str(tmp_path), max_bytes=10_000)
+    cache.remember("error", "https://print/error")
+    assert cache.read(_Session(_Response(b"<html>Error</html>")), "https://print/error").startswith(b"<html>")
+    assert cache.lookup("error") is None
+
+    cache.remember("failed", "https://print/failed")
+    with pytest.raises(RuntimeError):
+        cache.read(_Session(_Response(b"", 500)), "https://print/failed")
+    cache.read(_Session(_Response(b"%PDF-1.4")), "https://print/failed")
+    assert cache.lookup("failed") is None
+
+    cache.remember("map", "https://print/map")
+    cache.read(_Session(_Response(b"%PDF-1.4")), "https://print/map")
+    assert cache.lookup("map").suffix == ".pdf"
+
+    print("✅ Print output validation works")
+
+
+def test_rerendered_maps_come_from_the_cache(tmp_path):
+    """A repeated ABFE map request is answered without contacting the print service"""
+
+    print("🧪 Testing cached print outputs")
+
+    pytest.importorskip("requests")
+    sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "FloodINFO"))
+    from abfe_client import FEMAABFEClient
+    from mock_arcgis_server import MockArcGISServer, MockConfig
+    from upstream_http import set_upstream_redirect
+
+    original = print_cache._cache
+    print_cache._cache = PrintOutputCache(cache_dir=str(tmp_path / "cache"))
+    try:
+        with MockArcGISServer(MockConfig(latency=0.0, seed=1)) as mock:
+            set_upstream_redirect(mock.url)
+            client = FEMAABFEClient()
+            outputs = []
+            for attempt in range(2):
+                success, url, _ = client.generate_abfe_map(-66.15, 18.43, "Test site", include_legend=False)
+                assert success
+                filename = str(tmp_path / f"abfe_{attempt}.pdf")
+                assert client.download_abfe_map(url, filename)
+                outputs.append((url, mock.stats["requests"], open(filename, "rb").read()))
+    finally:
+        set_upstream_redirect(None)
+        print_cache._cache = original
+
+    (first_url, first_requests, first_pdf), (second_url, second_requests, second_pdf) = outputs
+    assert first_url.startswith("http") and second_url.startswith("file://")
+    assert second_requests == first_requests
+    assert second_pdf == first_pdf and first_pdf.startswith(b"%PDF")
+
+    print("✅ Cached print outputs work")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_fingerprint_is_canonical()
+    for test in (test_cache_evicts_least_recently_used, test_only_print_artifacts_are_cached,
+                 test_rerendered_maps_come_from_the_cache):
+        with tempfile.TemporaryDirectory() as directory:
+            test(Path(directory))
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Test progressive map delivery: previews first, print-quality maps swapped in from the background
+"""
+
+import os
+import threading
+
+import pytest
+
+import progressive_maps
+
+pytest.importorskip("PIL")
+pytest.importorskip("pyproj")
+pytest.importorskip("matplotlib")
+
+from PIL import Image
+
+from progressive_maps import (MapManifest, ProgressiveMapPipeline, PREVIEW_HEIGHT_PX, PREVIEW_WIDTH_PX,
+                              deliver_map, web_map_preview)
+from mock_arcgis_server import MockArcGISServer, MockConfig
+from upstream_http import set_upstream_redirect
+
+LONGITUDE, LATITUDE = -66.1505, 18.4340
+
+WEB_MAP = {
+    "mapOptions": {"extent": {"xmin": LONGITUDE - 0.02, "ymin": LATITUDE - 0.02,
+                              "xmax": LONGITUDE + 0.02, "ymax": LATITUDE + 0.02,
+                              "spatialReference": {"wkid": 4326}}},
+    "operationalLayers": [
+        {"id": "wetlands_layer", "title": "National Wetlands Inventory", "opacity": 0.8, "visibility": True,
+         "url": "https://fwsprimary.wim.usgs.gov/server/rest/services/Wetlands/MapServer", "visibleLayers": [5]},
+        {"id": "location_marker", "title": "Query Location", "featureCollection": {"layers": []}},
+    ],
+    "baseMap": {"baseMapLayers": [
+        {"url": "https://services.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer"}]},
+    "layoutOptions": {"titleText": "Test site - Adaptive Analysis Map"},
+}
+
+
+def _write_pdf(path):
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n% print-quality map\n%%EOF\n")
+    return str(path)
+
+
+def test_preview_is_served_until_final_is_swapped_in(tmp_path):
+    """The preview is written and tracked before the final render finishes, then replaced by it"""
+
+    print("🧪 Testing preview then final delivery")
+
+    project_dir = tmp_path / "project"
+    release = threading.Event()
+    updates = []
+
+    def render_final():
+        assert release.wait(10)
+        return _write_pdf(project_dir / "maps" / "wetland_map.pdf")
+
+    pipeline = ProgressiveMapPipeline(max_workers=2)
+    pipeline.add_listener(lambda directory, entry: updates.append(entry["status"]))
+    manifest = MapManifest(str(project_dir))
+    with MockArcGISServer(MockConfig(latency=0.0, seed=1)) as mock:
+        set_upstream_redirect(mock.url)
+        try:
+            future = pipeline.submit(str(project_dir), "wetlands", render_final,
+                                     lambda path: web_map_preview(WEB_MAP, path, site=[(LONGITUDE, LATITUDE)],
+                                                                  buffer_circle_miles=0.5))
+        finally:
+            set_upstream_redirect(None)
+
+    entry = manifest.get("wetlands")
+    assert not future.done() and pipeline.pending(str(project_dir)) == 1
+    assert entry["status"] == "rendering" and entry["preview"] == "maps/previews/wetlands.png"
+    preview = manifest.artifact("wetlands")
+    assert preview.suffix == ".png"
+    assert Image.open(preview).size == (PREVIEW_WIDTH_PX, PREVIEW_HEIGHT_PX)
+    assert manifest.artifact("wetlands", "final") is None
+
+    release.set()
+    assert pipeline.wait(str(project_dir), timeout=10)
+    assert future.result() == str(project_dir / "maps" / "wetland_map.pdf")
+    entry = manifest.get("wetlands")
+    assert entry["status"] == "final" and entry["final"] == "maps/wetland_map.pdf"
+    assert manifest.artifact("wetlands").name == "wetland_map.pdf"
+    assert manifest.artifact("wetlands", "preview") == preview
+    assert updates == ["rendering", "final"] and pipeline.pending() == 0
+
+    urls = manifest.with_urls("/api/projects/p1/maps")["maps"]["wetlands"]
+    assert urls["preview_url"] == "/api/projects/p1/maps/wetlands?variant=preview"
+    assert urls["final_url"] == "/api/projects/p1/maps/wetlands?variant=final"
+    pipeline.shutdown()
+
+    print("✅ Preview then final delivery works")
+
+
+def test_failed_and_inline_finals(tmp_path):
+    """A failed final keeps the preview available; with progressive maps off finals render inline"""
+
+    print("🧪 Testing failed and inline finals")
+
+    pipeline = ProgressiveMapPipeline(max_workers=1)
+    manifest = MapManifest(str(tmp_path))
+
+    def fail():
+        raise RuntimeError("print service unavailable")
+
+    def preview(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Image.new("RGB", (8, 8)).save(path)
+
+    assert pipeline.submit(str(tmp_path), "habitat", fail, preview).result(timeout=10) is None
+    entry = manifest.get("habitat")
+    assert entry["status"] == "failed" and "print service unavailable" in entry["error"]
+    assert manifest.artifact("habitat").name == "habitat.png"
+
+    previous = os.environ.get("PROGRESSIVE_MAPS")
+    os.environ["PROGRESSIVE_MAPS"] = "0"
+    try:
+        future = pipeline.submit(str(tmp_path), "karst", lambda: _write_pdf(tmp_path / "karst.pdf"), preview)
+    finally:
+        if previous is None:
+            os.environ.pop("PROGRESSIVE_MAPS")
+        else:
+            os.environ["PROGRESSIVE_MAPS"] = previous
+    assert future.done() and manifest.get("karst")["status"] == "final"
+    assert manifest.get("karst")["preview"] is None and manifest.artifact("karst").name == "karst.pdf"
+    assert set(manifest.entries()) == {"habitat", "karst"}
+    pipeline.shutdown()
+
+    print("✅ Failed and inline finals work")
+
+
+def test_deliver_map_returns_existing_files(tmp_path):
+    """Tools get the preview while the final renders, the final once done, and nothing for a failed map"""
+
+    print("🧪 Testing deliver_map paths")
+
+    release = threading.Event()
+
+    def render_final():
+        assert release.wait(10)
+        return _write_pdf(tmp_path / "karst.pdf")
+
+    def preview(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Image.new("RGB", (8, 8)).save(path)
+
+    def fail():
+        raise RuntimeError("print service unavailable")
+
+    previous = progressive_maps._pipeline
+    progressive_maps._pipeline = ProgressiveMapPipeline(max_workers=2)
+    try:
+        delivery = deliver_map(str(tmp_path), "karst", render_final, preview)
+        assert delivery["status"] == "rendering" and delivery["path"].endswith("karst.png")
+        assert os.path.exists(delivery["path"])
+
+        release.set()
+        assert progressive_maps.wait_for_maps(str(tmp_path), timeout=10)
+        delivery = deliver_map(str(tmp_path), "karst", lambda: _write_pdf(tmp_path / "karst.pdf"))
+        assert delivery["status"] == "final" and delivery["path"] == str(tmp_path / "karst.pdf")
+
+        delivery = deliver_map(str(tmp_path), "habitat", fail)
+        assert delivery["status"] == "failed" and delivery["path"] is None
+    finally:
+        progressive_maps._pipeline.shutdown()
+        progressive_maps._pipeline = previous
+
+    print("✅ deliver_map paths work")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as directory:
+        test_preview_is_served_until_final_is_swapped_in(Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_failed_and_inline_finals(Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_deliver_map_returns_existing_files(Path(directory))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test the lazily hydrated project catalogue
+"""
+
+import os
+import time
+from pathlib import Path
+
+from output_file_index import OutputFileIndex
+from project_catalogue import ProjectCatalogue, project_id_for
+
+
+def _write(path: Path, mtime: float):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("x")
+    os.utime(path, (mtime, mtime))
+
+
+def test_stable_ids_pagination_and_screening_records(tmp_path):
+    """Project IDs survive restarts, pages are newest first and screening results are kept"""
+
+    print("🧪 Testing project catalogue")
+
+    output_dir = tmp_path / "output"
+    now = time.time()
+    for i in range(5):
+        project = output_dir / f"Project_{i}_Environmental_Screening"
+        _write(project / "reports" / f"report_{i}.pdf", now - 100 + i)
+        _write(project / "reports" / "pdfs" / f"comprehensive_{i}.pdf", now - 100 + i)
+        _write(project / "data" / "flood.json", now - 100 + i)
+
+    db_path = str(tmp_path / "index.db")
+    index = OutputFileIndex(str(output_dir), db_path)
+    index.reconcile()
+    catalogue = ProjectCatalogue(index)
+
+    page, total = catalogue.list_projects(offset=1, limit=2)
+    assert total == 5
+    assert [p["name"] for p in page] == ["Project 3", "Project 2"]
+    assert page[0]["id"] == project_id_for("Project_3_Environmental_Screening")
+    assert page[0]["reports_count"] == 2 and page[0]["risk_level"] == "Low"
+
+    # A new catalogue (server restart) hands out the same IDs
+    restarted = ProjectCatalogue(OutputFileIndex(str(output_dir), db_path))
+    assert [p["id"] for p in restarted.list_projects(offset=1, limit=2)[0]] == [p["id"] for p in page]
+
+    # Screening results are recorded per project and resolvable by screening id
+    restarted.record_screening("screening_1", str(output_dir / "Project_3_Environmental_Screening"),
+                               risk_level="High")
+    restarted.update_status("screening_1", "completed")
+    assert restarted.get_project("screening_1")["risk_level"] == "High"
+    assert restarted.get_project_directory(page[0]["id"]).name == "Project_3_Environmental_Screening"
+    assert restarted.count_by_risk_level("High") == 1
+    assert restarted.count_by_status("completed") == 5
+
+    reports, report_total = restarted.list_reports(page[0]["id"])
+    assert report_total == 2
+    assert {r["category"] for r in reports} == {"pdf", "comprehensive_pdf"}
+    assert restarted.count_reports() == 10
+
+    print("✅ Project catalogue works")
+
+
+def test_unlisted_projects_resolve_by_id(tmp_path):
+    """Project IDs resolve in a fresh process before any page of projects has been listed"""
+
+    print("🧪 Testing project lookup without a listing")
+
+    output_dir = tmp_path / "output"
+    _write(output_dir / "Fresh_Environmental_Screening" / "reports" / "report.pdf", time.time())
+    index = OutputFileIndex(str(output_dir), str(tmp_path / "index.db"))
+    index.reconcile()
+    catalogue = ProjectCatalogue(index)
+
+    project_id = project_id_for("Fresh_Environmental_Screening")
+    assert catalogue.get_project_directory(project_id).name == "Fresh_Environmental_Screening"
+    assert catalogue.get_project(project_id)["id"] == project_id
+    assert catalogue.list_reports(project_id)[1] == 1
+    assert catalogue.get_project_directory(project_id_for("Missing")) is None
+
+    print("✅ Project lookup without a listing works")
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_stable_ids_pagination_and_screening_records(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_unlisted_projects_resolve_by_id(Path(tmp))
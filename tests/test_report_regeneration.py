@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test up-to-date detection used by the parallel report regeneration runner
+"""
+
+import os
+import time
+from pathlib import Path
+
+from report_regeneration_runner import (is_screening_report_up_to_date, get_latest_report_outputs,
+                                        _regeneration_result)
+
+
+def _touch(path: Path, mtime: float):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("x")
+    os.utime(path, (mtime, mtime))
+
+
+def test_up_to_date_detection(tmp_path):
+    """Reports newer than all data inputs are up to date; a newer input makes them stale"""
+
+    print("🧪 Testing report up-to-date detection")
+
+    screening_dir = tmp_path / "Project_2025-01-01_at_00.00.00"
+    now = time.time()
+
+    _touch(screening_dir / "data" / "flood_analysis.json", now - 100)
+    assert not is_screening_report_up_to_date(screening_dir), "no reports yet -> stale"
+
+    for ext in (".json", ".md", ".pdf"):
+        _touch(screening_dir / "reports" / f"comprehensive_screening_report_p_1{ext}", now - 50)
+    assert len(get_latest_report_outputs(screening_dir)) == 3
+    assert is_screening_report_up_to_date(screening_dir)
+
+    # A newly generated map invalidates the PDF report
+    _touch(screening_dir / "maps" / "wetland_map.pdf", now - 10)
+    assert not is_screening_report_up_to_date(screening_dir)
+
+    # Missing markdown output is stale for 'both' but fine for 'json'
+    (screening_dir / "reports" / "comprehensive_screening_report_p_1.md").unlink()
+    for ext in (".json", ".pdf"):
+        _touch(screening_dir / "reports" / f"comprehensive_screening_report_p_2{ext}", now)
+    assert not is_screening_report_up_to_date(screening_dir, "both")
+    assert is_screening_report_up_to_date(screening_dir, "json")
+
+    print("✅ Up-to-date detection works")
+
+
+def test_pdf_failure_is_reported_separately():
+    """A PDF failure message is not listed as an output file and marks the PDF as missing"""
+
+    print("🧪 Testing regeneration results")
+
+    result = _regeneration_result("p", {"json": "reports/r.json", "markdown": "reports/r.md",
+                                        "pdf_error": "PDF generation failed: boom"}, time.time())
+    assert result["output_files"] == ["reports/r.json", "reports/r.md"]
+    assert not result["pdf_generated"] and result["pdf_error"] == "PDF generation failed: boom"
+
+    result = _regeneration_result("p", {"json": "reports/r.json", "pdf": "reports/r.pdf"}, time.time())
+    assert result["pdf_generated"] and result["pdf_error"] is None and len(result["output_files"]) == 2
+
+    print("✅ Regeneration results work")
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_up_to_date_detection(Path(tmp))
+    test_pdf_failure_is_reported_separately()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test benchmark timing statistics and baseline comparison
+"""
+
+from screening_benchmark import summarize_timings, compare_results, format_comparison
+
+
+def _run(**medians):
+    return {"results": [
+        {"name": name, "status": "ok", "timings": {"median": median}} if median is not None
+        else {"name": name, "status": "error", "error": "boom"}
+        for name, median in medians.items()
+    ]}
+
+
+def test_summarize_timings():
+    """Iteration timings are summarized with median and p95"""
+
+    print("🧪 Testing timing summary")
+
+    timings = summarize_timings([1.0, 3.0, 2.0])
+    assert timings["median"] == 2.0 and timings["min"] == 1.0 and timings["max"] == 3.0
+    assert timings["p95"] == 3.0 and timings["iterations"] == 3
+
+    print("✅ Timing summary works")
+
+
+def test_baseline_comparison_verdicts():
+    """Median changes beyond the threshold are regressions or improvements"""
+
+    print("🧪 Testing baseline comparison")
+
+    baseline = _run(**{"client.flood_query": 1.0, "pipeline.full": 10.0, "client.karst_check": 0.5,
+                       "report.generate": 2.0})
+    current = _run(**{"client.flood_query": 1.2, "pipeline.full": 7.0, "client.karst_check": 0.52,
+                      "tool.comprehensive_flood_analysis": 4.0, "report.generate": None})
+
+    verdicts = {row["name"]: row["verdict"] for row in compare_results(current, baseline, threshold=0.1)}
+    assert verdicts == {
+        "client.flood_query": "regression",
+        "pipeline.full": "improvement",
+        "client.karst_check": "unchanged",
+        "tool.comprehensive_flood_analysis": "new",
+        "report.generate": "failed",
+    }
+
+    baseline["results"].append({"name": "client.habitat_query", "status": "ok", "timings": {"median": 1.0}})
+    rows = compare_results(current, baseline)
+    assert rows[-1]["name"] == "client.habitat_query" and rows[-1]["verdict"] == "missing"
+    assert "+20.0%" in format_comparison(rows)
+
+    print("✅ Baseline comparison works")
+
+
+if __name__ == "__main__":
+    test_summarize_timings()
+    test_baseline_comparison_verdicts()
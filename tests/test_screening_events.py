@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test tool-driven progress tracking and the Server-Sent Events stream
+"""
+
+import os
+import json
+import asyncio
+import tempfile
+
+from screening_job_store import ScreeningJobStore
+from screening_events import ScreeningProgressTracker, job_event_stream, tool_step
+
+
+def _parse_events(chunks):
+    events = []
+    for chunk in chunks:
+        if chunk.startswith(":"):
+            continue
+        fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_tool_progress_and_event_stream():
+    """Tool callbacks drive step/progress, and the stream replays them and ends with the job"""
+
+    print("🧪 Testing tool progress events")
+
+    assert tool_step("get_cadastral_data_from_number") == "property"
+    assert tool_step("check_cadastral_karst") == "environmental"
+    assert tool_step("comprehensive_flood_analysis") == "environmental"
+    assert tool_step("generate_comprehensive_screening_report") == "reports"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScreeningJobStore(os.path.join(tmp, "jobs.db"))
+        store.create_job("job-1", {})
+
+        tracker = ScreeningProgressTracker(store, "job-1")
+        tracker.tool_started("get_cadastral_data_from_number", run_id=1)
+        tracker.tool_finished(run_id=1)
+        property_progress = store.get_job("job-1")["progress"]
+        assert 15 < property_progress < 35
+
+        tracker.tool_started("comprehensive_flood_analysis", run_id=2)
+        tracker.tool_finished(run_id=2, error="FEMA timeout")
+        job = store.get_job("job-1")
+        assert job["current_step"] == "environmental" and job["progress"] > property_progress
+        assert "FEMA timeout" in job["message"]
+
+        # A late property tool does not move the step backwards
+        tracker.tool_started("calculate_cadastral_center_point", run_id=3)
+        assert store.get_job("job-1")["current_step"] == "environmental"
+
+        store.update_job("job-1", status="completed", progress=100)
+
+        async def collect():
+            return [chunk async for chunk in job_event_stream(store, "job-1", poll_interval=0.01)]
+
+        events = _parse_events(asyncio.run(collect()))
+        logs = [data["message"] for event, data in events if event == "log"]
+        assert len(logs) == 5 and logs[0] == "▶ Running get_cadastral_data_from_number"
+        assert events[-1][0] == "end" and events[-1][1]["status"] == "completed"
+
+        # Reconnecting after the second log entry only replays the rest
+        async def resume():
+            return [chunk async for chunk in job_event_stream(store, "job-1", last_log_id=2)]
+
+        resumed = [data for event, data in _parse_events(asyncio.run(resume())) if event == "log"]
+        assert len(resumed) == 3
+
+    print("✅ Progress events work")
+
+
+if __name__ == "__main__":
+    test_tool_progress_and_event_stream()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test the durable screening job store: claiming, leases, resume and atomic transitions
+"""
+
+import os
+import time
+import tempfile
+import threading
+
+from screening_job_store import ScreeningJobStore, ScreeningWorkerPool
+
+
+def test_claim_lease_and_resume():
+    """Jobs are claimed once, and an expired lease lets another worker resume the job"""
+
+    print("🧪 Testing job claiming and lease expiry")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScreeningJobStore(os.path.join(tmp, "jobs.db"), max_attempts=2)
+        store.create_job("job-1", {"projectName": "Test"})
+
+        job = store.claim_next("worker-a", lease_seconds=0.05)
+        assert job["id"] == "job-1" and job["status"] == "processing"
+        assert store.claim_next("worker-b", lease_seconds=0.05) is None
+
+        # worker-a dies; after the lease expires worker-b resumes the job
+        time.sleep(0.1)
+        resumed = store.claim_next("worker-b", lease_seconds=60)
+        assert resumed["id"] == "job-1" and resumed["attempts"] == 2
+
+        # worker-a can no longer finish the job it lost
+        assert not store.complete("job-1", "worker-a")
+        assert store.complete("job-1", "worker-b")
+        assert store.get_job("job-1")["status"] == "completed"
+
+        # A job whose handler already reached a terminal state is not overwritten
+        store.create_job("job-2", {})
+        store.claim_next("worker-a", lease_seconds=60)
+        store.update_job("job-2", status="failed", error="boom")
+        assert not store.complete("job-2", "worker-a")
+        assert store.get_job("job-2")["status"] == "failed"
+
+    print("✅ Claiming and leases work")
+
+
+def test_worker_pool_processes_jobs_once():
+    """Two pools sharing one database process every job exactly once"""
+
+    print("🧪 Testing worker pools sharing one store")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "jobs.db")
+        seen = []
+        lock = threading.Lock()
+
+        def handler(job):
+            with lock:
+                seen.append(job["id"])
+            if job["request_data"].get("fail"):
+                raise ValueError("upstream error")
+
+        store = ScreeningJobStore(db_path)
+        for i in range(10):
+            store.create_job(f"job-{i}", {"fail": i == 3}, batch_id="batch", batch_index=i)
+
+        pools = [ScreeningWorkerPool(ScreeningJobStore(db_path), handler, num_workers=2, poll_interval=0.02)
+                 for _ in range(2)]
+        for pool in pools:
+            pool.start()
+
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            counts = store.count_by_status("batch")
+            if counts.get("completed", 0) + counts.get("failed", 0) == 10:
+                break
+            time.sleep(0.05)
+
+        for pool in pools:
+            pool.stop()
+
+        assert sorted(seen) == sorted(f"job-{i}" for i in range(10))
+        assert store.count_by_status("batch") == {"completed": 9, "failed": 1}
+        assert store.get_job("job-3")["error"] == "upstream error"
+
+    print("✅ Worker pools process every job exactly once")
+
+
+def test_batch_concurrency_limit():
+    """A batch never has more leased jobs than its concurrency limit, and runs in queue order"""
+
+    print("🧪 Testing batch concurrency limit")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScreeningJobStore(os.path.join(tmp, "jobs.db"))
+        job_ids = store.create_batch("batch", [{}] * 4, queue_order=[3, 2, 1, 0], concurrency_limit=2)
+        assert job_ids == [f"batch_item_{i}" for i in range(4)]
+
+        first = store.claim_next("worker-a", lease_seconds=60)
+        second = store.claim_next("worker-b", lease_seconds=60)
+        assert [first["id"], second["id"]] == ["batch_item_3", "batch_item_2"]
+        assert first["batch_index"] == 3
+        assert store.claim_next("worker-c", lease_seconds=60) is None
+
+        # Jobs outside the batch are not held back by it
+        store.create_job("single", {})
+        assert store.claim_next("worker-c", lease_seconds=60)["id"] == "single"
+
+        assert store.complete("batch_item_3", "worker-a")
+        assert store.claim_next("worker-a", lease_seconds=60)["id"] == "batch_item_1"
+
+    print("✅ Batch concurrency limit works")
+
+
+def test_workers_only_claim_their_kind():
+    """Servers sharing the job database each claim only the jobs of their own kind"""
+
+    print("🧪 Testing job kinds")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScreeningJobStore(os.path.join(tmp, "jobs.db"))
+        store.create_job("app_job", {"query": "flood"}, kind="screening")
+        store.create_batch("batch", [{"project_name": "a"}], kind="project_screening")
+
+        assert store.claim_next("advanced", lease_seconds=60, kinds=["project_screening"])["id"] == "batch_item_0"
+        assert store.claim_next("advanced", lease_seconds=60, kinds=["project_screening"]) is None
+        assert store.claim_next("app", lease_seconds=60, kinds=["screening"])["id"] == "app_job"
+
+    print("✅ Job kinds work")
+
+
+def test_listing_and_counts_filter_by_kind():
+    """Each server lists and counts only its own jobs in the shared database"""
+
+    print("🧪 Testing job listing by kind")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScreeningJobStore(os.path.join(tmp, "jobs.db"))
+        store.create_job("app_job", {"projectName": "App"}, kind="screening")
+        store.create_job("advanced_job", {"project_name": "Advanced"}, kind="project_screening")
+        store.update_job("advanced_job", status="completed")
+
+        assert [job["id"] for job in store.list_jobs(kind="screening")] == ["app_job"]
+        assert store.list_jobs(status="completed", kind="screening") == []
+        assert [job["id"] for job in store.list_jobs(status="completed", kind="project_screening")] == ["advanced_job"]
+        assert len(store.list_jobs()) == 2
+
+        assert store.count_by_status(kind="project_screening") == {"completed": 1}
+        assert sum(store.count_by_status(kind="screening").values()) == 1
+        assert sum(store.count_by_status().values()) == 2
+
+    print("✅ Job listing by kind works")
+
+
+def test_list_jobs_pages():
+    """Offset and limit page through jobs in the database query"""
+
+    print("🧪 Testing job list paging")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScreeningJobStore(os.path.join(tmp, "jobs.db"))
+        store.create_batch("batch", [{"project_name": str(i)} for i in range(5)])
+
+        assert [job["id"] for job in store.list_jobs(batch_id="batch", offset=1, limit=2)] == ["batch_item_1", "batch_item_2"]
+        assert [job["id"] for job in store.list_jobs(batch_id="batch", offset=3)] == ["batch_item_3", "batch_item_4"]
+        assert store.list_jobs(batch_id="batch", offset=5, limit=2) == []
+
+    print("✅ Job list paging works")
+
+
+if __name__ == "__main__":
+    test_claim_lease_and_resume()
+    test_worker_pool_processes_jobs_once()
+    test_batch_concurrency_limit()
+    test_workers_only_claim_their_kind()
+    test_listing_and_counts_filter_by_kind()
+    test_list_jobs_pages()
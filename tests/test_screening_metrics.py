@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test upstream metrics, Prometheus exposition and per-screening summaries
+"""
+
+import json
+import threading
+from pathlib import Path
+
+from screening_metrics import (
+    REGISTRY, describe_url, record_http, record_tool, record_cache,
+    render_prometheus, screening_metrics
+)
+
+
+def test_describe_url_splits_arcgis_services():
+    """ArcGIS REST URLs are labelled by host, service path and layer"""
+
+    print("🧪 Testing upstream URL labels")
+
+    assert describe_url("https://hazards.fema.gov/arcgis/rest/services/public/NFHL/MapServer/28/query") == (
+        "hazards.fema.gov", "public/NFHL/MapServer", "28")
+    assert describe_url(
+        "https://msc.fema.gov/arcgis/rest/services/NFHL_Print/AGOLPrintB/GPServer/Print%20FIRM%20or%20FIRMette/jobs"
+    ) == ("msc.fema.gov", "NFHL_Print/AGOLPrintB/GPServer", "Print%20FIRM%20or%20FIRMette")
+    assert describe_url("https://example.com/api/v1/items?x=1") == ("example.com", "api/v1", "")
+
+    print("✅ Upstream URL labels work")
+
+
+def test_metrics_exposition_and_screening_summary(tmp_path):
+    """Requests land in the process registry and only in their own screening's summary"""
+
+    print("🧪 Testing metrics exposition and screening summary")
+
+    REGISTRY.reset()
+    url = "https://sige.pr.gov/server/rest/services/MIPR/Catastro/MapServer/0/query"
+
+    with screening_metrics("screening_a") as metrics_a:
+        record_http("get", url, 200, 0.3, size=2048)
+        record_http("get", url, None, 30.0, error_kind="timeout")
+        record_tool("get_cadastral_data_from_number", 1.5)
+        record_cache("pjson", hit=True)
+        record_cache("pjson", hit=False)
+
+        # Threads started from a copied context attribute to the same screening
+        import contextvars
+        context = contextvars.copy_context()
+        worker = threading.Thread(target=context.run, args=(record_http, "get", url, 500, 0.1))
+        worker.start()
+        worker.join()
+
+    with screening_metrics("screening_b") as metrics_b:
+        record_http("post", url, 200, 0.2)
+
+    record_http("get", url, 200, 0.1)  # outside any screening
+
+    labels = dict(host="sige.pr.gov", service="MIPR/Catastro/MapServer", layer="0", method="GET")
+    assert REGISTRY.get("upstream_requests_total", status="200", **labels) == 2
+    assert REGISTRY.get("upstream_errors_total", host="sige.pr.gov", service="MIPR/Catastro/MapServer",
+                        kind="timeout") == 1
+
+    text = render_prometheus()
+    assert "# TYPE upstream_request_duration_seconds histogram" in text
+    assert 'upstream_request_duration_seconds_bucket{host="sige.pr.gov",service="MIPR/Catastro/MapServer",le="+Inf"} 5' in text
+    assert 'cache_requests_total{cache="pjson",result="hit"} 1' in text
+
+    summary = metrics_a.summary()
+    upstream = summary["upstreams"][0]
+    assert upstream["name"] == "sige.pr.gov/MIPR/Catastro/MapServer"
+    assert upstream["calls"] == 3 and upstream["errors"] == 2
+    assert upstream["bytes"] == 2048
+    assert summary["tools"][0]["name"] == "get_cadastral_data_from_number"
+    assert summary["caches"]["pjson"]["hit_rate"] == 0.5
+    assert metrics_b.summary()["upstreams"][0]["calls"] == 1
+
+    project_dir = tmp_path / "Project_A"
+    project_dir.mkdir()
+    path = metrics_a.write_summary(str(project_dir))
+    assert path == str(project_dir / "logs" / "metrics_summary.json")
+    assert json.loads(Path(path).read_text())["screening_id"] == "screening_a"
+    assert metrics_a.write_summary(None) is None
+
+    REGISTRY.reset()
+    print("✅ Metrics exposition and screening summary work")
+
+
+if __name__ == "__main__":
+    import tempfile
+    test_describe_url_splits_arcgis_services()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_metrics_exposition_and_screening_summary(Path(tmp))
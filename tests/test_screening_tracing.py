@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test hierarchical screening traces, the JSONL exporter and critical path analysis
+"""
+
+import time
+import threading
+import contextvars
+from pathlib import Path
+
+from screening_tracing import (
+    screening_trace, span, traced, TracingCallbackHandler,
+    load_trace, critical_path, to_chrome_trace, format_waterfall
+)
+
+
+@traced("report job")
+def _report_job():
+    with span("HTTP GET", kind="http", host="msc.fema.gov"):
+        time.sleep(0.02)
+
+
+def test_spans_nest_across_turns_tools_and_threads(tmp_path):
+    """LLM turns, tools, sub-steps in worker threads and HTTP calls form one tree"""
+
+    print("🧪 Testing screening trace hierarchy")
+
+    with span("outside", kind="step") as outside:
+        assert outside is None  # no-op outside a traced screening
+
+    with screening_trace("screening_1") as trace:
+        handler = TracingCallbackHandler(trace)
+
+        handler.on_chat_model_start({"name": "ChatModel"}, [], run_id="llm-1")
+        handler.on_llm_end(None, run_id="llm-1")
+        handler.on_tool_start({"name": "comprehensive_flood_analysis"}, "{}", run_id="tool-1")
+
+        # Tool body: sub-steps run in worker threads that copy the context
+        workers = [threading.Thread(target=contextvars.copy_context().run, args=(_report_job,))
+                   for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        handler.on_tool_end("done", run_id="tool-1")
+        with span("after tool", kind="step"):
+            pass  # the tool's span is no longer current
+
+        handler.on_chat_model_start({"name": "ChatModel"}, [], run_id="llm-2")
+        handler.on_llm_end(None, run_id="llm-2")
+
+    path = trace.write(str(tmp_path))
+    spans = load_trace(path)
+    by_id = {s["span_id"]: s for s in spans}
+    by_name = {}
+    for recorded in spans:
+        by_name.setdefault(recorded["name"], []).append(recorded)
+
+    root = by_name["screening"][0]
+    assert root["parent_id"] is None
+    assert [by_id[t["parent_id"]]["name"] for t in by_name["turn 1"]] == ["screening"]
+    assert len(by_name["turn 2"]) == 1
+
+    tool = by_name["tool comprehensive_flood_analysis"][0]
+    assert by_id[tool["parent_id"]]["name"] == "turn 1"
+    assert all(job["parent_id"] == tool["span_id"] for job in by_name["report job"])
+    assert {by_id[h["parent_id"]]["name"] for h in by_name["HTTP GET"]} == {"report job"}
+    assert by_id[by_name["after tool"][0]["parent_id"]]["name"] == "screening"
+    assert all(s["end"] >= s["start"] for s in spans)
+
+    # The last turn ends the trace; within turn 1 the slow report job is critical
+    assert [s["name"] for s in critical_path(spans)] == ["screening", "turn 2", "llm"]
+    turn_2 = by_name["turn 2"][0]["span_id"]
+    without_turn_2 = [s for s in spans if turn_2 not in (s["span_id"], s["parent_id"])]
+    assert [s["name"] for s in critical_path(without_turn_2)] == [
+        "screening", "turn 1", "tool comprehensive_flood_analysis", "report job", "HTTP GET"]
+
+    chrome = to_chrome_trace(spans)
+    assert len([e for e in chrome["traceEvents"] if e["ph"] == "X"]) == len(spans)
+    assert "tool comprehensive_flood_analysis" in format_waterfall(spans)
+
+    print("✅ Screening trace hierarchy works")
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_spans_nest_across_turns_tools_and_threads(Path(tmp))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test the shared service metadata registry
+"""
+
+import threading
+import time
+
+import pytest
+
+from service_metadata import ServiceMetadataError, ServiceMetadataRegistry
+
+URL = "https://example.test/arcgis/rest/services/Topo/MapServer"
+
+
+class _Fetcher:
+    """Counts fetches and returns a fresh document each time"""
+
+    def __init__(self, fail=False, delay=0.0, error_body=False):
+        self.calls = 0
+        self.fail = fail
+        self.delay = delay
+        self.error_body = error_body
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("service down")
+        if self.error_body:
+            return {"error": {"code": 500, "message": "Unable to complete operation.", "details": []}}
+        return {"layers": [{"id": 0}], "tileInfo": {"lods": [{"level": 0}]}, "version": self.calls}
+
+
+def test_metadata_is_fetched_once_and_persisted(tmp_path):
+    """Repeated and concurrent lookups share one fetch, and a new registry reads it from disk"""
+
+    print("🧪 Testing metadata caching and persistence")
+
+    registry = ServiceMetadataRegistry(cache_dir=str(tmp_path), ttl=3600)
+    fetch = _Fetcher(delay=0.05)
+    threads = [threading.Thread(target=registry.get, args=(URL, fetch)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.get(URL + "/", fetch)["version"] == 1
+    assert fetch.calls == 1
+
+    restarted = ServiceMetadataRegistry(cache_dir=str(tmp_path), ttl=3600)
+    refetch = _Fetcher()
+    assert restarted.get(URL, refetch)["layers"] == [{"id": 0}]
+    assert refetch.calls == 0
+
+    restarted.invalidate(URL)
+    assert restarted.get(URL, refetch)["version"] == 1
+    assert refetch.calls == 1
+
+    print("✅ Metadata caching works")
+
+
+def test_redirected_metadata_is_cached_separately(tmp_path):
+    """Metadata served by a redirect target (mock server) never replaces the real service's"""
+
+    print("🧪 Testing metadata under upstream redirection")
+
+    upstream_http = pytest.importorskip("upstream_http")
+    registry = ServiceMetadataRegistry(cache_dir=str(tmp_path), ttl=3600)
+    registry.get(URL, _Fetcher())
+
+    upstream_http.set_upstream_redirect("http://127.0.0.1:8900")
+    try:
+        mock = _Fetcher()
+        assert registry.get(URL, mock)["version"] == 1
+        assert mock.calls == 1
+    finally:
+        upstream_http.set_upstream_redirect(None)
+
+    print("✅ Redirected metadata is cached separately")
+
+
+def test_expired_metadata_refreshes_in_background(tmp_path):
+    """Expired entries are served immediately, refreshed behind the caller, and kept if the refresh fails"""
+
+    print("🧪 Testing stale metadata refresh")
+
+    registry = ServiceMetadataRegistry(cache_dir=str(tmp_path), ttl=0.05)
+    registry.get(URL, _Fetcher())
+    time.sleep(0.1)
+
+    failing = _Fetcher(fail=True)
+    assert registry.get(URL, failing)["version"] == 1
+    deadline = time.time() + 2
+    while failing.calls == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert failing.calls == 1
+
+    refresh = _Fetcher()
+    refresh.calls = 1
+    assert registry.get(URL, refresh)["version"] == 1
+    deadline = time.time() + 2
+    while registry.get(URL, refresh)["version"] != 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert registry.get(URL, refresh)["version"] == 2
+
+    print("✅ Stale metadata refresh works")
+
+
+def test_error_documents_are_never_cached(tmp_path):
+    """An ArcGIS error body raises instead of being cached, and a stale good copy survives it"""
+
+    print("🧪 Testing metadata error documents")
+
+    registry = ServiceMetadataRegistry(cache_dir=str(tmp_path), ttl=0.05)
+    with pytest.raises(ServiceMetadataError, match="500"):
+        registry.get(URL, _Fetcher(error_body=True))
+    assert list(tmp_path.glob("*.json")) == []
+
+    registry.get(URL, _Fetcher())
+    time.sleep(0.1)
+    failing = _Fetcher(error_body=True)
+    assert registry.get(URL, failing)["version"] == 1
+    deadline = time.time() + 2
+    while failing.calls == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    restarted = ServiceMetadataRegistry(cache_dir=str(tmp_path), ttl=3600)
+    assert restarted.get(URL, _Fetcher(fail=True))["version"] == 1
+
+    uncached = ServiceMetadataRegistry(cache_dir=str(tmp_path), ttl=0)
+    with pytest.raises(ServiceMetadataError):
+        uncached.get(URL, _Fetcher(error_body=True))
+
+    print("✅ Error documents are never cached")
+
+
+def test_derived_values_are_reused_until_refresh(tmp_path):
+    """Parsed values are built once per metadata document"""
+
+    print("🧪 Testing derived metadata values")
+
+    registry = ServiceMetadataRegistry(cache_dir=str(tmp_path), ttl=3600)
+    builds = []
+
+    def parse(data):
+        builds.append(data["version"])
+        return {lod["level"]: object() for lod in data["tileInfo"]["lods"]}
+
+    fetch = _Fetcher()
+    first = registry.derived(URL, "scales", fetch, parse)
+    assert registry.derived(URL, "scales", fetch, parse) is first
+    assert builds == [1]
+
+    registry.invalidate()
+    assert registry.derived(URL, "scales", fetch, parse) is not first
+    assert builds == [1, 2]
+
+    print("✅ Derived metadata values work")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    for test in (test_metadata_is_fetched_once_and_persisted,
+                 test_redirected_metadata_is_cached_separately,
+                 test_expired_metadata_refreshes_in_background,
+                 test_error_documents_are_never_cached,
+                 test_derived_values_are_reused_until_refresh):
+        with tempfile.TemporaryDirectory() as directory:
+            test(Path(directory))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test tile-based basemap mosaicking and the MBTiles cache against the mock server
+"""
+
+import contextlib
+import sqlite3
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("pyproj")
+pytest.importorskip("matplotlib")
+
+import service_metadata
+from mapmaker.common import MapServerClient
+from mapmaker.tile_mosaic import TileCache, TileMosaicker
+from mock_arcgis_server import MockArcGISServer, MockConfig
+from upstream_http import set_upstream_redirect
+
+TOPO_URL = "https://services.arcgisonline.com/ArcGIS/rest/services/World_Topo_Map/MapServer"
+
+SITE_EXTENT = {"xmin": -66.160, "ymin": 18.425, "xmax": -66.140, "ymax": 18.440}
+NEARBY_EXTENT = {"xmin": -66.158, "ymin": 18.426, "xmax": -66.138, "ymax": 18.441}
+
+
+@contextlib.contextmanager
+def _mock_upstream(cache_dir):
+    """Redirect upstream requests to a mock server, with a private metadata cache"""
+    registry = service_metadata._registry
+    service_metadata._registry = service_metadata.ServiceMetadataRegistry(cache_dir=str(cache_dir))
+    try:
+        with MockArcGISServer(MockConfig(latency=0.0, seed=1)) as mock:
+            set_upstream_redirect(mock.url)
+            yield mock
+    finally:
+        set_upstream_redirect(None)
+        service_metadata._registry = registry
+
+
+def test_tile_range_covers_extent(tmp_path):
+    """The tile range at a level covers the extent and the LOD matches the requested resolution"""
+
+    print("🧪 Testing tile range computation")
+
+    with _mock_upstream(tmp_path / "metadata"):
+        client = MapServerClient(TOPO_URL)
+        client.fetch_metadata()
+        mosaicker = TileMosaicker(client, cache=TileCache(cache_dir=str(tmp_path / "tiles")))
+
+    native = mosaicker.native_extent(SITE_EXTENT)
+    level = mosaicker.best_level(native, 1024)
+    row_min, row_max, col_min, col_max = mosaicker.tile_range(native, level)
+    span = client.scales[level].resolution * 256
+    assert mosaicker.origin_x + col_min * span <= native[0] < native[2] <= mosaicker.origin_x + (col_max + 1) * span
+    assert mosaicker.origin_y - (row_max + 1) * span <= native[1] < native[3] <= mosaicker.origin_y - row_min * span
+    assert abs(client.scales[level].resolution - (native[2] - native[0]) / 1024) <= client.scales[level].resolution / 2
+
+    print("✅ Tile range computation works")
+
+
+def test_nearby_sites_reuse_cached_tiles(tmp_path):
+    """Tiles land in the MBTiles file and a nearby site's mosaic is mostly built from it"""
+
+    print("🧪 Testing MBTiles tile cache")
+
+    cache = TileCache(cache_dir=str(tmp_path / "tiles"))
+    with _mock_upstream(tmp_path / "metadata") as mock:
+        client = MapServerClient(TOPO_URL)
+        client.fetch_metadata()
+        mosaicker = TileMosaicker(client, cache=cache)
+
+        before = mock.stats["requests"]
+        image, _ = mosaicker.mosaic(SITE_EXTENT, 800, 600)
+        first = mock.stats["requests"] - before
+        level = mosaicker.best_level(mosaicker.native_extent(SITE_EXTENT), 800)
+        repeat_image, _ = mosaicker.mosaic(SITE_EXTENT, 800, 600, level=level)
+        repeat = mock.stats["requests"] - before - first
+        mosaicker.mosaic(NEARBY_EXTENT, 800, 600, level=level)
+        nearby = mock.stats["requests"] - before - first - repeat
+        path = cache.path(TOPO_URL)
+
+    assert image.size == (800, 600) and image.tobytes() == repeat_image.tobytes()
+    assert image.getpixel((0, 0))[3] == 255
+    assert first > 1 and repeat == 0 and nearby < first
+
+    with sqlite3.connect(str(path)) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM tiles").fetchone()[0] == first + nearby
+        assert dict(connection.execute("SELECT name, value FROM metadata"))["scheme"] == "arcgis"
+
+    print("✅ MBTiles tile cache works")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    for test in (test_tile_range_covers_extent, test_nearby_sites_reuse_cached_tiles):
+        with tempfile.TemporaryDirectory() as directory:
+            test(Path(directory))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test reading agent tool specs from source for lazy loading
+"""
+
+import ast
+import contextvars
+import threading
+import time
+
+import pytest
+
+from tool_registry import AGENT_TOOLS, module_path, read_tool_specs, parse_importtime, call_with_timeout
+
+_screening = contextvars.ContextVar("screening", default=None)
+
+# Export lists the agent used to concatenate, by module
+_EXPORT_LISTS = {
+    "comprehensive_flood_tool": "COMPREHENSIVE_FLOOD_TOOLS",
+    "wetland_analysis_tool": "COMPREHENSIVE_WETLAND_TOOL",
+    "cadastral.cadastral_data_tool": "CADASTRAL_DATA_TOOLS",
+    "karst.karst_tools": "KARST_TOOLS",
+    "nonattainment_analysis_tool": "COMPREHENSIVE_NONATTAINMENT_TOOL",
+    "comprehensive_screening_report_tool": "COMPREHENSIVE_SCREENING_TOOLS",
+    "output_directory_manager": "PROJECT_DIRECTORY_TOOLS",
+}
+
+
+def _exported_names(module: str, variable: str):
+    with open(module_path(module), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == variable for t in node.targets):
+            values = node.value.elts if isinstance(node.value, ast.List) else [node.value]
+            return [value.id for value in values]
+    raise AssertionError(f"{variable} not found in {module}")
+
+
+def test_every_agent_tool_has_a_spec():
+    """Each registered tool is found in source with a description and argument schema"""
+
+    print("🧪 Testing tool specs read from source")
+
+    for module, names in AGENT_TOOLS:
+        specs = read_tool_specs(module, names)
+        assert sorted(specs) == sorted(names), f"{module}: {sorted(set(names) - set(specs))} not found"
+        for spec in specs.values():
+            assert spec.description
+            assert spec.schema_source or spec.parameters
+
+    flood = read_tool_specs("comprehensive_flood_tool", ["comprehensive_flood_analysis"])["comprehensive_flood_analysis"]
+    assert flood.schema_source.startswith("class ComprehensiveFloodInput(BaseModel)")
+
+    habitat = read_tool_specs("HabitatINFO.map_tools", ["generate_adaptive_critical_habitat_map"])
+    parameters = habitat["generate_adaptive_critical_habitat_map"].parameters
+    assert parameters[0] == ("longitude", "float", None)
+    assert ("location_name", "Optional[str]", "None") in parameters
+
+    print("✅ Tool specs work")
+
+
+def test_registry_matches_module_exports():
+    """The registry binds the same tools the modules export"""
+
+    print("🧪 Testing registry against module exports")
+
+    registered = dict(AGENT_TOOLS)
+    for module, variable in _EXPORT_LISTS.items():
+        specs = read_tool_specs(module, registered[module])
+        functions = sorted(spec.function for spec in specs.values())
+        assert functions == sorted(_exported_names(module, variable)), module
+
+    print("✅ Registry matches module exports")
+
+
+def test_parse_importtime():
+    """`-X importtime` rows keep self, cumulative time and nesting depth"""
+
+    print("🧪 Testing import time parsing")
+
+    rows = parse_importtime(
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        150 |   numpy.core\n"
+        "import time:     90000 |     250000 | matplotlib\n"
+    )
+    assert rows[0]["module"] == "numpy.core" and rows[0]["depth"] == 1
+    assert rows[1] == {"module": "matplotlib", "self_seconds": 0.09, "cumulative_seconds": 0.25, "depth": 0}
+
+    print("✅ Import time parsing works")
+
+
+def test_call_with_timeout_isolates_tool_calls():
+    """Tool calls keep the caller's context, surface errors and give up after their timeout"""
+
+    print("🧪 Testing tool call timeouts")
+
+    _screening.set("s1")
+    assert call_with_timeout(lambda x: (x, _screening.get()), 1, 2) == (2, "s1")
+
+    with pytest.raises(ValueError):
+        call_with_timeout(lambda: int("print service down"), 1)
+
+    release = threading.Event()
+    started = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        call_with_timeout(release.wait, 0.1, 5)
+    assert time.perf_counter() - started < 1
+    release.set()
+
+    print("✅ Tool call timeouts work")
+
+
+if __name__ == "__main__":
+    test_every_agent_tool_has_a_spec()
+    test_registry_matches_module_exports()
+    test_parse_importtime()
+    test_call_with_timeout_isolates_tool_calls()
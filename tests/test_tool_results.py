@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test compacting tool results for the agent's history and measuring the savings
+"""
+
+import json
+from pathlib import Path
+
+from tool_results import shape_tool_result, compact_value
+from screening_metrics import screening_metrics, record_tool_result, record_llm
+
+
+def _wetland_result(data_file: str):
+    wetlands = [{"wetland_type": "Estuarine", "nwi_code": f"E2EM1P{i}", "area_acres": i * 1.5,
+                 "distance_miles": i / 10, "geometry": {"rings": [[[-66.1, 18.4]] * 40]}} for i in range(40)]
+    return {
+        "location_analysis": {"location": "Cataño, Puerto Rico", "is_in_wetland": False, "total_wetlands_found": 40},
+        "wetlands_in_radius": {"wetlands_count": 40, "wetlands": wetlands},
+        "regulatory_assessment": {"permit_required": True, "complexity": "high"},
+        "project_directory": {"project_dir": "output/x", "files": [f"file_{i}.pdf" for i in range(100)]},
+        "files_generated": {"wetland_data_file": data_file, "map_file": "maps/wetland_map.pdf"},
+    }
+
+
+def test_large_results_are_compacted_with_detail_handle(tmp_path):
+    """Bulky fields go, decisions and file paths stay, the saved JSON is referenced"""
+
+    print("🧪 Testing tool result compaction")
+
+    data_file = tmp_path / "data" / "wetland_analysis_x.json"
+    data_file.parent.mkdir()
+    data_file.write_text("{}")
+
+    result = _wetland_result(str(data_file))
+    shaped, tokens = shape_tool_result("analyze_wetland_location_with_map", result, project_dir=str(tmp_path))
+
+    assert tokens["compact_tokens"] < tokens["full_tokens"] / 4
+    assert "project_directory" not in shaped
+    assert shaped["regulatory_assessment"] == {"permit_required": True, "complexity": "high"}
+    assert shaped["files_generated"]["map_file"] == "maps/wetland_map.pdf"
+    assert len(shaped["wetlands_in_radius"]["wetlands"]) == 4  # 3 items + "... 37 more"
+    assert "geometry" not in shaped["wetlands_in_radius"]["wetlands"][0]
+    assert shaped["_details"]["full_result_file"] == str(data_file)
+    assert not (tmp_path / "logs").exists()
+
+    print("✅ Tool result compaction works")
+
+
+def test_unsaved_and_small_results(tmp_path):
+    """Results without saved data are written to logs/; small ones pass through untouched"""
+
+    print("🧪 Testing unsaved and small results")
+
+    small = {"success": True, "karst": False}
+    assert shape_tool_result("check_cadastral_karst", small, project_dir=str(tmp_path))[0] is small
+
+    big = json.dumps({"species": [{"name": f"Species {i}", "units": list(range(30))} for i in range(50)]})
+    shaped, tokens = shape_tool_result("generate_adaptive_critical_habitat_map", big, project_dir=str(tmp_path))
+    assert isinstance(shaped, str) and tokens["compact_tokens"] < tokens["full_tokens"]
+    detail = json.loads(shaped)["_details"]["full_result_file"]
+    assert Path(detail).parent == tmp_path / "logs" / "tool_results"
+    assert json.loads(Path(detail).read_text()) == json.loads(big)
+
+    assert compact_value("x" * 1000).endswith("(1000 chars)")
+
+    print("✅ Unsaved and small results work")
+
+
+def test_tokens_saved_per_turn():
+    """Each LLM turn after a compacted result counts the saving again"""
+
+    print("🧪 Testing per-turn token savings")
+
+    with screening_metrics("s1") as metrics:
+        record_llm("model", 0.1)
+        record_tool_result("comprehensive_flood_analysis", 5000, 800)
+        record_llm("model", 0.1)
+        record_tool_result("analyze_wetland_location_with_map", 3000, 500)
+        record_llm("model", 0.1)
+
+    context = metrics.summary()["context"]
+    assert context["saved_per_turn"] == [0, 4200, 6700]
+    assert context["history_tokens_saved"] == 10900
+    assert context["tool_results"] == 2
+
+    print("✅ Per-turn token savings work")
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_large_results_are_compacted_with_detail_handle(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_unsaved_and_small_results(Path(tmp))
+    test_tokens_saved_per_turn()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test recording upstream exchanges to fixtures and replaying them offline
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from upstream_http import UpstreamSession
+from upstream_replay import replay_mode, request_key, parse_latency
+
+
+class _JobHandler(BaseHTTPRequestHandler):
+    """Tiny GP service: each status poll advances the job"""
+
+    polls = 0
+
+    def do_GET(self):
+        if self.path.startswith("/jobs/j1"):
+            type(self).polls += 1
+            status = "esriJobSucceeded" if type(self).polls >= 2 else "esriJobExecuting"
+            body = json.dumps({"jobStatus": status}).encode()
+            content_type = "application/json"
+        else:
+            body = b"%PDF-1.4 binary \x00\xff"
+            content_type = "application/pdf"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_record_then_replay_offline(tmp_path):
+    """Recorded sequences replay in order, binary bodies survive, unknown requests fail"""
+
+    print("🧪 Testing upstream record / replay")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _JobHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    fixtures = tmp_path / "fixtures"
+
+    try:
+        session = UpstreamSession()
+        with replay_mode("record", str(fixtures)):
+            recorded = [session.get(f"{base}/jobs/j1?f=json").json()["jobStatus"] for _ in range(2)]
+            pdf = session.get(f"{base}/output/map.pdf").content
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert recorded == ["esriJobExecuting", "esriJobSucceeded"]
+    assert len(list(fixtures.rglob("*.json"))) == 3
+
+    # The server is gone: everything now comes from the fixtures
+    with replay_mode("replay", str(fixtures)):
+        replayed = [session.get(f"{base}/jobs/j1?f=json").json()["jobStatus"] for _ in range(3)]
+        assert replayed == ["esriJobExecuting", "esriJobSucceeded", "esriJobSucceeded"]
+        assert session.get(f"{base}/output/map.pdf").content == pdf
+        with pytest.raises(requests.ConnectionError):
+            session.get(f"{base}/never/recorded")
+
+    # Synthetic latency
+    with replay_mode("replay", str(fixtures), latency=0.05):
+        started = time.perf_counter()
+        session.get(f"{base}/output/map.pdf")
+        assert time.perf_counter() - started >= 0.05
+
+    print("✅ Upstream record / replay works")
+
+
+def test_request_matching_and_latency_settings():
+    """Query order and volatile parameters do not affect matching"""
+
+    print("🧪 Testing request matching")
+
+    assert request_key("GET", "https://a.gov/x?b=2&a=1&_ts=5", None) == request_key("get", "https://A.gov/x?a=1&b=2", None)
+    assert request_key("POST", "https://a.gov/x", b"a=1")[1] != request_key("POST", "https://a.gov/x", b"a=2")[1]
+    assert parse_latency("") is None and parse_latency("0") is None
+    assert parse_latency("0.25") == 0.25
+    assert parse_latency("recorded*0.5") == ("recorded", 0.5)
+
+    print("✅ Request matching works")
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_record_then_replay_offline(Path(tmp))
+    test_request_matching_and_latency_settings()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test vector stamping of the wetland map radius circle onto print service PDFs
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("requests")
+fitz = pytest.importorskip("fitz")
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "WetlandsINFO"))
+
+from generate_wetland_map_pdf_v3 import CIRCLE_OVERLAY_COLOR, WetlandMapGeneratorV3
+from mock_arcgis_server import png_bytes
+
+LONGITUDE, LATITUDE = -66.15, 18.43
+
+
+def _print_service_pdf(path):
+    """A letter-landscape layout: title text, a raster map frame and a vector neatline"""
+    document = fitz.open()
+    page = document.new_page(width=792, height=612)
+    frame = fitz.Rect(36, 72, 756, 540)
+    page.insert_image(frame, stream=png_bytes(720, 468))
+    page.draw_rect(frame, color=(0, 0, 0), width=1)
+    page.insert_text((36, 50), "Wetland Map", fontsize=18)
+    document.save(str(path))
+    document.close()
+    return frame
+
+
+def test_circle_is_stamped_as_vector_paths(tmp_path):
+    """The circle and legend are added as paths on the original page, centred in the map frame"""
+
+    print("🧪 Testing vector circle overlay")
+
+    base_pdf = tmp_path / "base.pdf"
+    frame = _print_service_pdf(base_pdf)
+    (tmp_path / "output").mkdir()
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        result = WetlandMapGeneratorV3()._add_circle_overlay_to_pdf(
+            str(base_pdf), LONGITUDE, LATITUDE, 0.5, "Test site", 1.0, "with_circle.pdf")
+    finally:
+        os.chdir(cwd)
+
+    document = fitz.open(str(tmp_path / result))
+    page = document[0]
+    assert len(document) == 1 and page.rect == fitz.Rect(0, 0, 792, 612)
+    assert len(page.get_images()) == 1                      # the map was not re-encoded
+    assert "Wetland Map" in page.get_text() and "0.5 mile radius" in page.get_text()
+
+    circles = [drawing for drawing in page.get_drawings()
+               if drawing.get("color") and all(abs(a - b) < 0.01 for a, b in zip(drawing["color"], CIRCLE_OVERLAY_COLOR))
+               and len(drawing["items"]) > 100]
+    assert len(circles) == 1
+    bounds = circles[0]["rect"]
+    center = ((bounds.x0 + bounds.x1) / 2, (bounds.y0 + bounds.y1) / 2)
+    assert abs(center[0] - (frame.x0 + frame.x1) / 2) < 2 and abs(center[1] - (frame.y0 + frame.y1) / 2) < 2
+    # A 0.5 mile circle in a 1 mile buffer spans half the frame height (the shorter side)
+    assert abs(bounds.height - frame.height / 2) < frame.height * 0.05
+    assert abs(bounds.width - bounds.height) < 3
+    document.close()
+
+    assert os.path.getsize(tmp_path / result) < os.path.getsize(base_pdf) * 1.5
+
+    print("✅ Vector circle overlay works")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as directory:
+        test_circle_is_stamped_as_vector_paths(Path(directory))
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test that concurrent screenings resolve to isolated output workspaces
+"""
+
+import asyncio
+import tempfile
+
+from output_directory_manager import get_output_manager, screening_workspace
+
+
+async def _run_screening(index: int, base_dir: str):
+    """Simulate a screening whose tool creates a project directory from a worker thread"""
+
+    with screening_workspace(f"screening_{index}", base_output_dir=base_dir) as workspace:
+        def tool_call():
+            manager = get_output_manager()
+            manager.create_project_directory(custom_name=f"Project_{index}")
+            return manager.current_project_dir
+
+        await asyncio.sleep(0.01 * (4 - index))
+        tool_dir = await asyncio.to_thread(tool_call)
+
+    return tool_dir, workspace.current_project_dir
+
+
+def test_concurrent_workspaces_are_isolated():
+    """Each screening sees only the directory its own tools created"""
+
+    print("🧪 Testing per-screening workspace isolation")
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        async def run_all():
+            return await asyncio.gather(*[_run_screening(i, base_dir) for i in range(4)])
+
+        results = asyncio.run(run_all())
+
+        for index, (tool_dir, workspace_dir) in enumerate(results):
+            print(f"   screening_{index}: {workspace_dir}")
+            assert tool_dir == workspace_dir
+            assert workspace_dir.endswith(f"Project_{index}")
+
+    # Outside any workspace the global manager is untouched by the screenings
+    assert get_output_manager().current_project_dir is None or \
+        not get_output_manager().current_project_dir.startswith(base_dir)
+
+    print("✅ Workspaces are isolated")
+
+
+if __name__ == "__main__":
+    test_concurrent_workspaces_are_isolated()
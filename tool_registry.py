@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Lazy Tool Registry
+
+The screening agent's tools live in modules that import matplotlib, reportlab,
+PyPDF2, pyproj and Pillow at import time. Importing them all whenever the agent
+module is imported makes app.py startup and every one-shot CLI pay for tools they
+may never call.
+
+This registry reads each tool's name, description and argument schema from the
+tool module's source (ast, nothing is executed) and returns LazyTool proxies
+that the agent can bind immediately. A tool's module is imported the first time
+one of its tools runs; later calls go straight to the real implementation.
+Results pass through tool_results.shape_tool_result() before they reach the
+agent's history.
+
+The agent's tool node runs the tool calls of one LLM turn concurrently. Each
+LazyTool call is bounded by its timeout (TOOL_TIMEOUTS, TOOL_TIMEOUT_SECONDS
+for the rest). A failure or timeout becomes an error result for that call
+alone, so one stuck print service does not abort the sibling analyses. A
+timed-out tool cannot be interrupted; it keeps running in its daemon thread
+and its late result is discarded.
+
+Import cost per tool module can be inspected with:
+
+    python tool_registry.py --import-times
+"""
+
+import ast
+import contextvars
+import importlib
+import inspect
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from screening_metrics import record_tool_result
+from tool_results import shape_tool_result
+
+try:
+    from langchain_core.tools import BaseTool, ToolException
+except ImportError:
+    # Specs and import timings remain usable without LangChain
+    BaseTool = object
+    ToolException = RuntimeError
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# (module, tool names) in the order the agent binds them
+AGENT_TOOLS: List[Tuple[str, List[str]]] = [
+    ("comprehensive_flood_tool", ["comprehensive_flood_analysis"]),
+    ("wetland_analysis_tool", ["analyze_wetland_location_with_map"]),
+    ("cadastral.cadastral_data_tool", ["get_cadastral_data_from_coordinates", "get_cadastral_data_from_number"]),
+    ("karst.karst_tools", ["check_cadastral_karst", "check_multiple_cadastrals_karst", "find_nearest_karst",
+                           "analyze_cadastral_karst_proximity", "generate_karst_analysis_map"]),
+    ("HabitatINFO.map_tools", ["generate_adaptive_critical_habitat_map"]),
+    ("nonattainment_analysis_tool", ["analyze_nonattainment_with_map"]),
+    ("comprehensive_screening_report_tool", ["generate_comprehensive_screening_report",
+                                             "auto_discover_and_generate_reports",
+                                             "find_latest_screening_directory"]),
+    ("output_directory_manager", ["create_intelligent_project_directory"]),
+]
+
+# Seconds a tool call may run before the agent gets a timeout error instead
+TOOL_TIMEOUTS: Dict[str, float] = {
+    "comprehensive_flood_analysis": 600,            # FIRMette, Preliminary Comparison and ABFE print jobs
+    "analyze_wetland_location_with_map": 300,
+    "generate_adaptive_critical_habitat_map": 300,
+    "analyze_nonattainment_with_map": 300,
+    "generate_karst_analysis_map": 300,
+    "analyze_cadastral_karst_proximity": 300,
+    "generate_comprehensive_screening_report": 600,
+    "auto_discover_and_generate_reports": 1800,
+}
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT_SECONDS", "180"))
+
+# Site analyses that only need the location; the agent should request them in one turn
+BATCHABLE_TOOLS = {
+    "comprehensive_flood_analysis", "analyze_wetland_location_with_map", "generate_adaptive_critical_habitat_map",
+    "analyze_nonattainment_with_map", "check_cadastral_karst", "check_multiple_cadastrals_karst",
+}
+BATCH_HINT = ("Independent site analysis: request it in the SAME turn as the other site analyses "
+              "(flood, wetland, critical habitat, air quality, karst) - they run concurrently.")
+
+# Names available to argument schemas evaluated from source
+_SCHEMA_NAMESPACE_TYPES = ("Any", "Dict", "List", "Literal", "Optional", "Tuple", "Union")
+
+# Parameters LangChain injects rather than the model
+_INJECTED_PARAMETERS = {"self", "run_manager", "callbacks", "config"}
+
+
+@dataclass
+class ToolSpec:
+    """A tool as declared in its module's source"""
+    name: str
+    module: str
+    function: str
+    description: str
+    schema_source: Optional[str] = None
+    parameters: List[Tuple[str, Optional[str], Optional[str]]] = field(default_factory=list)
+
+
+def module_path(module: str) -> str:
+    """Source file of a repository module, found without importing its package"""
+    return os.path.join(_ROOT, *module.split(".")) + ".py"
+
+
+def _decorator_tool_name(decorator: ast.expr) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    """(explicit tool name, args_schema class) of a @tool decorator, None for other decorators"""
+    if isinstance(decorator, ast.Name) and decorator.id == "tool":
+        return None, None
+    if isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Name) and decorator.func.id == "tool":
+        name = None
+        if decorator.args and isinstance(decorator.args[0], ast.Constant) and isinstance(decorator.args[0].value, str):
+            name = decorator.args[0].value
+        schema = next((kw.value.id for kw in decorator.keywords
+                       if kw.arg == "args_schema" and isinstance(kw.value, ast.Name)), None)
+        return name, schema
+    return None
+
+
+def read_tool_specs(module: str, names: List[str]) -> Dict[str, ToolSpec]:
+    """Read the @tool definitions named `names` from a module's source"""
+    path = module_path(module)
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source, filename=path)
+
+    classes = {node.name: node for node in tree.body if isinstance(node, ast.ClassDef)}
+    specs: Dict[str, ToolSpec] = {}
+    for node in tree.body:
+        if not isinstance(node, ast.FunctionDef):
+            continue
+        for decorator in node.decorator_list:
+            declared = _decorator_tool_name(decorator)
+            if declared is None:
+                continue
+            tool_name = declared[0] or node.name
+            if tool_name not in names:
+                continue
+
+            spec = ToolSpec(name=tool_name, module=module, function=node.name,
+                            description=inspect.cleandoc(ast.get_docstring(node, clean=False) or ""))
+            schema_class = classes.get(declared[1]) if declared[1] else None
+            if schema_class is not None:
+                spec.schema_source = ast.get_source_segment(source, schema_class)
+            else:
+                args = node.args
+                defaults = [None] * (len(args.args) - len(args.defaults)) + list(args.defaults)
+                for arg, default in zip(args.args, defaults):
+                    if arg.arg in _INJECTED_PARAMETERS:
+                        continue
+                    spec.parameters.append((
+                        arg.arg,
+                        ast.unparse(arg.annotation) if arg.annotation is not None else None,
+                        ast.unparse(default) if default is not None else None,
+                    ))
+            specs[tool_name] = spec
+    return specs
+
+
+def build_args_schema(spec: ToolSpec):
+    """Pydantic model for a tool's arguments, built from its spec"""
+    import typing
+    from pydantic import BaseModel, Field, create_model
+
+    namespace: Dict[str, Any] = {"BaseModel": BaseModel, "Field": Field}
+    namespace.update({name: getattr(typing, name) for name in _SCHEMA_NAMESPACE_TYPES})
+
+    if spec.schema_source:
+        exec(compile(spec.schema_source, module_path(spec.module), "exec"), namespace)
+        class_name = re.match(r"\s*class\s+(\w+)", spec.schema_source).group(1)
+        return namespace[class_name]
+
+    fields = {}
+    for name, annotation, default in spec.parameters:
+        field_type = eval(annotation, namespace) if annotation else Any
+        fields[name] = (field_type, ast.literal_eval(default) if default is not None else ...)
+    return create_model(spec.name, **fields)
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+_load_lock = threading.Lock()
+_loaded_tools: Dict[str, Any] = {}
+_module_load_seconds: Dict[str, float] = {}
+
+
+def load_tool(module: str, function: str):
+    """Import a tool's module (once) and return the real tool object"""
+    key = f"{module}:{function}"
+    tool_object = _loaded_tools.get(key)
+    if tool_object is not None:
+        return tool_object
+    with _load_lock:
+        if key not in _loaded_tools:
+            first_import = module not in sys.modules
+            started = time.perf_counter()
+            imported = importlib.import_module(module)
+            if first_import:
+                _module_load_seconds[module] = time.perf_counter() - started
+                print(f"⏱️ Loaded tool module {module} in {_module_load_seconds[module]:.2f}s")
+            _loaded_tools[key] = getattr(imported, function)
+        return _loaded_tools[key]
+
+
+def module_load_times() -> Dict[str, float]:
+    """Seconds spent importing each tool module this process loaded on demand"""
+    return dict(_module_load_seconds)
+
+
+def tool_timeout(name: str) -> float:
+    return TOOL_TIMEOUTS.get(name, DEFAULT_TOOL_TIMEOUT)
+
+
+def call_with_timeout(func, timeout: float, *args, **kwargs):
+    """
+    Run func(*args, **kwargs) in a daemon thread bound to the caller's context
+
+    Raises TimeoutError when it has not finished after `timeout` seconds; the
+    call itself keeps running.
+    """
+    context = contextvars.copy_context()
+    done = threading.Event()
+    outcome: Dict[str, Any] = {}
+
+    def target():
+        try:
+            outcome["result"] = context.run(func, *args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    threading.Thread(target=target, name=f"tool-{getattr(func, '__name__', 'call')}", daemon=True).start()
+    if not done.wait(timeout):
+        raise TimeoutError(f"timed out after {timeout:.0f}s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+class LazyTool(BaseTool):
+    """Agent tool whose implementation is imported on its first call"""
+
+    module: str
+    function: str
+    # Errors and timeouts are returned to the model as this call's result
+    handle_tool_error: bool = True
+
+    def _implementation(self):
+        return load_tool(self.module, self.function)
+
+    def _call(self, args, kwargs):
+        # Call the wrapped function directly so callbacks see one tool run, not two
+        implementation = self._implementation()
+        func = getattr(implementation, "func", None)
+        if func is not None:
+            return func(*args, **kwargs)
+        return implementation._run(*args, **kwargs)
+
+    def _run(self, *args, run_manager=None, **kwargs):
+        timeout = tool_timeout(self.name)
+        try:
+            result = call_with_timeout(self._call, timeout, args, kwargs)
+        except TimeoutError:
+            raise ToolException(f"{self.name} did not finish within {timeout:.0f}s. Continue with the "
+                                f"other analyses and report this one as unavailable.")
+        except ToolException:
+            raise
+        except Exception as e:
+            raise ToolException(f"{self.name} failed: {e}")
+
+        shaped, tokens = shape_tool_result(self.name, result)
+        record_tool_result(self.name, tokens["full_tokens"], tokens["compact_tokens"])
+        return shaped
+
+
+@lru_cache(maxsize=None)
+def _specs_for(module: str, names: Tuple[str, ...]) -> Dict[str, ToolSpec]:
+    return read_tool_specs(module, list(names))
+
+
+def get_agent_tools() -> List[Any]:
+    """
+    The agent's tools as lazy proxies, in binding order
+
+    A tool whose spec cannot be read from source falls back to importing its
+    module right away, so the agent always gets the full tool set.
+    """
+    tools = []
+    for module, names in AGENT_TOOLS:
+        try:
+            specs = _specs_for(module, tuple(names))
+        except (OSError, SyntaxError) as e:
+            print(f"⚠️ Could not read tool specs from {module}: {e}")
+            specs = {}
+        for name in names:
+            spec = specs.get(name)
+            try:
+                if spec is None:
+                    raise LookupError(f"no @tool named {name}")
+                description = spec.description
+                if name in BATCHABLE_TOOLS:
+                    description = f"{description}\n\n{BATCH_HINT}"
+                tools.append(LazyTool(name=spec.name, description=description,
+                                      args_schema=build_args_schema(spec),
+                                      module=module, function=spec.function))
+            except Exception as e:
+                print(f"⚠️ Loading {name} eagerly ({e})")
+                tools.append(load_tool(module, spec.function if spec else name))
+    return tools
+
+
+# ---------------------------------------------------------------------------
+# Import-time breakdown
+# ---------------------------------------------------------------------------
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse `python -X importtime` output into (module, self, cumulative, depth) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            rows.append({
+                "module": match.group(4),
+                "self_seconds": int(match.group(1)) / 1e6,
+                "cumulative_seconds": int(match.group(2)) / 1e6,
+                "depth": (len(match.group(3)) - 1) // 2,
+            })
+    return rows
+
+
+def measure_import(module: str) -> Dict[str, Any]:
+    """Import `module` in a fresh interpreter and break down where the time goes"""
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=_ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    rows = parse_importtime(completed.stderr)
+    target = next((row for row in reversed(rows) if row["module"] == module), None)
+
+    # Heaviest packages pulled in, by the cumulative time of their top-level import
+    packages = {
+        row["module"]: row["cumulative_seconds"] for row in rows
+        if row["depth"] >= 1 and "." not in row["module"] and row["module"] not in sys.stdlib_module_names
+    }
+
+    error = None
+    if completed.returncode != 0:
+        error = (completed.stderr.strip().splitlines() or ["import failed"])[-1]
+    return {
+        "module": module,
+        "ok": completed.returncode == 0,
+        "error": error,
+        "import_seconds": round(target["cumulative_seconds"], 3) if target else None,
+        "process_seconds": round(wall, 3),
+        "heaviest_packages": sorted(((name, round(seconds, 3)) for name, seconds in packages.items()),
+                                    key=lambda item: -item[1])[:5],
+    }
+
+
+def format_import_breakdown(rows: List[Dict[str, Any]]) -> str:
+    """Markdown table of measure_import() rows"""
+    lines = ["| Module | Import (s) | Heaviest packages |", "|---|---:|---|"]
+    for row in rows:
+        heaviest = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in row["heaviest_packages"])
+        seconds = f"{row['import_seconds']:.2f}" if row["ok"] else f"failed: {row['error']}"
+        lines.append(f"| {row['module']} | {seconds} | {heaviest or '-'} |")
+    return "\n".join(lines)
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Inspect the agent's lazy tool registry")
+    parser.add_argument("--import-times", action="store_true",
+                        help="Import every tool module in a fresh interpreter and report the cost")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args()
+
+    if args.import_times:
+        modules = ["comprehensive_environmental_agent"] + [module for module, _ in AGENT_TOOLS]
+        rows = [measure_import(module) for module in modules]
+        print(json.dumps(rows, indent=2) if args.json else format_import_breakdown(rows))
+        return 0
+
+    for module, names in AGENT_TOOLS:
+        specs = read_tool_specs(module, names)
+        for name in names:
+            spec = specs.get(name)
+            status = "✅" if spec else "❌ not found"
+            summary = spec.description.splitlines()[0] if spec and spec.description else ""
+            print(f"{status} {name} ({module}) {summary}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
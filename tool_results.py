@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Compact Tool Results
+
+Screening tools return large nested dicts (raw cadastral results, project
+directory listings, per-feature details). Whatever a tool returns becomes a
+message in the agent's history and is re-sent on every later LLM turn.
+
+shape_tool_result() reduces a large result to a compact decision summary:
+scalars, short lists, the first few items of long lists, and file paths. It
+also adds a `_details` handle that points to the full JSON on disk. When the
+tool already saved its data (data/ or logs/ files referenced in the result),
+the handle points there. Otherwise the full result is written to
+logs/tool_results/ in the project directory. It goes under logs/ because the
+report generator files everything in data/ by filename.
+
+The estimated token savings are recorded per tool and per LLM turn through
+screening_metrics.record_tool_result().
+
+Environment:
+- TOOL_RESULT_COMPACTION=0 returns tool results unchanged
+- TOOL_RESULT_COMPACT_CHARS: results shorter than this are not compacted (default 2000)
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Keys whose values are bulky and only useful from the saved detail file
+DROP_KEYS = {
+    "project_directory", "available_directories",
+    "polygon_coordinates", "geometry", "geometry_data", "geometry_details",
+    "raw_result", "raw_cadastral_result", "raw_data",
+}
+
+MAX_DEPTH = 4
+MAX_SCALAR_ITEMS = 8
+MAX_DICT_ITEMS = 3
+MAX_STRING_CHARS = 400
+
+# Rough characters-per-token ratio for JSON-heavy English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def compaction_enabled() -> bool:
+    return os.getenv("TOOL_RESULT_COMPACTION", "1").lower() not in ("0", "false", "no", "off")
+
+
+def compact_threshold() -> int:
+    try:
+        return int(os.getenv("TOOL_RESULT_COMPACT_CHARS", "2000"))
+    except ValueError:
+        return 2000
+
+
+def _to_text(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value, default=str)
+
+
+def compact_value(value: Any, depth: int = 0) -> Any:
+    """Compact summary of a JSON-like value"""
+    if isinstance(value, dict):
+        if depth >= MAX_DEPTH:
+            return f"{{{len(value)} keys}}"
+        return {key: compact_value(item, depth + 1) for key, item in value.items() if key not in DROP_KEYS}
+
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return []
+        if all(not isinstance(item, (dict, list, tuple)) for item in value):
+            items = [compact_value(item, depth + 1) for item in value[:MAX_SCALAR_ITEMS]]
+            if len(value) > MAX_SCALAR_ITEMS:
+                items.append(f"... {len(value) - MAX_SCALAR_ITEMS} more")
+            return items
+        if depth >= MAX_DEPTH:
+            return f"[{len(value)} items]"
+        items = [compact_value(item, depth + 1) for item in value[:MAX_DICT_ITEMS]]
+        if len(value) > MAX_DICT_ITEMS:
+            items.append(f"... {len(value) - MAX_DICT_ITEMS} more (see _details)")
+        return items
+
+    if isinstance(value, str) and len(value) > MAX_STRING_CHARS:
+        return value[:MAX_STRING_CHARS] + f"... ({len(value)} chars)"
+    return value
+
+
+def saved_detail_files(value: Any, found: Optional[List[str]] = None) -> List[str]:
+    """JSON files referenced by a tool result that exist on disk"""
+    found = [] if found is None else found
+    if isinstance(value, dict):
+        for item in value.values():
+            saved_detail_files(item, found)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            saved_detail_files(item, found)
+    elif isinstance(value, str) and value.endswith(".json") and value not in found and os.path.isfile(value):
+        found.append(value)
+    return found
+
+
+def _current_project_dir() -> Optional[str]:
+    try:
+        from output_directory_manager import get_output_manager
+        return get_output_manager().current_project_dir
+    except Exception:
+        return None
+
+
+def write_full_result(tool_name: str, result: Any, project_dir: Optional[str]) -> Optional[str]:
+    """Save a full tool result to <project_dir>/logs/tool_results/"""
+    if not project_dir or not Path(project_dir).is_dir():
+        return None
+    directory = Path(project_dir) / "logs" / "tool_results"
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{tool_name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+    path.write_text(json.dumps(result, indent=2, default=str))
+    return str(path)
+
+
+def shape_tool_result(tool_name: str, result: Any, project_dir: Optional[str] = None) -> Tuple[Any, Dict[str, int]]:
+    """
+    Compact a tool result for the agent's message history
+
+    Args:
+        tool_name: Name of the tool that produced the result
+        result: The tool's return value (dict, list or JSON string)
+        project_dir: Project directory for the detail file (defaults to the current workspace's)
+
+    Returns:
+        (result for the LLM, {"full_tokens", "compact_tokens"})
+    """
+    full_text = _to_text(result)
+    stats = {"full_tokens": estimate_tokens(full_text), "compact_tokens": estimate_tokens(full_text)}
+    if not compaction_enabled() or len(full_text) < compact_threshold():
+        return result, stats
+
+    data = result
+    if isinstance(result, str):
+        try:
+            data = json.loads(result)
+        except ValueError:
+            return result, stats
+    if not isinstance(data, (dict, list)):
+        return result, stats
+
+    saved = saved_detail_files(data)
+    full_result_file = None if saved else write_full_result(tool_name, data, project_dir or _current_project_dir())
+
+    compact = compact_value(data)
+    if not isinstance(compact, dict):
+        compact = {"result": compact}
+    compact["_details"] = {
+        "compacted": True,
+        "full_result_file": full_result_file or (saved[0] if saved else None),
+        "saved_data_files": saved,
+        "note": "Bulky fields were omitted or truncated; the full result is in the file above "
+                "and is used by comprehensive report generation",
+    }
+
+    compact_text = json.dumps(compact, default=str)
+    if len(compact_text) >= len(full_text):
+        return result, stats
+    stats["compact_tokens"] = estimate_tokens(compact_text)
+    return (compact_text if isinstance(result, str) else compact), stats
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show how a saved tool result would be compacted")
+    parser.add_argument("result_file", help="JSON file holding a tool result")
+    parser.add_argument("--tool", default="tool", help="Tool name")
+    args = parser.parse_args()
+
+    with open(args.result_file) as f:
+        result = json.load(f)
+    os.environ.setdefault("TOOL_RESULT_COMPACT_CHARS", "0")
+    shaped, tokens = shape_tool_result(args.tool, result, project_dir=None)
+    print(json.dumps(shaped, indent=2, default=str))
+    saved = tokens["full_tokens"] - tokens["compact_tokens"]
+    print(f"\n📉 ~{tokens['full_tokens']} → ~{tokens['compact_tokens']} tokens "
+          f"({saved} saved on every later LLM turn)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
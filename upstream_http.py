@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Transport for Upstream GIS Services
+
+All domain clients (FEMA MSC/NFHL, sige.pr.gov, USFWS, EPA, ...) issue their
+REST and print-service requests through this module. It provides:
+
+- UpstreamSession: a requests.Session that limits concurrent requests per host
+  and uses a larger connection pool, so many screenings running in one process
+  never overload a single upstream service
+- shared_session(): a process-wide UpstreamSession for module-level callers
+
+Every request is recorded in screening_metrics (latency, payload size, status,
+errors and timeouts per host / service / layer) and, inside a traced screening,
+as an HTTP span in screening_tracing. Exchanges can be recorded to fixtures and
+replayed offline (see upstream_replay).
+
+Per-host limits default to DEFAULT_HOST_LIMITS and can be overridden with the
+UPSTREAM_HOST_LIMITS environment variable, e.g.
+    UPSTREAM_HOST_LIMITS="msc.fema.gov=2,sige.pr.gov=6"
+Hosts without an explicit limit use UPSTREAM_DEFAULT_HOST_LIMIT (default: 8).
+
+For load tests, UPSTREAM_REDIRECT sends every upstream request to one base URL
+(e.g. mock_arcgis_server.py), keeping the original host as the first path segment:
+    https://sige.pr.gov/server/rest/... -> <UPSTREAM_REDIRECT>/sige.pr.gov/server/rest/...
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse, urlsplit
+
+import requests
+
+from screening_metrics import describe_url, record_http
+from screening_tracing import span
+from upstream_replay import ReplayAdapter
+
+# Concurrent request limits for the upstreams used by a screening
+DEFAULT_HOST_LIMITS: Dict[str, int] = {
+    "msc.fema.gov": 4,                  # FIRMette / preliminary comparison print jobs
+    "hazards.geoplatform.gov": 4,       # ABFE MapServer
+    "hazards.fema.gov": 6,              # NFHL MapServer
+    "sige.pr.gov": 6,                   # cadastral, karst, geometry and basemap services
+    "fwsprimary.wim.usgs.gov": 4,       # NWI wetlands
+    "fwspublicservices.wim.usgs.gov": 4,
+    "ecos.fws.gov": 4,                  # USFWS critical habitat
+    "services.arcgis.com": 6,           # hosted feature services (habitat, RIBITS)
+    "gispub.epa.gov": 4,                # EPA nonattainment
+    "geopub.epa.gov": 4,
+    "utility.arcgisonline.com": 4,      # Esri print / utility services
+    "services.arcgisonline.com": 8,     # Esri basemaps
+}
+
+DEFAULT_HOST_LIMIT = int(os.getenv("UPSTREAM_DEFAULT_HOST_LIMIT", "8"))
+
+# Connection pool size per host for UpstreamSession adapters
+POOL_MAXSIZE = int(os.getenv("UPSTREAM_POOL_MAXSIZE", "32"))
+
+_redirect_base = os.getenv("UPSTREAM_REDIRECT", "").rstrip("/")
+
+
+def _parse_host_limits(spec: Optional[str]) -> Dict[str, int]:
+    """Parse 'host=limit,host=limit' into a dictionary"""
+    limits = {}
+    if not spec:
+        return limits
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        host, limit = item.split("=", 1)
+        try:
+            limits[host.strip().lower()] = max(1, int(limit))
+        except ValueError:
+            continue
+    return limits
+
+
+def set_upstream_redirect(base_url: Optional[str]):
+    """Send all upstream requests to base_url (None to talk to the real services again)"""
+    global _redirect_base
+    _redirect_base = (base_url or "").rstrip("/")
+
+
+def redirect_url(url: str) -> str:
+    """Rewrite an upstream URL to the redirect target, if one is set"""
+    if not _redirect_base or url.startswith(_redirect_base):
+        return url
+    parts = urlsplit(url)
+    if not parts.netloc:
+        return url
+    return f"{_redirect_base}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+
+_host_limits: Dict[str, int] = {**DEFAULT_HOST_LIMITS, **_parse_host_limits(os.getenv("UPSTREAM_HOST_LIMITS"))}
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_semaphores_lock = threading.Lock()
+
+
+def get_host_limit(host: str) -> int:
+    """Get the concurrent request limit for a host"""
+    return _host_limits.get(host.lower(), DEFAULT_HOST_LIMIT)
+
+
+def set_host_limit(host: str, limit: int):
+    """
+    Override the concurrent request limit for a host
+
+    Takes effect for requests that start after the call; requests already
+    waiting on the previous limit keep using it.
+    """
+    host = host.lower()
+    with _semaphores_lock:
+        _host_limits[host] = max(1, limit)
+        _host_semaphores.pop(host, None)
+
+
+def _get_semaphore(host: str) -> threading.BoundedSemaphore:
+    with _semaphores_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(get_host_limit(host))
+            _host_semaphores[host] = semaphore
+        return semaphore
+
+
+@contextmanager
+def host_slot(url: str):
+    """Hold one of the URL host's concurrent request slots for the duration of the block"""
+    host = (urlparse(url).hostname or "").lower()
+    semaphore = _get_semaphore(host)
+    semaphore.acquire()
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+class UpstreamSession(requests.Session):
+    """requests.Session with per-host concurrency limits, pooled connections and record/replay"""
+
+    def __init__(self):
+        super().__init__()
+        adapter = ReplayAdapter(pool_connections=16, pool_maxsize=POOL_MAXSIZE)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        host, service, layer = describe_url(url)
+        with span(f"HTTP {method.upper()}", kind="http", host=host, service=service, layer=layer) as http_span:
+            queued = time.perf_counter()
+            with host_slot(url):
+                started = time.perf_counter()
+                if http_span is not None:
+                    http_span.set_attributes(queued_ms=round((started - queued) * 1000, 1))
+                try:
+                    response = super().request(method, redirect_url(url), *args, **kwargs)
+                except requests.Timeout:
+                    record_http(method, url, None, time.perf_counter() - started, error_kind="timeout")
+                    raise
+                except requests.ConnectionError:
+                    record_http(method, url, None, time.perf_counter() - started, error_kind="connection")
+                    raise
+                except requests.RequestException:
+                    record_http(method, url, None, time.perf_counter() - started, error_kind="other")
+                    raise
+
+            size = self._record_response(method, url, response, time.perf_counter() - started)
+            if http_span is not None:
+                http_span.set_attributes(status=response.status_code, bytes=size)
+                if response.status_code >= 400:
+                    http_span.fail(f"HTTP {response.status_code}")
+        return response
+
+    @staticmethod
+    def _record_response(method, url, response, duration: float) -> int:
+        """Record a completed request; streamed bodies are sized from Content-Length only"""
+        size = response.headers.get("Content-Length")
+        if size is not None and size.isdigit():
+            size = int(size)
+        elif response._content_consumed:
+            size = len(response.content or b"")
+        else:
+            size = 0
+        record_http(method, url, response.status_code, duration, size)
+        return size
+
+
+_shared_session: Optional[UpstreamSession] = None
+_shared_session_lock = threading.Lock()
+
+
+def shared_session() -> UpstreamSession:
+    """Get the process-wide UpstreamSession used by module-level callers"""
+    global _shared_session
+    if _shared_session is None:
+        with _shared_session_lock:
+            if _shared_session is None:
+                _shared_session = UpstreamSession()
+    return _shared_session
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Record / Replay of Upstream Exchanges
+
+Transport adapter used by upstream_http.UpstreamSession that can record every
+upstream REST and print-service exchange to fixture files and replay them
+later without network access, optionally with synthetic latency. This makes
+screening performance measurable offline and repeatably (see
+screening_benchmark.py).
+
+Modes (UPSTREAM_REPLAY_MODE, or configure() / replay_mode() in code):
+- off: requests go to the network (default)
+- record: requests go to the network and each exchange is saved as a fixture
+- replay: requests are answered from fixtures; a request without a fixture
+  fails with requests.ConnectionError, so nothing silently reaches the network
+
+Fixtures are JSON files under UPSTREAM_FIXTURES_DIR (default fixtures/upstream),
+one per exchange, grouped by host. Requests are matched by method, URL with
+sorted query parameters and request body. Repeated identical requests (print
+job status polling) replay the recorded responses in order, repeating the last.
+When no fixture matches the body exactly, the first recording of the same URL
+is used, so volatile form fields (titles with dates) do not break replay.
+
+Synthetic latency (UPSTREAM_REPLAY_LATENCY):
+- unset or 0: answer immediately
+- a number of seconds, e.g. 0.25: fixed latency per request
+- recorded, or recorded*0.5: the recorded upstream latency, optionally scaled
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+MODES = ("off", "record", "replay")
+DEFAULT_FIXTURES_DIR = os.getenv("UPSTREAM_FIXTURES_DIR", "fixtures/upstream")
+
+# Query parameters that change on every request and must not affect matching
+IGNORED_PARAMS = {"_", "_ts", "timestamp", "token"}
+
+# Response headers that no longer apply to the decoded body stored in a fixture
+DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection",
+                   "set-cookie", "date"}
+
+# Content types stored as readable text instead of base64
+TEXT_CONTENT_TYPES = ("application/json", "text/", "application/xml", "application/javascript")
+
+Latency = Union[None, float, Tuple[str, float]]
+
+
+def parse_latency(spec: Optional[str]) -> Latency:
+    """Parse a latency setting: '', '0.25', 'recorded' or 'recorded*0.5'"""
+    if not spec:
+        return None
+    spec = spec.strip().lower()
+    if spec.startswith("recorded"):
+        _, _, scale = spec.partition("*")
+        return ("recorded", float(scale) if scale else 1.0)
+    seconds = float(spec)
+    return seconds if seconds > 0 else None
+
+
+def request_key(method: str, url: str, body: Optional[Union[bytes, str]]) -> Tuple[str, str]:
+    """
+    Matching key of a request
+
+    Returns:
+        (url_key, body_key): hash of the method and normalized URL, and hash of the body
+    """
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in IGNORED_PARAMS)
+    normalized = f"{method.upper()} {parts.scheme}://{parts.netloc.lower()}{parts.path}?{urlencode(query)}"
+    url_key = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+    if body is None or body == b"" or body == "":
+        return url_key, "nobody"
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return url_key, hashlib.sha1(body).hexdigest()[:16]
+
+
+class FixtureStore:
+    """Fixture files of recorded exchanges, with per-key replay sequence counters"""
+
+    def __init__(self, fixtures_dir: str):
+        self.fixtures_dir = Path(fixtures_dir)
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, ...], int] = {}
+
+    def reset(self):
+        """Restart every replay / recording sequence from the first exchange"""
+        with self._lock:
+            self._counters.clear()
+
+    def _next(self, key: Tuple[str, ...]) -> int:
+        with self._lock:
+            index = self._counters.get(key, 0)
+            self._counters[key] = index + 1
+            return index
+
+    def _host_dir(self, url: str) -> Path:
+        return self.fixtures_dir / (urlsplit(url).hostname or "unknown")
+
+    def save(self, request: requests.PreparedRequest, response: requests.Response, elapsed: float) -> Path:
+        """Write one recorded exchange"""
+        url_key, body_key = request_key(request.method, request.url, request.body)
+        index = self._next(("record", url_key, body_key))
+        path = self._host_dir(request.url) / f"{url_key}-{body_key}-{index:03d}.json"
+
+        content_type = response.headers.get("Content-Type", "")
+        content = response.content or b""
+        fixture: Dict[str, Any] = {
+            "method": request.method,
+            "url": request.url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS},
+            "elapsed": round(elapsed, 4),
+            "recorded_at": datetime.now().isoformat(),
+        }
+        if content_type.startswith(TEXT_CONTENT_TYPES):
+            fixture["body_text"] = content.decode(response.encoding or "utf-8", errors="replace")
+            fixture["body_encoding"] = response.encoding or "utf-8"
+        else:
+            fixture["body_base64"] = base64.b64encode(content).decode("ascii")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(fixture, indent=1))
+        return path
+
+    def _sequence(self, host_dir: Path, pattern: str) -> List[Path]:
+        return sorted(host_dir.glob(pattern)) if host_dir.is_dir() else []
+
+    def load(self, request: requests.PreparedRequest) -> Optional[Dict[str, Any]]:
+        """Next recorded exchange for a request, or None if it was never recorded"""
+        url_key, body_key = request_key(request.method, request.url, request.body)
+        host_dir = self._host_dir(request.url)
+
+        sequence = self._sequence(host_dir, f"{url_key}-{body_key}-*.json")
+        key: Tuple[str, ...] = ("replay", url_key, body_key)
+        if not sequence:
+            # Same URL with a different body: replay the first recorded body's sequence
+            candidates = self._sequence(host_dir, f"{url_key}-*-*.json")
+            if not candidates:
+                return None
+            first_body = candidates[0].name.split("-")[1]
+            sequence = [path for path in candidates if path.name.split("-")[1] == first_body]
+            key = ("replay", url_key, "*")
+
+        index = min(self._next(key), len(sequence) - 1)
+        return json.loads(sequence[index].read_text())
+
+
+def build_response(fixture: Dict[str, Any], request: requests.PreparedRequest,
+                   adapter: HTTPAdapter, elapsed: float) -> requests.Response:
+    """Build a requests.Response from a fixture"""
+    response = requests.Response()
+    response.status_code = fixture["status"]
+    response.reason = fixture.get("reason") or ""
+    response.headers = CaseInsensitiveDict(fixture.get("headers") or {})
+    if "body_text" in fixture:
+        content = fixture["body_text"].encode(fixture.get("body_encoding") or "utf-8")
+    else:
+        content = base64.b64decode(fixture.get("body_base64") or "")
+    response._content = content
+    response.headers["Content-Length"] = str(len(content))
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = request.url
+    response.request = request
+    response.connection = adapter
+    response.elapsed = timedelta(seconds=elapsed)
+    return response
+
+
+class ReplayConfig:
+    """Active record / replay settings"""
+
+    def __init__(self, mode: str = "off", fixtures_dir: str = DEFAULT_FIXTURES_DIR, latency: Latency = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown replay mode '{mode}' (expected one of {', '.join(MODES)})")
+        self.mode = mode
+        self.store = FixtureStore(fixtures_dir)
+        self.latency = latency
+
+    @classmethod
+    def from_env(cls) -> "ReplayConfig":
+        return cls(
+            mode=os.getenv("UPSTREAM_REPLAY_MODE", "off").strip().lower() or "off",
+            fixtures_dir=DEFAULT_FIXTURES_DIR,
+            latency=parse_latency(os.getenv("UPSTREAM_REPLAY_LATENCY")),
+        )
+
+    def delay(self, fixture: Dict[str, Any]) -> float:
+        """Synthetic latency for a replayed exchange"""
+        if self.latency is None:
+            return 0.0
+        if isinstance(self.latency, tuple):
+            return float(fixture.get("elapsed") or 0.0) * self.latency[1]
+        return self.latency
+
+
+_config = ReplayConfig.from_env()
+_config_lock = threading.Lock()
+
+
+def get_config() -> ReplayConfig:
+    """Current record / replay settings"""
+    return _config
+
+
+def configure(mode: str = "off", fixtures_dir: Optional[str] = None,
+              latency: Latency = None) -> ReplayConfig:
+    """
+    Switch record / replay mode for every UpstreamSession in the process
+
+    Returns:
+        The previous settings (pass to restore() to switch back)
+    """
+    global _config
+    with _config_lock:
+        previous = _config
+        _config = ReplayConfig(mode, fixtures_dir or DEFAULT_FIXTURES_DIR, latency)
+    return previous
+
+
+def restore(config: ReplayConfig):
+    """Reinstate settings returned by configure()"""
+    global _config
+    with _config_lock:
+        _config = config
+
+
+@contextmanager
+def replay_mode(mode: str, fixtures_dir: Optional[str] = None, latency: Latency = None) -> Iterator[ReplayConfig]:
+    """Use a record / replay mode for the duration of the block"""
+    previous = configure(mode, fixtures_dir, latency)
+    try:
+        yield get_config()
+    finally:
+        restore(previous)
+
+
+class ReplayAdapter(HTTPAdapter):
+    """HTTPAdapter that records or replays exchanges according to the active ReplayConfig"""
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, timeout=None,
+             verify=True, cert=None, proxies=None) -> requests.Response:
+        config = _config
+        if config.mode == "replay":
+            fixture = config.store.load(request)
+            if fixture is None:
+                raise requests.ConnectionError(
+                    f"No recorded fixture for {request.method} {request.url}", request=request
+                )
+            delay = config.delay(fixture)
+            if delay:
+                time.sleep(delay)
+            return build_response(fixture, request, self, delay)
+
+        started = time.perf_counter()
+        response = super().send(request, stream=stream, timeout=timeout, verify=verify,
+                                cert=cert, proxies=proxies)
+        if config.mode == "record":
+            response.content  # read the body so it can be stored (and reused by the caller)
+            config.store.save(request, response, time.perf_counter() - started)
+        return response
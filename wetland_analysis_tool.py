@@ -33,6 +33,8 @@ from langchain_core.tools import tool
 from query_wetland_location import WetlandLocationAnalyzer, save_results_to_file
 from generate_wetland_map_pdf_v3 import WetlandMapGeneratorV3
 from output_directory_manager import get_output_manager
+from progressive_maps import deliver_map, web_map_preview, PREVIEW_DPI, PREVIEW_WIDTH_PX, PREVIEW_HEIGHT_PX
+from screening_tracing import span
 
 # Remove the old output directory creation
 # os.makedirs('output', exist_ok=True)
@@ -111,7 +113,8 @@ def analyze_wetland_location_with_map(longitude: float, latitude: float, locatio
         
         # Step 1: Perform wetland data analysis
         print(f"🔍 Step 1: Analyzing wetland data...")
-        wetland_results = analyzer.analyze_location(longitude, latitude, location_name)
+        with span("query wetland data", kind="step"):
+            wetland_results = analyzer.analyze_location(longitude, latitude, location_name)
         
         # Save detailed results to project logs directory
         logs_dir = output_manager.get_subdirectory("logs")
@@ -347,37 +350,55 @@ def _generate_adaptive_map(longitude: float, latitude: float, location_name: str
         safe_name = location_name.replace(' ', '_').replace(',', '').replace('(', '').replace(')', '')
         map_filename = os.path.join(maps_dir, f"wetland_map_{safe_name}_{timestamp}.pdf")
         
-        # Generate the map with adaptive configuration
-        map_path = map_generator.generate_wetland_map_pdf(
-            longitude=longitude,
-            latitude=latitude,
-            location_name=f"{location_name} - Adaptive Analysis Map",
-            buffer_miles=buffer_miles,
-            base_map=base_map,
-            dpi=300,
-            output_size=(1224, 792),
-            include_legend=True,
-            wetland_transparency=wetland_transparency,
-            output_filename=os.path.basename(map_filename)
-        )
+        def render_final() -> Optional[str]:
+            # Print-quality map; runs on a background worker while the preview is shown
+            with span("wetland map", kind="step", buffer_miles=buffer_miles, base_map=base_map):
+                map_path = map_generator.generate_wetland_map_pdf(
+                    longitude=longitude,
+                    latitude=latitude,
+                    location_name=f"{location_name} - Adaptive Analysis Map",
+                    buffer_miles=buffer_miles,
+                    base_map=base_map,
+                    dpi=300,
+                    output_size=(1224, 792),
+                    include_legend=True,
+                    wetland_transparency=wetland_transparency,
+                    output_filename=os.path.basename(map_filename)
+                )
+            
+            # Move the generated map to the correct location if needed
+            if map_path and map_path != map_filename:
+                import shutil
+                try:
+                    shutil.move(map_path, map_filename)
+                    map_path = map_filename
+                except:
+                    # If move fails, keep original path
+                    pass
+            return map_path
+        
+        def render_preview(path: str):
+            # Same extent and layers as the print request, exported at preview DPI
+            web_map_json = map_generator._create_web_map_json(
+                longitude, latitude, f"{location_name} - Adaptive Analysis Map", buffer_miles,
+                base_map, PREVIEW_DPI, (PREVIEW_WIDTH_PX, PREVIEW_HEIGHT_PX), True, wetland_transparency
+            )
+            web_map_preview(web_map_json, path, site=[(longitude, latitude)])
         
-        # Move the generated map to the correct location if needed
-        if map_path and map_path != map_filename:
-            import shutil
-            try:
-                shutil.move(map_path, map_filename)
-                map_path = map_filename
-            except:
-                # If move fails, keep original path
-                pass
+        # Preview now, print-quality PDF in the background (inline when progressive maps are off)
+        delivery = deliver_map(output_manager.current_project_dir, "wetlands", render_final, render_preview)
+        map_path = delivery["path"]
         
         if map_path:
             coverage_area = round(math.pi * (buffer_miles ** 2), 2)
             
             return {
                 "success": True,
-                "message": "Adaptive wetland map successfully generated",
+                "message": ("Adaptive wetland map successfully generated" if delivery["status"] == "final"
+                            else "Wetland map preview ready; the print-quality map is rendering"),
                 "filename": map_path,
+                "status": delivery["status"],
+                "preview": delivery.get("preview"),
                 "adaptive_settings": {
                     "buffer_miles": buffer_miles,
                     "base_map": base_map,